@@ -49,3 +49,27 @@ class Connector(abc.ABC):
       An iterator over binary chunks that the server responded with.
     """
     raise NotImplementedError()
+
+  def SendItemsStreamingRequest(
+      self,
+      handler_name: str,
+      args: message.Message,
+  ) -> utils.ItemsIterator[message.Message]:
+    """Sends a request to the GRR server and streams result items back.
+
+    Unlike paging through results with `SendRequest`, items are fetched with
+    a single request and are returned as soon as they are received.
+
+    Args:
+      handler_name: A handler to which the request should be delivered to.
+      args: Arguments of the request to pass to the handler.
+
+    Returns:
+      An iterator over items of the result that the server responded with,
+      with the total count of items sent upfront by the server.
+
+    Raises:
+      NotImplementedError: If the connector or the handler on the server side
+        do not support streaming result items.
+    """
+    raise NotImplementedError()
@@ -2,6 +2,7 @@
 """HTTP API connector implementation."""
 
 import contextlib
+import itertools
 import json
 import logging
 import re
@@ -119,6 +120,9 @@ class HttpConnector(abstract.Connector):
   DEFAULT_PAGE_SIZE = 50
   DEFAULT_BINARY_CHUNK_SIZE = 66560
 
+  STREAM_ITEMS_PARAM = "stream_items"
+  STREAM_ITEMS_HEADER = "X-GRR-Stream-Items"
+
   def __init__(
       self,
       api_endpoint: str,
@@ -463,6 +467,71 @@ class HttpConnector(abstract.Connector):
 
     return utils.BinaryChunkIterator(chunks=GenerateChunks())
 
+  def SendItemsStreamingRequest(
+      self,
+      handler_name: str,
+      args: message.Message,
+  ) -> utils.ItemsIterator[message.Message]:
+    self._InitializeIfNeeded()
+    method_descriptor = self.api_methods[handler_name]
+
+    result_type_url = method_descriptor.result_type_descriptor.default.type_url
+    result_descriptor = utils.TypeUrlToMessage(result_type_url).DESCRIPTOR
+    item_descriptor = result_descriptor.fields_by_name["items"].message_type
+    item_cls = symbol_database.Default().GetSymbol(item_descriptor.full_name)
+
+    request = self.BuildRequest(method_descriptor.name, args)
+    request.params[self.STREAM_ITEMS_PARAM] = "1"
+    prepped_request = request.prepare()
+
+    session = requests.Session()
+    session.trust_env = self.trust_env
+    options = session.merge_environment_settings(prepped_request.url,
+                                                 self.proxies or {}, None,
+                                                 self.verify, self.cert)
+    options["stream"] = True
+    response = session.send(prepped_request, **options)
+    self._CheckResponseStatus(response)
+
+    if not response.headers.get(self.STREAM_ITEMS_HEADER):
+      response.close()
+      session.close()
+      raise NotImplementedError(
+          f"Streaming items is not supported for '{handler_name}'.")
+
+    # Every item is sent in a separate line, after the XSSI protection prefix
+    # and the line opening the items list, which also holds the total count of
+    # items (see the server-side
+    # `HttpRequestHandler._BuildItemsStreamingResponse`).
+    lines = response.iter_lines(self.DEFAULT_BINARY_CHUNK_SIZE)
+    try:
+      header = next(itertools.islice(lines, 1, None))
+      total_count = json.loads(header + b"]}").get("total_count", 0)
+    except (StopIteration, ValueError) as e:
+      response.close()
+      session.close()
+      raise errors.UnknownError(
+          f"Malformed streamed items of '{handler_name}'.") from e
+
+    def GenerateItems() -> Iterator[message.Message]:
+      with contextlib.closing(session):  # pytype: disable=wrong-arg-types
+        with contextlib.closing(response):
+          for line in lines:
+            if not line:
+              continue
+            if line == b"]}":
+              return
+
+            item = item_cls()
+            json_format.Parse(
+                line.lstrip(b","), item, ignore_unknown_fields=True)
+            yield item
+
+      raise errors.UnknownError(
+          f"Streaming items of '{handler_name}' ended prematurely.")
+
+    return utils.ItemsIterator(items=GenerateItems(), total_count=total_count)
+
   def _ValidateVersion(self):
     """Validates that the API client is compatible the GRR server.
 
@@ -95,6 +95,29 @@ class GrrApiContext(object):
 
       return utils.ItemsIterator(items=all_items, total_count=total_count)
 
+  def SendItemsStreamingRequest(
+      self,
+      handler_name: str,
+      args: Any,
+  ) -> utils.ItemsIterator:
+    """Sends an iterator request with result items streamed back.
+
+    Items are streamed from the server with a single request if the connector
+    and the handler support it, otherwise results are paged through as with
+    `SendIteratorRequest`.
+
+    Args:
+      handler_name: A handler to which the request should be delivered to.
+      args: Arguments of the request to pass to the handler.
+
+    Returns:
+      An iterator over result items.
+    """
+    try:
+      return self.connector.SendItemsStreamingRequest(handler_name, args)
+    except NotImplementedError:
+      return self.SendIteratorRequest(handler_name, args)
+
   def SendStreamingRequest(
       self,
       handler_name: str,
@@ -77,7 +77,7 @@ class FlowBase(object):
   def ListResults(self) -> utils.ItemsIterator[FlowResult]:
     args = flow_pb2.ApiListFlowResultsArgs(
         client_id=self.client_id, flow_id=self.flow_id)
-    items = self._context.SendIteratorRequest("ListFlowResults", args)
+    items = self._context.SendItemsStreamingRequest("ListFlowResults", args)
     return utils.MapItemsIterator(lambda data: FlowResult(data=data), items)
 
   def ListParsedResults(self) -> utils.ItemsIterator[FlowResult]:
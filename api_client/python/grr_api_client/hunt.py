@@ -290,15 +290,35 @@ class HuntBase(object):
 
     return Hunt(data=data, context=self._context)
 
-  def ListResults(self) -> utils.ItemsIterator[HuntResult]:
-    args = hunt_pb2.ApiListHuntResultsArgs(hunt_id=self.hunt_id)
-    items = self._context.SendIteratorRequest("ListHuntResults", args)
+  def ListResults(
+      self,
+      with_type: Optional[str] = None,
+      with_tag: Optional[str] = None,
+      fields: Optional[Sequence[str]] = None,
+  ) -> utils.ItemsIterator[HuntResult]:
+    """Lists results of the hunt, filtered and projected on the server side.
+
+    Args:
+      with_type: If set, only results with payloads of this type (e.g.
+        "StatEntry") are returned.
+      with_tag: If set, only results with this tag are returned.
+      fields: If set, only these fields (e.g. "pathspec.path") of the payloads
+        are returned. Requires with_type to be set.
+
+    Returns:
+      An iterator over hunt results.
+    """
+    args = hunt_pb2.ApiListHuntResultsArgs(
+        hunt_id=self.hunt_id, with_type=with_type, with_tag=with_tag)
+    if fields:
+      args.fields = ",".join(fields)
+    items = self._context.SendItemsStreamingRequest("ListHuntResults", args)
     return utils.MapItemsIterator(
         lambda data: HuntResult(data=data, context=self._context), items)
 
   def ListLogs(self) -> utils.ItemsIterator[HuntLog]:
     args = hunt_pb2.ApiListHuntLogsArgs(hunt_id=self.hunt_id)
-    items = self._context.SendIteratorRequest("ListHuntLogs", args)
+    items = self._context.SendItemsStreamingRequest("ListHuntLogs", args)
     return utils.MapItemsIterator(
         lambda data: HuntLog(data=data, context=self._context), items)
 
@@ -325,7 +345,7 @@ class HuntBase(object):
   ) -> utils.ItemsIterator[HuntClient]:
     args = hunt_pb2.ApiListHuntClientsArgs(
         hunt_id=self.hunt_id, client_status=client_status)
-    items = self._context.SendIteratorRequest("ListHuntClients", args)
+    items = self._context.SendItemsStreamingRequest("ListHuntClients", args)
     return utils.MapItemsIterator(
         lambda data: HuntClient(data=data, context=self._context), items)
 
@@ -206,7 +206,18 @@ class ArtifactCollector(actions.ActionPlugin):
     """Find files fulfilling regex conditions."""
     attributes = source.base_source.attributes
     paths = self._InterpolateMany(attributes["paths"])
-    regex = utils.RegexListDisjunction(attributes["content_regex_list"])
+
+    # `content_regex_list` elements can be both binary and unicode strings, but
+    # only the latter can be interpolated.
+    content_regex_list = []
+    for content_regex in attributes["content_regex_list"]:
+      if isinstance(content_regex, bytes):
+        content_regex = content_regex.decode("utf-8")
+      content_regex_list.append(content_regex)
+
+    content_regex_list = self._InterpolateMany(content_regex_list)
+    regex = utils.RegexListDisjunction(
+        [content_regex.encode("utf-8") for content_regex in content_regex_list])
     condition = rdf_file_finder.FileFinderCondition.ContentsRegexMatch(
         regex=regex, mode="ALL_HITS")
     file_finder_action = rdf_file_finder.FileFinderAction.Stat()
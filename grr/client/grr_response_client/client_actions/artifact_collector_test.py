@@ -302,6 +302,29 @@ class ArtifactCollectorTest(client_test_lib.EmptyActionTest):
     self.assertIsInstance(result, rdf_client_fs.StatEntry)
     self.assertEndsWith(result.pathspec.path, "auth.log")
 
+  def testGrepArtifactInterpolatesRegexes(self):
+    """Test the source type `GREP` with knowledge base values in regexes."""
+
+    paths = [
+        os.path.join(self.base_path, "searching", "dpkg.log"),
+        os.path.join(self.base_path, "searching", "auth.log")
+    ]
+    content_regex_list = [r"%%fqdn%%"]
+    source = rdf_artifact.ArtifactSource(
+        type=self.source_type.GREP,
+        attributes={
+            "paths": paths,
+            "content_regex_list": content_regex_list
+        })
+    knowledge_base = rdf_client.KnowledgeBase(fqdn="mydomain.com")
+    request = GetRequest(source, "TestGrep", knowledge_base)
+
+    collected_artifact = self.RunArtifactCollector(request)
+    self.assertLen(collected_artifact.action_results, 1)
+    result = collected_artifact.action_results[0].value
+    self.assertIsInstance(result, rdf_client_fs.StatEntry)
+    self.assertEndsWith(result.pathspec.path, "auth.log")
+
   @artifact_test_lib.PatchCleanArtifactRegistry
   def testMultipleArtifacts(self, registry):
     """Test collecting multiple artifacts."""
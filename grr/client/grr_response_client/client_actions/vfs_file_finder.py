@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 """The file finder client action."""
 
+import contextlib
 from typing import Callable, Text, Iterator
 
 from grr_response_client import actions
@@ -9,11 +10,17 @@ from grr_response_client import vfs
 from grr_response_client.client_actions.file_finder_utils import conditions
 from grr_response_client.client_actions.file_finder_utils import globbing
 from grr_response_client.client_actions.file_finder_utils import vfs_subactions
+from grr_response_client.unprivileged.filesystem import vfs as unprivileged_vfs
 from grr_response_core.lib.rdfvalues import file_finder as rdf_file_finder
 from grr_response_core.lib.rdfvalues import paths as rdf_paths
+from grr_response_core.lib.util import collection
 from grr_response_core.lib.util import filesystem
 
 
+# Maximum number of files kept open at once to be stat-ed together.
+STAT_BATCH_SIZE = 64
+
+
 def _NoOp():
   """Does nothing. This function is to be used as default heartbeat callback."""
 
@@ -31,29 +38,45 @@ class VfsFileFinder(actions.ActionPlugin):
     metadata_conditions = list(
         conditions.MetadataCondition.Parse(args.conditions))
 
-    for path in _GetExpandedPaths(args, heartbeat_cb=self.Progress):
-      self.Progress()
-      pathspec = rdf_paths.PathSpec(path=path, pathtype=args.pathtype)
-      if args.HasField("implementation_type"):
-        pathspec.implementation_type = args.implementation_type
-
-      with vfs.VFSOpen(pathspec) as vfs_file:
-        stat_entry = vfs_file.Stat()
-
-        # Conversion from StatEntry to os.stat_result is lossy. Some checks do
-        # not work (e.g. extended attributes).
-        stat_obj = client_utils.StatResultFromStatEntry(stat_entry)
-        fs_stat = filesystem.Stat(path=path, stat_obj=stat_obj)
-        if not all(cond.Check(fs_stat) for cond in metadata_conditions):
-          continue
-
-        matches = _CheckConditionsShortCircuit(content_conditions, pathspec)
-        if content_conditions and not matches:
-          continue  # Skip if any condition yielded no matches.
-
-        result = action(stat_entry=stat_entry, fd=vfs_file)
-        result.matches = matches
-        self.SendReply(result)
+    expanded_paths = _GetExpandedPaths(args, heartbeat_cb=self.Progress)
+    for paths in collection.Batch(expanded_paths, STAT_BATCH_SIZE):
+      with contextlib.ExitStack() as stack:
+        pathspecs = []
+        vfs_files = []
+        for path in paths:
+          self.Progress()
+          pathspec = rdf_paths.PathSpec(path=path, pathtype=args.pathtype)
+          if args.HasField("implementation_type"):
+            pathspec.implementation_type = args.implementation_type
+          pathspecs.append(pathspec)
+          vfs_files.append(stack.enter_context(vfs.VFSOpen(pathspec)))
+
+        # Files opened in a sandbox are stat-ed in a single round trip.
+        unprivileged_vfs.PrefetchStats(vfs_files)
+
+        for path, pathspec, vfs_file in zip(paths, pathspecs, vfs_files):
+          self._ProcessFile(action, content_conditions, metadata_conditions,
+                            path, pathspec, vfs_file)
+
+  def _ProcessFile(self, action, content_conditions, metadata_conditions,
+                   path, pathspec, vfs_file):
+    """Checks conditions of an opened file and runs the action on it."""
+    stat_entry = vfs_file.Stat()
+
+    # Conversion from StatEntry to os.stat_result is lossy. Some checks do not
+    # work (e.g. extended attributes).
+    stat_obj = client_utils.StatResultFromStatEntry(stat_entry)
+    fs_stat = filesystem.Stat(path=path, stat_obj=stat_obj)
+    if not all(cond.Check(fs_stat) for cond in metadata_conditions):
+      return
+
+    matches = _CheckConditionsShortCircuit(content_conditions, pathspec)
+    if content_conditions and not matches:
+      return  # Skip if any condition yielded no matches.
+
+    result = action(stat_entry=stat_entry, fd=vfs_file)
+    result.matches = matches
+    self.SendReply(result)
 
   def _ParseAction(
       self, args: rdf_file_finder.FileFinderArgs) -> vfs_subactions.Action:
@@ -17,6 +17,7 @@ from grr_response_client import client_utils
 from grr_response_client import vfs
 from grr_response_client.client_actions import vfs_file_finder
 from grr_response_client.client_actions.file_finder_utils import globbing
+from grr_response_client.unprivileged.filesystem import client as fs_client
 from grr_response_client.vfs_handlers import files
 
 from grr_response_core import config
@@ -551,6 +552,35 @@ class NtfsImageTestBase(absltest.TestCase):
 
     files.FlushHandleCache()
 
+  def testStatsSandboxedFilesInOneRoundTrip(self) -> None:
+    sandbox = rdf_paths.PathSpec.ImplementationType.SANDBOX
+    multi_stat = mock.MagicMock(wraps=fs_client.Client.MultiStat)
+
+    def MultiStat(client_obj, files_to_stat):
+      return multi_stat(client_obj, files_to_stat)
+
+    with contextlib.ExitStack() as stack:
+      stack.enter_context(
+          mock.patch.object(fs_client.Client, "MultiStat", MultiStat))
+      stack.enter_context(
+          mock.patch.object(
+              client_utils, "GetRawDevice", new=self._MockGetRawDevice))
+      results = _RunFileFinder(
+          rdf_file_finder.FileFinderArgs(
+              paths=[self._paths_expr],
+              pathtype=self.pathtype,
+              implementation_type=sandbox,
+              action=rdf_file_finder.FileFinderAction.Stat()))
+
+    multi_stat.assert_called_once()
+    self.assertLen(multi_stat.call_args[0][1], len(results))
+    stat_entries = {
+        result.stat_entry.pathspec.nested_path.path: result.stat_entry
+        for result in results
+    }
+    self.assertEqual(stat_entries["/numbers.txt"].st_size, 3893)
+    files.FlushHandleCache()
+
 
 class NtfsTest(NtfsImageTestBase):
   pathtype = rdf_paths.PathSpec.PathType.NTFS
@@ -23,6 +23,7 @@ from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
+from grr_response_core.lib.util import cache
 
 
 class GRRClientWorker(threading.Thread):
@@ -71,7 +72,7 @@ class GRRClientWorker(threading.Thread):
 
     # This queue should never hit its maximum since the server will throttle
     # messages before this.
-    self._in_queue = utils.HeartbeatQueue(callback=heart_beat_cb, maxsize=1024)
+    self._in_queue = utils.HeartbeatQueue(callback=self._OnIdle, maxsize=1024)
 
     if out_queue is not None:
       self._out_queue = out_queue
@@ -127,6 +128,13 @@ class GRRClientWorker(threading.Thread):
     if self.heart_beat_cb:
       self.heart_beat_cb()
 
+  def _OnIdle(self):
+    """Called periodically while the worker waits for messages."""
+    self.heart_beat_cb()
+    # Caches holding resources (e.g. open files) aren't used while the client
+    # is idle, so their expired entries are removed here.
+    cache.SweepExpiredCaches()
+
   def StartStatsCollector(self):
     if not GRRClientWorker.stats_collector:
       GRRClientWorker.stats_collector = client_stats.ClientStatsCollector(self)
@@ -7,6 +7,7 @@ from absl import app
 
 from grr_response_client import comms
 from grr_response_core.lib import rdfvalue
+from grr_response_core.lib.util import cache
 from grr.test_lib import test_lib
 
 
@@ -31,6 +32,19 @@ class GRRClientWorkerTest(test_lib.GRRBaseTest):
     self.assertIsInstance(messages[0].payload, rdfvalue.RDFDatetime)
     self.assertEqual(messages[0].payload, rdfvalue.RDFDatetime(0))
 
+  def testSweepsExpiredCachesWhileIdle(self):
+    in_queue = self.client_worker._in_queue  # pylint: disable=protected-access
+
+    # Ends the wait once caches are swept.
+    def SweepExpiredCaches():
+      in_queue.put(None)
+
+    with mock.patch.object(cache, "SweepExpiredCaches",
+                           side_effect=SweepExpiredCaches) as sweep:
+      self.assertIsNone(in_queue.get(poll_interval=0.01))
+
+    sweep.assert_called_once()
+
 
 def main(argv):
   test_lib.main(argv)
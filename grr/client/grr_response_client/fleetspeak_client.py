@@ -221,18 +221,25 @@ class GRRFleetspeakClient(object):
       raise BrokenFSConnectionError() from e
 
     received_type = fs_msg.data.TypeName()
-    if not received_type.endswith("GrrMessage"):
+    if received_type.endswith("GrrMessage"):
+      grr_msgs = [rdf_flows.GrrMessage.FromSerializedBytes(fs_msg.data.value)]
+    elif received_type.endswith(".MessageList"):
+      # The server batches messages sent to the client in a single flow step.
+      message_list = rdf_flows.MessageList.FromSerializedBytes(
+          fs_msg.data.value)
+      grr_msgs = list(message_list.job)
+    else:
       raise ValueError(
           "Unexpected proto type received through Fleetspeak: %r; expected "
-          "grr.GrrMessage." % received_type)
+          "grr.GrrMessage or grr.MessageList." % received_type)
 
     client_metrics.GRR_CLIENT_RECEIVED_BYTES.Increment(received_bytes)
 
-    grr_msg = rdf_flows.GrrMessage.FromSerializedBytes(fs_msg.data.value)
-    # Authentication is ensured by Fleetspeak.
-    grr_msg.auth_state = jobs_pb2.GrrMessage.AUTHENTICATED
+    for grr_msg in grr_msgs:
+      # Authentication is ensured by Fleetspeak.
+      grr_msg.auth_state = jobs_pb2.GrrMessage.AUTHENTICATED
 
-    self._threads["Worker"].QueueMessages([grr_msg])
+    self._threads["Worker"].QueueMessages(grr_msgs)
 
 
 class _FleetspeakQueueForwarder(object):
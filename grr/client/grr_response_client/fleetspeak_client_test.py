@@ -101,6 +101,34 @@ class FleetspeakClientTest(absltest.TestCase):
     self.assertListEqual(list(message_list.job), grr_messages)
     self.assertEqual(fs_message.annotations, expected_annotations)
 
+  @mock.patch.object(fs_client, "FleetspeakConnection")
+  @mock.patch.object(comms, "GRRClientWorker")
+  def testReceiveMessageList(self, mock_worker_class, mock_conn_class):
+    grr_messages = [
+        rdf_flows.GrrMessage(
+            session_id="C.0123456789abcdef/01234567",
+            name="TestClientAction",
+            request_id=i) for i in range(1, 3)
+    ]
+    fs_message = fs_common_pb2.Message(message_type="MessageList")
+    fs_message.data.Pack(
+        rdf_flows.MessageList(job=grr_messages).AsPrimitiveProto())
+
+    mock_conn = mock.Mock()
+    mock_conn.Recv.return_value = (fs_message, 123)
+    mock_conn_class.return_value = mock_conn
+
+    client = fleetspeak_client.GRRFleetspeakClient()
+    client._ReceiveOp()
+
+    mock_worker = mock_worker_class.return_value
+    mock_worker.QueueMessages.assert_called_once()
+    queued = mock_worker.QueueMessages.call_args[0][0]
+    self.assertEqual([m.request_id for m in queued], [1, 2])
+    for m in queued:
+      self.assertEqual(m.auth_state, rdf_flows.GrrMessage.AuthorizationState
+                       .AUTHENTICATED)
+
   @mock.patch.object(fs_client, "FleetspeakConnection")
   @mock.patch.object(comms, "GRRClientWorker")
   def testBrokenFSConnection(self, mock_worker_class, mock_con_class):
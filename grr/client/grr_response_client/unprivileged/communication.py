@@ -4,11 +4,13 @@
 import abc
 import contextlib
 import enum
+import logging
+import mmap
 import os
 import platform
 import struct
 import subprocess
-from typing import NamedTuple, Callable, Optional, List, BinaryIO, Set
+from typing import NamedTuple, Callable, Optional, List, BinaryIO, Set, Tuple
 import psutil
 
 from grr_response_client.unprivileged import sandbox
@@ -44,6 +46,110 @@ class Message(NamedTuple):
 
 _HEADER_STRUCT = struct.Struct("<LL")
 
+# Attachment length in the header, signaling that the attachment is passed in
+# shared memory. The header is followed by a _SHARED_MEMORY_STRUCT then.
+_SHARED_MEMORY_ATTACHMENT = 0xFFFFFFFF
+
+# Position, size and end of an attachment passed in shared memory.
+_SHARED_MEMORY_STRUCT = struct.Struct("<QQQ")
+
+# Attachments smaller than this are always sent using the transport.
+MIN_SHARED_MEMORY_ATTACHMENT_SIZE = 64 * 1024
+
+
+class SharedMemoryBuffer:
+  """A ring buffer in shared memory used to pass attachments.
+
+  A buffer is written by one process and read by another one. The writer
+  copies an attachment into the buffer and only sends its position over the
+  transport. The reader copies the attachment out and records in the header
+  of the buffer how much of the buffer has been consumed, so that the writer
+  can reuse the space.
+
+  If an attachment doesn't fit into the free space of the buffer, `Write`
+  returns None and the attachment has to be sent using the transport.
+  """
+
+  # The header contains the total number of bytes consumed by the reader.
+  _HEADER_STRUCT = struct.Struct("<Q")
+  _HEADER_SIZE = 64
+
+  def __init__(self, file_descriptor: int):
+    """Constructor.
+
+    Args:
+      file_descriptor: File descriptor of the shared memory, as returned by
+        `Create`. The buffer takes ownership of the file descriptor.
+    """
+    self._file_descriptor = file_descriptor
+    self._mmap = mmap.mmap(file_descriptor, os.fstat(file_descriptor).st_size)
+    self._capacity = len(self._mmap) - self._HEADER_SIZE
+    # Total number of bytes written, including padding. Used by the writer.
+    self._written = 0
+
+  @classmethod
+  def IsSupported(cls) -> bool:
+    return hasattr(os, "memfd_create")
+
+  @classmethod
+  def Create(cls, size: int) -> "SharedMemoryBuffer":
+    """Creates a buffer of a given size in anonymous shared memory."""
+    # pytype: disable=module-attr
+    file_descriptor = os.memfd_create("grr_unprivileged_buffer")
+    # pytype: enable=module-attr
+    try:
+      os.ftruncate(file_descriptor, cls._HEADER_SIZE + size)
+      return cls(file_descriptor)
+    except:
+      os.close(file_descriptor)
+      raise
+
+  @property
+  def file_descriptor(self) -> int:
+    return self._file_descriptor
+
+  def Close(self) -> None:
+    self._mmap.close()
+    os.close(self._file_descriptor)
+
+  def Write(self, data: bytes) -> Optional[Tuple[int, int]]:
+    """Writes data into the buffer.
+
+    Args:
+      data: The data to write.
+
+    Returns:
+      A (position, end) tuple to be passed to `Read` by the reader or None, if
+      the data doesn't fit into the free space of the buffer.
+    """
+    size = len(data)
+    position = self._written % self._capacity
+    # Data is written contiguously. If it doesn't fit at the end of the buffer,
+    # it's written at the start and the end of the buffer is skipped.
+    if position + size > self._capacity:
+      end = self._written + self._capacity - position + size
+      position = 0
+    else:
+      end = self._written + size
+
+    (consumed,) = self._HEADER_STRUCT.unpack_from(self._mmap, 0)
+    if end - consumed > self._capacity:
+      return None
+
+    offset = self._HEADER_SIZE + position
+    self._mmap[offset:offset + size] = data
+    self._written = end
+    return position, end
+
+  def Read(self, position: int, size: int, end: int) -> bytes:
+    """Reads data written by `Write` and marks the space as free."""
+    if position + size > self._capacity:
+      raise Error(f"Invalid shared memory range: {position}, {size}.")
+    offset = self._HEADER_SIZE + position
+    data = self._mmap[offset:offset + size]
+    self._HEADER_STRUCT.pack_into(self._mmap, 0, end)
+    return data
+
 
 class Connection:
   """Connection between a client and a server.
@@ -53,29 +159,61 @@ class Connection:
   * is bi-directional.
   * makes it possible to send a message (bytes) and an attachment (bytes)
   * is implemented on top of a low-level `Transport`
+  * optionally passes large attachments in shared memory.
   """
 
-  def __init__(self, transport: Transport):
+  def __init__(self,
+               transport: Transport,
+               send_buffer: Optional[SharedMemoryBuffer] = None,
+               recv_buffer: Optional[SharedMemoryBuffer] = None):
+    """Constructor.
+
+    Args:
+      transport: The transport used to send messages.
+      send_buffer: If set, shared memory used to send large attachments.
+      recv_buffer: If set, shared memory used to receive large attachments.
+    """
     self._transport = transport
+    self._send_buffer = send_buffer
+    self._recv_buffer = recv_buffer
 
   def Send(self, message: Message) -> None:
     """Sends a data message and an attachment."""
-    header = _HEADER_STRUCT.pack(len(message.data), len(message.attachment))
+    placement = None
+    if (self._send_buffer is not None and
+        len(message.attachment) >= MIN_SHARED_MEMORY_ATTACHMENT_SIZE):
+      placement = self._send_buffer.Write(message.attachment)
+
+    if placement is None:
+      header = _HEADER_STRUCT.pack(len(message.data), len(message.attachment))
+    else:
+      position, end = placement
+      header = _HEADER_STRUCT.pack(
+          len(message.data), _SHARED_MEMORY_ATTACHMENT
+      ) + _SHARED_MEMORY_STRUCT.pack(position, len(message.attachment), end)
     self._transport.SendBytes(header)
     if message.data:
       self._transport.SendBytes(message.data)
-    if message.attachment:
+    if message.attachment and placement is None:
       self._transport.SendBytes(message.attachment)
 
   def Recv(self) -> Message:
     """Receives a data message and an attachment."""
     header = self._transport.RecvBytes(_HEADER_STRUCT.size)
     data_len, attachment_len = _HEADER_STRUCT.unpack(header)
+    if attachment_len == _SHARED_MEMORY_ATTACHMENT:
+      if self._recv_buffer is None:
+        raise Error("Received an attachment in shared memory, but the "
+                    "connection has no shared memory.")
+      position, size, end = _SHARED_MEMORY_STRUCT.unpack(
+          self._transport.RecvBytes(_SHARED_MEMORY_STRUCT.size))
     if data_len > 0:
       data = self._transport.RecvBytes(data_len)
     else:
       data = b""
-    if attachment_len > 0:
+    if attachment_len == _SHARED_MEMORY_ATTACHMENT:
+      attachment = self._recv_buffer.Read(position, size, end)
+    elif attachment_len > 0:
       attachment = self._transport.RecvBytes(attachment_len)
     else:
       attachment = b""
@@ -242,12 +380,26 @@ class Channel(NamedTuple):
   This is a file descriptor on UNIX, a handle on Windows.
   """
 
+  shared_memory_input: Optional[FileDescriptor] = None
+  """Optional shared memory used for input attachments (client to server)."""
+
+  shared_memory_output: Optional[FileDescriptor] = None
+  """Optional shared memory used for output attachments (server to client)."""
+
   @classmethod
-  def FromSerialized(cls, pipe_input: int, pipe_output: int) -> "Channel":
+  def FromSerialized(cls,
+                     pipe_input: int,
+                     pipe_output: int,
+                     shared_memory_input: Optional[int] = None,
+                     shared_memory_output: Optional[int] = None) -> "Channel":
     """Creates a channel from serialized pipe file descriptors."""
     return Channel(
         FileDescriptor.FromSerialized(pipe_input, Mode.READ),
-        FileDescriptor.FromSerialized(pipe_output, Mode.WRITE))
+        FileDescriptor.FromSerialized(pipe_output, Mode.WRITE),
+        None if shared_memory_input is None else
+        FileDescriptor.FromSerialized(shared_memory_input, Mode.READ),
+        None if shared_memory_output is None else
+        FileDescriptor.FromSerialized(shared_memory_output, Mode.WRITE))
 
 
 ArgsFactory = Callable[[Channel], List[str]]
@@ -267,13 +419,17 @@ class SubprocessServer(Server):
 
   def __init__(self,
                args_factory: ArgsFactory,
-               extra_file_descriptors: Optional[List[FileDescriptor]] = None):
+               extra_file_descriptors: Optional[List[FileDescriptor]] = None,
+               shared_memory_size: int = 0):
     """Constructor.
 
     Args:
       args_factory: Function which takes a channel and returns the args to run
         the server subprocess (as required by subprocess.Popen).
       extra_file_descriptors: Extra file desctiptors to map to the subprocess.
+      shared_memory_size: Size of the shared memory buffers used to pass large
+        attachments, in each direction. If 0 or shared memory is not supported
+        on the platform, all attachments are passed through the pipes.
     """
     self._args_factory = args_factory
     self._process: Optional[subprocess.Popen] = None
@@ -284,6 +440,9 @@ class SubprocessServer(Server):
     if extra_file_descriptors is None:
       extra_file_descriptors = []
     self._extra_file_descriptors = extra_file_descriptors
+    self._shared_memory_size = shared_memory_size
+    self._shared_memory_input: Optional[SharedMemoryBuffer] = None
+    self._shared_memory_output: Optional[SharedMemoryBuffer] = None
 
   def Start(self) -> None:
     with contextlib.ExitStack() as stack:
@@ -309,11 +468,24 @@ class SubprocessServer(Server):
             args, [input_r_fd_obj.ToHandle(),
                    output_w_fd_obj.ToHandle()] + extra_handles)
       else:
-        args = self._args_factory(
-            Channel(pipe_input=input_r_fd_obj, pipe_output=output_w_fd_obj))
+        channel = Channel(
+            pipe_input=input_r_fd_obj, pipe_output=output_w_fd_obj)
+        if self._shared_memory_size > 0 and SharedMemoryBuffer.IsSupported():
+          self._CreateSharedMemory()
+        if self._shared_memory_output is not None:
+          channel = channel._replace(
+              shared_memory_input=FileDescriptor.FromFileDescriptor(
+                  self._shared_memory_input.file_descriptor),
+              shared_memory_output=FileDescriptor.FromFileDescriptor(
+                  self._shared_memory_output.file_descriptor))
+        args = self._args_factory(channel)
         extra_fds = [
             fd.ToFileDescriptor() for fd in self._extra_file_descriptors
         ]
+        if self._shared_memory_input is not None:
+          extra_fds.append(self._shared_memory_input.file_descriptor)
+        if self._shared_memory_output is not None:
+          extra_fds.append(self._shared_memory_output.file_descriptor)
         self._process = subprocess.Popen(
             args,
             close_fds=True,
@@ -322,6 +494,26 @@ class SubprocessServer(Server):
 
     SubprocessServer._started_instances.add(self)
 
+  def _CreateSharedMemory(self) -> None:
+    """Creates the shared memory buffers, falling back to pipes on failure."""
+    try:
+      self._shared_memory_input = SharedMemoryBuffer.Create(
+          self._shared_memory_size)
+      self._shared_memory_output = SharedMemoryBuffer.Create(
+          self._shared_memory_size)
+    except OSError as e:
+      logging.warning("Failed to create shared memory, using pipes only: %s",
+                      e)
+      self._CloseSharedMemory()
+
+  def _CloseSharedMemory(self) -> None:
+    if self._shared_memory_input is not None:
+      self._shared_memory_input.Close()
+      self._shared_memory_input = None
+    if self._shared_memory_output is not None:
+      self._shared_memory_output.Close()
+      self._shared_memory_output = None
+
   def Stop(self) -> None:
 
     if self in self._started_instances:
@@ -338,10 +530,14 @@ class SubprocessServer(Server):
       self._input_w.close()
     if self._output_r is not None:
       self._output_r.close()
+    self._CloseSharedMemory()
 
   def Connect(self) -> Connection:
     transport = PipeTransport(self._output_r, self._input_w)
-    return Connection(transport)
+    return Connection(
+        transport,
+        send_buffer=self._shared_memory_input,
+        recv_buffer=self._shared_memory_output)
 
   @classmethod
   def TotalCpuTime(cls) -> float:
@@ -394,8 +590,20 @@ def Main(channel: Channel, connection_handler: ConnectionHandler, user: str,
         channel.pipe_output.ToFileDescriptor(), "wb",
         buffering=False) as pipe_output:
       transport = PipeTransport(pipe_input, pipe_output)
-      connection = Connection(transport)
-      connection_handler(connection)
+      with contextlib.ExitStack() as stack:
+        send_buffer = None
+        recv_buffer = None
+        if channel.shared_memory_output is not None:
+          send_buffer = SharedMemoryBuffer(
+              channel.shared_memory_output.ToFileDescriptor())
+          stack.callback(send_buffer.Close)
+        if channel.shared_memory_input is not None:
+          recv_buffer = SharedMemoryBuffer(
+              channel.shared_memory_input.ToFileDescriptor())
+          stack.callback(recv_buffer.Close)
+        connection = Connection(
+            transport, send_buffer=send_buffer, recv_buffer=recv_buffer)
+        connection_handler(connection)
 
 
 def TotalServerCpuTime() -> float:
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""Benchmarks the throughput of connections to unprivileged servers."""
+
+import time
+import unittest
+
+from absl import app
+
+from grr_response_client.unprivileged import communication
+from grr_response_client.unprivileged import communication_test
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import test_lib
+
+
+@unittest.skipIf(not communication.SharedMemoryBuffer.IsSupported(),
+                 "Shared memory is not supported.")
+class CommunicationThroughputBenchmark(benchmark_test_lib.MicroBenchmarks):
+  """Compares passing attachments through pipes and shared memory."""
+
+  TOTAL_SIZE = 256 * 1024 * 1024
+  ATTACHMENT_SIZES = [64 * 1024, 1024 * 1024, 8 * 1024 * 1024]
+  SHARED_MEMORY_SIZE = 32 * 1024 * 1024
+
+  def setUp(self):
+    super().setUp(["Throughput (MiB/s)"], ["<20"])
+
+  def _Measure(self, name: str, shared_memory_size: int,
+               attachment_size: int) -> None:
+    attachment = b"x" * attachment_size
+    repetitions = self.TOTAL_SIZE // attachment_size
+
+    with communication.SubprocessServer(
+        communication_test._MakeArgs,  # pylint: disable=protected-access
+        shared_memory_size=shared_memory_size) as server:
+      connection = server.Connect()
+      # Waits for the server to start up.
+      connection.Send(communication.Message(b"", b""))
+      connection.Recv()
+
+      start = time.time()
+      for _ in range(repetitions):
+        connection.Send(communication.Message(b"", attachment))
+        result = connection.Recv()
+      time_taken = time.time() - start
+
+    self.assertLen(result.attachment, attachment_size + 1)
+    # Data is sent in both directions.
+    throughput = 2 * self.TOTAL_SIZE / time_taken / 1024 / 1024
+    self.AddResult(f"{name}, {attachment_size // 1024} KiB attachments",
+                   time_taken / repetitions, repetitions,
+                   "%.1f" % throughput)
+
+  def testThroughput(self):
+    """Round trips of attachments echoed back by the server."""
+    for attachment_size in self.ATTACHMENT_SIZES:
+      self._Measure("Pipes", 0, attachment_size)
+      self._Measure("Shared memory", self.SHARED_MEMORY_SIZE, attachment_size)
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
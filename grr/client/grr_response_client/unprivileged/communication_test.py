@@ -16,12 +16,19 @@ from grr_response_client.unprivileged import sandbox
 
 def _MakeArgs(channel: communication.Channel) -> List[str]:
   assert channel.pipe_input is not None and channel.pipe_output is not None
-  return [
+  args = [
       sys.executable, "-m",
       "grr_response_client.unprivileged.echo_server",
       str(channel.pipe_input.Serialize()),
       str(channel.pipe_output.Serialize()),
   ]
+  if channel.shared_memory_input is not None:
+    assert channel.shared_memory_output is not None
+    args.extend([
+        str(channel.shared_memory_input.Serialize()),
+        str(channel.shared_memory_output.Serialize()),
+    ])
+  return args
 
 
 class CommunicationTest(absltest.TestCase):
@@ -49,6 +56,23 @@ class CommunicationTest(absltest.TestCase):
 
     server.Stop()
 
+  @unittest.skipIf(not communication.SharedMemoryBuffer.IsSupported(),
+                   "Shared memory is not supported.")
+  def testCommunication_sharedMemory(self):
+    with communication.SubprocessServer(
+        _MakeArgs, shared_memory_size=1024 * 1024) as server:
+      connection = server.Connect()
+
+      # Includes attachments sent through pipes, because they are small or
+      # don't fit into the buffer, and enough data to wrap the buffer around.
+      sizes = [0, 10, 64 * 1024, 500 * 1024, 1024 * 1024 + 1] + [700 * 1024] * 5
+      for i, size in enumerate(sizes):
+        attachment = bytes([i]) * size
+        connection.Send(communication.Message(b"foo", attachment))
+        result = connection.Recv()
+        self.assertEqual(result.data, b"foox")
+        self.assertEqual(result.attachment, attachment + b"x")
+
   @unittest.skipIf(platform.system() == "Windows",
                    "psutil is not used on Windows.")
   def testTotalServerCpuSysTime_usesPsutilProcess(self):
@@ -178,6 +202,51 @@ class CommunicationTest(absltest.TestCase):
       mock_enter_sandbox.assert_called_with("fooUser", "barGroup")
 
 
+@unittest.skipIf(not communication.SharedMemoryBuffer.IsSupported(),
+                 "Shared memory is not supported.")
+class SharedMemoryBufferTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.writer = communication.SharedMemoryBuffer.Create(100)
+    self.addCleanup(self.writer.Close)
+    self.reader = communication.SharedMemoryBuffer(
+        os.dup(self.writer.file_descriptor))
+    self.addCleanup(self.reader.Close)
+
+  def testWriteRead(self):
+    position, end = self.writer.Write(b"foo")
+    self.assertEqual(self.reader.Read(position, 3, end), b"foo")
+    position, end = self.writer.Write(b"barbaz")
+    self.assertEqual(self.reader.Read(position, 6, end), b"barbaz")
+
+  def testWrite_returnsNoneIfDataDoesNotFit(self):
+    self.assertIsNone(self.writer.Write(b"x" * 101))
+
+    first = self.writer.Write(b"a" * 60)
+    self.assertIsNotNone(first)
+    self.assertIsNone(self.writer.Write(b"b" * 41))
+
+    second = self.writer.Write(b"b" * 40)
+    self.assertIsNotNone(second)
+    self.assertIsNone(self.writer.Write(b"c"))
+
+    self.assertEqual(self.reader.Read(first[0], 60, first[1]), b"a" * 60)
+    self.assertEqual(self.reader.Read(second[0], 40, second[1]), b"b" * 40)
+    self.assertIsNotNone(self.writer.Write(b"c" * 100))
+
+  def testWrite_wrapsAround(self):
+    for i in range(20):
+      data = bytes([i]) * (i * 7 % 50 + 1)
+      position, end = self.writer.Write(data)
+      self.assertLessEqual(position + len(data), 100)
+      self.assertEqual(self.reader.Read(position, len(data), end), data)
+
+  def testRead_invalidRangeRaises(self):
+    with self.assertRaises(communication.Error):
+      self.reader.Read(90, 20, 110)
+
+
 class PipeTransportTest(absltest.TestCase):
 
   def testRead_AllReadsAreShort(self):
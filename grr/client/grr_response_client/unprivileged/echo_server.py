@@ -21,9 +21,14 @@ def Handler(connection: communication.Connection):
 
 
 def main(argv):
+  # Optional arguments 3 and 4 are the shared memory file descriptors.
+  shared_memory = [int(arg) for arg in argv[3:5]] or [None, None]
   communication.Main(
       communication.Channel.FromSerialized(
-          pipe_input=int(argv[1]), pipe_output=int(argv[2])),
+          pipe_input=int(argv[1]),
+          pipe_output=int(argv[2]),
+          shared_memory_input=shared_memory[0],
+          shared_memory_output=shared_memory[1]),
       Handler,
       user="",
       group="")
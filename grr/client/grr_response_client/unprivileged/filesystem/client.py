@@ -2,7 +2,8 @@
 """Unprivileged filesystem RPC client code."""
 
 import abc
-from typing import TypeVar, Generic, Optional, Sequence, BinaryIO, Tuple
+import collections
+from typing import Any, BinaryIO, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
 
 from grr_response_client.unprivileged import communication
 from grr_response_client.unprivileged.proto import filesystem_pb2
@@ -10,6 +11,20 @@ from grr_response_client.unprivileged.proto import filesystem_pb2
 RequestType = TypeVar('RequestType')
 ResponseType = TypeVar('ResponseType')
 
+# Maximum number of pipelined requests sent before receiving a response.
+MAX_REQUESTS_IN_FLIGHT = 8
+
+# Maximum total size of reads batched in a single MultiRead request.
+MULTI_READ_BATCH_SIZE = 1024 * 1024
+# Maximum number of reads batched in a single MultiRead request. This keeps
+# the size of pipelined requests well within the buffer size of the transport.
+MULTI_READ_BATCH_MAX_READS = 64
+
+# Default parameters of the read-ahead block cache of files.
+DEFAULT_BLOCK_SIZE = 64 * 1024
+DEFAULT_READ_AHEAD_BLOCKS = 4
+DEFAULT_MAX_CACHED_BLOCKS = 16
+
 
 class Error(Exception):
   """Base class for exceptions in this module."""
@@ -36,6 +51,11 @@ class ConnectionWrapper:
 
   def __init__(self, connection: communication.Connection):
     self._connection = connection
+    self._last_request_id = 0
+
+  def NextRequestId(self) -> int:
+    self._last_request_id += 1
+    return self._last_request_id
 
   def Send(self, request: filesystem_pb2.Request, attachment: bytes) -> None:
     self._connection.Send(
@@ -94,8 +114,36 @@ class OperationHandler(abc.ABC, Generic[RequestType, ResponseType]):
     self._device = device
 
   def Run(self, request: RequestType) -> ResponseType:
-    self._connection.Send(self.PackRequest(request), b'')
+    return self.Receive(self.Send(request))
+
+  def Send(self, request: RequestType) -> int:
+    """Sends a request without waiting for the response.
+
+    Args:
+      request: The request to send.
+
+    Returns:
+      The id of the request, to be passed to `Receive`.
+    """
+    packed_request = self.PackRequest(request)
+    packed_request.request_id = self._connection.NextRequestId()
+    self._connection.Send(packed_request, b'')
+    return packed_request.request_id
+
+  def Receive(self, request_id: int) -> ResponseType:
+    """Receives the response to a request sent by `Send`.
+
+    Responses have to be received in the order the requests were sent.
+
+    Args:
+      request_id: The id of the request returned by `Send`.
+
+    Returns:
+      The response.
 
+    Raises:
+      OperationError: if the operation failed on the server.
+    """
     while True:
       packed_response, attachment = self._connection.Recv()
       if packed_response.HasField('device_data_request'):
@@ -105,13 +153,17 @@ class OperationHandler(abc.ABC, Generic[RequestType, ResponseType]):
         device_data = filesystem_pb2.DeviceData()
         request = filesystem_pb2.Request(device_data=device_data)
         self._connection.Send(request, data)
-      elif packed_response.HasField('exception'):
+        continue
+
+      if packed_response.request_id != request_id:
+        raise Error(f'Expected a response to request {request_id}, '
+                    f'got a response to request {packed_response.request_id}.')
+      if packed_response.HasField('exception'):
         raise OperationError(packed_response.exception.message,
                              packed_response.exception.formatted_exception)
-      else:
-        response = self.UnpackResponse(packed_response)
-        self.MergeResponseAttachment(response, attachment)
-        return response
+      response = self.UnpackResponse(packed_response)
+      self.MergeResponseAttachment(response, attachment)
+      return response
 
   def MergeResponseAttachment(self, response: ResponseType,
                               attachment: bytes) -> None:
@@ -172,6 +224,27 @@ class ReadHandler(OperationHandler[filesystem_pb2.ReadRequest,
     response.data = attachment
 
 
+class MultiReadHandler(OperationHandler[filesystem_pb2.MultiReadRequest,
+                                        filesystem_pb2.MultiReadResponse]):
+  """Implements the MultiRead RPC."""
+
+  def UnpackResponse(
+      self,
+      response: filesystem_pb2.Response) -> filesystem_pb2.MultiReadResponse:
+    return response.multi_read_response
+
+  def PackRequest(
+      self, request: filesystem_pb2.MultiReadRequest) -> filesystem_pb2.Request:
+    return filesystem_pb2.Request(multi_read_request=request)
+
+  def MergeResponseAttachment(self, response: filesystem_pb2.MultiReadResponse,
+                              attachment: bytes) -> None:
+    offset = 0
+    for read_response, size in zip(response.responses, response.data_sizes):
+      read_response.data = attachment[offset:offset + size]
+      offset += size
+
+
 class StatHandler(OperationHandler[filesystem_pb2.StatRequest,
                                    filesystem_pb2.StatResponse]):
   """Implements the Stat RPC."""
@@ -185,6 +258,20 @@ class StatHandler(OperationHandler[filesystem_pb2.StatRequest,
     return filesystem_pb2.Request(stat_request=request)
 
 
+class MultiStatHandler(OperationHandler[filesystem_pb2.MultiStatRequest,
+                                        filesystem_pb2.MultiStatResponse]):
+  """Implements the MultiStat RPC."""
+
+  def UnpackResponse(
+      self,
+      response: filesystem_pb2.Response) -> filesystem_pb2.MultiStatResponse:
+    return response.multi_stat_response
+
+  def PackRequest(
+      self, request: filesystem_pb2.MultiStatRequest) -> filesystem_pb2.Request:
+    return filesystem_pb2.Request(multi_stat_request=request)
+
+
 class ListFilesHandler(OperationHandler[filesystem_pb2.ListFilesRequest,
                                         filesystem_pb2.ListFilesResponse]):
   """Implements the ListFiles RPC."""
@@ -242,17 +329,197 @@ class LookupCaseInsensitiveHandler(
     return filesystem_pb2.Request(lookup_case_insensitive_request=request)
 
 
+def RunPipelined(operations: Sequence[Tuple[OperationHandler, Any]],
+                 max_in_flight: int = MAX_REQUESTS_IN_FLIGHT) -> List[Any]:
+  """Runs multiple operations, pipelining their requests.
+
+  Up to `max_in_flight` requests are sent before the first response is
+  received, which saves a round trip per operation. Since the server doesn't
+  read requests while sending a response, the requests in flight have to fit
+  into the buffer of the underlying transport, so they have to be small.
+
+  Args:
+    operations: (handler, request) pairs. All handlers have to use the same
+      connection.
+    max_in_flight: Maximum number of requests sent, but not responded to yet.
+
+  Returns:
+    Responses to the operations, in order.
+
+  Raises:
+    OperationError: if any of the operations failed. Responses to all requests
+      sent are received before raising, so that the connection can still be
+      used.
+  """
+  responses = [None] * len(operations)
+  in_flight = collections.deque()
+  next_index = 0
+  error = None
+
+  while in_flight or (error is None and next_index < len(operations)):
+    while (error is None and next_index < len(operations) and
+           len(in_flight) < max_in_flight):
+      handler, request = operations[next_index]
+      in_flight.append((next_index, handler.Send(request)))
+      next_index += 1
+
+    index, request_id = in_flight.popleft()
+    try:
+      responses[index] = operations[index][0].Receive(request_id)
+    except OperationError as e:
+      if error is None:
+        error = e
+
+  if error is not None:
+    raise error
+  return responses
+
+
+def _MultiRead(connection: ConnectionWrapper, device: Device,
+               reads: Sequence[filesystem_pb2.ReadRequest]) -> List[bytes]:
+  """Runs reads in pipelined batches of MultiRead requests."""
+  operations = []
+  batch = filesystem_pb2.MultiReadRequest()
+  batch_size = 0
+  for read in reads:
+    if batch.reads and (batch_size + read.size > MULTI_READ_BATCH_SIZE or
+                        len(batch.reads) >= MULTI_READ_BATCH_MAX_READS):
+      operations.append((MultiReadHandler(connection, device), batch))
+      batch = filesystem_pb2.MultiReadRequest()
+      batch_size = 0
+    batch.reads.append(read)
+    batch_size += read.size
+  if batch.reads:
+    operations.append((MultiReadHandler(connection, device), batch))
+
+  return [
+      read_response.data
+      for response in RunPipelined(operations)
+      for read_response in response.responses
+  ]
+
+
+class BlockCache:
+  """An LRU cache of fixed-size blocks of a file, with read-ahead.
+
+  Reads are served in whole blocks. On a miss, the missing blocks are read
+  together with the blocks following them, in a single round trip.
+  """
+
+  def __init__(self, read_blocks: Callable[[Sequence[int]], List[bytes]],
+               block_size: int, read_ahead_blocks: int, max_blocks: int):
+    """Constructor.
+
+    Args:
+      read_blocks: Function reading blocks of the given indexes.
+      block_size: Size of a block.
+      read_ahead_blocks: Number of blocks to read following a missing block.
+      max_blocks: Maximum number of blocks kept in the cache.
+    """
+    self._read_blocks = read_blocks
+    self._block_size = block_size
+    self._read_ahead_blocks = read_ahead_blocks
+    self._max_blocks = max_blocks
+    self._blocks = collections.OrderedDict()
+    # Number of blocks in the file, known once a short block is read.
+    self._num_blocks: Optional[int] = None
+
+  @property
+  def max_read_size(self) -> int:
+    """Maximum size of a read served by the cache."""
+    return self._block_size * (self._max_blocks // 2)
+
+  def _IsPastEnd(self, index: int) -> bool:
+    return self._num_blocks is not None and index >= self._num_blocks
+
+  def _Put(self, index: int, data: bytes) -> None:
+    self._blocks[index] = data
+    self._blocks.move_to_end(index)
+    while len(self._blocks) > self._max_blocks:
+      self._blocks.popitem(last=False)
+
+    if len(data) < self._block_size:
+      if self._num_blocks is None or index + 1 < self._num_blocks:
+        self._num_blocks = index + 1
+
+  def Read(self, offset: int, size: int) -> bytes:
+    """Reads data using the cache."""
+    if size <= 0:
+      return b''
+
+    first = offset // self._block_size
+    last = (offset + size - 1) // self._block_size
+
+    blocks = {}
+    missing = []
+    for index in range(first, last + 1):
+      if self._IsPastEnd(index):
+        break
+      block = self._blocks.get(index)
+      if block is None:
+        missing.append(index)
+      else:
+        self._blocks.move_to_end(index)
+        blocks[index] = block
+
+    if missing:
+      to_read = missing + [
+          index for index in range(last + 1, last + 1 + self._read_ahead_blocks)
+          if index not in self._blocks
+      ]
+      to_read = to_read[:self._max_blocks]
+      for index, block in zip(to_read, self._read_blocks(to_read)):
+        self._Put(index, block)
+        blocks[index] = block
+
+    chunks = []
+    for index in range(first, last + 1):
+      block = blocks.get(index)
+      if block is None:
+        break
+      chunks.append(block)
+      if len(block) < self._block_size:
+        break
+
+    start = offset - first * self._block_size
+    return b''.join(chunks)[start:start + size]
+
+
 class File:
   """Wraps a remote file_id."""
 
-  def __init__(self, connection: ConnectionWrapper, device: Device,
-               file_id: int, inode: int):
+  def __init__(self,
+               connection: ConnectionWrapper,
+               device: Device,
+               file_id: int,
+               inode: int,
+               block_size: int = DEFAULT_BLOCK_SIZE,
+               read_ahead_blocks: int = DEFAULT_READ_AHEAD_BLOCKS,
+               max_cached_blocks: int = DEFAULT_MAX_CACHED_BLOCKS):
     self._connection = connection
     self._device = device
     self._file_id = file_id
     self._inode = inode
+    self._block_size = block_size
+    if max_cached_blocks > 0:
+      self._block_cache = BlockCache(self._ReadBlocks, block_size,
+                                     read_ahead_blocks, max_cached_blocks)
+    else:
+      self._block_cache = None
+
+  def _ReadBlocks(self, indexes: Sequence[int]) -> List[bytes]:
+    return _MultiRead(self._connection, self._device, [
+        filesystem_pb2.ReadRequest(
+            file_id=self._file_id,
+            offset=index * self._block_size,
+            size=self._block_size) for index in indexes
+    ])
 
   def Read(self, offset: int, size: int) -> bytes:
+    if (self._block_cache is not None and
+        size <= self._block_cache.max_read_size):
+      return self._block_cache.Read(offset, size)
+
     request = filesystem_pb2.ReadRequest(
         file_id=self._file_id, offset=offset, size=size)
     response = ReadHandler(self._connection, self._device).Run(request)
@@ -277,6 +544,10 @@ class File:
     response = ListNamesHandler(self._connection, self._device).Run(request)
     return list(response.names)
 
+  @property
+  def file_id(self) -> int:
+    return self._file_id
+
   @property
   def inode(self) -> int:
     return self._inode
@@ -305,11 +576,29 @@ class StaleInodeError(Error):
 class Client:
   """Client for the RPC filesystem service."""
 
-  def __init__(self, connection: communication.Connection,
+  def __init__(self,
+               connection: communication.Connection,
                implementation_type: filesystem_pb2.ImplementationType,
-               device: Device):
+               device: Device,
+               block_size: int = DEFAULT_BLOCK_SIZE,
+               read_ahead_blocks: int = DEFAULT_READ_AHEAD_BLOCKS,
+               max_cached_blocks: int = DEFAULT_MAX_CACHED_BLOCKS):
+    """Constructor.
+
+    Args:
+      connection: Connection to the filesystem server.
+      implementation_type: The filesystem implementation to use.
+      device: The device underlying the filesystem.
+      block_size: Block size of the read-ahead cache of opened files.
+      read_ahead_blocks: Number of blocks read ahead by the cache.
+      max_cached_blocks: Maximum number of blocks cached per opened file. 0
+        disables caching.
+    """
     self._connection = ConnectionWrapper(connection)
     self._device = device
+    self._block_size = block_size
+    self._read_ahead_blocks = read_ahead_blocks
+    self._max_cached_blocks = max_cached_blocks
     device_file_descriptor = device.file_descriptor
     if device_file_descriptor is None:
       serialized_device_file_descriptor = None
@@ -351,7 +640,16 @@ class Client:
     elif response.status != filesystem_pb2.OpenResponse.Status.NO_ERROR:
       raise IOError(f'Open RPC returned status {response.status}.')
     return File(self._connection, self._device, response.file_id,
-                response.inode)
+                response.inode, self._block_size, self._read_ahead_blocks,
+                self._max_cached_blocks)
+
+  def MultiStat(self,
+                files: Sequence[File]) -> List[filesystem_pb2.StatEntry]:
+    """Returns information about multiple files in a single round trip."""
+    request = filesystem_pb2.MultiStatRequest(
+        file_ids=[file_obj.file_id for file_obj in files])
+    response = MultiStatHandler(self._connection, self._device).Run(request)
+    return list(response.entries)
 
 
 def CreateFilesystemClient(
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+from typing import List, Sequence
+
+from absl.testing import absltest
+
+from grr_response_client.unprivileged.filesystem import client
+
+_DATA = bytes(range(256)) * 4 + b"tail"
+
+
+class BlockCacheTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.read_calls = []
+
+  def _ReadBlocks(self, indexes: Sequence[int]) -> List[bytes]:
+    self.read_calls.append(list(indexes))
+    return [_DATA[index * 100:(index + 1) * 100] for index in indexes]
+
+  def _CreateCache(self, read_ahead_blocks=2, max_blocks=8):
+    return client.BlockCache(
+        self._ReadBlocks,
+        block_size=100,
+        read_ahead_blocks=read_ahead_blocks,
+        max_blocks=max_blocks)
+
+  def testReadsAreCorrect(self):
+    cache = self._CreateCache()
+    for offset in range(0, len(_DATA) + 50, 7):
+      for size in [0, 1, 99, 100, 101, 250, 400]:
+        self.assertEqual(
+            cache.Read(offset, size), _DATA[offset:offset + size],
+            f"offset={offset}, size={size}")
+
+  def testReadsAhead(self):
+    cache = self._CreateCache()
+    self.assertEqual(cache.Read(10, 20), _DATA[10:30])
+    self.assertEqual(self.read_calls, [[0, 1, 2]])
+
+    self.assertEqual(cache.Read(150, 150), _DATA[150:300])
+    self.assertEqual(self.read_calls, [[0, 1, 2]])
+
+    self.assertEqual(cache.Read(250, 100), _DATA[250:350])
+    self.assertEqual(self.read_calls, [[0, 1, 2], [3, 4, 5]])
+
+  def testDoesNotReadPastTheEnd(self):
+    cache = self._CreateCache()
+    self.assertEqual(cache.Read(1024, 100), b"tail")
+    self.assertEqual(self.read_calls, [[10, 11, 12, 13]])
+
+    self.assertEqual(cache.Read(1100, 100), b"")
+    self.assertEqual(cache.Read(1500, 100), b"")
+    self.assertEqual(self.read_calls, [[10, 11, 12, 13]])
+
+  def testEvictsLeastRecentlyUsedBlocks(self):
+    cache = self._CreateCache(read_ahead_blocks=0, max_blocks=2)
+    cache.Read(0, 1)
+    cache.Read(100, 1)
+    cache.Read(0, 1)
+    cache.Read(200, 1)
+    self.assertEqual(self.read_calls, [[0], [1], [2]])
+
+    cache.Read(0, 1)
+    self.assertEqual(self.read_calls, [[0], [1], [2]])
+    cache.Read(100, 1)
+    self.assertEqual(self.read_calls, [[0], [1], [2], [1]])
+
+
+if __name__ == "__main__":
+  absltest.main()
@@ -415,3 +415,100 @@ class NtfsImageTest(absltest.TestCase, abc.ABC):
                                 "Attempting to read from a directory"):
       with self._client.Open(path=self._Path("\\a")) as file_obj:
         file_obj.Read(offset=0, size=1)
+
+  def testRead_inSmallChunks(self):
+    expected = b"".join(b"%d\n" % i for i in range(1, 1001))
+    with self._client.Open(path=self._Path("\\numbers.txt")) as file_obj:
+      data = b""
+      while True:
+        chunk = file_obj.Read(offset=len(data), size=100)
+        if not chunk:
+          break
+        data += chunk
+    self.assertEqual(data, expected)
+
+  def _MultiRead(self, reads):
+    # pylint: disable=protected-access
+    return client._MultiRead(self._client._connection, self._client._device, [
+        filesystem_pb2.ReadRequest(
+            file_id=file_obj.file_id, offset=offset, size=size)
+        for file_obj, offset, size in reads
+    ])
+    # pylint: enable=protected-access
+
+  def testMultiRead(self):
+    with contextlib.ExitStack() as stack:
+      numbers = stack.enter_context(
+          self._client.Open(path=self._Path("\\numbers.txt")))
+      d = stack.enter_context(
+          self._client.Open(path=self._Path("\\a\\b1\\c1\\d")))
+      result = self._MultiRead([
+          (numbers, 0, 4),
+          (d, 0, 100),
+          (numbers, 3888, 100),
+          (d, 100, 100),
+      ])
+    self.assertEqual(result, [b"1\n2\n", b"foo\n", b"1000\n", b""])
+
+  def testMultiRead_manyBatches(self):
+    expected = b"".join(b"%d\n" % i for i in range(1, 1001))
+    with self._client.Open(path=self._Path("\\numbers.txt")) as file_obj:
+      reads = [(file_obj, offset, 10) for offset in range(0, len(expected), 10)]
+      self.assertGreater(len(reads), client.MULTI_READ_BATCH_MAX_READS)
+      result = self._MultiRead(reads)
+    self.assertEqual(b"".join(result), expected)
+
+  def testMultiRead_failureKeepsConnectionUsable(self):
+    with contextlib.ExitStack() as stack:
+      directory = stack.enter_context(
+          self._client.Open(path=self._Path("\\a")))
+      d = stack.enter_context(
+          self._client.Open(path=self._Path("\\a\\b1\\c1\\d")))
+      reads = [(d, 0, 1)] * 1000 + [(directory, 0, 1)] + [(d, 0, 1)] * 1000
+      with self.assertRaisesRegex(client.OperationError,
+                                  "Attempting to read from a directory"):
+        self._MultiRead(reads)
+
+      self.assertEqual(self._MultiRead([(d, 0, 100)]), [b"foo\n"])
+
+  def testMultiStat(self):
+    with contextlib.ExitStack() as stack:
+      numbers = stack.enter_context(
+          self._client.Open(path=self._Path("\\numbers.txt")))
+      d = stack.enter_context(
+          self._client.Open(path=self._Path("\\a\\b1\\c1\\d")))
+      result = self._client.MultiStat([numbers, d])
+      self.assertEqual(result, [numbers.Stat(), d.Stat()])
+    self.assertEqual(result[0].st_ino,
+                     self._FileRefToInode(NUMBERS_TXT_FILE_REF))
+    self.assertEqual(result[1].st_ino,
+                     self._FileRefToInode(A_B1_C1_D_FILE_REF))
+
+  def testRunPipelined(self):
+    with contextlib.ExitStack() as stack:
+      numbers = stack.enter_context(
+          self._client.Open(path=self._Path("\\numbers.txt")))
+      directory = stack.enter_context(
+          self._client.Open(path=self._Path("\\a")))
+      # pylint: disable=protected-access
+      connection = self._client._connection
+      device = self._client._device
+      # pylint: enable=protected-access
+
+      operations = [(client.ReadHandler(connection, device),
+                     filesystem_pb2.ReadRequest(
+                         file_id=numbers.file_id, offset=offset, size=2))
+                    for offset in range(0, 36, 2)]
+      responses = client.RunPipelined(operations, max_in_flight=4)
+      self.assertEqual(
+          b"".join(response.data for response in responses),
+          b"1\n2\n3\n4\n5\n6\n7\n8\n9\n10\n11\n12\n13\n14\n15\n")
+
+      operations.insert(
+          10, (client.ReadHandler(connection, device),
+               filesystem_pb2.ReadRequest(
+                   file_id=directory.file_id, offset=0, size=1)))
+      with self.assertRaises(client.OperationError):
+        client.RunPipelined(operations, max_in_flight=4)
+
+      self.assertEqual(numbers.Read(0, 4), b"1\n2\n")
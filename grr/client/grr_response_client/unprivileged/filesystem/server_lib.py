@@ -2,10 +2,11 @@
 """Unprivileged filesystem RPC server."""
 
 import abc
+import collections
 import os
 import sys
 import traceback
-from typing import TypeVar, Generic, Optional, Tuple
+from typing import Deque, TypeVar, Generic, Optional, Tuple
 from grr_response_client.unprivileged import communication
 from grr_response_client.unprivileged.filesystem import filesystem
 from grr_response_client.unprivileged.filesystem import ntfs
@@ -35,21 +36,40 @@ class State:
 
 
 class ConnectionWrapper:
-  """Wraps a connection, adding protobuf serialization."""
+  """Wraps a connection, adding protobuf serialization.
+
+  Requests received while waiting for device data are queued and returned by
+  subsequent `Recv` calls. This makes pipelining of requests possible.
+  """
 
   def __init__(self, connection: communication.Connection):
     self._connection = connection
+    self._pending: Deque[Tuple[filesystem_pb2.Request, bytes]] = (
+        collections.deque())
 
   def Send(self, response: filesystem_pb2.Response, attachment: bytes) -> None:
     self._connection.Send(
         communication.Message(response.SerializeToString(), attachment))
 
-  def Recv(self) -> Tuple[filesystem_pb2.Request, bytes]:
+  def _RecvFromConnection(self) -> Tuple[filesystem_pb2.Request, bytes]:
     raw_request, attachment = self._connection.Recv()
     request = filesystem_pb2.Request()
     request.ParseFromString(raw_request)
     return request, attachment
 
+  def Recv(self) -> Tuple[filesystem_pb2.Request, bytes]:
+    if self._pending:
+      return self._pending.popleft()
+    return self._RecvFromConnection()
+
+  def RecvDeviceData(self) -> bytes:
+    """Receives device data, queueing requests received in the meantime."""
+    while True:
+      request, attachment = self._RecvFromConnection()
+      if request.HasField('device_data'):
+        return attachment
+      self._pending.append((request, attachment))
+
 
 class RpcDevice(filesystem.Device):
   """A device implementation which reads data blocks via a connection."""
@@ -62,8 +82,7 @@ class RpcDevice(filesystem.Device):
         offset=offset, size=size)
     self._connection.Send(
         filesystem_pb2.Response(device_data_request=device_data_request), b'')
-    _, attachment = self._connection.Recv()
-    return attachment
+    return self._connection.RecvDeviceData()
 
 
 class FileDevice(filesystem.Device):
@@ -98,7 +117,10 @@ class OperationHandler(abc.ABC, Generic[RequestType, ResponseType]):
     request = self.UnpackRequest(self._request)
     response = self.HandleOperation(self._state, request)
     attachment = self.ExtractResponseAttachment(response)
-    self._connection.Send(self.PackResponse(response), attachment)
+    packed_response = self.PackResponse(response)
+    if self._request.HasField('request_id'):
+      packed_response.request_id = self._request.request_id
+    self._connection.Send(packed_response, attachment)
 
   def CreateDevice(self) -> filesystem.Device:
     return RpcDevice(self._connection)
@@ -218,6 +240,39 @@ class ReadHandler(OperationHandler[filesystem_pb2.ReadRequest,
     return request.read_request
 
 
+class MultiReadHandler(OperationHandler[filesystem_pb2.MultiReadRequest,
+                                        filesystem_pb2.MultiReadResponse]):
+  """Implements the MultiRead operation."""
+
+  def HandleOperation(
+      self, state: State, request: filesystem_pb2.MultiReadRequest
+  ) -> filesystem_pb2.MultiReadResponse:
+    response = filesystem_pb2.MultiReadResponse()
+    for read_request in request.reads:
+      file = state.files.Get(read_request.file_id)
+      data = file.Read(offset=read_request.offset, size=read_request.size)
+      response.responses.add(data=data)
+    return response
+
+  def PackResponse(
+      self,
+      response: filesystem_pb2.MultiReadResponse) -> filesystem_pb2.Response:
+    return filesystem_pb2.Response(multi_read_response=response)
+
+  def ExtractResponseAttachment(
+      self, response: filesystem_pb2.MultiReadResponse) -> bytes:
+    attachment = b''.join(
+        read_response.data for read_response in response.responses)
+    for read_response in response.responses:
+      response.data_sizes.append(len(read_response.data))
+      read_response.ClearField('data')
+    return attachment
+
+  def UnpackRequest(
+      self, request: filesystem_pb2.Request) -> filesystem_pb2.MultiReadRequest:
+    return request.multi_read_request
+
+
 class StatHandler(OperationHandler[filesystem_pb2.StatRequest,
                                    filesystem_pb2.StatResponse]):
   """Implements the Stat operation."""
@@ -237,6 +292,27 @@ class StatHandler(OperationHandler[filesystem_pb2.StatRequest,
     return request.stat_request
 
 
+class MultiStatHandler(OperationHandler[filesystem_pb2.MultiStatRequest,
+                                        filesystem_pb2.MultiStatResponse]):
+  """Implements the MultiStat operation."""
+
+  def HandleOperation(
+      self, state: State, request: filesystem_pb2.MultiStatRequest
+  ) -> filesystem_pb2.MultiStatResponse:
+    return filesystem_pb2.MultiStatResponse(entries=[
+        state.files.Get(file_id).Stat() for file_id in request.file_ids
+    ])
+
+  def PackResponse(
+      self,
+      response: filesystem_pb2.MultiStatResponse) -> filesystem_pb2.Response:
+    return filesystem_pb2.Response(multi_stat_response=response)
+
+  def UnpackRequest(
+      self, request: filesystem_pb2.Request) -> filesystem_pb2.MultiStatRequest:
+    return request.multi_stat_request
+
+
 class ListFilesHandler(OperationHandler[filesystem_pb2.ListFilesRequest,
                                         filesystem_pb2.ListFilesResponse]):
   """Implements the ListFiles operation."""
@@ -325,6 +401,7 @@ def DispatchWrapped(connection: ConnectionWrapper) -> None:
   """Dispatches a request to the proper OperationHandler."""
   state = State()
   while True:
+    request = None
     try:
       request, att = connection.Recv()
 
@@ -350,6 +427,10 @@ def DispatchWrapped(connection: ConnectionWrapper) -> None:
         handler_class = LookupCaseInsensitiveHandler
       elif request.HasField('list_names_request'):
         handler_class = ListNamesHandler
+      elif request.HasField('multi_read_request'):
+        handler_class = MultiReadHandler
+      elif request.HasField('multi_stat_request'):
+        handler_class = MultiStatHandler
       else:
         raise DispatchError('No request set.')
 
@@ -359,7 +440,10 @@ def DispatchWrapped(connection: ConnectionWrapper) -> None:
       exception = filesystem_pb2.Exception(
           message=str(sys.exc_info()[1]),
           formatted_exception=traceback.format_exc())
-      connection.Send(filesystem_pb2.Response(exception=exception), b'')
+      response = filesystem_pb2.Response(exception=exception)
+      if request is not None and request.HasField('request_id'):
+        response.request_id = request.request_id
+      connection.Send(response, b'')
 
 
 def Dispatch(connection: communication.Connection):
@@ -1,9 +1,10 @@
 #!/usr/bin/env python
 """Virtual filesystem module based on an unprivileged filesystem client."""
 
+import collections
 import contextlib
 import stat
-from typing import Any, Callable, Dict, Iterator, Optional, Text, Type, Tuple, NamedTuple
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Text, Type, Tuple, NamedTuple
 
 from grr_response_client import client_utils
 from grr_response_client.unprivileged import communication
@@ -15,6 +16,7 @@ from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
 from grr_response_core.lib.rdfvalues import paths as rdf_paths
+from grr_response_core.lib.util import cache
 
 
 class MountCacheItem(NamedTuple):
@@ -22,16 +24,16 @@ class MountCacheItem(NamedTuple):
   server: communication.Server
 
 
-class MountCache(utils.TimeBasedCache):
+class MountCache(cache.LRUCache[bytes, MountCacheItem]):
 
-  def KillObject(self, obj: utils.TimeBasedCacheEntry) -> None:
-    item = obj.value
-    item.client.Close()
-    item.server.Stop()
+  def KillObject(self, value: MountCacheItem) -> None:
+    value.client.Close()
+    value.server.Stop()
 
 
 # Caches server instances.
-MOUNT_CACHE = MountCache()
+MOUNT_CACHE = MountCache(
+    "unprivileged_filesystem_mounts", max_age=600, sweep_expired=True)
 
 
 def _ConvertStatEntry(entry: filesystem_pb2.StatEntry,
@@ -184,7 +186,15 @@ class UnprivilegedFileBase(vfs_base.VFSHandler):
     # Access the file by file_reference, to skip path lookups.
     self.pathspec.last.inode = self.fd.inode
 
-    self._stat_result = _ConvertStatEntry(self.fd.Stat(), self.pathspec)
+    # Fetched on first use, unless prefetched by `PrefetchStats`.
+    self._stat_entry: Optional[rdf_client_fs.StatEntry] = None
+
+  @property
+  def _stat_result(self) -> rdf_client_fs.StatEntry:
+    if self._stat_entry is None:
+      assert self.fd is not None
+      self._stat_entry = _ConvertStatEntry(self.fd.Stat(), self.pathspec)
+    return self._stat_entry
 
   def _OpenPathSpec(self, pathspec: rdf_paths.PathSpec) -> client.File:
     if pathspec.HasField("stream_name"):
@@ -368,6 +378,32 @@ class UnprivilegedFileBase(vfs_base.VFSHandler):
           progress_callback=progress_callback)
 
 
+def PrefetchStats(vfs_files: Iterable[vfs_base.VFSHandler]) -> None:
+  """Fetches stat entries of multiple opened files in a few round trips.
+
+  Stat entries of all files served by the same unprivileged server are fetched
+  with a single MultiStat RPC. Other files are skipped.
+
+  Args:
+    vfs_files: Opened VFS handlers.
+  """
+  files_by_client = collections.defaultdict(list)
+  for vfs_file in vfs_files:
+    if (isinstance(vfs_file, UnprivilegedFileBase) and
+        vfs_file._stat_entry is None):  # pylint: disable=protected-access
+      files_by_client[vfs_file.client].append(vfs_file)
+
+  for fs_client, client_files in files_by_client.items():
+    try:
+      entries = fs_client.MultiStat([vfs_file.fd for vfs_file in client_files])
+    except client.OperationError as e:
+      raise IOError("Failed to stat files.") from e
+    for vfs_file, entry in zip(client_files, entries):
+      # pylint: disable=protected-access
+      vfs_file._stat_entry = _ConvertStatEntry(entry, vfs_file.pathspec)
+      # pylint: enable=protected-access
+
+
 class UnprivilegedNtfsFile(UnprivilegedFileBase):
   supported_pathtype = rdf_paths.PathSpec.PathType.NTFS
   implementation_type = filesystem_pb2.NTFS
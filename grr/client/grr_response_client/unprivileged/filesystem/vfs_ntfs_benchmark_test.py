@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Benchmarks sandboxed against unsandboxed NTFS file access."""
+
+import contextlib
+import os
+from unittest import mock
+
+from absl import app
+
+from grr_response_client import vfs as client_vfs
+from grr_response_client.unprivileged.filesystem import vfs
+from grr_response_client.vfs_handlers import files as vfs_files
+from grr_response_client.vfs_handlers import ntfs as vfs_ntfs
+from grr_response_core import config
+from grr_response_core.lib.rdfvalues import paths as rdf_paths
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import test_lib
+
+
+class VfsNtfsBenchmark(benchmark_test_lib.AverageMicroBenchmarks):
+  """Compares the direct NTFS VFS handler with the sandboxed one."""
+
+  REPEATS = 100
+  units = "ms"
+
+  def setUp(self):
+    super().setUp()
+    client_vfs.Init()
+    self.addCleanup(vfs.MOUNT_CACHE.Flush)
+
+  def _PathSpec(self, path: str) -> rdf_paths.PathSpec:
+    return rdf_paths.PathSpec(
+        path=os.path.join(config.CONFIG["Test.data_dir"], "ntfs.img"),
+        pathtype=rdf_paths.PathSpec.PathType.OS,
+        path_options=rdf_paths.PathSpec.Options.CASE_LITERAL,
+        nested_path=rdf_paths.PathSpec(
+            path=path, pathtype=rdf_paths.PathSpec.PathType.NTFS))
+
+  @contextlib.contextmanager
+  def _Handler(self, handler_class, remote_device=False):
+    with contextlib.ExitStack() as stack:
+      stack.enter_context(
+          mock.patch.dict(client_vfs.VFS_HANDLERS, {
+              rdf_paths.PathSpec.PathType.NTFS: handler_class,
+          }))
+      if remote_device:
+        # The File VFS handler won't return a path, so the device is read via
+        # RPC calls instead of sharing its file descriptor with the server.
+        stack.enter_context(
+            mock.patch.object(vfs_files.File, "native_path", None))
+      yield
+
+  def _TimeVariants(self, callback, name):
+    with self._Handler(vfs_ntfs.NTFSFile):
+      self.TimeIt(callback, f"{name} (unsandboxed)")
+    with self._Handler(vfs.UnprivilegedNtfsFile):
+      self.TimeIt(callback, f"{name} (sandboxed)")
+    with self._Handler(vfs.UnprivilegedNtfsFile, remote_device=True):
+      self.TimeIt(callback, f"{name} (sandboxed, remote device)")
+
+  def testReadFile(self):
+    """Opening a file and reading it in small chunks."""
+    pathspec = self._PathSpec("numbers.txt")
+
+    def ReadFile():
+      fd = client_vfs.VFSOpen(pathspec)
+      size = 0
+      while True:
+        data = fd.Read(128)
+        if not data:
+          return size
+        size += len(data)
+
+    self._TimeVariants(ReadFile, "Read numbers.txt")
+
+  def testListDirectory(self):
+    """Opening a directory and stating its entries."""
+    pathspec = self._PathSpec("/")
+
+    def ListDirectory():
+      fd = client_vfs.VFSOpen(pathspec)
+      return len(list(fd.ListFiles()))
+
+    self._TimeVariants(ListDirectory, "List /")
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
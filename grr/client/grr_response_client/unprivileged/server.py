@@ -25,6 +25,16 @@ def _MakeServerArgs(channel: communication.Channel,
       "--unprivileged_group",
       config.CONFIG["Client.unprivileged_group"],
   ]
+  if channel.shared_memory_input is not None:
+    named_flags.extend([
+        "--unprivileged_server_shared_memory_input",
+        str(channel.shared_memory_input.Serialize()),
+    ])
+  if channel.shared_memory_output is not None:
+    named_flags.extend([
+        "--unprivileged_server_shared_memory_output",
+        str(channel.shared_memory_output.Serialize()),
+    ])
 
   # PyInstaller executable
   if getattr(sys, "frozen", False):
@@ -43,5 +53,7 @@ def CreateServer(
     interface: interface_registry.Interface) -> communication.Server:
   server = communication.SubprocessServer(
       lambda channel: _MakeServerArgs(channel, interface),
-      extra_file_descriptors)
+      extra_file_descriptors,
+      shared_memory_size=config.CONFIG[
+          "Client.unprivileged_shared_memory_size"])
   return server
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 """Entry point of filesystem server."""
 
+from typing import Optional
+
 from absl import flags
 
 from grr_response_client.unprivileged import communication
@@ -14,6 +16,14 @@ flags.DEFINE_integer(
     "unprivileged_server_pipe_output", -1,
     "The file descriptor of the output pipe used for communication.")
 
+flags.DEFINE_integer(
+    "unprivileged_server_shared_memory_input", -1,
+    "The file descriptor of the shared memory used for input attachments.")
+
+flags.DEFINE_integer(
+    "unprivileged_server_shared_memory_output", -1,
+    "The file descriptor of the shared memory used for output attachments.")
+
 flags.DEFINE_string("unprivileged_server_interface", "",
                     "The name of the RPC interface used.")
 
@@ -24,12 +34,20 @@ flags.DEFINE_string("unprivileged_group", "",
                     "Name of group to run unprivileged server as.")
 
 
+def _OptionalFileDescriptor(value: int) -> Optional[int]:
+  return None if value == -1 else value
+
+
 def main(argv):
   del argv
   communication.Main(
       communication.Channel.FromSerialized(
           pipe_input=flags.FLAGS.unprivileged_server_pipe_input,
-          pipe_output=flags.FLAGS.unprivileged_server_pipe_output),
+          pipe_output=flags.FLAGS.unprivileged_server_pipe_output,
+          shared_memory_input=_OptionalFileDescriptor(
+              flags.FLAGS.unprivileged_server_shared_memory_input),
+          shared_memory_output=_OptionalFileDescriptor(
+              flags.FLAGS.unprivileged_server_shared_memory_output)),
       interface_registry.GetConnectionHandlerForInterfaceString(
           flags.FLAGS.unprivileged_server_interface),
       flags.FLAGS.unprivileged_user, flags.FLAGS.unprivileged_group)
@@ -15,6 +15,7 @@ from grr_response_client.vfs_handlers import base as vfs_base
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
 from grr_response_core.lib.rdfvalues import paths as rdf_paths
+from grr_response_core.lib.util import cache
 from grr_response_core.lib.util import filesystem
 
 
@@ -40,11 +41,11 @@ class LockedFileHandle(object):
       self.fd.close()
 
 
-class FileHandleCache(utils.TimeBasedCache):
+class FileHandleCache(cache.LRUCache[Text, LockedFileHandle]):
   """Cache that closes file descriptors when they're no longer needed."""
 
-  def KillObject(self, obj: utils.TimeBasedCacheEntry[LockedFileHandle]):
-    obj.value.Close()
+  def KillObject(self, value: LockedFileHandle) -> None:
+    value.Close()
 
 
 # File handles are cached here. After expiration, the file handle is garbage
@@ -54,7 +55,8 @@ class FileHandleCache(utils.TimeBasedCache):
 # tables. Since VFSHandlers have no de-facto support for context managers, it is
 # hard to determine when the file can be freed again, thus this caching is hard
 # to remove.
-FILE_HANDLE_CACHE = FileHandleCache(max_age=30)
+FILE_HANDLE_CACHE = FileHandleCache(
+    "file_handles", max_age=30, sweep_expired=True)
 
 
 # TODO: Globbing uses VFS handlers which cache file handles causing
@@ -64,8 +66,6 @@ FILE_HANDLE_CACHE = FileHandleCache(max_age=30)
 # method can be removed but for now, we have to empty the cache manually.
 def FlushHandleCache() -> None:
   """Flushes the handle cache closing all cached files and releasing locks."""
-  for _, entry in FILE_HANDLE_CACHE:
-    entry.value.Close()
   FILE_HANDLE_CACHE.Flush()
 
 
@@ -76,11 +76,8 @@ class FileHandleManager(object):
     self.filename = filename
 
   def __enter__(self):
-    try:
-      self.fd = FILE_HANDLE_CACHE.Get(self.filename)
-    except KeyError:
-      self.fd = LockedFileHandle(self.filename, mode="rb")
-      FILE_HANDLE_CACHE.Put(self.filename, self.fd)
+    self.fd = FILE_HANDLE_CACHE.GetOrLoad(
+        self.filename, lambda: LockedFileHandle(self.filename, mode="rb"))
 
     # Wait for exclusive access to this file handle.
     self.fd.lock.acquire()
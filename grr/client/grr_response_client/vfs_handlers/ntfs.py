@@ -12,10 +12,12 @@ from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
 from grr_response_core.lib.rdfvalues import paths as rdf_paths
+from grr_response_core.lib.util import cache
 
 
 # Caches pyfsntfs.volume instances.
-MOUNT_CACHE = utils.TimeBasedCache()
+MOUNT_CACHE = cache.LRUCache(
+    "ntfs_volumes", max_age=600, sweep_expired=True)
 
 
 # See
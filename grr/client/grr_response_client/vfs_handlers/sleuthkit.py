@@ -12,11 +12,13 @@ from grr_response_client.vfs_handlers import base as vfs_base
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
 from grr_response_core.lib.rdfvalues import paths as rdf_paths
+from grr_response_core.lib.util import cache
 from grr_response_core.lib.util import precondition
 
 # A central Cache for vfs handlers. This can be used to keep objects alive
 # for a limited time.
-DEVICE_CACHE = utils.TimeBasedCache()
+DEVICE_CACHE = cache.LRUCache(
+    "tsk_devices", max_age=600, sweep_expired=True)
 
 
 def _DecodeUTF8WithWarning(string):
@@ -3,6 +3,7 @@
 
 
 from grr_response_core.lib import config_lib
+from grr_response_core.lib import rdfvalue
 
 config_lib.DEFINE_list("Artifacts.artifact_dirs", [
     "%(grr_response_core/artifacts@grr-response-core|resource)",
@@ -10,6 +11,13 @@ config_lib.DEFINE_list("Artifacts.artifact_dirs", [
     "%(grr_response_core/artifacts/local@grr-response-core|resource)"
 ], "A list directories to load artifacts from.")
 
+config_lib.DEFINE_string(
+    "Artifacts.registry_snapshot_path", "",
+    "If set, artifacts loaded from Artifacts.artifact_dirs are stored in a"
+    " binary snapshot at this path. Processes starting later load the"
+    " snapshot instead of parsing the artifact files again, as long as the"
+    " files haven't changed.")
+
 config_lib.DEFINE_list(
     "Artifacts.knowledge_base", [
     ], "List of artifacts that are collected regularly by"
@@ -45,6 +53,17 @@ config_lib.DEFINE_list(
     " or slow to collect regularly from all machines.",
 )
 
+config_lib.DEFINE_bool(
+    "Artifacts.knowledge_base_batched", False,
+    "If true, interrogate sends all knowledge base artifacts to the client"
+    " in a single request instead of collecting them one by one.")
+
+config_lib.DEFINE_semantic_value(
+    rdfvalue.Duration, "Artifacts.knowledge_base_max_age",
+    rdfvalue.Duration.From(0, rdfvalue.SECONDS),
+    "If non-zero, interrogate reuses a knowledge base collected for the client"
+    " within this time instead of collecting it again.")
+
 config_lib.DEFINE_list(
     "Artifacts.netgroup_filter_regexes", [],
     help="Only parse groups that match one of these regexes"
@@ -152,6 +152,13 @@ config_lib.DEFINE_string(
     help="Name of (UNIX) group to run sandboxed code as.",
     default="")
 
+config_lib.DEFINE_integer(
+    name="Client.unprivileged_shared_memory_size",
+    help="Size of the shared memory buffers used to pass large data to and "
+    "from sandboxed code, in each direction. Only supported on Linux. If 0, "
+    "all data is passed through pipes.",
+    default=16 * 1024 * 1024)
+
 # Windows client specific options.
 config_lib.DEFINE_string(
     "Client.config_hive",
@@ -50,6 +50,16 @@ config_lib.DEFINE_integer(
     help="The maximum number of flow-processing worker threads.",
 )
 
+config_lib.DEFINE_integer(
+    "Mysql.path_info_cache_max_age",
+    default=0,
+    help="Number of seconds for which latest path infos read from the "
+    "database are cached. Path infos written by other processes (e.g. by "
+    "workers collecting files) are not visible to a process until its cached "
+    "entries expire, so this should only be enabled when stale reads are "
+    "acceptable. 0 disables the cache.",
+)
+
 config_lib.DEFINE_string(
     "Mysql.migrations_dir", "%(grr_response_server/databases/mysql_migrations@"
     "grr-response-server|resource)", "Folder with MySQL migrations files.")
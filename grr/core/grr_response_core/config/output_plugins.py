@@ -79,3 +79,35 @@ config_lib.DEFINE_bool(
 
 config_lib.DEFINE_string("Elasticsearch.index", "grr-flows",
                          "The index assigned to all submitted events.")
+
+# Output plugin delivery
+config_lib.DEFINE_bool(
+    "OutputPlugins.async_delivery", False,
+    "If True, results of hunt flows are queued in the database and delivered "
+    "to the hunt's output plugins in batches by the workers' message handler "
+    "threads instead of being processed right after each flow step.")
+
+config_lib.DEFINE_integer(
+    "OutputPlugins.delivery_max_attempts", 5,
+    "Total number of times queued results are delivered to an output plugin "
+    "before they are dropped.")
+
+config_lib.DEFINE_semantic_value(
+    rdfvalue.Duration, "OutputPlugins.delivery_retry_interval", "1m",
+    "Time to wait before the first retry of a failed delivery. The interval "
+    "doubles with each subsequent retry.")
+
+config_lib.DEFINE_integer(
+    "OutputPlugins.state_shards", 1,
+    "Number of database rows the state updates of an output plugin of a hunt "
+    "are spread over. Workers pick one at random, so that they don't contend "
+    "on a single row. Only plugins whose state consists of counters support "
+    "this, the states of other plugins are always kept in a single row.")
+
+# Export converters
+config_lib.DEFINE_integer(
+    "Export.converter_processes", 0,
+    "Number of worker processes converting results to their exported form "
+    "for instant output plugins. Only converters that don't access the data "
+    "store are run in worker processes. If 0, all results are converted in "
+    "the exporting process.")
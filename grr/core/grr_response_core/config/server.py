@@ -39,6 +39,12 @@ config_lib.DEFINE_integer(
     "Worker.queue_shards", 5, "Queue notifications will be sharded across "
     "this number of datastore subjects.")
 
+config_lib.DEFINE_integer(
+    "Worker.flow_state_cache_size", 0,
+    "Number of deserialized flow states a worker keeps between processing "
+    "rounds. When the same worker processes the next round of a flow, its "
+    "state doesn't have to be deserialized again. 0 disables the cache.")
+
 config_lib.DEFINE_list("Frontend.well_known_flows", [], "Unused, Deprecated.")
 
 # Smtp settings.
@@ -127,6 +133,20 @@ config_lib.DEFINE_integer(
     "Maximum time messages remain valid within the "
     "system.")
 
+config_lib.DEFINE_integer(
+    "Frontend.ingestion_batch_size", 1000,
+    "Maximum number of flow responses and message handler requests received "
+    "from clients that are written to the database in a single batch.")
+
+config_lib.DEFINE_semantic_value(
+    rdfvalue.Duration,
+    "Frontend.ingestion_batch_latency",
+    default=rdfvalue.Duration.From(0, rdfvalue.SECONDS),
+    help="How long the frontend waits for messages from other clients before "
+    "writing a batch of flow responses and message handler requests. With no "
+    "delay, only messages arriving while the previous batch is being written "
+    "are batched together.")
+
 config_lib.DEFINE_bool(
     "Server.initialized", False, "True once config_updater initialize has been "
     "run at least once.")
@@ -245,6 +265,52 @@ config_lib.DEFINE_string(
     help="Inactive clients marked with "
     "this label will be retained forever.")
 
+config_lib.DEFINE_semantic_value(
+    rdfvalue.Duration,
+    "DataRetention.flow_results_ttl",
+    default=None,
+    help="Time after which results of flows that are not part of a hunt are "
+    "deleted. If not set, flow results will be retained forever.")
+
+config_lib.DEFINE_semantic_value(
+    rdfvalue.Duration,
+    "DataRetention.hunt_results_ttl",
+    default=None,
+    help="Time after which results of hunt flows are deleted. If not set, hunt "
+    "results will be retained forever.")
+
+config_lib.DEFINE_semantic_value(
+    rdfvalue.Duration,
+    "DataRetention.flow_log_entries_ttl",
+    default=None,
+    help="Time after which flow log entries are deleted. If not set, flow log "
+    "entries will be retained forever.")
+
+config_lib.DEFINE_semantic_value(
+    rdfvalue.Duration,
+    "DataRetention.flow_requests_ttl",
+    default=None,
+    help="Time after which requests and responses left behind by flows that "
+    "are not running are deleted. If not set, they will be retained forever.")
+
+config_lib.DEFINE_semantic_value(
+    rdfvalue.Duration,
+    "DataRetention.hash_blob_references_ttl",
+    default=None,
+    help="Time after which blob references of file contents that no path "
+    "refers to are deleted unless they are written again. Shorter values than "
+    "10 hours are ignored. If not set, they will be retained forever.")
+
+config_lib.DEFINE_integer(
+    "DataRetention.purge_batch_size", 5000,
+    "Maximum number of rows deleted by data retention in a single "
+    "transaction.")
+
+config_lib.DEFINE_float(
+    "DataRetention.purge_sleep_coefficient", 1.0,
+    "After deleting a batch, data retention pauses for the time it took "
+    "multiplied by this coefficient, leaving time for replicas to catch up.")
+
 config_lib.DEFINE_float(
     "Hunt.default_client_rate",
     default=20.0,
@@ -325,6 +391,20 @@ config_lib.DEFINE_integer(
     help="Maximum number of client ids to place in a single Fleetspeak "
     "ListClients() API request.")
 
+config_lib.DEFINE_bool(
+    "Server.fleetspeak_send_message_lists",
+    default=False,
+    help="If True, all messages sent to a Fleetspeak client in a single flow "
+    "step are packed into one MessageList. Requires clients that accept "
+    "MessageLists.")
+
+config_lib.DEFINE_integer(
+    "Server.fleetspeak_send_max_in_flight",
+    default=1,
+    help="Maximum number of concurrent InsertMessage calls made by the "
+    "process when sending batches of messages to Fleetspeak. Messages of a "
+    "batch may be delivered out of order if greater than 1.")
+
 config_lib.DEFINE_semantic_enum(
     rdf_paths.PathSpec.PathType,
     "Server.raw_filesystem_access_pathtype",
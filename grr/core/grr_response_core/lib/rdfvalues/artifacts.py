@@ -352,6 +352,22 @@ class Artifact(rdf_structs.RDFProtoStruct):
     return yaml.safe_dump(ordered_artifact_dict)
 
 
+class ArtifactSourceFile(rdf_structs.RDFProtoStruct):
+  """A file artifacts were loaded from."""
+  protobuf = artifact_pb2.ArtifactSourceFile
+  rdf_deps = [
+      Artifact,
+  ]
+
+
+class ArtifactRegistrySnapshot(rdf_structs.RDFProtoStruct):
+  """A serialized snapshot of the artifacts loaded from files."""
+  protobuf = artifact_pb2.ArtifactRegistrySnapshot
+  rdf_deps = [
+      ArtifactSourceFile,
+  ]
+
+
 class ArtifactProcessorDescriptor(rdf_structs.RDFProtoStruct):
   """Describes artifact processor."""
 
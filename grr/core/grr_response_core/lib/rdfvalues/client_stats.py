@@ -124,6 +124,125 @@ class ClientStats(rdf_structs.RDFProtoStruct):
       yield kind.FromMany(bucket)
 
 
+class ClientStatsRollup(rdf_structs.RDFProtoStruct):
+  """Aggregates of client stats samples within a period of time."""
+  protobuf = jobs_pb2.ClientStatsRollup
+  rdf_deps = [
+      rdfvalue.DurationSeconds,
+      rdfvalue.RDFDatetime,
+  ]
+
+  # Counters (e.g. CPU times) only ever grow, so similarly to `FromMany` of
+  # samples, the biggest value is representative for the whole period.
+  _SUM_FIELDS = [
+      "cpu_sample_count", "cpu_percent_sum", "io_sample_count", "stats_count",
+      "RSS_size_sum", "VMS_size_sum", "memory_percent_sum"
+  ]
+  _MAX_FIELDS = [
+      "cpu_percent_max", "user_cpu_time", "system_cpu_time", "read_count",
+      "write_count", "read_bytes", "write_bytes", "RSS_size_max",
+      "bytes_received", "bytes_sent"
+  ]
+
+  @classmethod
+  def FromClientStats(cls, stats, resolution):
+    """Aggregates samples of given stats into rollups of given resolution.
+
+    Args:
+      stats: A `ClientStats` instance.
+      resolution: A `Duration` of the periods to aggregate samples in.
+
+    Returns:
+      A list of `ClientStatsRollup` instances, one for every period with
+      samples, sorted by timestamp.
+    """
+    rollups = {}
+
+    def Add(timestamp, **kwargs):
+      start = timestamp.Floor(resolution)
+      sample_rollup = cls(timestamp=start, resolution=resolution, **kwargs)
+      if start in rollups:
+        rollups[start].Merge(sample_rollup)
+      else:
+        rollups[start] = sample_rollup
+
+    for sample in stats.cpu_samples:
+      Add(sample.timestamp,
+          cpu_sample_count=1,
+          cpu_percent_sum=sample.cpu_percent,
+          cpu_percent_max=sample.cpu_percent,
+          user_cpu_time=sample.user_cpu_time,
+          system_cpu_time=sample.system_cpu_time)
+
+    for sample in stats.io_samples:
+      Add(sample.timestamp,
+          io_sample_count=1,
+          read_count=sample.read_count,
+          write_count=sample.write_count,
+          read_bytes=sample.read_bytes,
+          write_bytes=sample.write_bytes)
+
+    if stats.HasField("timestamp"):
+      Add(stats.timestamp,
+          stats_count=1,
+          RSS_size_sum=stats.RSS_size,
+          RSS_size_max=stats.RSS_size,
+          VMS_size_sum=stats.VMS_size,
+          memory_percent_sum=stats.memory_percent,
+          bytes_received=stats.bytes_received,
+          bytes_sent=stats.bytes_sent)
+
+    return [rollup for _, rollup in sorted(rollups.items())]
+
+  def Merge(self, other):
+    """Adds aggregates of another rollup of the same period to this one.
+
+    Args:
+      other: A `ClientStatsRollup` instance.
+
+    Raises:
+      ValueError: If `other` aggregates a different period.
+    """
+    if (self.timestamp != other.timestamp or
+        self.resolution != other.resolution):
+      raise ValueError("Can't merge rollups of different periods")
+
+    for name in self._SUM_FIELDS:
+      self.Set(name, self.Get(name) + other.Get(name))
+    for name in self._MAX_FIELDS:
+      self.Set(name, max(self.Get(name), other.Get(name)))
+
+  def ToClientStats(self):
+    """Returns a single `ClientStats` sample representing this rollup."""
+    stats = ClientStats(timestamp=self.timestamp)
+
+    if self.cpu_sample_count:
+      stats.cpu_samples.Append(
+          CpuSample(
+              timestamp=self.timestamp,
+              cpu_percent=self.cpu_percent_sum / self.cpu_sample_count,
+              user_cpu_time=self.user_cpu_time,
+              system_cpu_time=self.system_cpu_time))
+
+    if self.io_sample_count:
+      stats.io_samples.Append(
+          IOSample(
+              timestamp=self.timestamp,
+              read_count=self.read_count,
+              write_count=self.write_count,
+              read_bytes=self.read_bytes,
+              write_bytes=self.write_bytes))
+
+    if self.stats_count:
+      stats.RSS_size = round(self.RSS_size_sum / self.stats_count)
+      stats.VMS_size = round(self.VMS_size_sum / self.stats_count)
+      stats.memory_percent = self.memory_percent_sum / self.stats_count
+      stats.bytes_received = self.bytes_received
+      stats.bytes_sent = self.bytes_sent
+
+    return stats
+
+
 class ClientResources(rdf_structs.RDFProtoStruct):
   """An RDFValue class representing the client resource usage."""
   protobuf = jobs_pb2.ClientResources
@@ -380,6 +380,138 @@ class ClientStatsTest(absltest.TestCase):
     self.assertEqual(actual, expected)
 
 
+class ClientStatsRollupTest(absltest.TestCase):
+
+  def _Stats(self):
+    timestamp = rdfvalue.RDFDatetime.FromHumanReadable
+
+    return rdf_client_stats.ClientStats(
+        timestamp=timestamp("2001-01-01 00:12"),
+        RSS_size=100,
+        VMS_size=200,
+        memory_percent=0.5,
+        bytes_received=1000,
+        bytes_sent=2000,
+        cpu_samples=[
+            rdf_client_stats.CpuSample(
+                timestamp=timestamp("2001-01-01 00:00"),
+                user_cpu_time=2.5,
+                system_cpu_time=3.25,
+                cpu_percent=0.5),
+            rdf_client_stats.CpuSample(
+                timestamp=timestamp("2001-01-01 00:05"),
+                user_cpu_time=2.75,
+                system_cpu_time=4.75,
+                cpu_percent=0.75),
+            rdf_client_stats.CpuSample(
+                timestamp=timestamp("2001-01-01 00:12"),
+                user_cpu_time=12.5,
+                system_cpu_time=14.5,
+                cpu_percent=0.25),
+        ],
+        io_samples=[
+            rdf_client_stats.IOSample(
+                timestamp=timestamp("2001-01-01 00:02"),
+                read_count=3,
+                write_count=5),
+            rdf_client_stats.IOSample(
+                timestamp=timestamp("2001-01-01 00:12"),
+                read_count=6,
+                write_count=8),
+        ])
+
+  def testFromClientStats(self):
+    timestamp = rdfvalue.RDFDatetime.FromHumanReadable
+    resolution = rdfvalue.Duration.From(10, rdfvalue.MINUTES)
+
+    rollups = rdf_client_stats.ClientStatsRollup.FromClientStats(
+        self._Stats(), resolution)
+
+    self.assertEqual(rollups, [
+        rdf_client_stats.ClientStatsRollup(
+            timestamp=timestamp("2001-01-01 00:00"),
+            resolution=resolution,
+            cpu_sample_count=2,
+            cpu_percent_sum=1.25,
+            cpu_percent_max=0.75,
+            user_cpu_time=2.75,
+            system_cpu_time=4.75,
+            io_sample_count=1,
+            read_count=3,
+            write_count=5),
+        rdf_client_stats.ClientStatsRollup(
+            timestamp=timestamp("2001-01-01 00:10"),
+            resolution=resolution,
+            cpu_sample_count=1,
+            cpu_percent_sum=0.25,
+            cpu_percent_max=0.25,
+            user_cpu_time=12.5,
+            system_cpu_time=14.5,
+            io_sample_count=1,
+            read_count=6,
+            write_count=8,
+            stats_count=1,
+            RSS_size_sum=100,
+            RSS_size_max=100,
+            VMS_size_sum=200,
+            memory_percent_sum=0.5,
+            bytes_received=1000,
+            bytes_sent=2000),
+    ])
+
+  def testMerge(self):
+    resolution = rdfvalue.Duration.From(1, rdfvalue.HOURS)
+    stats = self._Stats()
+    (rollup,) = rdf_client_stats.ClientStatsRollup.FromClientStats(
+        stats, resolution)
+
+    stats.timestamp += rdfvalue.Duration.From(1, rdfvalue.MINUTES)
+    stats.RSS_size = 300
+    stats.cpu_samples = []
+    stats.io_samples = []
+    (other,) = rdf_client_stats.ClientStatsRollup.FromClientStats(
+        stats, resolution)
+    rollup.Merge(other)
+
+    self.assertEqual(rollup.cpu_sample_count, 3)
+    self.assertEqual(rollup.stats_count, 2)
+    self.assertEqual(rollup.RSS_size_sum, 400)
+    self.assertEqual(rollup.RSS_size_max, 300)
+    self.assertEqual(rollup.bytes_received, 1000)
+
+  def testMergeRaisesOnDifferentPeriods(self):
+    resolution = rdfvalue.Duration.From(10, rdfvalue.MINUTES)
+    first, second = rdf_client_stats.ClientStatsRollup.FromClientStats(
+        self._Stats(), resolution)
+
+    with self.assertRaises(ValueError):
+      first.Merge(second)
+
+  def testToClientStats(self):
+    timestamp = rdfvalue.RDFDatetime.FromHumanReadable
+    (rollup,) = rdf_client_stats.ClientStatsRollup.FromClientStats(
+        self._Stats(), rdfvalue.Duration.From(1, rdfvalue.HOURS))
+
+    stats = rollup.ToClientStats()
+
+    self.assertEqual(stats.timestamp, timestamp("2001-01-01 00:00"))
+    self.assertLen(stats.cpu_samples, 1)
+    self.assertAlmostEqual(stats.cpu_samples[0].cpu_percent, 0.5)
+    self.assertEqual(stats.cpu_samples[0].user_cpu_time, 12.5)
+    self.assertEqual(stats.cpu_samples[0].system_cpu_time, 14.5)
+    self.assertEqual(stats.io_samples, [
+        rdf_client_stats.IOSample(
+            timestamp=timestamp("2001-01-01 00:00"),
+            read_count=6,
+            write_count=8,
+            read_bytes=0,
+            write_bytes=0)
+    ])
+    self.assertEqual(stats.RSS_size, 100)
+    self.assertEqual(stats.VMS_size, 200)
+    self.assertEqual(stats.bytes_sent, 2000)
+
+
 class ProcessTest(absltest.TestCase):
 
   def testFromPsutilProcess(self):
@@ -216,6 +216,35 @@ class Dict(rdf_structs.RDFProtoStruct):
     self.dat = self._values.values()  # pytype: disable=annotation-type-mismatch
     return self
 
+  def UpdateFromDict(self, dictionary, changed_keys, raise_on_error=True):
+    """Sets the contents from a dictionary, converting only changed values.
+
+    Entries of keys that are not in `changed_keys` are assumed to be equal to
+    the current ones and are kept as they are, which saves converting and
+    serializing their values again.
+
+    Args:
+      dictionary: The dictionary to set the contents from.
+      changed_keys: Keys whose values differ from the current ones.
+      raise_on_error: if True, raise if we can't serialize.
+
+    Returns:
+      This Dict.
+    """
+    values = {}
+    for key in dictionary:
+      entry = self._values.get(key)
+      if entry is None or key in changed_keys:
+        entry = KeyValue(
+            k=DataBlob().SetValue(key, raise_on_error=raise_on_error),
+            v=DataBlob().SetValue(
+                dictionary[key], raise_on_error=raise_on_error))
+      values[key] = entry
+
+    self._values = values
+    self.dat = self._values.values()  # pytype: disable=annotation-type-mismatch
+    return self
+
   def __getitem__(self, key):
     return self._values[key].v.GetValue()
 
@@ -235,6 +235,26 @@ class DictSimpleTest(absltest.TestCase):
     }
     self.assertEqual(rdf_protodict.Dict(dct).ToDict(), dct)
 
+  def testUpdateFromDictConvertsOnlyChangedKeys(self):
+    dct = rdf_protodict.Dict.FromSerializedBytes(
+        rdf_protodict.Dict({
+            "foo": 1,
+            "bar": [2],
+            "baz": 3,
+        }).SerializeToBytes())
+
+    # "bar" is not converted again because it's not marked as changed.
+    dct.UpdateFromDict({
+        "foo": 4,
+        "bar": [5],
+        "quux": 6,
+    }, changed_keys={"foo", "quux"})
+
+    self.assertEqual(dct.ToDict(), {"foo": 4, "bar": [2], "quux": 6})
+    self.assertEqual(
+        rdf_protodict.Dict.FromSerializedBytes(dct.SerializeToBytes()).ToDict(),
+        {"foo": 4, "bar": [2], "quux": 6})
+
 
 class AttributedDictTest(rdf_test_base.RDFValueTestMixin, test_lib.GRRBaseTest):
   """Test AttributedDictFile operations."""
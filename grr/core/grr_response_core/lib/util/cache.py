@@ -1,19 +1,41 @@
 #!/usr/bin/env python
 """This file contains cache-related utility functions used by GRR."""
 
+import collections
 import functools
 import logging
+import re
 import threading
-from typing import Any, Callable, TypeVar
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import Hashable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+import weakref
 
 from grr_response_core.lib import rdfvalue
+from grr_response_core.stats import metrics
 
 WITH_LIMITED_CALL_FREQUENCY_PASS_THROUGH = False
 
+CACHE_LOOKUPS = metrics.Counter(
+    "cache_lookups", fields=[("cache", str), ("result", str)])
+CACHE_EVICTIONS = metrics.Counter(
+    "cache_evictions", fields=[("cache", str), ("reason", str)])
+
 _F = TypeVar("_F", bound=Callable[..., Any])
 
 _FVoid = TypeVar("_FVoid", bound=Callable[..., None])
 
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
 
 def WithLimitedCallFrequency(
     min_time_between_calls: rdfvalue.Duration,
@@ -297,3 +319,377 @@ def WithLimitedCallFrequencyWithoutReturnValue(
     return Fn
 
   return Decorated
+
+
+class _Entry(Generic[_V]):
+  """A value stored in the `LRUCache` together with its timestamp."""
+
+  __slots__ = ("value", "timestamp")
+
+  def __init__(self, value: _V, timestamp: float):
+    self.value = value
+    self.timestamp = timestamp
+
+
+class _LoadLock:
+  """A lock serializing loads of a single key with a count of its users."""
+
+  __slots__ = ("lock", "users")
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.users = 0
+
+
+_SWEPT_CACHES: "weakref.WeakSet[LRUCache]" = weakref.WeakSet()
+_SWEPT_CACHES_LOCK = threading.Lock()
+
+
+def SweepExpiredCaches() -> None:
+  """Removes and cleans up expired values of caches created with sweep_expired.
+
+  Meant to be called by processes that are idle, which don't use their caches
+  and thus don't expire their entries otherwise.
+  """
+  with _SWEPT_CACHES_LOCK:
+    caches = list(_SWEPT_CACHES)
+
+  for c in caches:
+    try:
+      c.SweepExpired()
+    except Exception:  # pylint: disable=broad-except
+      logging.exception("Failed to sweep expired entries of a cache.")
+
+
+class LRUCache(Generic[_K, _V]):
+  """A thread-safe LRU cache with optional time-based expiry.
+
+  Entries are kept in an `OrderedDict` in the order of their last use, so that
+  all operations take constant time. Entries older than `max_age` are expired
+  lazily: when they are looked up and when other entries are written. Thus, an
+  expired entry of an idle cache stays in memory until the cache is used or
+  flushed. Caches whose values hold resources (e.g. open files) should be
+  created with `sweep_expired`: all their expired entries are then removed by
+  `Get` and `Put` at least every `max_age` seconds and by
+  `SweepExpiredCaches`, which idle processes call.
+
+  Subclasses can release resources held by evicted values by overriding
+  `KillObject`. It is called for entries dropped because of the size limit or
+  their age and for entries removed with `ExpireObject` or `Flush`, but not
+  for entries removed with `Pop` or replaced with `Put`.
+
+  Lookups and evictions are counted by the `cache_lookups` and
+  `cache_evictions` metrics, using the cache name as a field value. Lookups of
+  `GetOrLoad` that missed, but got a value loaded by a concurrent call, are
+  additionally counted as "coalesced". Updating a metric costs about as much
+  as a cache operation, so counts are accumulated locally and exported at
+  most every `METRICS_EXPORT_INTERVAL` seconds (when the cache is used) or on
+  `ExportMetrics` calls.
+  """
+
+  METRICS_EXPORT_INTERVAL = 1.0
+
+  def __init__(self,
+               name: str,
+               max_size: int = 10,
+               max_age: Optional[float] = None,
+               refresh_on_access: bool = True,
+               sweep_expired: bool = False):
+    """Constructor.
+
+    Args:
+      name: A name of the cache used as a metric field value.
+      max_size: The maximum number of entries held in the cache.
+      max_age: The maximum age of an entry in seconds. If None, entries don't
+        expire.
+      refresh_on_access: If true, the age of an entry is the time since it was
+        last used. Otherwise, it is the time since the entry was written.
+      sweep_expired: If true, all expired entries are periodically removed
+        when the cache is used and by `SweepExpiredCaches`.
+    """
+    self._name = name
+    self._max_size = max_size
+    self._max_age = max_age
+    self._refresh_on_access = refresh_on_access
+    self._entries: "collections.OrderedDict[_K, _Entry[_V]]" = (
+        collections.OrderedDict())
+    self._load_locks: Dict[_K, _LoadLock] = {}
+    self.lock = threading.RLock()
+
+    self._hits = 0
+    self._misses = 0
+    self._coalesced = 0
+    self._size_evictions = 0
+    self._age_evictions = 0
+    self._metrics_export_time = time.time()
+
+    self._sweep_time: Optional[float] = None
+    if sweep_expired and max_age is not None:
+      self._sweep_time = time.time() + max_age
+      with _SWEPT_CACHES_LOCK:
+        _SWEPT_CACHES.add(self)
+
+  def KillObject(self, value: _V) -> None:
+    """Performs cleanup on values that are evicted from the cache.
+
+    Should be overridden by classes which need to perform special cleanup.
+
+    Args:
+      value: The value which was stored in the cache and is now evicted.
+    """
+
+  def ExportMetrics(self) -> None:
+    """Adds counts accumulated since the last export to the metrics."""
+    with self.lock:
+      counts = [
+          (CACHE_LOOKUPS, "hit", self._hits),
+          (CACHE_LOOKUPS, "miss", self._misses),
+          (CACHE_LOOKUPS, "coalesced", self._coalesced),
+          (CACHE_EVICTIONS, "size", self._size_evictions),
+          (CACHE_EVICTIONS, "age", self._age_evictions),
+      ]
+      self._hits = 0
+      self._misses = 0
+      self._coalesced = 0
+      self._size_evictions = 0
+      self._age_evictions = 0
+      self._metrics_export_time = time.time()
+
+    for metric, field, count in counts:
+      if count:
+        metric.Increment(count, fields=[self._name, field])
+
+  def _MaybeExportMetrics(self, now: float) -> None:
+    if now - self._metrics_export_time >= self.METRICS_EXPORT_INTERVAL:
+      self.ExportMetrics()
+
+  def _IsExpired(self, entry: _Entry[_V], now: float) -> bool:
+    return self._max_age is not None and entry.timestamp + self._max_age < now
+
+  def _EvictLocked(self, now: float) -> List[_V]:
+    """Removes entries above the size limit and expired ones at the front."""
+    evicted = []
+
+    while len(self._entries) > self._max_size:
+      _, entry = self._entries.popitem(last=False)
+      evicted.append(entry.value)
+      self._size_evictions += 1
+
+    if self._max_age is None:
+      return evicted
+
+    # With `refresh_on_access`, entries are ordered by their timestamps, so
+    # all expired entries are at the front. Otherwise, some expired entries
+    # might remain until they are looked up or pushed out by the size limit.
+    while self._entries:
+      entry = next(iter(self._entries.values()))
+      if not self._IsExpired(entry, now):
+        break
+      self._entries.popitem(last=False)
+      evicted.append(entry.value)
+      self._age_evictions += 1
+
+    return evicted
+
+  def _SweepLocked(self, now: float) -> List[_V]:
+    """Removes all expired entries, returning their values."""
+    if self._sweep_time is not None:
+      self._sweep_time = now + self._max_age
+
+    keys = [
+        key for key, entry in self._entries.items()
+        if self._IsExpired(entry, now)
+    ]
+    values = [self._entries.pop(key).value for key in keys]
+    self._age_evictions += len(values)
+    return values
+
+  def _MaybeSweepLocked(self, now: float) -> List[_V]:
+    if self._sweep_time is None or now < self._sweep_time:
+      return []
+    return self._SweepLocked(now)
+
+  def SweepExpired(self) -> None:
+    """Removes and cleans up all expired values."""
+    if self._max_age is None:
+      return
+
+    now = time.time()
+    with self.lock:
+      values = self._SweepLocked(now)
+
+    self._MaybeExportMetrics(now)
+    self._Kill(values)
+
+  def _Kill(self, values: List[_V]) -> None:
+    # Cleanup can be slow (e.g. closing files), so it is done without holding
+    # the lock.
+    for value in values:
+      self.KillObject(value)
+
+  def _GetLocked(self, key: _K, now: float) -> _Entry[_V]:
+    """Looks up an entry, raising KeyError for missing and expired ones."""
+    entry = self._entries[key]
+    if self._max_age is not None:
+      if entry.timestamp + self._max_age < now:
+        raise KeyError(key)
+      if self._refresh_on_access:
+        entry.timestamp = now
+
+    self._entries.move_to_end(key)
+    return entry
+
+  def _ExpireLocked(self, key: _K, now: float) -> Optional[_V]:
+    """Removes an expired entry of a given key, returning its value."""
+    entry = self._entries.get(key)
+    if entry is None or not self._IsExpired(entry, now):
+      return None
+
+    del self._entries[key]
+    self._age_evictions += 1
+    return entry.value
+
+  def Get(self, key: _K) -> _V:
+    """Fetches a value from the cache.
+
+    Values may be evicted from the cache at any time. Callers must always
+    handle the possibility of KeyError raised here.
+
+    Args:
+      key: The key used to access the value.
+
+    Returns:
+      The cached value.
+
+    Raises:
+      KeyError: If the key is not present in the cache or has expired.
+    """
+    now = time.time()
+    with self.lock:
+      try:
+        entry = self._GetLocked(key, now)
+      except KeyError:
+        entry = None
+        self._misses += 1
+        expired = self._ExpireLocked(key, now)
+      else:
+        self._hits += 1
+        expired = None
+      swept = self._MaybeSweepLocked(now)
+
+    self._MaybeExportMetrics(now)
+    if expired is not None:
+      self.KillObject(expired)
+    self._Kill(swept)
+    if entry is None:
+      raise KeyError(key)
+    return entry.value
+
+  def Put(self, key: _K, value: _V) -> None:
+    """Adds a value to the cache, replacing the previous value of the key."""
+    now = time.time()
+    with self.lock:
+      self._entries.pop(key, None)
+      self._entries[key] = _Entry(value, now)
+      evicted = self._EvictLocked(now)
+      evicted.extend(self._MaybeSweepLocked(now))
+
+    self._MaybeExportMetrics(now)
+    self._Kill(evicted)
+
+  def GetOrLoad(self, key: _K, load_fn: Callable[[], _V]) -> _V:
+    """Fetches a value from the cache, loading and caching it if needed.
+
+    Concurrent calls for the same key are coalesced: only one of them calls
+    `load_fn`, while the others wait for it and return the loaded value.
+    Loads of different keys don't block each other.
+
+    Args:
+      key: The key used to access the value.
+      load_fn: A function returning the value if it is not cached.
+
+    Returns:
+      The cached or loaded value.
+    """
+    try:
+      return self.Get(key)
+    except KeyError:
+      pass
+
+    with self.lock:
+      load_lock = self._load_locks.get(key)
+      if load_lock is None:
+        load_lock = _LoadLock()
+        self._load_locks[key] = load_lock
+      load_lock.users += 1
+
+    try:
+      with load_lock.lock:
+        with self.lock:
+          try:
+            entry = self._GetLocked(key, time.time())
+            self._coalesced += 1
+            return entry.value
+          except KeyError:
+            pass
+
+        value = load_fn()
+        self.Put(key, value)
+        return value
+    finally:
+      with self.lock:
+        load_lock.users -= 1
+        if not load_lock.users:
+          del self._load_locks[key]
+
+  def Pop(self, key: _K) -> Optional[_V]:
+    """Removes a value from the cache without cleaning it up."""
+    with self.lock:
+      entry = self._entries.pop(key, None)
+
+    return entry.value if entry is not None else None
+
+  def ExpireObject(self, key: _K) -> Optional[_V]:
+    """Removes a value from the cache and cleans it up."""
+    value = self.Pop(key)
+    if value is not None:
+      self.KillObject(value)
+    return value
+
+  def ExpirePrefix(self, prefix: Any) -> None:
+    """Removes and cleans up all values with keys having a given prefix."""
+    with self.lock:
+      keys = [key for key in self._entries if key.startswith(prefix)]
+    for key in keys:
+      self.ExpireObject(key)
+
+  def ExpireRegEx(self, regex: str) -> None:
+    """Removes and cleans up all values with keys matching a regex."""
+    reg = re.compile(regex)
+    with self.lock:
+      keys = [key for key in self._entries if reg.match(key)]
+    for key in keys:
+      self.ExpireObject(key)
+
+  def Flush(self) -> None:
+    """Removes and cleans up all values."""
+    with self.lock:
+      values = [entry.value for entry in self._entries.values()]
+      self._entries.clear()
+
+    self._Kill(values)
+
+  def __iter__(self) -> Iterator[Tuple[_K, _V]]:
+    """Iterates over a snapshot of (key, value) pairs in the cache."""
+    with self.lock:
+      items = [(key, entry.value) for key, entry in self._entries.items()]
+    return iter(items)
+
+  def __contains__(self, key: _K) -> bool:
+    now = time.time()
+    with self.lock:
+      entry = self._entries.get(key)
+      return entry is not None and not self._IsExpired(entry, now)
+
+  def __len__(self) -> int:
+    return len(self._entries)
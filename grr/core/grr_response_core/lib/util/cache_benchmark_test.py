@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""Benchmarks the LRU cache against the legacy FastStore."""
+
+from absl import app
+
+from grr_response_core.lib import utils
+from grr_response_core.lib.util import cache
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import test_lib
+
+
+class LRUCacheBenchmark(benchmark_test_lib.AverageMicroBenchmarks):
+  """Compares operations of `cache.LRUCache` and `utils.FastStore`."""
+
+  REPEATS = 10
+  units = "ms"
+
+  MAX_SIZE = 1000
+  OPERATIONS = 10000
+
+  def _Variants(self):
+    return [
+        ("FastStore", lambda: utils.FastStore(max_size=self.MAX_SIZE)),
+        ("TimeBasedCache",
+         lambda: utils.TimeBasedCache(max_size=self.MAX_SIZE, max_age=600)),
+        ("LRUCache", lambda: cache.LRUCache("benchmark", max_size=self.MAX_SIZE)
+        ),
+        ("LRUCache with max_age", lambda: cache.LRUCache(
+            "benchmark", max_size=self.MAX_SIZE, max_age=600)),
+    ]
+
+  def testPutAndGetHits(self):
+    """Puts followed by lookups of keys that are all cached."""
+    for name, factory in self._Variants():
+      store = factory()
+
+      def PutAndGet():
+        for i in range(self.OPERATIONS):
+          store.Put(i % self.MAX_SIZE, i)
+        for i in range(self.OPERATIONS):
+          store.Get(i % self.MAX_SIZE)  # pylint: disable=cell-var-from-loop
+
+      self.TimeIt(PutAndGet, name)
+
+  def testPutWithEvictions(self):
+    """Puts of distinct keys, each of which evicts another entry."""
+    for name, factory in self._Variants():
+      store = factory()
+
+      def PutMany():
+        for i in range(self.OPERATIONS):
+          store.Put(i, i)  # pylint: disable=cell-var-from-loop
+
+      self.TimeIt(PutMany, name)
+
+  def testGetMisses(self):
+    """Lookups of keys that are not cached."""
+    for name, factory in self._Variants():
+      store = factory()
+
+      def GetMisses():
+        for i in range(self.OPERATIONS):
+          try:
+            store.Get(i)  # pylint: disable=cell-var-from-loop
+          except KeyError:
+            pass
+
+      self.TimeIt(GetMisses, name)
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
@@ -1,12 +1,14 @@
 #!/usr/bin/env python
 import random
 import threading
+import time
 from unittest import mock
 
 from absl.testing import absltest
 
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.util import cache
+from grr.test_lib import stats_test_lib
 from grr.test_lib import test_lib
 
 
@@ -425,5 +427,220 @@ class WithLimitedCallFrequencyWithoutReturnValueTest(absltest.TestCase):
       decorated("blah")
 
 
+class _KillRecordingCache(cache.LRUCache):
+
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.killed = []
+
+  def KillObject(self, value):
+    self.killed.append(value)
+
+
+class LRUCacheTest(stats_test_lib.StatsTestMixin, absltest.TestCase):
+
+  def testGetReturnsPutValues(self):
+    c = cache.LRUCache("test", max_size=5)
+    c.Put("a", 1)
+    c.Put("b", 2)
+    c.Put("a", 3)
+
+    self.assertEqual(c.Get("a"), 3)
+    self.assertEqual(c.Get("b"), 2)
+    self.assertLen(c, 2)
+    self.assertIn("a", c)
+    with self.assertRaises(KeyError):
+      c.Get("c")
+
+  def testEvictsLeastRecentlyUsedEntries(self):
+    c = _KillRecordingCache("test", max_size=2)
+    c.Put("a", 1)
+    c.Put("b", 2)
+    c.Get("a")
+
+    with self.assertStatsCounterDelta(
+        1, cache.CACHE_EVICTIONS, fields=["test", "size"]):
+      c.Put("c", 3)
+      c.ExportMetrics()
+
+    self.assertEqual(c.killed, [2])
+    self.assertCountEqual(list(c), [("a", 1), ("c", 3)])
+
+  def testExpiresEntriesNotUsedForMaxAge(self):
+    c = _KillRecordingCache("test", max_size=5, max_age=10)
+
+    with mock.patch.object(time, "time", return_value=100):
+      c.Put("a", 1)
+      c.Put("b", 2)
+    with mock.patch.object(time, "time", return_value=105):
+      self.assertEqual(c.Get("a"), 1)
+    with mock.patch.object(time, "time", return_value=112):
+      # Put expires "b" lazily, while "a" has been refreshed by Get.
+      with self.assertStatsCounterDelta(
+          1, cache.CACHE_EVICTIONS, fields=["test", "age"]):
+        c.Put("c", 3)
+        c.ExportMetrics()
+      self.assertEqual(c.killed, [2])
+      self.assertEqual(c.Get("a"), 1)
+    with mock.patch.object(time, "time", return_value=200):
+      self.assertNotIn("c", c)
+      with self.assertRaises(KeyError):
+        c.Get("c")
+      self.assertEqual(c.killed, [2, 3])
+
+  def testExpiresEntriesWrittenMaxAgeAgoWithoutRefresh(self):
+    c = cache.LRUCache(
+        "test", max_size=5, max_age=10, refresh_on_access=False)
+
+    with mock.patch.object(time, "time", return_value=100):
+      c.Put("a", 1)
+    with mock.patch.object(time, "time", return_value=105):
+      self.assertEqual(c.Get("a"), 1)
+    with mock.patch.object(time, "time", return_value=111):
+      with self.assertRaises(KeyError):
+        c.Get("a")
+
+  def testCountsHitsAndMisses(self):
+    c = cache.LRUCache("test")
+    c.Put("a", 1)
+
+    with self.assertStatsCounterDelta(
+        1, cache.CACHE_LOOKUPS, fields=["test", "hit"]):
+      with self.assertStatsCounterDelta(
+          1, cache.CACHE_LOOKUPS, fields=["test", "miss"]):
+        c.Get("a")
+        with self.assertRaises(KeyError):
+          c.Get("b")
+        c.ExportMetrics()
+
+  def testExportsMetricsPeriodically(self):
+    with mock.patch.object(time, "time", return_value=100):
+      c = cache.LRUCache("test")
+
+    with self.assertStatsCounterDelta(
+        2, cache.CACHE_LOOKUPS, fields=["test", "miss"]):
+      with mock.patch.object(time, "time", return_value=100.5):
+        with self.assertRaises(KeyError):
+          c.Get("a")
+      with mock.patch.object(time, "time", return_value=101):
+        with self.assertRaises(KeyError):
+          c.Get("a")
+
+  def testPopDoesNotKillButExpireObjectAndFlushDo(self):
+    c = _KillRecordingCache("test", max_size=5)
+    c.Put("foo/a", 1)
+    c.Put("foo/b", 2)
+    c.Put("bar/c", 3)
+    c.Put("bar/d", 4)
+
+    self.assertEqual(c.Pop("foo/a"), 1)
+    self.assertIsNone(c.Pop("foo/a"))
+    self.assertEqual(c.killed, [])
+
+    self.assertEqual(c.ExpireObject("foo/b"), 2)
+    self.assertEqual(c.killed, [2])
+
+    c.ExpirePrefix("bar/c")
+    self.assertEqual(c.killed, [2, 3])
+
+    c.Flush()
+    self.assertEqual(c.killed, [2, 3, 4])
+    self.assertEmpty(c)
+
+  def testSweepExpiredKillsAllExpiredValues(self):
+    c = _KillRecordingCache("test", max_age=10, refresh_on_access=False)
+    with mock.patch.object(time, "time", return_value=100):
+      c.Put("a", 1)
+      c.Put("b", 2)
+    with mock.patch.object(time, "time", return_value=105):
+      c.Put("c", 3)
+      # Moves "a" to the end without refreshing its age.
+      c.Get("a")
+
+    with mock.patch.object(time, "time", return_value=111):
+      c.SweepExpired()
+
+    self.assertCountEqual(c.killed, [1, 2])
+    self.assertEqual(list(c), [("c", 3)])
+
+  def testPutSweepsAllExpiredValuesEveryMaxAge(self):
+    with mock.patch.object(time, "time", return_value=100):
+      c = _KillRecordingCache(
+          "test", max_age=10, refresh_on_access=False, sweep_expired=True)
+      c.Put("a", 1)
+    with mock.patch.object(time, "time", return_value=105):
+      c.Put("b", 2)
+      # Moves "a" behind "b" without refreshing its age.
+      c.Get("a")
+
+    with mock.patch.object(time, "time", return_value=111):
+      c.Put("c", 3)
+
+    self.assertEqual(c.killed, [1])
+    self.assertEqual(list(c), [("b", 2), ("c", 3)])
+
+  def testSweepExpiredCachesSweepsOnlyCachesCreatedWithSweepExpired(self):
+    with mock.patch.object(time, "time", return_value=100):
+      swept = _KillRecordingCache("test", max_age=10, sweep_expired=True)
+      swept.Put("a", 1)
+      unswept = _KillRecordingCache("test", max_age=10)
+      unswept.Put("a", 1)
+
+    with mock.patch.object(time, "time", return_value=111):
+      cache.SweepExpiredCaches()
+
+    self.assertEqual(swept.killed, [1])
+    self.assertEmpty(swept)
+    self.assertEqual(unswept.killed, [])
+    self.assertLen(unswept, 1)
+
+  def testGetOrLoadLoadsMissingValuesOnce(self):
+    c = cache.LRUCache("test")
+    load_fn = mock.Mock(return_value=42)
+
+    self.assertEqual(c.GetOrLoad("a", load_fn), 42)
+    self.assertEqual(c.GetOrLoad("a", load_fn), 42)
+    load_fn.assert_called_once()
+
+  def testGetOrLoadCoalescesConcurrentLoadsOfTheSameKey(self):
+    c = cache.LRUCache("test")
+    load_started = threading.Event()
+    finish_load = threading.Event()
+    load_fn = mock.Mock(return_value=42)
+
+    def SlowLoad():
+      load_started.set()
+      finish_load.wait()
+      return load_fn()
+
+    results = []
+    first = threading.Thread(
+        target=lambda: results.append(c.GetOrLoad("a", SlowLoad)))
+    first.start()
+    load_started.wait()
+
+    second = threading.Thread(
+        target=lambda: results.append(c.GetOrLoad("a", load_fn)))
+    second.start()
+    # Loads of other keys are not blocked by the pending load.
+    self.assertEqual(c.GetOrLoad("b", lambda: 1), 1)
+
+    finish_load.set()
+    first.join()
+    second.join()
+
+    self.assertEqual(results, [42, 42])
+    load_fn.assert_called_once()
+
+  def testGetOrLoadDoesNotCacheFailedLoads(self):
+    c = cache.LRUCache("test")
+
+    with self.assertRaises(ValueError):
+      c.GetOrLoad("a", mock.Mock(side_effect=ValueError()))
+
+    self.assertNotIn("a", c)
+    self.assertEqual(c.GetOrLoad("a", lambda: 1), 1)
+
+
 if __name__ == "__main__":
   absltest.main()
@@ -3,6 +3,9 @@
 
 
 import abc
+import bisect
+import threading
+import weakref
 
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import stats as rdf_stats
@@ -15,6 +18,68 @@ def _FieldsToKey(fields):
   return tuple(fields) if fields else ()
 
 
+class _ThreadShardedValues(object):
+  """Metric values accumulated in per-thread shards.
+
+  Every thread updates values in its own shard (a dictionary mapping metric
+  keys to values), so recording values requires no locking. Shards are merged
+  when values are read. Shards of threads that are no longer alive are folded
+  into a single dictionary on read, so the number of shards is bounded by the
+  number of live threads.
+  """
+
+  def __init__(self, merge_fn):
+    """Initializes the values.
+
+    Args:
+      merge_fn: A function that takes two values and returns a new value that
+        is their combination. It must not modify its arguments.
+    """
+    self._merge_fn = merge_fn
+    self._local = threading.local()
+    self._lock = threading.Lock()
+    self._shards = []
+    self._retired = {}
+
+  def GetShard(self):
+    """Returns the current thread's shard."""
+    try:
+      return self._local.shard
+    except AttributeError:
+      shard = {}
+      with self._lock:
+        self._shards.append((weakref.ref(threading.current_thread()), shard))
+      self._local.shard = shard
+      return shard
+
+  def _MergeInto(self, target, shard):
+    # Copying the shard is atomic, while iterating a dictionary that is being
+    # updated by another thread isn't.
+    for key, value in dict(shard).items():
+      existing = target.get(key)
+      target[key] = value if existing is None else self._merge_fn(
+          existing, value)
+
+  def Merge(self):
+    """Returns a dictionary with values merged from all the shards."""
+    with self._lock:
+      live_shards = []
+      for thread_ref, shard in self._shards:
+        thread = thread_ref()
+        if thread is not None and thread.is_alive():
+          live_shards.append((thread_ref, shard))
+        else:
+          self._MergeInto(self._retired, shard)
+      self._shards = live_shards
+
+      result = {}
+      self._MergeInto(result, self._retired)
+      for _, shard in self._shards:
+        self._MergeInto(result, shard)
+
+    return result
+
+
 class _Metric(metaclass=abc.ABCMeta):
   """Base class for all the metric objects used by the DefaultStatsCollector.
 
@@ -40,8 +105,8 @@ class _Metric(metaclass=abc.ABCMeta):
     the empty string depending on the type of the gauge (int, float or str).
     """
 
-  def Get(self, fields=None):
-    """Gets the metric value corresponding to the given field values."""
+  def _ValidateFields(self, fields):
+    """Checks that given field values match the metric's field definitions."""
     if not self._field_defs and fields:
       raise ValueError("Metric was registered without fields, "
                        "but following fields were provided: %s." % (fields,))
@@ -56,27 +121,63 @@ class _Metric(metaclass=abc.ABCMeta):
           "%d fields were provided (%s)." % (len(
               self._field_defs), self._field_defs, len(fields), fields))
 
-    metric_value = self._metric_values.get(_FieldsToKey(fields))
+  def Get(self, fields=None):
+    """Gets the metric value corresponding to the given field values."""
+    self._ValidateFields(fields)
+    metric_value = self._Values().get(_FieldsToKey(fields))
     return self._DefaultValue() if metric_value is None else metric_value
 
   def ListFieldsValues(self):
     """Returns a list of tuples of all field values used with the metric."""
-    return list(self._metric_values) if self._field_defs else []
+    return list(self._Values()) if self._field_defs else []
+
+  def _Values(self):
+    """Returns a dictionary mapping metric keys to values."""
+    return self._metric_values
 
 
 class _CounterMetric(_Metric):
   """Simple counter metric (see stats_collector for more info)."""
 
+  def __init__(self, field_defs):
+    super().__init__(field_defs)
+    self._sharded_values = _ThreadShardedValues(lambda a, b: a + b)
+
   def _DefaultValue(self):
     return 0
 
+  def _Values(self):
+    return self._sharded_values.Merge()
+
   def Increment(self, delta, fields=None):
     """Increments counter value by a given delta."""
     if delta < 0:
       raise ValueError(
           "Counter increment should not be < 0 (received: %d)" % delta)
+    self._ValidateFields(fields)
+
+    shard = self._sharded_values.GetShard()
+    key = _FieldsToKey(fields)
+    shard[key] = shard.get(key, 0) + delta
+
+
+class _EventAccumulator(object):
+  """A lightweight accumulator of observations of a single event metric."""
 
-    self._metric_values[_FieldsToKey(fields)] = self.Get(fields=fields) + delta
+  __slots__ = ("count", "sum", "heights")
+
+  def __init__(self, num_bins):
+    self.count = 0
+    self.sum = 0
+    self.heights = [0] * num_bins
+
+  def Merge(self, other):
+    """Returns a new accumulator combining this one with another one."""
+    result = _EventAccumulator(len(self.heights))
+    result.count = self.count + other.count
+    result.sum = self.sum + other.sum
+    result.heights = [a + b for a, b in zip(self.heights, other.heights)]
+    return result
 
 
 class _EventMetric(_Metric):
@@ -97,18 +198,39 @@ class _EventMetric(_Metric):
         0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.75, 1, 1.5, 2, 2.5, 3, 4, 5, 6, 7, 8, 9,
         10, 15, 20, 50, 100
     ]
+    # Same bins as the ones used by rdf_stats.Distribution.
+    self._distribution_bins = [-float("inf")] + self._bins
+    self._sharded_values = _ThreadShardedValues(lambda a, b: a.Merge(b))
 
   def _DefaultValue(self):
     return rdf_stats.Distribution(bins=self._bins)
 
+  def _Values(self):
+    result = {}
+    for key, accumulator in self._sharded_values.Merge().items():
+      distribution = self._DefaultValue()
+      distribution.count = accumulator.count
+      distribution.sum = accumulator.sum
+      distribution.heights = list(accumulator.heights)
+      result[key] = distribution
+    return result
+
   def Record(self, value, fields=None):
     """Records the given observation in a distribution."""
+    shard = self._sharded_values.GetShard()
     key = _FieldsToKey(fields)
-    metric_value = self._metric_values.get(key)
-    if metric_value is None:
-      metric_value = self._DefaultValue()
-      self._metric_values[key] = metric_value
-    metric_value.Record(value)
+    accumulator = shard.get(key)
+    if accumulator is None:
+      accumulator = _EventAccumulator(len(self._distribution_bins))
+      shard[key] = accumulator
+
+    # Mirrors rdf_stats.Distribution.Record.
+    pos = bisect.bisect(self._distribution_bins, value) - 1
+    if pos < 0:
+      pos = 0
+    accumulator.heights[pos] += 1
+    accumulator.sum += value
+    accumulator.count += 1
 
 
 class _GaugeMetric(_Metric):
@@ -173,14 +295,14 @@ class DefaultStatsCollector(stats_collector.StatsCollector):
     else:
       raise ValueError("Unknown metric type: %s." % metadata.metric_type)
 
-  @utils.Synchronized
+  # Counters and events are accumulated in per-thread shards, so recording
+  # them doesn't need to be synchronized.
   def IncrementCounter(self, metric_name, delta=1, fields=None):
     """See base class."""
     if delta < 0:
       raise ValueError("Invalid increment for counter: %d." % delta)
     self._counter_metrics[metric_name].Increment(delta, fields)
 
-  @utils.Synchronized
   def RecordEvent(self, metric_name, value, fields=None):
     """See base class."""
     self._event_metrics[metric_name].Record(value, fields)
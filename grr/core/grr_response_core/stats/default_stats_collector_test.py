@@ -2,9 +2,12 @@
 """Tests for the DefaultStatsCollector."""
 
 
+import threading
+
 from absl import app
 
 from grr_response_core.stats import default_stats_collector
+from grr_response_core.stats import metrics
 from grr_response_core.stats import stats_test_utils
 from grr.test_lib import test_lib
 
@@ -14,6 +17,72 @@ class DefaultStatsCollectorTest(stats_test_utils.StatsCollectorTest):
   def _CreateStatsCollector(self):
     return default_stats_collector.DefaultStatsCollector()
 
+  def _RunInThreads(self, fn, num_threads):
+    threads = [threading.Thread(target=fn) for _ in range(num_threads)]
+    for t in threads:
+      t.start()
+    for t in threads:
+      t.join()
+
+  def testCounterIncrementedFromManyThreads(self):
+    with self.SetUpStatsCollector(self._CreateStatsCollector()):
+      counter = metrics.Counter(
+          "testCounterIncrementedFromManyThreads_counter",
+          fields=[("dimension", str)])
+
+    def Increment():
+      for _ in range(1000):
+        counter.Increment(fields=["a"])
+        counter.Increment(2, fields=["b"])
+
+    self._RunInThreads(Increment, 8)
+
+    self.assertEqual(8000, counter.GetValue(fields=["a"]))
+    self.assertEqual(16000, counter.GetValue(fields=["b"]))
+    self.assertCountEqual([("a",), ("b",)], counter.GetFields())
+
+  def testEventRecordedFromManyThreads(self):
+    with self.SetUpStatsCollector(self._CreateStatsCollector()):
+      event_metric = metrics.Event(
+          "testEventRecordedFromManyThreads_event", bins=[0, 10])
+
+    def Record():
+      for _ in range(100):
+        event_metric.RecordEvent(-1)
+        event_metric.RecordEvent(5)
+        event_metric.RecordEvent(15)
+
+    self._RunInThreads(Record, 8)
+
+    distribution = event_metric.GetValue()
+    self.assertEqual(2400, distribution.count)
+    self.assertEqual(800 * (-1 + 5 + 15), distribution.sum)
+    self.assertEqual([800, 800, 800], list(distribution.heights))
+
+  def testValuesFromFinishedThreadsArePreserved(self):
+    with self.SetUpStatsCollector(self._CreateStatsCollector()):
+      counter = metrics.Counter(
+          "testValuesFromFinishedThreadsArePreserved_counter")
+
+    counter.Increment()
+    for i in range(3):
+      self._RunInThreads(counter.Increment, 2)
+      # Reading values folds shards of finished threads, the value must stay
+      # the same no matter how many times it's read.
+      self.assertEqual(3 + 2 * i, counter.GetValue())
+      self.assertEqual(3 + 2 * i, counter.GetValue())
+
+  def testIncrementingCounterWithWrongFieldsRaises(self):
+    with self.SetUpStatsCollector(self._CreateStatsCollector()):
+      counter = metrics.Counter(
+          "testIncrementingCounterWithWrongFieldsRaises_counter",
+          fields=[("dimension", str)])
+
+    with self.assertRaises(ValueError):
+      counter.Increment()
+    with self.assertRaises(ValueError):
+      counter.Increment(fields=["a", "b"])
+
 
 def main(argv):
   test_lib.main(argv)
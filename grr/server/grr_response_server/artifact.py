@@ -10,6 +10,8 @@ from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import Sequence
+from typing import Set
+from typing import Tuple
 
 from grr_response_core import config
 from grr_response_core.lib import artifact_utils
@@ -19,6 +21,7 @@ from grr_response_core.lib import utils
 from grr_response_core.lib.parsers import linux_release_parser
 from grr_response_core.lib.parsers import windows_registry_parser
 from grr_response_core.lib.rdfvalues import anomaly as rdf_anomaly
+from grr_response_core.lib.rdfvalues import artifacts as rdf_artifacts
 from grr_response_core.lib.rdfvalues import client as rdf_client
 from grr_response_core.lib.rdfvalues import client_action as rdf_client_action
 from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
@@ -65,8 +68,49 @@ def GetKnowledgeBase(rdf_client_obj, allow_uninitialized=False):
   return kb
 
 
+# A tag of knowledge bases returned by flows that reused a knowledge base
+# collected by another flow. A reused knowledge base can be older than the flow
+# that returned it, so it is not reused again.
+_REUSED_KNOWLEDGE_BASE_TAG = "knowledge_base:reused"
+
+
+def _CollectedKnowledgeBaseTag(lightweight: bool,
+                               require_complete: bool) -> str:
+  """Returns a tag of knowledge bases collected with given arguments."""
+  return "knowledge_base:{}:{}".format(
+      "lightweight" if lightweight else "full",
+      "complete" if require_complete else "partial")
+
+
+# Source types that the client artifact collector handles on its own. Group
+# and file sources are expanded into other artifacts, so their values can't be
+# attributed to the artifact that was requested.
+_BATCHABLE_SOURCE_TYPES = frozenset([
+    rdf_artifacts.ArtifactSource.SourceType.COMMAND,
+    rdf_artifacts.ArtifactSource.SourceType.DIRECTORY,
+    rdf_artifacts.ArtifactSource.SourceType.FILE,
+    rdf_artifacts.ArtifactSource.SourceType.GREP,
+    rdf_artifacts.ArtifactSource.SourceType.GRR_CLIENT_ACTION,
+    rdf_artifacts.ArtifactSource.SourceType.PATH,
+    rdf_artifacts.ArtifactSource.SourceType.REGISTRY_KEY,
+    rdf_artifacts.ArtifactSource.SourceType.REGISTRY_VALUE,
+    rdf_artifacts.ArtifactSource.SourceType.WMI,
+])
+
+
+def _IsBatchable(artifact_obj: rdf_artifacts.Artifact) -> bool:
+  """Returns whether the artifact can be collected in a client batch."""
+  if artifact_registry.GetArtifactPathDependencies(artifact_obj):
+    return False
+  return all(
+      source.type in _BATCHABLE_SOURCE_TYPES for source in artifact_obj.sources)
+
+
 class KnowledgeBaseInitializationArgs(rdf_structs.RDFProtoStruct):
   protobuf = flows_pb2.KnowledgeBaseInitializationArgs
+  rdf_deps = [
+      rdfvalue.DurationSeconds,
+  ]
 
 
 class KnowledgeBaseInitializationFlow(flow_base.FlowBase):
@@ -102,25 +146,22 @@ class KnowledgeBaseInitializationFlow(flow_base.FlowBase):
     self.state.in_flight_artifacts = set()
     self.state.awaiting_deps_artifacts = set()
     self.state.completed_artifacts = set()
+    self.state.reused_flow_id = None
 
-    self.InitializeKnowledgeBase()
-    first_flows = self.GetFirstFlowsForCollection()
+    if self.args.max_age:
+      fresh = self._ReadFreshKnowledgeBase()
+      if fresh is not None:
+        self.state.reused_flow_id, self.state.knowledge_base = fresh
+        self.Log("Reusing knowledge base collected by flow %s.",
+                 self.state.reused_flow_id)
+        return
 
-    # Send each artifact independently so we can track which artifact produced
-    # it when it comes back.
-    # TODO(user): tag SendReplys with the flow that
-    # generated them.
-    for artifact_name in first_flows:
-      self.state.in_flight_artifacts.add(artifact_name)
+    self.InitializeKnowledgeBase()
 
-      self.CallFlow(
-          # TODO(user): dependency loop with flows/general/collectors.py.
-          # collectors.ArtifactCollectorFlow.__name__,
-          "ArtifactCollectorFlow",
-          artifact_list=[artifact_name],
-          knowledge_base=self.state.knowledge_base,
-          next_state=self.ProcessBase.__name__,
-          request_data={"artifact_name": artifact_name})
+    if self.args.batched:
+      self._CollectArtifactsBatched()
+    else:
+      self._CollectArtifacts()
 
     if self.client_os == "Linux":
       if artifact_registry.REGISTRY.Exists("LinuxReleaseInfo"):
@@ -254,6 +295,171 @@ class KnowledgeBaseInitializationFlow(flow_base.FlowBase):
       # pylint: enable=line-too-long
       # pyformat: enable
 
+  def _ReadFreshKnowledgeBase(
+      self) -> Optional[Tuple[str, rdf_client.KnowledgeBase]]:
+    """Reads the newest knowledge base collected within `max_age`.
+
+    Only knowledge bases collected (not reused) by flows whose arguments
+    satisfy the arguments of this flow are considered: a full knowledge base
+    can replace a lightweight one and a complete one can replace one that is
+    not required to be complete, but not the other way around.
+
+    Returns:
+      A tuple of the id of the flow that collected the knowledge base and the
+      knowledge base itself or `None` if there is no fresh enough one.
+    """
+    if self.args.lightweight:
+      lightweight_values = [False, True]
+    else:
+      lightweight_values = [False]
+
+    if self.args.require_complete:
+      require_complete_values = [True]
+    else:
+      require_complete_values = [True, False]
+
+    tags = set()
+    for lightweight in lightweight_values:
+      for require_complete in require_complete_values:
+        tags.add(_CollectedKnowledgeBaseTag(lightweight, require_complete))
+
+    min_create_time = rdfvalue.RDFDatetime.Now() - self.args.max_age
+    flow_digests = data_store.REL_DB.ReadFlowDigests(
+        self.client_id, self.__class__.__name__, min_create_time)
+    flow_digests.sort(key=lambda digest: digest.create_time, reverse=True)
+
+    for flow_digest in flow_digests:
+      # The knowledge base is only returned once the flow has finished.
+      results = data_store.REL_DB.ReadFlowResults(
+          self.client_id,
+          flow_digest.flow_id,
+          offset=0,
+          count=1,
+          with_type=rdf_client.KnowledgeBase.__name__)
+      if results and results[0].tag in tags:
+        return flow_digest.flow_id, results[0].payload
+
+    return None
+
+  def _CollectArtifacts(self):
+    """Starts collecting artifacts that have no dependencies."""
+    first_flows = self.GetFirstFlowsForCollection()
+
+    # Send each artifact independently so we can track which artifact produced
+    # it when it comes back.
+    # TODO(user): tag SendReplys with the flow that
+    # generated them.
+    for artifact_name in first_flows:
+      self.state.in_flight_artifacts.add(artifact_name)
+      self._CallArtifactCollectorFlow(artifact_name)
+
+  def _CollectArtifactsBatched(self):
+    """Collects artifacts that have no dependencies with one client call.
+
+    Only artifacts that do not need any knowledge base values and whose sources
+    the client collector supports directly are batched. For those the client
+    returns the same values as a separate `ArtifactCollectorFlow` would, and
+    they are merged into the knowledge base by `ProcessBase` as in the
+    unbatched mode. All other artifacts are collected by separate flows.
+
+    Raises:
+      flow_base.FlowError: If some artifacts have dependencies that can't be
+        fulfilled and a complete knowledge base is required.
+    """
+    # TODO(user): dependency loop with flows/general/collectors.py.
+    # pylint: disable=g-import-not-at-top
+    from grr_response_server.flows.general import collectors
+    # pylint: enable=g-import-not-at-top
+
+    kb_set = self._GetArtifactNamesForCollection()
+    if not kb_set:
+      return
+
+    knowledge_base = self.state.knowledge_base
+    # We only retrieve artifacts that are explicitly listed in
+    # Artifacts.knowledge_base + additions - skip.
+    ordered_names = [
+        name for name in collectors.GetArtifactsForCollection(
+            knowledge_base.os, kb_set) if name in kb_set
+    ]
+
+    os_names = artifact_registry.REGISTRY.GetArtifactNames(
+        os_name=knowledge_base.os, name_list=kb_set)
+    missing_names = os_names.difference(ordered_names)
+    if missing_names:
+      message = ("The following artifacts had dependencies that could not be "
+                 "fulfilled: %s" % sorted(missing_names))
+      if self.args.require_complete:
+        raise flow_base.FlowError("KnowledgeBase initialization failed. %s" %
+                                  message)
+      self.Log(message)
+
+    first_flows = self.GetFirstFlowsForCollection()
+
+    request = rdf_artifacts.ClientArtifactCollectorArgs()
+    request.knowledge_base = knowledge_base
+    request.apply_parsers = True
+
+    expander = collectors.ArtifactExpander(knowledge_base,
+                                           rdf_paths.PathSpec.PathType.OS,
+                                           request.max_file_size)
+    self.state.batched_artifacts = []
+    for artifact_name in sorted(first_flows):
+      self.state.in_flight_artifacts.add(artifact_name)
+
+      artifact_obj = artifact_registry.REGISTRY.GetArtifact(artifact_name)
+      if _IsBatchable(artifact_obj):
+        self.state.batched_artifacts.append(artifact_name)
+        # The collected values are sent back so that they can be processed
+        # exactly as the results of a separate flow would be.
+        request.artifacts.Extend(expander.Expand(artifact_obj, requested=True))
+      else:
+        self._CallArtifactCollectorFlow(artifact_name)
+
+    if not self.state.batched_artifacts:
+      return
+
+    self.CallClient(
+        server_stubs.ArtifactCollector,
+        request,
+        next_state=self._ProcessBatchedArtifacts.__name__)
+
+  def _ProcessBatchedArtifacts(
+      self,
+      responses: flow_responses.Responses[
+          rdf_artifacts.ClientArtifactCollectorResult],
+  ) -> None:
+    """Processes the values of each batched artifact as a separate flow."""
+    if not responses.success:
+      # Collecting the artifacts one by one gives the same knowledge base, so
+      # a failed batch only costs the extra round trips.
+      self.Log("Failed to collect knowledge base artifacts in a batch: %s",
+               responses.status)
+      for artifact_name in self.state.batched_artifacts:
+        self._CallArtifactCollectorFlow(artifact_name)
+      return
+
+    values = {name: [] for name in self.state.batched_artifacts}
+    for response in responses:
+      for collected_artifact in response.collected_artifacts:
+        values.setdefault(collected_artifact.name, []).extend(
+            result.value for result in collected_artifact.action_results)
+
+    for artifact_name in self.state.batched_artifacts:
+      self.ProcessBase(
+          flow_responses.FakeResponses(values[artifact_name],
+                                       {"artifact_name": artifact_name}))
+
+  def _CallArtifactCollectorFlow(self, artifact_name):
+    self.CallFlow(
+        # TODO(user): dependency loop with flows/general/collectors.py.
+        # collectors.ArtifactCollectorFlow.__name__,
+        "ArtifactCollectorFlow",
+        artifact_list=[artifact_name],
+        knowledge_base=self.state.knowledge_base,
+        next_state=self.ProcessBase.__name__,
+        request_data={"artifact_name": artifact_name})
+
   def _ScheduleCollection(self):
     # Schedule any new artifacts for which we have now fulfilled dependencies.
     for artifact_name in self.state.awaiting_deps_artifacts:
@@ -1275,7 +1481,12 @@ class KnowledgeBaseInitializationFlow(flow_base.FlowBase):
   def End(self, responses):
     """Finish up."""
     del responses
-    self.SendReply(self.state.knowledge_base)
+    if self.state.reused_flow_id:
+      tag = _REUSED_KNOWLEDGE_BASE_TAG
+    else:
+      tag = _CollectedKnowledgeBaseTag(self.args.lightweight,
+                                       self.args.require_complete)
+    self.SendReply(self.state.knowledge_base, tag=tag)
 
   def GetFirstFlowsForCollection(self):
     """Initialize dependencies and calculate first round of flows.
@@ -1286,15 +1497,7 @@ class KnowledgeBaseInitializationFlow(flow_base.FlowBase):
     Raises:
       RuntimeError: On bad artifact configuration parameters.
     """
-    kb_base_set = set(config.CONFIG["Artifacts.knowledge_base"])
-    kb_add = set(config.CONFIG["Artifacts.knowledge_base_additions"])
-    kb_skip = set(config.CONFIG["Artifacts.knowledge_base_skip"])
-    if self.args.lightweight:
-      kb_skip.update(config.CONFIG["Artifacts.knowledge_base_heavyweight"])
-    kb_set = kb_base_set.union(kb_add) - kb_skip
-
-    for artifact_name in kb_set:
-      artifact_registry.REGISTRY.GetArtifact(artifact_name)
+    kb_set = self._GetArtifactNamesForCollection()
 
     # If `kb_set` is empty, `GetArtifactNames` returns *all* artifacts in the
     # system for the given platform, which is not what we want.
@@ -1321,6 +1524,25 @@ class KnowledgeBaseInitializationFlow(flow_base.FlowBase):
 
     return no_deps_names
 
+  def _GetArtifactNamesForCollection(self) -> Set[str]:
+    """Returns names of the configured knowledge base artifacts.
+
+    Raises:
+      rdf_artifacts.ArtifactNotRegisteredError: If any of the artifacts is not
+        registered.
+    """
+    kb_base_set = set(config.CONFIG["Artifacts.knowledge_base"])
+    kb_add = set(config.CONFIG["Artifacts.knowledge_base_additions"])
+    kb_skip = set(config.CONFIG["Artifacts.knowledge_base_skip"])
+    if self.args.lightweight:
+      kb_skip.update(config.CONFIG["Artifacts.knowledge_base_heavyweight"])
+    kb_set = kb_base_set.union(kb_add) - kb_skip
+
+    for artifact_name in kb_set:
+      artifact_registry.REGISTRY.GetArtifact(artifact_name)
+
+    return kb_set
+
   def InitializeKnowledgeBase(self):
     """Get the existing KB or create a new one if none exists."""
     # Always create a new KB to override any old values but keep os and
@@ -1,11 +1,14 @@
 #!/usr/bin/env python
 """Central registry for artifacts."""
 
+import collections
+import hashlib
 import io
 import logging
 import os
 import threading
 
+from google.protobuf import message
 import yaml
 
 from grr_response_core import config
@@ -97,16 +100,88 @@ class ArtifactRegistrySources(object):
                       dirpath, error)
 
 
+def _ReadSourceFile(path, previous=None):
+  """Returns information about an artifact source file.
+
+  Args:
+    path: A path to the file.
+    previous: Optional information about the file read before. If the file
+      still has the same modification time and size, it is not hashed again.
+
+  Returns:
+    An `ArtifactSourceFile` without artifacts.
+
+  Raises:
+    OSError: If the file can't be read.
+  """
+  stat = os.stat(path)
+  source_file = rdf_artifacts.ArtifactSourceFile(
+      path=path, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+  if (previous is not None and previous.mtime_ns == source_file.mtime_ns and
+      previous.size == source_file.size):
+    source_file.sha256 = previous.sha256
+    return source_file
+
+  with io.open(path, mode="rb") as fd:
+    source_file.sha256 = hashlib.sha256(fd.read()).digest()
+  return source_file
+
+
 class ArtifactRegistry(object):
-  """A global registry of artifacts."""
+  """A global registry of artifacts.
+
+  Besides the artifacts themselves, the registry keeps indexes of artifact
+  names by supported OS, source type, provided knowledge base attribute and
+  artifact dependency. The indexes reflect artifacts as they were registered,
+  so an artifact has to be registered again after being modified.
+  """
 
   def __init__(self):
     self._artifacts = {}
+    self._positions = {}
+    self._names_by_os = collections.defaultdict(set)
+    self._names_by_source_type = collections.defaultdict(set)
+    self._names_by_provides = collections.defaultdict(set)
+    self._names_by_dependency = collections.defaultdict(set)
     self._sources = ArtifactRegistrySources()
     self._dirty = False
     # Field required by the utils.Synchronized annotation.
     self.lock = threading.RLock()
 
+  def _IndexArtifact(self, artifact):
+    name = artifact.name
+    if name not in self._positions:
+      self._positions[name] = len(self._positions)
+    # Artifacts without supported OSes are indexed under `None`.
+    for os_name in artifact.supported_os or [None]:
+      self._names_by_os[os_name].add(name)
+    for source in artifact.sources:
+      self._names_by_source_type[source.type].add(name)
+    for provide in artifact.provides:
+      self._names_by_provides[provide].add(name)
+    for dependency in GetArtifactDependencies(artifact):
+      self._names_by_dependency[dependency].add(name)
+
+  def _UnindexArtifact(self, artifact):
+    name = artifact.name
+    for os_name in artifact.supported_os or [None]:
+      self._names_by_os[os_name].discard(name)
+    for source in artifact.sources:
+      self._names_by_source_type[source.type].discard(name)
+    for provide in artifact.provides:
+      self._names_by_provides[provide].discard(name)
+    for dependency in GetArtifactDependencies(artifact):
+      self._names_by_dependency[dependency].discard(name)
+
+  def _ClearArtifacts(self):
+    self._artifacts = {}
+    self._positions = {}
+    self._names_by_os.clear()
+    self._names_by_source_type.clear()
+    self._names_by_provides.clear()
+    self._names_by_dependency.clear()
+
   def _LoadArtifactsFromDatastore(self):
     """Load artifacts from the data store."""
     loaded_artifacts = []
@@ -211,14 +286,26 @@ class ArtifactRegistry(object):
     return valid_artifacts
 
   def _LoadArtifactsFromFiles(self, file_paths, overwrite_if_exists=True):
-    """Load artifacts from file paths as json or yaml."""
-    loaded_files = []
+    """Load artifacts from file paths as json or yaml.
+
+    Args:
+      file_paths: Paths of the files to load.
+      overwrite_if_exists: If true, artifacts loaded before are overwritten.
+
+    Returns:
+      A dict mapping paths of the successfully loaded files to lists of
+      artifacts defined in them.
+    """
+    loaded_files = {}
     loaded_artifacts = []
     for file_path in file_paths:
       try:
         with io.open(file_path, mode="r", encoding="utf-8") as fh:
           logging.debug("Loading artifacts from %s", file_path)
+          file_artifacts = []
           for artifact_val in self.ArtifactsFromYaml(fh.read()):
+            # Registering modifies the artifact, so the snapshot gets a copy.
+            file_artifacts.append(artifact_val.Copy())
             self.RegisterArtifact(
                 artifact_val,
                 source="file:%s" % file_path,
@@ -227,7 +314,7 @@ class ArtifactRegistry(object):
             logging.debug("Loaded artifact %s from %s", artifact_val.name,
                           file_path)
 
-        loaded_files.append(file_path)
+        loaded_files[file_path] = file_artifacts
       except (IOError, OSError) as e:
         logging.error("Failed to open artifact file %s. %s", file_path, e)
       except rdf_artifacts.ArtifactDefinitionError as e:
@@ -239,6 +326,72 @@ class ArtifactRegistry(object):
     for artifact_value in loaded_artifacts:
       Validate(artifact_value)
 
+    return loaded_files
+
+  def _LoadArtifactsFromSnapshot(self, snapshot_path, file_paths):
+    """Loads artifacts from a snapshot if the files haven't changed since.
+
+    Args:
+      snapshot_path: A path to the snapshot.
+      file_paths: A sorted list of paths of the artifact source files.
+
+    Returns:
+      True if the artifacts were loaded from the snapshot.
+    """
+    try:
+      with io.open(snapshot_path, mode="rb") as fd:
+        snapshot = rdf_artifacts.ArtifactRegistrySnapshot.FromSerializedBytes(
+            fd.read())
+    except FileNotFoundError:
+      return False
+    except (IOError, OSError, ValueError, message.DecodeError) as e:
+      logging.warning("Failed to read artifact registry snapshot %s: %s",
+                      snapshot_path, e)
+      return False
+
+    if snapshot.version != config.CONFIG["Source.version_string"]:
+      return False
+    if [source_file.path for source_file in snapshot.files] != file_paths:
+      return False
+
+    modified = False
+    for source_file in snapshot.files:
+      try:
+        current = _ReadSourceFile(source_file.path, previous=source_file)
+      except (IOError, OSError):
+        return False
+      if current.sha256 != source_file.sha256:
+        return False
+      # Files that were only touched are not parsed again, but the snapshot is
+      # updated so they don't have to be hashed every time.
+      if current.mtime_ns != source_file.mtime_ns:
+        source_file.mtime_ns = current.mtime_ns
+        modified = True
+
+    for source_file in snapshot.files:
+      for artifact_value in source_file.artifacts:
+        self.RegisterArtifact(
+            artifact_value,
+            source="file:%s" % source_file.path,
+            overwrite_if_exists=True)
+
+    if modified:
+      self._WriteSnapshot(snapshot_path, snapshot)
+
+    logging.debug("Loaded artifacts from snapshot %s", snapshot_path)
+    return True
+
+  def _WriteSnapshot(self, snapshot_path, snapshot):
+    """Atomically writes a snapshot, logging failures."""
+    tmp_path = "%s.%d.tmp" % (snapshot_path, os.getpid())
+    try:
+      with io.open(tmp_path, mode="wb") as fd:
+        fd.write(snapshot.SerializeToBytes())
+      os.replace(tmp_path, snapshot_path)
+    except (IOError, OSError) as e:
+      logging.warning("Failed to write artifact registry snapshot %s: %s",
+                      snapshot_path, e)
+
   @utils.Synchronized
   def ClearSources(self):
     self._sources.Clear()
@@ -286,26 +439,62 @@ class ArtifactRegistry(object):
     artifact_rdfvalue.loaded_from = source
     # Clear any stale errors.
     artifact_rdfvalue.error_message = None
+    if artifact_name in self._artifacts:
+      self._UnindexArtifact(self._artifacts[artifact_name])
     self._artifacts[artifact_rdfvalue.name] = artifact_rdfvalue
+    self._IndexArtifact(artifact_rdfvalue)
 
   @utils.Synchronized
   def UnregisterArtifact(self, artifact_name):
     try:
-      del self._artifacts[artifact_name]
+      artifact = self._artifacts.pop(artifact_name)
     except KeyError:
       raise ValueError("Artifact %s unknown." % artifact_name)
+    self._UnindexArtifact(artifact)
 
   @utils.Synchronized
   def ClearRegistry(self):
-    self._artifacts = {}
+    self._ClearArtifacts()
     self._dirty = True
 
   def _ReloadArtifacts(self):
     """Load artifacts from all sources."""
-    self._artifacts = {}
-    self._LoadArtifactsFromFiles(self._sources.GetAllFiles())
+    self._ClearArtifacts()
+
+    file_paths = sorted(self._sources.GetAllFiles())
+    snapshot_path = config.CONFIG["Artifacts.registry_snapshot_path"]
+    if snapshot_path:
+      if not self._LoadArtifactsFromSnapshot(snapshot_path, file_paths):
+        self._LoadArtifactsFromFilesAndSnapshot(snapshot_path, file_paths)
+    else:
+      self._LoadArtifactsFromFiles(file_paths)
+
     self.ReloadDatastoreArtifacts()
 
+  def _LoadArtifactsFromFilesAndSnapshot(self, snapshot_path, file_paths):
+    """Loads artifacts from files and writes a snapshot of them."""
+    # Files are hashed before being loaded, so that if they change while being
+    # loaded the snapshot is considered outdated next time.
+    source_files = []
+    for file_path in file_paths:
+      try:
+        source_files.append(_ReadSourceFile(file_path))
+      except (IOError, OSError):
+        source_files = None
+        break
+
+    loaded_files = self._LoadArtifactsFromFiles(file_paths)
+
+    if source_files is None or len(loaded_files) != len(file_paths):
+      return
+
+    snapshot = rdf_artifacts.ArtifactRegistrySnapshot(
+        version=config.CONFIG["Source.version_string"])
+    for source_file in source_files:
+      source_file.artifacts = loaded_files[source_file.path]
+      snapshot.files.Append(source_file)
+    self._WriteSnapshot(snapshot_path, snapshot)
+
   def _UnregisterDatastoreArtifacts(self):
     """Remove artifacts that came from the datastore."""
     to_remove = []
@@ -313,7 +502,7 @@ class ArtifactRegistry(object):
       if artifact.loaded_from.startswith("datastore"):
         to_remove.append(name)
     for key in to_remove:
-      self._artifacts.pop(key)
+      self._UnindexArtifact(self._artifacts.pop(key))
 
   @utils.Synchronized
   def ReloadDatastoreArtifacts(self):
@@ -356,8 +545,35 @@ class ArtifactRegistry(object):
       list of artifacts matching filter criteria
     """
     self._CheckDirty(reload_datastore_artifacts=reload_datastore_artifacts)
+
+    # The indexes narrow down the candidates, the filters below are still
+    # applied to each of them.
+    name_sets = []
+    if name_list:
+      name_sets.append(set(name_list))
+    if os_name:
+      name_sets.append(
+          self._names_by_os.get(os_name, set())
+          | self._names_by_os.get(None, set()))
+    if source_type:
+      name_sets.append(self._names_by_source_type.get(source_type, set()))
+    if provides:
+      name_sets.append(
+          set().union(*[
+              self._names_by_provides.get(provide, set())
+              for provide in provides
+          ]))
+
+    if name_sets:
+      names = set.intersection(*name_sets)
+      names = sorted((name for name in names if name in self._artifacts),
+                     key=self._positions.get)
+      candidates = [self._artifacts[name] for name in names]
+    else:
+      candidates = self._artifacts.values()
+
     results = {}
-    for artifact in self._artifacts.values():
+    for artifact in candidates:
 
       # artifact.supported_os = [] matches all OSes
       if os_name and artifact.supported_os and (os_name
@@ -424,6 +640,25 @@ class ArtifactRegistry(object):
 
     return True
 
+  @utils.Synchronized
+  def GetDependentArtifactNames(self, artifact_names, reload_artifacts=False):
+    """Returns names of artifacts that directly depend on given artifacts.
+
+    Args:
+      artifact_names: An iterable of artifact names.
+      reload_artifacts: If true, artifacts stored in the data store are
+        reloaded first.
+
+    Returns:
+      A set of names of the dependent artifacts, excluding `artifact_names`.
+    """
+    self._CheckDirty(reload_datastore_artifacts=reload_artifacts)
+    artifact_names = set(artifact_names)
+    result = set()
+    for name in artifact_names:
+      result.update(self._names_by_dependency.get(name, set()))
+    return set(str(name) for name in result - artifact_names)
+
   @utils.Synchronized
   def GetArtifactNames(self, *args, **kwargs):
     return set([a.name for a in self.GetArtifacts(*args, **kwargs)])
@@ -506,27 +741,16 @@ REGISTRY = ArtifactRegistry()
 
 def DeleteArtifactsFromDatastore(artifact_names, reload_artifacts=True):
   """Deletes a list of artifacts from the data store."""
-  artifacts_list = REGISTRY.GetArtifacts(
-      reload_datastore_artifacts=reload_artifacts)
-
   to_delete = set(artifact_names)
-  deps = set()
-  for artifact_obj in artifacts_list:
-    if artifact_obj.name in to_delete:
-      continue
-
-    if GetArtifactDependencies(artifact_obj) & to_delete:
-      deps.add(str(artifact_obj.name))
-
+  deps = REGISTRY.GetDependentArtifactNames(
+      to_delete, reload_artifacts=reload_artifacts)
   if deps:
     raise ValueError(
         "Artifact(s) %s depend(s) on one of the artifacts to delete." %
         (",".join(deps)))
 
-  found_artifact_names = set()
-  for artifact_value in artifacts_list:
-    if artifact_value.name in to_delete:
-      found_artifact_names.add(artifact_value.name)
+  found_artifact_names = set(
+      name for name in to_delete if REGISTRY.Exists(name))
 
   if len(found_artifact_names) != len(to_delete):
     not_found = to_delete - found_artifact_names
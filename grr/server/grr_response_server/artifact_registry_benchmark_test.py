@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""Benchmarks loading and querying the artifact registry."""
+
+import os
+
+from absl import app
+
+from grr_response_core.lib.rdfvalues import artifacts as rdf_artifacts
+from grr_response_server import artifact_registry
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import test_lib
+
+
+class ArtifactRegistryBenchmark(benchmark_test_lib.AverageMicroBenchmarks):
+  """Measures what loading default artifacts costs at server startup.
+
+  `server_startup.Init` loads the default artifact sources, so the time of the
+  first lookup in a fresh registry is the startup cost of the registry.
+  """
+
+  REPEATS = 10
+  units = "ms"
+
+  def setUp(self):
+    super().setUp()
+    self.snapshot_path = os.path.join(self.temp_dir, "artifacts.snapshot")
+
+  def _LoadDefaultArtifacts(self):
+    registry = artifact_registry.ArtifactRegistry()
+    registry.AddDefaultSources()
+    return len(registry.GetArtifacts())
+
+  def testLoadDefaultArtifacts(self):
+    """Loading default artifacts with and without a snapshot."""
+    self.TimeIt(self._LoadDefaultArtifacts, "Load without snapshot")
+
+    with test_lib.ConfigOverrider(
+        {"Artifacts.registry_snapshot_path": self.snapshot_path}):
+
+      def RemoveSnapshot():
+        if os.path.exists(self.snapshot_path):
+          os.remove(self.snapshot_path)
+
+      self.TimeIt(
+          self._LoadDefaultArtifacts,
+          "Load writing snapshot",
+          repetitions=1,
+          pre=RemoveSnapshot)
+      self.TimeIt(self._LoadDefaultArtifacts, "Load from snapshot")
+
+  def testGetArtifacts(self):
+    """Filtered lookups in a registry with default artifacts."""
+    registry = artifact_registry.ArtifactRegistry()
+    registry.AddDefaultSources()
+    registry.GetArtifacts()
+
+    def GetWindowsFileArtifacts():
+      return len(
+          registry.GetArtifacts(
+              os_name="Windows",
+              source_type=rdf_artifacts.ArtifactSource.SourceType.FILE))
+
+    def GetUsersProviders():
+      return len(registry.GetArtifacts(os_name="Linux", provides=["users"]))
+
+    self.TimeIt(GetWindowsFileArtifacts, repetitions=1000)
+    self.TimeIt(GetUsersProviders, repetitions=1000)
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
@@ -1,4 +1,6 @@
 #!/usr/bin/env python
+import os
+import shutil
 import textwrap
 from unittest import mock
 
@@ -291,6 +293,223 @@ class ArtifactRegistryTest(absltest.TestCase):
 
     self.assertFalse(registry.Exists("Foo"))
 
+  def _RegisterTestArtifacts(self, registry):
+    path_type = rdf_artifacts.ArtifactSource.SourceType.PATH
+    command_type = rdf_artifacts.ArtifactSource.SourceType.COMMAND
+    registry.RegisterArtifact(
+        rdf_artifacts.Artifact(
+            name="Foo",
+            supported_os=["Linux"],
+            provides=["fqdn"],
+            sources=[rdf_artifacts.ArtifactSource(type=path_type)]))
+    registry.RegisterArtifact(
+        rdf_artifacts.Artifact(
+            name="Bar",
+            supported_os=["Windows", "Linux"],
+            provides=["os", "fqdn"],
+            sources=[rdf_artifacts.ArtifactSource(type=command_type)]))
+    registry.RegisterArtifact(
+        rdf_artifacts.Artifact(
+            name="Baz",
+            sources=[
+                rdf_artifacts.ArtifactSource(type=path_type),
+                rdf_artifacts.ArtifactSource(type=command_type),
+            ]))
+
+  def _GetNames(self, registry, **kwargs):
+    return [str(artifact.name) for artifact in registry.GetArtifacts(**kwargs)]
+
+  def testGetArtifactsFiltersByIndexedValues(self):
+    registry = ar.ArtifactRegistry()
+    self._RegisterTestArtifacts(registry)
+    path_type = rdf_artifacts.ArtifactSource.SourceType.PATH
+
+    self.assertEqual(self._GetNames(registry), ["Foo", "Bar", "Baz"])
+    self.assertEqual(
+        self._GetNames(registry, os_name="Windows"), ["Bar", "Baz"])
+    self.assertEqual(self._GetNames(registry, os_name="Darwin"), ["Baz"])
+    self.assertEqual(
+        self._GetNames(registry, source_type=path_type), ["Foo", "Baz"])
+    self.assertEqual(
+        self._GetNames(registry, provides=["fqdn"]), ["Foo", "Bar"])
+    self.assertEqual(self._GetNames(registry, provides=["os"]), ["Bar"])
+    self.assertEqual(
+        self._GetNames(
+            registry, os_name="Linux", source_type=path_type,
+            provides=["fqdn"]), ["Foo"])
+    self.assertEqual(
+        self._GetNames(registry, name_list=["Baz", "Foo", "Quux"]),
+        ["Foo", "Baz"])
+
+  def testGetArtifactsReflectsReregisteredArtifacts(self):
+    registry = ar.ArtifactRegistry()
+    self._RegisterTestArtifacts(registry)
+
+    registry.RegisterArtifact(
+        rdf_artifacts.Artifact(
+            name="Foo", supported_os=["Darwin"], provides=["os"]),
+        overwrite_if_exists=True,
+        overwrite_system_artifacts=True)
+
+    self.assertEqual(self._GetNames(registry), ["Foo", "Bar", "Baz"])
+    self.assertEqual(self._GetNames(registry, os_name="Linux"), ["Bar", "Baz"])
+    self.assertEqual(self._GetNames(registry, os_name="Darwin"), ["Foo", "Baz"])
+    self.assertEqual(self._GetNames(registry, provides=["fqdn"]), ["Bar"])
+    self.assertEqual(self._GetNames(registry, provides=["os"]), ["Foo", "Bar"])
+
+  def testGetArtifactsSkipsUnregisteredArtifacts(self):
+    registry = ar.ArtifactRegistry()
+    self._RegisterTestArtifacts(registry)
+
+    registry.UnregisterArtifact("Bar")
+
+    self.assertEqual(self._GetNames(registry), ["Foo", "Baz"])
+    self.assertEqual(self._GetNames(registry, provides=["fqdn"]), ["Foo"])
+    self.assertEqual(self._GetNames(registry, os_name="Windows"), ["Baz"])
+
+  def testGetDependentArtifactNames(self):
+    registry = ar.ArtifactRegistry()
+    self._RegisterTestArtifacts(registry)
+    group_type = rdf_artifacts.ArtifactSource.SourceType.ARTIFACT_GROUP
+    registry.RegisterArtifact(
+        rdf_artifacts.Artifact(
+            name="Group",
+            sources=[
+                rdf_artifacts.ArtifactSource(
+                    type=group_type, attributes={"names": ["Foo", "Bar"]})
+            ]))
+
+    self.assertEqual(registry.GetDependentArtifactNames(["Foo"]), {"Group"})
+    self.assertEqual(registry.GetDependentArtifactNames(["Baz"]), set())
+    self.assertEqual(
+        registry.GetDependentArtifactNames(["Foo", "Group"]), set())
+
+    registry.UnregisterArtifact("Group")
+    self.assertEqual(registry.GetDependentArtifactNames(["Foo"]), set())
+
+
+class ArtifactRegistrySnapshotTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.dir_path = temp.TempDirPath()
+    self.addCleanup(shutil.rmtree, self.dir_path)
+    self.artifacts_path = os.path.join(self.dir_path, "artifacts")
+    os.mkdir(self.artifacts_path)
+    self.snapshot_path = os.path.join(self.dir_path, "snapshot")
+
+    config_overrider = test_lib.ConfigOverrider(
+        {"Artifacts.registry_snapshot_path": self.snapshot_path})
+    config_overrider.Start()
+    self.addCleanup(config_overrider.Stop)
+
+  def _WriteArtifactFile(self, filename, *names):
+    content = "---\n".join(
+        textwrap.dedent(f"""\
+        name: {name}
+        doc: Lorem ipsum.
+        sources:
+          - type: PATH
+            attributes:
+              paths: ['/{name}']
+        """) for name in names)
+    with open(os.path.join(self.artifacts_path, filename), "w") as fd:
+      fd.write(content)
+
+  def _LoadRegistry(self):
+    registry = ar.ArtifactRegistry()
+    registry.AddDirSource(self.artifacts_path)
+    registry.GetArtifacts()
+    return registry
+
+  def _LoadRegistryFromSnapshot(self):
+    with mock.patch.object(
+        ar.ArtifactRegistry, "ArtifactsFromYaml",
+        side_effect=AssertionError("Artifacts files were parsed.")):
+      return self._LoadRegistry()
+
+  def _GetFileArtifactNames(self, registry):
+    # Artifacts stored in the data store by other tests are loaded too.
+    return [
+        str(artifact.name)
+        for artifact in registry.GetArtifacts()
+        if artifact.loaded_from.startswith("file:")
+    ]
+
+  def testLoadsArtifactsFromSnapshot(self):
+    self._WriteArtifactFile("foo.yaml", "SnapshotFoo", "SnapshotBar")
+    self._WriteArtifactFile("baz.yaml", "SnapshotBaz")
+    self._LoadRegistry()
+    self.assertTrue(os.path.exists(self.snapshot_path))
+
+    registry = self._LoadRegistryFromSnapshot()
+
+    self.assertCountEqual(
+        self._GetFileArtifactNames(registry),
+        ["SnapshotFoo", "SnapshotBar", "SnapshotBaz"])
+    artifact = registry.GetArtifact("SnapshotBar")
+    self.assertEqual(artifact.loaded_from,
+                     "file:%s" % os.path.join(self.artifacts_path, "foo.yaml"))
+    self.assertEqual(artifact.sources[0].attributes["paths"], ["/SnapshotBar"])
+
+  def testReloadsModifiedFiles(self):
+    self._WriteArtifactFile("foo.yaml", "SnapshotFoo")
+    self._LoadRegistry()
+
+    self._WriteArtifactFile("foo.yaml", "SnapshotFoo", "SnapshotBar")
+    registry = self._LoadRegistry()
+    self.assertCountEqual(
+        self._GetFileArtifactNames(registry), ["SnapshotFoo", "SnapshotBar"])
+
+    # The snapshot has been updated.
+    registry = self._LoadRegistryFromSnapshot()
+    self.assertCountEqual(
+        self._GetFileArtifactNames(registry), ["SnapshotFoo", "SnapshotBar"])
+
+  def testReloadsWhenFilesAreAdded(self):
+    self._WriteArtifactFile("foo.yaml", "SnapshotFoo")
+    self._LoadRegistry()
+
+    self._WriteArtifactFile("bar.yaml", "SnapshotBar")
+    registry = self._LoadRegistry()
+
+    self.assertCountEqual(
+        self._GetFileArtifactNames(registry), ["SnapshotFoo", "SnapshotBar"])
+
+  def testUsesSnapshotIfFileContentIsUnchanged(self):
+    self._WriteArtifactFile("foo.yaml", "SnapshotFoo")
+    self._LoadRegistry()
+
+    file_path = os.path.join(self.artifacts_path, "foo.yaml")
+    mtime_ns = os.stat(file_path).st_mtime_ns + 10 * 1000 * 1000 * 1000
+    os.utime(file_path, ns=(mtime_ns, mtime_ns))
+
+    registry = self._LoadRegistryFromSnapshot()
+    self.assertEqual(self._GetFileArtifactNames(registry), ["SnapshotFoo"])
+
+  def testReloadsIfVersionChanged(self):
+    self._WriteArtifactFile("foo.yaml", "SnapshotFoo")
+    self._LoadRegistry()
+
+    with test_lib.ConfigOverrider({"Source.version_string": "0.0.0.0"}):
+      with mock.patch.object(
+          ar.ArtifactRegistry,
+          "ArtifactsFromYaml",
+          wraps=ar.ArtifactRegistry().ArtifactsFromYaml) as artifacts_from_yaml:
+        registry = self._LoadRegistry()
+
+    artifacts_from_yaml.assert_called_once()
+    self.assertEqual(self._GetFileArtifactNames(registry), ["SnapshotFoo"])
+
+  def testIgnoresCorruptSnapshot(self):
+    self._WriteArtifactFile("foo.yaml", "SnapshotFoo")
+    with open(self.snapshot_path, "wb") as fd:
+      fd.write(b"\xff" * 100)
+
+    registry = self._LoadRegistry()
+
+    self.assertEqual(self._GetFileArtifactNames(registry), ["SnapshotFoo"])
+
 
 if __name__ == "__main__":
   app.run(test_lib.main)
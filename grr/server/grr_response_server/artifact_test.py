@@ -15,6 +15,7 @@ from absl import app
 from absl.testing import absltest
 
 from grr_response_client import actions
+from grr_response_client.client_actions import artifact_collector
 from grr_response_client.client_actions import file_fingerprint
 from grr_response_client.client_actions import searching
 from grr_response_client.client_actions import standard
@@ -30,6 +31,7 @@ from grr_response_core.lib.rdfvalues import client as rdf_client
 from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
 from grr_response_core.lib.rdfvalues import paths as rdf_paths
 from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
+from grr_response_core.lib.util import temp
 from grr_response_server import action_registry
 from grr_response_server import artifact
 from grr_response_server import artifact_registry
@@ -554,7 +556,14 @@ class ArtifactFlowWindowsTest(ArtifactTest):
 class GrrKbTest(ArtifactTest):
 
   def _RunKBI(self, **kw):
-    session_id = flow_test_lib.TestFlowHelper(
+    session_id = self._RunKBIFlowWithActions(**kw)
+
+    results = flow_test_lib.GetFlowResults(test_lib.TEST_CLIENT_ID, session_id)
+    self.assertLen(results, 1)
+    return results[0]
+
+  def _RunKBIFlowWithActions(self, **kw):
+    return flow_test_lib.TestFlowHelper(
         artifact.KnowledgeBaseInitializationFlow.__name__,
         # TODO: remove additional client actions when Glob flow
         # ArtifactCollectorFlow dependency is removed.
@@ -567,16 +576,13 @@ class GrrKbTest(ArtifactTest):
             standard.GetFileStat,
             standard.ListDirectory,
             standard.TransferBuffer,
+            artifact_collector.ArtifactCollector,
         ),
         client_id=test_lib.TEST_CLIENT_ID,
         creator=self.test_username,
         **kw,
     )
 
-    results = flow_test_lib.GetFlowResults(test_lib.TEST_CLIENT_ID, session_id)
-    self.assertLen(results, 1)
-    return results[0]
-
 
 class GrrKbWindowsTest(GrrKbTest):
 
@@ -757,6 +763,320 @@ class GrrKbLinuxTest(GrrKbTest):
     self.assertEqual(kb.os_minor_version, 4)
     self.assertCountEqual([x.username for x in kb.users], [])
 
+  def _RunKBIAt(self, seconds, **kw):
+    with test_lib.FakeTime(rdfvalue.RDFDatetime.FromSecondsSinceEpoch(seconds)):
+      with vfs_test_lib.FakeTestDataVFSOverrider():
+        with test_lib.ConfigOverrider({
+            "Artifacts.knowledge_base": ["LinuxWtmp"],
+        }):
+          with test_lib.SuppressLogs():
+            flow_id = self._RunKBIFlowWithActions(**kw)
+
+    flow_obj = data_store.REL_DB.ReadFlowObject(test_lib.TEST_CLIENT_ID,
+                                                flow_id)
+    results = flow_test_lib.GetFlowResults(test_lib.TEST_CLIENT_ID, flow_id)
+    self.assertLen(results, 1)
+    return flow_id, flow_obj.persistent_data.ToDict()["reused_flow_id"]
+
+  @parser_test_lib.WithAllParsers
+  def testReusesFreshKnowledgeBase(self):
+    max_age = rdfvalue.Duration.From(1, rdfvalue.DAYS)
+    first_flow_id, reused_flow_id = self._RunKBIAt(0, max_age=max_age)
+    self.assertIsNone(reused_flow_id)
+
+    _, reused_flow_id = self._RunKBIAt(3600, max_age=max_age)
+    self.assertEqual(reused_flow_id, first_flow_id)
+
+  @parser_test_lib.WithAllParsers
+  def testDoesNotReuseStaleKnowledgeBase(self):
+    max_age = rdfvalue.Duration.From(1, rdfvalue.DAYS)
+    self._RunKBIAt(0, max_age=max_age)
+
+    _, reused_flow_id = self._RunKBIAt(2 * 24 * 3600, max_age=max_age)
+    self.assertIsNone(reused_flow_id)
+
+  @parser_test_lib.WithAllParsers
+  def testDoesNotReuseKnowledgeBaseWithoutMaxAge(self):
+    self._RunKBIAt(0)
+
+    _, reused_flow_id = self._RunKBIAt(3600)
+    self.assertIsNone(reused_flow_id)
+
+  @parser_test_lib.WithAllParsers
+  def testDoesNotReuseKnowledgeBaseReusedByOtherFlow(self):
+    max_age = rdfvalue.Duration.From(1, rdfvalue.DAYS)
+    first_flow_id, _ = self._RunKBIAt(0, max_age=max_age)
+    _, reused_flow_id = self._RunKBIAt(20 * 3600, max_age=max_age)
+    self.assertEqual(reused_flow_id, first_flow_id)
+
+    # The knowledge base returned by the second flow is 30 hours old already.
+    _, reused_flow_id = self._RunKBIAt(30 * 3600, max_age=max_age)
+    self.assertIsNone(reused_flow_id)
+
+  @parser_test_lib.WithAllParsers
+  def testReusesFullKnowledgeBaseForLightweightRequest(self):
+    max_age = rdfvalue.Duration.From(1, rdfvalue.DAYS)
+    first_flow_id, _ = self._RunKBIAt(0, max_age=max_age, lightweight=False)
+
+    _, reused_flow_id = self._RunKBIAt(
+        3600, max_age=max_age, lightweight=True)
+    self.assertEqual(reused_flow_id, first_flow_id)
+
+  @parser_test_lib.WithAllParsers
+  def testDoesNotReuseLightweightKnowledgeBaseForFullRequest(self):
+    max_age = rdfvalue.Duration.From(1, rdfvalue.DAYS)
+    self._RunKBIAt(0, max_age=max_age, lightweight=True)
+
+    _, reused_flow_id = self._RunKBIAt(
+        3600, max_age=max_age, lightweight=False)
+    self.assertIsNone(reused_flow_id)
+
+  @parser_test_lib.WithAllParsers
+  def testDoesNotReusePartialKnowledgeBaseForCompleteRequest(self):
+    max_age = rdfvalue.Duration.From(1, rdfvalue.DAYS)
+    self._RunKBIAt(0, max_age=max_age, require_complete=False)
+
+    second_flow_id, reused_flow_id = self._RunKBIAt(
+        3600, max_age=max_age, require_complete=True)
+    self.assertIsNone(reused_flow_id)
+
+    # A complete knowledge base can be reused for a partial request.
+    _, reused_flow_id = self._RunKBIAt(
+        7200, max_age=max_age, require_complete=False)
+    self.assertEqual(reused_flow_id, second_flow_id)
+
+  @parser_test_lib.WithAllParsers
+  def testBatchedKnowledgeBaseMatchesUnbatched(self):
+    with temp.AutoTempDirPath(remove_non_empty=True) as temp_dirpath:
+      netgroup_path = os.path.join(temp_dirpath, "netgroup")
+      with open(netgroup_path, "w") as filedesc:
+        filedesc.write("login (-,foo,) (-,bar,)\n")
+
+      passwd_path = os.path.join(temp_dirpath, "passwd")
+      with open(passwd_path, "w") as filedesc:
+        filedesc.write("foo:x:1000:1000:Foo Bar:/home/foo:/bin/bash\n")
+
+      # The client collector reads files directly, so the artifacts are
+      # pointed at real files instead of the fake VFS.
+      netgroup_artifact = rdf_artifacts.Artifact(
+          name="NetgroupConfiguration",
+          doc="Netgroup configuration.",
+          sources=[
+              rdf_artifacts.ArtifactSource(
+                  type=rdf_artifacts.ArtifactSource.SourceType.FILE,
+                  attributes={"paths": [netgroup_path]})
+          ],
+          provides=["users.username"],
+          supported_os=["Linux"])
+
+      passwd_artifact = rdf_artifacts.Artifact(
+          name="LinuxPasswdHomedirs",
+          doc="Home directories from the passwd file.",
+          sources=[
+              rdf_artifacts.ArtifactSource(
+                  type=rdf_artifacts.ArtifactSource.SourceType.GREP,
+                  attributes={
+                      "paths": [passwd_path],
+                      "content_regex_list": [
+                          "^%%users.username%%:[^:]*:[^:]*:[^:]*:[^:]*:[^:]+:"
+                          "[^:]*\n"
+                      ],
+                  })
+          ],
+          provides=["users.homedir", "users.full_name"],
+          supported_os=["Linux"])
+
+      with artifact_test_lib.PatchCleanArtifactRegistry():
+        artifact_registry.REGISTRY.RegisterArtifact(netgroup_artifact)
+        artifact_registry.REGISTRY.RegisterArtifact(passwd_artifact)
+
+        with test_lib.ConfigOverrider({
+            "Artifacts.knowledge_base": [
+                "NetgroupConfiguration",
+                "LinuxPasswdHomedirs",
+            ],
+            "Artifacts.knowledge_base_additions": [],
+            "Artifacts.knowledge_base_skip": [],
+            "Artifacts.netgroup_filter_regexes": ["^login$"],
+            "Artifacts.netgroup_ignore_users": [],
+        }):
+          with test_lib.SuppressLogs():
+            unbatched = self._RunKBI()
+            batched = self._RunKBI(batched=True)
+
+    self.assertEqual(batched, unbatched)
+    self.assertCountEqual([user.username for user in batched.users],
+                          ["foo", "bar"])
+    self.assertEqual(batched.GetUser(username="foo").homedir, "/home/foo")
+    self.assertEqual(batched.GetUser(username="foo").full_name, "Foo Bar")
+
+  def testKnowledgeBaseRetrievalBatched(self):
+
+    hostname_artifact = rdf_artifacts.Artifact(
+        name="TestHostname",
+        doc="Hostname.",
+        sources=[
+            rdf_artifacts.ArtifactSource(
+                type=rdf_artifacts.ArtifactSource.SourceType.GRR_CLIENT_ACTION,
+                attributes={"client_action": "GetHostname"})
+        ],
+        provides=["fqdn"],
+        supported_os=["Linux"])
+
+    users_artifact = rdf_artifacts.Artifact(
+        name="TestUsers",
+        doc="Users.",
+        sources=[
+            rdf_artifacts.ArtifactSource(
+                type=rdf_artifacts.ArtifactSource.SourceType.GRR_CLIENT_ACTION,
+                attributes={"client_action": "EnumerateUsers"})
+        ],
+        provides=["users.username", "users.homedir"],
+        supported_os=["Linux"])
+
+    homedir_artifact = rdf_artifacts.Artifact(
+        name="TestHomedir",
+        doc="Home directory named after the host.",
+        sources=[
+            rdf_artifacts.ArtifactSource(
+                type=rdf_artifacts.ArtifactSource.SourceType.PATH,
+                attributes={"paths": ["/home/%%fqdn%%"]})
+        ],
+        provides=["users.homedir"],
+        supported_os=["Linux"])
+
+    class ClientMock(action_mocks.ActionMock):
+
+      def ArtifactCollector(self, args):
+        self.artifact_collector_args = args
+        return [
+            rdf_artifacts.ClientArtifactCollectorResult(
+                knowledge_base=args.knowledge_base,
+                collected_artifacts=[
+                    rdf_artifacts.CollectedArtifact(
+                        name="TestHostname",
+                        action_results=[
+                            rdf_artifacts.ClientActionResult(
+                                type="RDFString",
+                                value=rdfvalue.RDFString("foo.example.com")),
+                        ]),
+                    rdf_artifacts.CollectedArtifact(
+                        name="TestUsers",
+                        action_results=[
+                            rdf_artifacts.ClientActionResult(
+                                type="User",
+                                value=rdf_client.User(
+                                    username="foo", homedir="/home/foo")),
+                        ]),
+                ])
+        ]
+
+    client_mock = ClientMock()
+
+    with artifact_test_lib.PatchCleanArtifactRegistry():
+      artifact_registry.REGISTRY.RegisterArtifact(homedir_artifact)
+      artifact_registry.REGISTRY.RegisterArtifact(hostname_artifact)
+      artifact_registry.REGISTRY.RegisterArtifact(users_artifact)
+
+      with test_lib.ConfigOverrider({
+          "Artifacts.knowledge_base": [
+              "TestHomedir", "TestHostname", "TestUsers"
+          ],
+      }):
+        with test_lib.SuppressLogs():
+          flow_id = flow_test_lib.TestFlowHelper(
+              artifact.KnowledgeBaseInitializationFlow.__name__,
+              client_mock=client_mock,
+              client_id=test_lib.TEST_CLIENT_ID,
+              creator=self.test_username,
+              batched=True,
+              check_flow_errors=False)
+
+    # Artifacts without dependencies are collected by a single client request.
+    args = client_mock.artifact_collector_args
+    self.assertCountEqual([a.name for a in args.artifacts],
+                          ["TestHostname", "TestUsers"])
+    self.assertEqual(args.knowledge_base.os, "Linux")
+
+    # The artifact that depends on the collected values is collected by its
+    # own flow, just as in the unbatched mode.
+    flow_objs = data_store.REL_DB.ReadAllFlowObjects(
+        client_id=test_lib.TEST_CLIENT_ID, parent_flow_id=flow_id)
+    self.assertLen(flow_objs, 1)
+    self.assertEqual(flow_objs[0].args.artifact_list, ["TestHomedir"])
+
+    results = flow_test_lib.GetFlowResults(test_lib.TEST_CLIENT_ID, flow_id)
+    self.assertLen(results, 1)
+    kb = results[0]
+    self.assertEqual(kb.os, "Linux")
+    self.assertEqual(kb.fqdn, "foo.example.com")
+    self.assertEqual(kb.GetUser(username="foo").homedir, "/home/foo")
+
+  def testKnowledgeBaseRetrievalBatchedFallsBackOnFailure(self):
+
+    hostname_artifact = rdf_artifacts.Artifact(
+        name="TestHostname",
+        doc="Hostname.",
+        sources=[
+            rdf_artifacts.ArtifactSource(
+                type=rdf_artifacts.ArtifactSource.SourceType.GRR_CLIENT_ACTION,
+                attributes={"client_action": "GetHostname"})
+        ],
+        provides=["fqdn"],
+        supported_os=["Linux"])
+
+    class ClientMock(action_mocks.ActionMock):
+
+      def ArtifactCollector(self, args):
+        raise RuntimeError("Batch failed.")
+
+    with artifact_test_lib.PatchCleanArtifactRegistry():
+      artifact_registry.REGISTRY.RegisterArtifact(hostname_artifact)
+
+      with test_lib.ConfigOverrider({
+          "Artifacts.knowledge_base": ["TestHostname"],
+      }):
+        with test_lib.SuppressLogs():
+          flow_id = flow_test_lib.TestFlowHelper(
+              artifact.KnowledgeBaseInitializationFlow.__name__,
+              client_mock=ClientMock(),
+              client_id=test_lib.TEST_CLIENT_ID,
+              creator=self.test_username,
+              batched=True,
+              check_flow_errors=False)
+
+    flow_objs = data_store.REL_DB.ReadAllFlowObjects(
+        client_id=test_lib.TEST_CLIENT_ID, parent_flow_id=flow_id)
+    self.assertLen(flow_objs, 1)
+    self.assertEqual(flow_objs[0].args.artifact_list, ["TestHostname"])
+
+  def testKnowledgeBaseRetrievalBatchedMissingDependencies(self):
+
+    homedir_artifact = rdf_artifacts.Artifact(
+        name="TestHomedir",
+        doc="Home directory named after the host.",
+        sources=[
+            rdf_artifacts.ArtifactSource(
+                type=rdf_artifacts.ArtifactSource.SourceType.PATH,
+                attributes={"paths": ["/home/%%fqdn%%"]})
+        ],
+        provides=["users.homedir"],
+        supported_os=["Linux"])
+
+    with artifact_test_lib.PatchCleanArtifactRegistry():
+      artifact_registry.REGISTRY.RegisterArtifact(homedir_artifact)
+
+      with test_lib.ConfigOverrider({
+          "Artifacts.knowledge_base": ["TestHomedir"],
+      }):
+        with self.assertRaisesRegex(RuntimeError, "TestHomedir"):
+          flow_test_lib.TestFlowHelper(
+              artifact.KnowledgeBaseInitializationFlow.__name__,
+              client_mock=action_mocks.ActionMock(),
+              client_id=test_lib.TEST_CLIENT_ID,
+              creator=self.test_username,
+              batched=True)
+
   def testUnicodeValues(self):
 
     foo_artifact_source = rdf_artifacts.ArtifactSource(
@@ -74,7 +74,10 @@ class GRRFSServer:
         max_queue_size=config.CONFIG["Frontend.max_queue_size"],
         message_expiry_time=config.CONFIG["Frontend.message_expiry_time"],
         max_retransmission_time=config
-        .CONFIG["Frontend.max_retransmission_time"])
+        .CONFIG["Frontend.max_retransmission_time"],
+        ingestion_batch_size=config.CONFIG["Frontend.ingestion_batch_size"],
+        ingestion_batch_latency=config
+        .CONFIG["Frontend.ingestion_batch_latency"])
 
   @FRONTEND_REQUEST_COUNT.Counted(fields=["fleetspeak"])
   @FRONTEND_REQUEST_LATENCY.Timed(fields=["fleetspeak"])
@@ -9,7 +9,10 @@ from absl import app
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import client_stats as rdf_client_stats
 from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
+from grr_response_server import action_registry
 from grr_response_server import data_store
+from grr_response_server import flow
+from grr_response_server import flow_base
 from grr_response_server import foreman
 from grr_response_server import worker_lib
 from grr_response_server.rdfvalues import objects as rdf_objects
@@ -18,6 +21,26 @@ from grr.test_lib import flow_test_lib
 from grr.test_lib import test_lib
 
 
+class RoundCountingFlow(flow_base.FlowBase):
+  """Records every processing round in its state."""
+
+  def Start(self):
+    self.state.rounds = []
+    self._CallClient()
+
+  def _CallClient(self):
+    self.CallClient(
+        action_registry.ACTION_STUB_BY_ID["Store"],
+        string="Hey!",
+        next_state="Round")
+
+  def Round(self, responses):
+    del responses
+    self.state.rounds.append(len(self.state.rounds))
+    if len(self.state.rounds) < 3:
+      self._CallClient()
+
+
 class GrrWorkerTest(flow_test_lib.FlowTestsBaseclass):
   """Tests the GRR Worker."""
 
@@ -76,6 +99,39 @@ class GrrWorkerTest(flow_test_lib.FlowTestsBaseclass):
     self.assertEqual(client_mock.storage["cpulimit"], [1000, 980, 960])
     self.assertEqual(client_mock.storage["networklimit"], [10000, 9000, 8000])
 
+  def _RunRoundCountingFlowWithCachedState(self, cached_version_delta):
+    client_id = self.SetupClient(0)
+    flow_id = flow.StartFlow(
+        client_id=client_id,
+        flow_cls=RoundCountingFlow,
+        creator=self.test_username)
+    rdf_flow = data_store.REL_DB.ReadFlowObject(client_id, flow_id)
+    version = rdf_flow.persistent_data_version + cached_version_delta
+
+    with test_lib.ConfigOverrider({"Worker.flow_state_cache_size": 10}):
+      with flow_test_lib.TestWorker() as worker:
+        # pylint: disable=protected-access
+        worker._flow_state_cache.Put((client_id, flow_id),
+                                     (version, flow.FlowState(rounds=[10])))
+        # pylint: enable=protected-access
+        flow_test_lib.RunFlow(
+            client_id,
+            flow_id,
+            client_mock=action_mocks.CPULimitClientMock(),
+            worker=worker)
+
+    rdf_flow = data_store.REL_DB.ReadFlowObject(client_id, flow_id)
+    self.assertEqual(rdf_flow.flow_state, rdf_flow.FlowState.FINISHED)
+    return rdf_flow.persistent_data["rounds"]
+
+  def testFlowStateCacheIsUsedWhenVersionMatches(self):
+    rounds = self._RunRoundCountingFlowWithCachedState(cached_version_delta=0)
+    self.assertEqual(rounds, [10, 1, 2])
+
+  def testFlowStateCacheIsIgnoredWhenVersionDiffers(self):
+    rounds = self._RunRoundCountingFlowWithCachedState(cached_version_delta=-1)
+    self.assertEqual(rounds, [0, 1, 2])
+
   def testForemanMessageHandler(self):
     with mock.patch.object(foreman.Foreman, "AssignTasksToClient") as instr:
       # Send a message to the Foreman.
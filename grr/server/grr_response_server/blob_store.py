@@ -105,6 +105,19 @@ class BlobStore(metaclass=abc.ABCMeta):
       corresponding blob_data will be None.
     """
 
+  @property
+  def has_fast_existence_checks(self) -> bool:
+    """Whether checking if blobs exist is much cheaper than writing them.
+
+    If true, it is worth calling `CheckBlobsExist` before `WriteBlobs` to skip
+    writing blobs that are already stored. Otherwise, such a check only adds a
+    round trip to every write.
+
+    Returns:
+      A boolean indicating if existence checks are fast.
+    """
+    return False
+
   @abc.abstractmethod
   def CheckBlobsExist(
       self,
@@ -265,6 +278,10 @@ class BlobStoreValidationWrapper(BlobStore):
     precondition.AssertIterableType(blob_ids, rdf_objects.BlobID)
     return self.delegate.ReadBlobs(blob_ids)
 
+  @property
+  def has_fast_existence_checks(self) -> bool:
+    return self.delegate.has_fast_existence_checks
+
   def CheckBlobsExist(
       self,
       blob_ids: Iterable[rdf_objects.BlobID]) -> Dict[rdf_objects.BlobID, bool]:
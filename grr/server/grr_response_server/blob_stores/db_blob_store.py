@@ -42,6 +42,10 @@ class DbBlobStore(blob_store.BlobStore):
   ) -> Dict[rdf_objects.BlobID, Optional[bytes]]:
     return self._delegate.ReadBlobs(blob_ids)
 
+  @property
+  def has_fast_existence_checks(self) -> bool:
+    return self._delegate.has_fast_existence_checks
+
   def CheckBlobsExist(
       self,
       blob_ids: Iterable[rdf_objects.BlobID],
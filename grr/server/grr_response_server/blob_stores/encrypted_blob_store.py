@@ -125,6 +125,10 @@ class EncryptedBlobStore(blob_store.BlobStore):
 
     return blobs
 
+  @property
+  def has_fast_existence_checks(self) -> bool:
+    return self._bs.has_fast_existence_checks
+
   def CheckBlobsExist(
       self,
       blob_ids: Iterable[rdf_objects.BlobID],
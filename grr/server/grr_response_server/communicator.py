@@ -9,8 +9,8 @@ import zlib
 from grr_response_core.lib import communicator
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import type_info
-from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
+from grr_response_core.lib.util import cache
 from grr_response_core.stats import metrics
 
 
@@ -54,7 +54,8 @@ class Communicator(metaclass=abc.ABCMeta):
     self._ClearServerCipherCache()
 
     # A cache for encrypted ciphers
-    self.encrypted_cipher_cache = utils.FastStore(max_size=50000)
+    self.encrypted_cipher_cache = cache.LRUCache(
+        "encrypted_ciphers", max_size=50000)
 
   @abc.abstractmethod
   def _GetRemotePublicKey(self, server_name):
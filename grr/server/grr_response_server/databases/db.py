@@ -45,6 +45,14 @@ from grr_response_proto.rrg import startup_pb2 as rrg_startup_pb2
 
 CLIENT_STATS_RETENTION = rdfvalue.Duration.From(31, rdfvalue.DAYS)
 
+# Resolutions of client stats rollups, from the finest to the coarsest. Only
+# rollups of the coarsest resolution are kept beyond CLIENT_STATS_RETENTION.
+CLIENT_STATS_ROLLUP_RESOLUTIONS = (
+    rdfvalue.Duration.From(1, rdfvalue.MINUTES),
+    rdfvalue.Duration.From(1, rdfvalue.HOURS),
+    rdfvalue.Duration.From(1, rdfvalue.DAYS),
+)
+
 # Use 254 as max length for usernames to allow email addresses.
 MAX_USERNAME_LENGTH = 254
 
@@ -442,6 +450,29 @@ FlowStateAndTimestamps = collections.namedtuple("FlowStateAndTimestamps", [
 ])
 
 
+class DeletedRows(NamedTuple):
+  """Rows deleted in a single batch by one of the retention methods."""
+
+  count: int
+  """Number of deleted rows."""
+
+  size: int
+  """Number of bytes taken by payloads of the deleted rows."""
+
+
+class FlowDigest(NamedTuple):
+  """A lightweight summary of a flow used to detect duplicate flows."""
+
+  flow_id: str
+  """An identifier of the flow."""
+
+  create_time: rdfvalue.RDFDatetime
+  """Creation time of the flow."""
+
+  args_digest: bytes
+  """A digest of flow arguments computed by `db_utils.FlowArgsDigest`."""
+
+
 class SearchClientsResult(NamedTuple):
   """The result of a structured search."""
 
@@ -1153,6 +1184,9 @@ class Database(metaclass=abc.ABCMeta):
     Any existing entry with identical client_id and create_time will be
     overwritten.
 
+    Samples of new entries are also added to the client's rollups of all
+    CLIENT_STATS_ROLLUP_RESOLUTIONS.
+
     Args:
       client_id: A GRR client id string, e.g. "C.ea3b2b71840d6fa7".
       stats: an instance of rdfvalues.client_stats.ClientStats
@@ -1163,7 +1197,8 @@ class Database(metaclass=abc.ABCMeta):
       self,
       client_id: Text,
       min_timestamp: Optional[rdfvalue.RDFDatetime] = None,
-      max_timestamp: Optional[rdfvalue.RDFDatetime] = None
+      max_timestamp: Optional[rdfvalue.RDFDatetime] = None,
+      max_samples: Optional[int] = None,
   ) -> List[rdf_client_stats.ClientStats]:
     """Reads ClientStats for a given client and optional time range.
 
@@ -1173,10 +1208,35 @@ class Database(metaclass=abc.ABCMeta):
         ClientStats since the retention date will be returned.
       max_timestamp: maximum rdfvalue.RDFDateTime (inclusive). If None,
         ClientStats up to the current time will be returned.
+      max_samples: If set and the time range spans more than max_samples
+        minutes, rollups of the finest resolution having at most (roughly)
+        max_samples periods in the time range are read instead of raw
+        ClientStats. Every rollup is returned as a single ClientStats instance
+        timestamped with the start of its period.
     Returns: A List of rdfvalues.client_stats.ClientStats instances, sorted by
       create_time.
     """
 
+  @abc.abstractmethod
+  def ReadClientStatsRollups(
+      self,
+      client_id: Text,
+      resolution: rdfvalue.Duration,
+      min_timestamp: rdfvalue.RDFDatetime,
+      max_timestamp: rdfvalue.RDFDatetime,
+  ) -> List[rdf_client_stats.ClientStatsRollup]:
+    """Reads rollups of ClientStats for a given client and time range.
+
+    Args:
+      client_id: A GRR client id string, e.g. "C.ea3b2b71840d6fa7".
+      resolution: One of CLIENT_STATS_ROLLUP_RESOLUTIONS.
+      min_timestamp: minimum start of the rollup periods (inclusive).
+      max_timestamp: maximum start of the rollup periods (inclusive).
+
+    Returns:
+      A list of ClientStatsRollup instances, sorted by timestamp.
+    """
+
   @abc.abstractmethod
   def DeleteOldClientStats(
       self,
@@ -1193,6 +1253,9 @@ class Database(metaclass=abc.ABCMeta):
     After every deleted batch, the function will yield the number of deleted
     stats. The returned iterator stops once all outdated client stats are gone.
 
+    Rollups of client stats periods starting before the cutoff time are
+    deleted as well, apart from rollups of the coarsest resolution.
+
     Args:
       cutoff_time: A point in time before each all stats are to be deleted.
       batch_size: An (optional) number of stats deleted at a single iteration.
@@ -1504,6 +1567,44 @@ class Database(metaclass=abc.ABCMeta):
     return self.ListDescendantPathInfos(
         client_id, path_type, components, max_depth=1, timestamp=timestamp)
 
+  def MultiListChildPathInfos(
+      self,
+      client_id: Text,
+      paths: Collection[Tuple["rdf_objects.PathInfo.PathType",
+                              Sequence[Text]]],
+      timestamp: Optional[rdfvalue.RDFDatetime] = None,
+  ) -> Dict[Tuple["rdf_objects.PathInfo.PathType", Tuple[Text, ...]],
+            Optional[List[rdf_objects.PathInfo]]]:
+    """Lists path info records that correspond to children of given paths.
+
+    This is a bulk version of `ListChildPathInfos` that allows database
+    implementations to list multiple directories (e.g. all the levels of a
+    directory tree for all path types) with a single query.
+
+    Args:
+      client_id: An identifier string for a client.
+      paths: A collection of (path type, path components) tuples identifying
+        directories to list.
+      timestamp: If set, lists only descendants that existed only at that
+        timestamp.
+
+    Returns:
+      A dictionary mapping (path type, path components tuple) pairs to lists
+      of `rdf_objects.PathInfo` instances sorted by path components. If a
+      given path does not exist or is not a directory, it is mapped to `None`.
+    """
+    results = {}
+    for path_type, components in paths:
+      try:
+        child_path_infos = self.ListChildPathInfos(
+            client_id, path_type, components, timestamp=timestamp)
+      except (UnknownPathError, NotDirectoryPathError):
+        child_path_infos = None
+
+      results[(path_type, tuple(components))] = child_path_infos
+
+    return results
+
   @abc.abstractmethod
   def ListDescendantPathInfos(self,
                               client_id,
@@ -1706,6 +1807,9 @@ class Database(metaclass=abc.ABCMeta):
   def WriteMessageHandlerRequests(self, requests):
     """Writes a list of message handler requests to the database.
 
+    Requests that have `leased_until` set are not leased to a handler before
+    that time.
+
     Args:
       requests: List of objects.MessageHandlerRequest.
     """
@@ -1962,6 +2066,57 @@ class Database(metaclass=abc.ABCMeta):
       None will be used as a value instead of a list.
     """
 
+  def CheckHashBlobReferencesExist(
+      self, hashes: Iterable[rdf_objects.SHA256HashID]
+  ) -> Dict[rdf_objects.SHA256HashID, bool]:
+    """Checks if blob references of given hashes exist.
+
+    This is a cheaper version of ReadHashBlobReferences for callers that only
+    need to know whether the contents of a file are present. It never writes
+    to the database: references are only marked as recently used when they
+    are written (see DeleteUnreferencedHashBlobReferences).
+
+    Args:
+      hashes: An iterable of SHA256HashID objects.
+
+    Returns:
+      A dict where SHA256HashID objects are keys and values are booleans
+      indicating whether the blob references are present.
+    """
+    return {
+        hash_id: bool(blob_refs)
+        for hash_id, blob_refs in self.ReadHashBlobReferences(hashes).items()
+    }
+
+  @abc.abstractmethod
+  def DeleteUnreferencedHashBlobReferences(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[DeletedRows]:
+    """Deletes blob references of hashes that no path info refers to.
+
+    Only references last written before the cutoff time are deleted, so that
+    files that are being collected (whose blob references are written before
+    their path infos) are not affected. References of hashes that are found to
+    exist are not refreshed, so the cutoff time should leave callers of
+    CheckHashBlobReferencesExist ample time to write path infos referring to
+    them. The blobs themselves are not deleted.
+
+    After every deleted batch, the function yields the number of deleted
+    references and their size. The returned iterator stops once all matching
+    references are gone.
+
+    Args:
+      cutoff_time: A point in time before which unreferenced blob references
+        were last written.
+      batch_size: An (optional) number of references deleted at a single
+        iteration.
+
+    Yields:
+      `DeletedRows` for every deleted batch.
+    """
+
   # If we send a message unsuccessfully to a client five times, we just give up
   # and remove the message to avoid endless repetition of some broken action.
   CLIENT_MESSAGES_TTL = 5
@@ -2017,6 +2172,48 @@ class Database(metaclass=abc.ABCMeta):
       A list of rdf_flow_objects.Flow objects.
     """
 
+  @abc.abstractmethod
+  def CountFlowsByCreator(
+      self,
+      client_id: str,
+      min_create_time: rdfvalue.RDFDatetime,
+      include_child_flows: bool = True,
+  ) -> Dict[str, int]:
+    """Counts flows of a client created since a given time by each creator.
+
+    Args:
+      client_id: The client id.
+      min_create_time: the minimum creation time (inclusive)
+      include_child_flows: include child flows in the counts.
+
+    Returns:
+      A dictionary mapping creators to numbers of flows they have created.
+      Creators without any flows are not included.
+    """
+
+  @abc.abstractmethod
+  def ReadFlowDigests(
+      self,
+      client_id: str,
+      flow_class_name: str,
+      min_create_time: rdfvalue.RDFDatetime,
+      include_child_flows: bool = True,
+  ) -> List[FlowDigest]:
+    """Reads digests of flows of a given class created since a given time.
+
+    Unlike `ReadAllFlowObjects`, this doesn't read and deserialize whole flow
+    objects, so it is cheap enough to be called on every flow start.
+
+    Args:
+      client_id: The client id.
+      flow_class_name: A name of the flow class to read digests for.
+      min_create_time: the minimum creation time (inclusive)
+      include_child_flows: include digests of child flows.
+
+    Returns:
+      A list of `FlowDigest` objects.
+    """
+
   def ReadChildFlowObjects(self, client_id, flow_id):
     """Reads flow objects that were started by a given flow from the database.
 
@@ -2066,6 +2263,35 @@ class Database(metaclass=abc.ABCMeta):
       this method will return false and the flow will not be written.
     """
 
+  @abc.abstractmethod
+  def CommitFlowStep(
+      self,
+      flow_obj: rdf_flow_objects.Flow,
+      requests: Sequence[rdf_flow_objects.FlowRequest] = (),
+      responses: Sequence[rdf_flow_objects.FlowMessage] = (),
+      completed_requests: Sequence[rdf_flow_objects.FlowRequest] = (),
+      results: Sequence[rdf_flow_objects.FlowResult] = (),
+  ) -> bool:
+    """Writes everything a flow processing step produced and releases the flow.
+
+    This is equivalent to calling `WriteFlowRequests`, `WriteFlowResponses`,
+    `DeleteFlowRequests`, `WriteFlowResults` and `ReleaseProcessedFlow` in
+    turn, but all changes are applied atomically.
+
+    Args:
+      flow_obj: The rdf_flow_objects.Flow object to return.
+      requests: Flow requests to write.
+      responses: Flow responses to write, updating corresponding requests.
+      completed_requests: Processed flow requests to delete together with their
+        responses.
+      results: Flow results to write.
+
+    Returns:
+      A boolean indicating if it was possible to return the flow to the
+      database (see `ReleaseProcessedFlow`). All other changes are written
+      even if the flow could not be returned.
+    """
+
   @abc.abstractmethod
   def UpdateFlow(self,
                  client_id,
@@ -2161,6 +2387,30 @@ class Database(metaclass=abc.ABCMeta):
       flow_id: The id of the flow to delete requests and responses for.
     """
 
+  @abc.abstractmethod
+  def DeleteOldFlowRequests(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[DeletedRows]:
+    """Deletes flow requests left behind by flows that are not running.
+
+    Flows delete their requests when they finish. Requests can still be left
+    behind, e.g. by crashed flows. Requests of running flows are never deleted.
+
+    After every deleted batch, the function yields the number of deleted
+    requests and responses and their size. The returned iterator stops once all
+    matching requests are gone.
+
+    Args:
+      cutoff_time: A point in time before which the requests were written.
+      batch_size: An (optional) number of requests deleted at a single
+        iteration.
+
+    Yields:
+      `DeletedRows` for every deleted batch.
+    """
+
   @abc.abstractmethod
   def ReadFlowRequestsReadyForProcessing(self,
                                          client_id,
@@ -2385,6 +2635,30 @@ class Database(metaclass=abc.ABCMeta):
       A number of flow errors of a given flow matching given query options.
     """
 
+  @abc.abstractmethod
+  def DeleteOldFlowResults(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      hunt_results: bool = False,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[DeletedRows]:
+    """Deletes flow results written before the specified cutoff time.
+
+    After every deleted batch, the function yields the number of deleted
+    results and their size. The returned iterator stops once all matching
+    results are gone.
+
+    Args:
+      cutoff_time: A point in time before which the results were written.
+      hunt_results: If true, only results of hunt flows are deleted. Otherwise,
+        only results of flows that don't belong to a hunt are deleted.
+      batch_size: An (optional) number of results deleted at a single
+        iteration.
+
+    Yields:
+      `DeletedRows` for every deleted batch.
+    """
+
   @abc.abstractmethod
   def WriteFlowLogEntry(self, entry: rdf_flow_objects.FlowLogEntry) -> None:
     """Writes a single flow log entry to the database.
@@ -2433,6 +2707,27 @@ class Database(metaclass=abc.ABCMeta):
       Number of flow log entries of a given flow.
     """
 
+  @abc.abstractmethod
+  def DeleteOldFlowLogEntries(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[DeletedRows]:
+    """Deletes flow log entries written before the specified cutoff time.
+
+    After every deleted batch, the function yields the number of deleted
+    entries and their size. The returned iterator stops once all matching
+    entries are gone.
+
+    Args:
+      cutoff_time: A point in time before which the entries were written.
+      batch_size: An (optional) number of entries deleted at a single
+        iteration.
+
+    Yields:
+      `DeletedRows` for every deleted batch.
+    """
+
   @abc.abstractmethod
   def WriteFlowOutputPluginLogEntry(
       self,
@@ -2639,6 +2934,50 @@ class Database(metaclass=abc.ABCMeta):
           not exist.
     """
 
+  @abc.abstractmethod
+  def ReadHuntOutputPluginStateShards(self, hunt_id):
+    """Reads all shards of the output plugin states of a given hunt.
+
+    Args:
+      hunt_id: Id of the hunt.
+
+    Returns:
+      A dict mapping indices of states in the ReadHuntOutputPluginsStates-
+      returned list to lists of AttributedDict objects, one per written shard.
+
+    Raises:
+      UnknownHuntError: if a hunt with a given hunt id does not exit.
+    """
+
+  @abc.abstractmethod
+  def UpdateHuntOutputPluginStateShard(self, hunt_id, state_index, shard,
+                                       update_fn):
+    """Updates a shard of the hunt output plugin state of a given plugin.
+
+    Shards allow concurrent workers to update the state of the same output
+    plugin without contending on a single database row. They are written
+    next to the state updated by UpdateHuntOutputPluginState, which is left
+    untouched.
+
+    Args:
+      hunt_id: Id of the hunt to be updated.
+      state_index: Index of a state in ReadHuntOutputPluginsStates-returned
+        list.
+      shard: Non-negative index of the shard to update.
+      update_fn: A function accepting the AttributedDict of the shard, or None
+        if the shard was not written before. The function is expected to
+        return the modified shard.
+
+    Returns:
+      An updated AttributedDict object corresponding to the updated shard
+      (result of the update_fn function call).
+
+    Raises:
+      UnknownHuntError: if a hunt with a given hunt id does not exit.
+      UnknownHuntOutputPluginStateError: if a state with a given index does
+          not exist.
+    """
+
   @abc.abstractmethod
   def DeleteHuntObject(self, hunt_id):
     """Deletes a hunt object with a given id.
@@ -3379,22 +3718,60 @@ class DatabaseValidationWrapper(Database):
       self,
       client_id: Text,
       min_timestamp: Optional[rdfvalue.RDFDatetime] = None,
-      max_timestamp: Optional[rdfvalue.RDFDatetime] = None
+      max_timestamp: Optional[rdfvalue.RDFDatetime] = None,
+      max_samples: Optional[int] = None,
   ) -> List[rdf_client_stats.ClientStats]:
     precondition.ValidateClientId(client_id)
+    precondition.AssertOptionalType(max_samples, int)
+    if max_samples is not None and max_samples < 1:
+      raise ValueError(f"Max samples must be positive (got '{max_samples}')")
 
+    now = rdfvalue.RDFDatetime.Now()
     if min_timestamp is None:
-      min_timestamp = rdfvalue.RDFDatetime.Now() - CLIENT_STATS_RETENTION
+      min_timestamp = now - CLIENT_STATS_RETENTION
     else:
       self._ValidateTimestamp(min_timestamp)
 
     if max_timestamp is None:
-      max_timestamp = rdfvalue.RDFDatetime.Now()
+      max_timestamp = now
     else:
       self._ValidateTimestamp(max_timestamp)
 
-    return self.delegate.ReadClientStats(client_id, min_timestamp,
-                                         max_timestamp)
+    time_range = max_timestamp - min_timestamp
+    # Raw ClientStats samples are already downsampled to one minute on
+    # ingestion, so the finest rollups would not reduce the number of samples.
+    if (max_samples is None or
+        time_range <= CLIENT_STATS_ROLLUP_RESOLUTIONS[0] * max_samples):
+      return self.delegate.ReadClientStats(client_id, min_timestamp,
+                                           max_timestamp)
+
+    if min_timestamp < now - CLIENT_STATS_RETENTION:
+      # Only the coarsest rollups are kept beyond the retention period.
+      resolution = CLIENT_STATS_ROLLUP_RESOLUTIONS[-1]
+    else:
+      for resolution in CLIENT_STATS_ROLLUP_RESOLUTIONS:
+        if time_range <= resolution * max_samples:
+          break
+
+    rollups = self.delegate.ReadClientStatsRollups(
+        client_id, resolution, min_timestamp.Floor(resolution), max_timestamp)
+    return [rollup.ToClientStats() for rollup in rollups]
+
+  def ReadClientStatsRollups(
+      self,
+      client_id: Text,
+      resolution: rdfvalue.Duration,
+      min_timestamp: rdfvalue.RDFDatetime,
+      max_timestamp: rdfvalue.RDFDatetime,
+  ) -> List[rdf_client_stats.ClientStatsRollup]:
+    precondition.ValidateClientId(client_id)
+    if resolution not in CLIENT_STATS_ROLLUP_RESOLUTIONS:
+      raise ValueError(f"Unsupported client stats resolution: {resolution}")
+    self._ValidateTimestamp(min_timestamp)
+    self._ValidateTimestamp(max_timestamp)
+
+    return self.delegate.ReadClientStatsRollups(client_id, resolution,
+                                                min_timestamp, max_timestamp)
 
   def DeleteOldClientStats(
       self,
@@ -3564,6 +3941,16 @@ class DatabaseValidationWrapper(Database):
     return self.delegate.ListChildPathInfos(
         client_id, path_type, components, timestamp=timestamp)
 
+  def MultiListChildPathInfos(self, client_id, paths, timestamp=None):
+    precondition.ValidateClientId(client_id)
+    for path_type, components in paths:
+      _ValidateEnumType(path_type, rdf_objects.PathInfo.PathType)
+      _ValidatePathComponents(components)
+    precondition.AssertOptionalType(timestamp, rdfvalue.RDFDatetime)
+
+    return self.delegate.MultiListChildPathInfos(
+        client_id, paths, timestamp=timestamp)
+
   def ListDescendantPathInfos(self,
                               client_id,
                               path_type,
@@ -3835,6 +4222,20 @@ class DatabaseValidationWrapper(Database):
     precondition.AssertIterableType(hashes, rdf_objects.SHA256HashID)
     return self.delegate.ReadHashBlobReferences(hashes)
 
+  def CheckHashBlobReferencesExist(self, hashes):
+    precondition.AssertIterableType(hashes, rdf_objects.SHA256HashID)
+    return self.delegate.CheckHashBlobReferencesExist(hashes)
+
+  def DeleteUnreferencedHashBlobReferences(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[DeletedRows]:
+    self._ValidateTimestamp(cutoff_time)
+    _ValidateBatchSize(batch_size)
+    return self.delegate.DeleteUnreferencedHashBlobReferences(
+        cutoff_time, batch_size=batch_size)
+
   def WriteFlowObject(self, flow_obj, allow_update=True):
     precondition.AssertType(flow_obj, rdf_flow_objects.Flow)
     precondition.AssertType(allow_update, bool)
@@ -3878,6 +4279,35 @@ class DatabaseValidationWrapper(Database):
         include_child_flows=include_child_flows,
         not_created_by=not_created_by)
 
+  def CountFlowsByCreator(
+      self,
+      client_id: str,
+      min_create_time: rdfvalue.RDFDatetime,
+      include_child_flows: bool = True,
+  ) -> Dict[str, int]:
+    precondition.ValidateClientId(client_id)
+    precondition.AssertType(min_create_time, rdfvalue.RDFDatetime)
+    precondition.AssertType(include_child_flows, bool)
+    return self.delegate.CountFlowsByCreator(
+        client_id, min_create_time, include_child_flows=include_child_flows)
+
+  def ReadFlowDigests(
+      self,
+      client_id: str,
+      flow_class_name: str,
+      min_create_time: rdfvalue.RDFDatetime,
+      include_child_flows: bool = True,
+  ) -> List[FlowDigest]:
+    precondition.ValidateClientId(client_id)
+    precondition.AssertType(flow_class_name, str)
+    precondition.AssertType(min_create_time, rdfvalue.RDFDatetime)
+    precondition.AssertType(include_child_flows, bool)
+    return self.delegate.ReadFlowDigests(
+        client_id,
+        flow_class_name,
+        min_create_time,
+        include_child_flows=include_child_flows)
+
   def ReadChildFlowObjects(self, client_id, flow_id):
     precondition.ValidateClientId(client_id)
     precondition.ValidateFlowId(flow_id)
@@ -3894,6 +4324,27 @@ class DatabaseValidationWrapper(Database):
     precondition.AssertType(flow_obj, rdf_flow_objects.Flow)
     return self.delegate.ReleaseProcessedFlow(flow_obj)
 
+  def CommitFlowStep(
+      self,
+      flow_obj: rdf_flow_objects.Flow,
+      requests: Sequence[rdf_flow_objects.FlowRequest] = (),
+      responses: Sequence[rdf_flow_objects.FlowMessage] = (),
+      completed_requests: Sequence[rdf_flow_objects.FlowRequest] = (),
+      results: Sequence[rdf_flow_objects.FlowResult] = (),
+  ) -> bool:
+    precondition.AssertType(flow_obj, rdf_flow_objects.Flow)
+    precondition.AssertIterableType(requests, rdf_flow_objects.FlowRequest)
+    precondition.AssertIterableType(responses, rdf_flow_objects.FlowMessage)
+    precondition.AssertIterableType(completed_requests,
+                                    rdf_flow_objects.FlowRequest)
+    _ValidateFlowResults(results)
+    return self.delegate.CommitFlowStep(
+        flow_obj,
+        requests=requests,
+        responses=responses,
+        completed_requests=completed_requests,
+        results=results)
+
   def UpdateFlow(self,
                  client_id,
                  flow_id,
@@ -3963,6 +4414,16 @@ class DatabaseValidationWrapper(Database):
     precondition.ValidateFlowId(flow_id)
     return self.delegate.DeleteAllFlowRequestsAndResponses(client_id, flow_id)
 
+  def DeleteOldFlowRequests(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[DeletedRows]:
+    self._ValidateTimestamp(cutoff_time)
+    _ValidateBatchSize(batch_size)
+    return self.delegate.DeleteOldFlowRequests(
+        cutoff_time, batch_size=batch_size)
+
   def ReadFlowRequestsReadyForProcessing(self,
                                          client_id,
                                          flow_id,
@@ -3997,13 +4458,7 @@ class DatabaseValidationWrapper(Database):
     return self.delegate.UnregisterFlowProcessingHandler(timeout=timeout)
 
   def WriteFlowResults(self, results):
-    for r in results:
-      precondition.AssertType(r, rdf_flow_objects.FlowResult)
-      precondition.ValidateClientId(r.client_id)
-      precondition.ValidateFlowId(r.flow_id)
-      if r.HasField("hunt_id") and r.hunt_id:
-        _ValidateHuntId(r.hunt_id)
-
+    _ValidateFlowResults(results)
     return self.delegate.WriteFlowResults(results)
 
   def ReadFlowResults(self,
@@ -4105,6 +4560,18 @@ class DatabaseValidationWrapper(Database):
     return self.delegate.CountFlowErrors(
         client_id, flow_id, with_tag=with_tag, with_type=with_type)
 
+  def DeleteOldFlowResults(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      hunt_results: bool = False,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[DeletedRows]:
+    self._ValidateTimestamp(cutoff_time)
+    precondition.AssertType(hunt_results, bool)
+    _ValidateBatchSize(batch_size)
+    return self.delegate.DeleteOldFlowResults(
+        cutoff_time, hunt_results=hunt_results, batch_size=batch_size)
+
   def WriteFlowLogEntry(self, entry: rdf_flow_objects.FlowLogEntry) -> None:
     precondition.ValidateClientId(entry.client_id)
     precondition.ValidateFlowId(entry.flow_id)
@@ -4132,6 +4599,16 @@ class DatabaseValidationWrapper(Database):
 
     return self.delegate.CountFlowLogEntries(client_id, flow_id)
 
+  def DeleteOldFlowLogEntries(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[DeletedRows]:
+    self._ValidateTimestamp(cutoff_time)
+    _ValidateBatchSize(batch_size)
+    return self.delegate.DeleteOldFlowLogEntries(
+        cutoff_time, batch_size=batch_size)
+
   def WriteFlowOutputPluginLogEntry(
       self,
       entry: rdf_flow_objects.FlowOutputPluginLogEntry,
@@ -4272,6 +4749,21 @@ class DatabaseValidationWrapper(Database):
     return self.delegate.UpdateHuntOutputPluginState(hunt_id, state_index,
                                                      update_fn)
 
+  def ReadHuntOutputPluginStateShards(self, hunt_id):
+    _ValidateHuntId(hunt_id)
+    return self.delegate.ReadHuntOutputPluginStateShards(hunt_id)
+
+  def UpdateHuntOutputPluginStateShard(self, hunt_id, state_index, shard,
+                                       update_fn):
+    _ValidateHuntId(hunt_id)
+    precondition.AssertType(state_index, int)
+    precondition.AssertType(shard, int)
+    if shard < 0:
+      raise ValueError("Negative shard index: %d" % shard)
+
+    return self.delegate.UpdateHuntOutputPluginStateShard(
+        hunt_id, state_index, shard, update_fn)
+
   def DeleteHuntObject(self, hunt_id):
     _ValidateHuntId(hunt_id)
     return self.delegate.DeleteHuntObject(hunt_id)
@@ -4595,6 +5087,15 @@ def _ValidateHuntId(hunt_id):
   _ValidateStringId("hunt_id", hunt_id)
 
 
+def _ValidateFlowResults(results):
+  for r in results:
+    precondition.AssertType(r, rdf_flow_objects.FlowResult)
+    precondition.ValidateClientId(r.client_id)
+    precondition.ValidateFlowId(r.flow_id)
+    if r.HasField("hunt_id") and r.hunt_id:
+      _ValidateHuntId(r.hunt_id)
+
+
 def _ValidateCronJobId(cron_job_id):
   _ValidateStringId("cron_job_id", cron_job_id)
   _ValidateStringLength("cron_job_id", cron_job_id, MAX_CRON_JOB_ID_LENGTH)
@@ -4690,6 +5191,12 @@ def _ValidateDuration(duration):
   precondition.AssertType(duration, rdfvalue.Duration)
 
 
+def _ValidateBatchSize(batch_size):
+  precondition.AssertOptionalType(batch_size, int)
+  if batch_size is not None and batch_size < 1:
+    raise ValueError(f"Batch size must be positive (got '{batch_size}')")
+
+
 def _ValidateClientPathID(client_path_id):
   precondition.AssertType(client_path_id, rdf_objects.ClientPathID)
 
@@ -4,6 +4,9 @@
 import os
 import random
 
+from grr_response_core.lib import rdfvalue
+from grr_response_core.lib.rdfvalues import crypto as rdf_crypto
+from grr_response_server.databases import db_test_utils
 from grr_response_server.rdfvalues import objects as rdf_objects
 
 
@@ -47,6 +50,94 @@ class DatabaseTestBlobReferencesMixin(object):
         missing_hash_id: None,
     })
 
+  def testCheckHashBlobReferencesExist(self):
+    blob_ref = rdf_objects.BlobReference(
+        offset=0, size=42, blob_id=rdf_objects.BlobID(b"01234567" * 4))
+    hash_id = rdf_objects.SHA256HashID(b"0a1b2c3d" * 4)
+    empty_hash_id = rdf_objects.SHA256HashID(b"0a1b2c3e" * 4)
+    missing_hash_id = rdf_objects.SHA256HashID(b"00000000" * 4)
+
+    self.db.WriteHashBlobReferences({hash_id: [blob_ref], empty_hash_id: []})
+
+    results = self.db.CheckHashBlobReferencesExist(
+        [hash_id, empty_hash_id, missing_hash_id])
+    self.assertEqual(results, {
+        hash_id: True,
+        empty_hash_id: False,
+        missing_hash_id: False,
+    })
+
+    # Repeated checks must give the same answers.
+    results = self.db.CheckHashBlobReferencesExist(
+        [hash_id, empty_hash_id, missing_hash_id])
+    self.assertEqual(results, {
+        hash_id: True,
+        empty_hash_id: False,
+        missing_hash_id: False,
+    })
+
+  def testCheckHashBlobReferencesExistWithEmptyInput(self):
+    self.assertEqual(self.db.CheckHashBlobReferencesExist([]), {})
+
+  def testDeleteUnreferencedHashBlobReferences(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    blob_ref = rdf_objects.BlobReference(
+        offset=0, size=42, blob_id=rdf_objects.BlobID(b"01234567" * 4))
+    referenced_hash_id = rdf_objects.SHA256HashID(b"0a1b2c3d" * 4)
+    unreferenced_hash_id = rdf_objects.SHA256HashID(b"0a1b2c3e" * 4)
+    recent_hash_id = rdf_objects.SHA256HashID(b"0a1b2c3f" * 4)
+
+    self.db.WriteHashBlobReferences({
+        referenced_hash_id: [blob_ref],
+        unreferenced_hash_id: [blob_ref],
+    })
+    path_info = rdf_objects.PathInfo.OS(components=["foo"])
+    path_info.hash_entry = rdf_crypto.Hash(
+        sha256=referenced_hash_id.AsBytes(), num_bytes=42)
+    self.db.WritePathInfos(client_id, [path_info])
+
+    cutoff_time = rdfvalue.RDFDatetime.Now()
+    self.db.WriteHashBlobReferences({recent_hash_id: [blob_ref]})
+
+    deleted = list(self.db.DeleteUnreferencedHashBlobReferences(cutoff_time))
+    self.assertEqual([d.count for d in deleted], [1])
+    self.assertGreater(deleted[0].size, 0)
+
+    results = self.db.CheckHashBlobReferencesExist(
+        [referenced_hash_id, unreferenced_hash_id, recent_hash_id])
+    self.assertEqual(results, {
+        referenced_hash_id: True,
+        unreferenced_hash_id: False,
+        recent_hash_id: True,
+    })
+
+  def testDeleteUnreferencedHashBlobReferencesKeepsRecentlyWrittenOnes(self):
+    blob_ref = rdf_objects.BlobReference(
+        offset=0, size=42, blob_id=rdf_objects.BlobID(b"01234567" * 4))
+    rewritten_hash_id = rdf_objects.SHA256HashID(b"0a1b2c3d" * 4)
+    checked_hash_id = rdf_objects.SHA256HashID(b"0a1b2c3e" * 4)
+    unused_hash_id = rdf_objects.SHA256HashID(b"0a1b2c3f" * 4)
+
+    self.db.WriteHashBlobReferences({
+        rewritten_hash_id: [blob_ref],
+        checked_hash_id: [blob_ref],
+        unused_hash_id: [blob_ref],
+    })
+    cutoff_time = rdfvalue.RDFDatetime.Now()
+    self.db.WriteHashBlobReferences({rewritten_hash_id: [blob_ref]})
+    self.db.CheckHashBlobReferencesExist([checked_hash_id])
+
+    deleted = list(self.db.DeleteUnreferencedHashBlobReferences(cutoff_time))
+    self.assertEqual(sum(d.count for d in deleted), 2)
+
+    results = self.db.ReadHashBlobReferences(
+        [rewritten_hash_id, checked_hash_id, unused_hash_id])
+    self.assertEqual(results, {
+        rewritten_hash_id: [blob_ref],
+        checked_hash_id: None,
+        unused_hash_id: None,
+    })
+
   def testMultipleHashBlobReferencesCanBeWrittenAndReadBack(self):
     blob_ref_1 = rdf_objects.BlobReference(
         offset=0, size=42, blob_id=rdf_objects.BlobID(b"01234567" * 4))
@@ -1825,6 +1825,132 @@ class DatabaseTestClientsMixin(object):
     self.assertLen(stats, 1)
     self.assertEqual(stats[0].RSS_size, 0xB42)
 
+  def _WriteClientStatsWithCpuSamples(self, client_id, timestamp, rss_size,
+                                      cpu_percents):
+    stats = rdf_client_stats.ClientStats(timestamp=timestamp, RSS_size=rss_size)
+    for i, cpu_percent in enumerate(cpu_percents):
+      stats.cpu_samples.Append(
+          rdf_client_stats.CpuSample(
+              timestamp=timestamp - rdfvalue.Duration.From(i, rdfvalue.SECONDS),
+              cpu_percent=cpu_percent))
+    self.db.WriteClientStats(client_id, stats)
+
+  def testWriteClientStatsUpdatesRollups(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    minute = rdfvalue.Duration.From(1, rdfvalue.MINUTES)
+    start = (self.db.Now() - rdfvalue.Duration.From(1, rdfvalue.HOURS)).Floor(
+        rdfvalue.Duration.From(1, rdfvalue.HOURS))
+
+    self._WriteClientStatsWithCpuSamples(
+        client_id, start + rdfvalue.Duration.From(10, rdfvalue.SECONDS), 100,
+        [0.25, 0.5])
+    self._WriteClientStatsWithCpuSamples(
+        client_id, start + rdfvalue.Duration.From(20, rdfvalue.SECONDS), 300,
+        [0.75])
+    self._WriteClientStatsWithCpuSamples(client_id, start + 2 * minute, 200,
+                                         [1.0])
+
+    rollups = self.db.ReadClientStatsRollups(client_id, minute, start,
+                                             start + 2 * minute)
+    self.assertEqual([r.timestamp for r in rollups],
+                     [start, start + 2 * minute])
+    self.assertEqual(rollups[0].resolution, minute)
+    self.assertEqual(rollups[0].cpu_sample_count, 3)
+    self.assertAlmostEqual(rollups[0].cpu_percent_sum, 1.5)
+    self.assertEqual(rollups[0].stats_count, 2)
+    self.assertEqual(rollups[0].RSS_size_sum, 400)
+    self.assertEqual(rollups[0].RSS_size_max, 300)
+
+    (rollup,) = self.db.ReadClientStatsRollups(
+        client_id, rdfvalue.Duration.From(1, rdfvalue.HOURS), start, start)
+    self.assertEqual(rollup.cpu_sample_count, 4)
+    self.assertEqual(rollup.stats_count, 3)
+
+  def testWriteClientStatsDoesNotRollUpOverwrittenStats(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    day = rdfvalue.Duration.From(1, rdfvalue.DAYS)
+    timestamp = self.db.Now()
+
+    self._WriteClientStatsWithCpuSamples(client_id, timestamp, 100, [0.5])
+    self._WriteClientStatsWithCpuSamples(client_id, timestamp, 100, [0.5])
+
+    (rollup,) = self.db.ReadClientStatsRollups(client_id, day,
+                                               timestamp.Floor(day), timestamp)
+    self.assertEqual(rollup.stats_count, 1)
+    self.assertEqual(rollup.cpu_sample_count, 1)
+
+  def testReadClientStatsRollups_UnsupportedResolution(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    with self.assertRaises(ValueError):
+      self.db.ReadClientStatsRollups(
+          client_id, rdfvalue.Duration.From(42, rdfvalue.SECONDS),
+          self.db.Now(), self.db.Now())
+
+  def testReadClientStats_MaxSamplesReadsRollups(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    hour = rdfvalue.Duration.From(1, rdfvalue.HOURS)
+    now = self.db.Now()
+
+    for i in range(1, 6):
+      self._WriteClientStatsWithCpuSamples(client_id, now - i * hour, i,
+                                           [0.5, 0.25])
+
+    stats = self.db.ReadClientStats(
+        client_id, min_timestamp=now - 5 * hour, max_samples=10)
+    self.assertEqual([s.RSS_size for s in stats], [5, 4, 3, 2, 1])
+    for s in stats:
+      self.assertEqual(s.timestamp, s.timestamp.Floor(hour))
+      self.assertLen(s.cpu_samples, 1)
+      self.assertAlmostEqual(s.cpu_samples[0].cpu_percent, 0.375)
+
+    # Raw stats are read if the time range fits into max_samples minutes.
+    stats = self.db.ReadClientStats(
+        client_id, min_timestamp=now - 5 * hour, max_samples=1000)
+    self.assertEqual([s.timestamp for s in stats],
+                     [now - i * hour for i in range(1, 6)])
+    for s in stats:
+      self.assertLen(s.cpu_samples, 2)
+
+  def testReadClientStats_MaxSamplesBeyondRetentionReadsDailyRollups(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    day = rdfvalue.Duration.From(1, rdfvalue.DAYS)
+    now = self.db.Now()
+
+    self._WriteClientStatsWithCpuSamples(client_id, now, 42, [0.5])
+
+    stats = self.db.ReadClientStats(
+        client_id,
+        min_timestamp=now - db.CLIENT_STATS_RETENTION - day,
+        max_samples=1000)
+    self.assertLen(stats, 1)
+    self.assertEqual(stats[0].timestamp, now.Floor(day))
+    self.assertEqual(stats[0].RSS_size, 42)
+
+  def testReadClientStats_MaxSamplesNegative(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    with self.assertRaises(ValueError):
+      self.db.ReadClientStats(client_id, max_samples=-1)
+
+  def testDeleteOldClientStats_KeepsCoarsestRollups(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    now = self.db.Now()
+    timestamp = now - rdfvalue.Duration.From(2, rdfvalue.DAYS)
+
+    self._WriteClientStatsWithCpuSamples(client_id, timestamp, 42, [0.5])
+    list(self.db.DeleteOldClientStats(now))
+
+    for resolution in db.CLIENT_STATS_ROLLUP_RESOLUTIONS[:-1]:
+      self.assertEmpty(
+          self.db.ReadClientStatsRollups(client_id, resolution,
+                                         timestamp.Floor(resolution), now))
+
+    day = db.CLIENT_STATS_ROLLUP_RESOLUTIONS[-1]
+    rollups = self.db.ReadClientStatsRollups(client_id, day,
+                                             timestamp.Floor(day), now)
+    self.assertLen(rollups, 1)
+
   def testDeleteOldClientStats_Empty(self):
     cutoff_time = self.db.Now()
 
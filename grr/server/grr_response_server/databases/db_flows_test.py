@@ -15,6 +15,7 @@ from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_server import flow
 from grr_response_server.databases import db
 from grr_response_server.databases import db_test_utils
+from grr_response_server.databases import db_utils
 from grr_response_server.flows import file
 from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
 from grr_response_server.rdfvalues import flow_runner as rdf_flow_runner
@@ -406,6 +407,96 @@ class DatabaseTestFlowMixin(object):
     flows = self.db.ReadAllFlowObjects(not_created_by=frozenset(["baz", "foo"]))
     self.assertCountEqual([f.flow_id for f in flows], ["000A0002"])
 
+  def testCountFlowsByCreator(self):
+    client_id_1 = db_test_utils.InitializeClient(self.db)
+    client_id_2 = db_test_utils.InitializeClient(self.db)
+
+    self.db.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            client_id=client_id_1, flow_id="0000000A", creator="foo"))
+    min_timestamp = self.db.Now()
+    self.db.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            client_id=client_id_1, flow_id="0000000B", creator="foo"))
+    self.db.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            client_id=client_id_1, flow_id="0000000C", creator="bar"))
+    self.db.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            client_id=client_id_1,
+            flow_id="0000000D",
+            parent_flow_id="0000000C",
+            creator="bar"))
+    self.db.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            client_id=client_id_2, flow_id="0000000E", creator="foo"))
+
+    self.assertEqual(
+        self.db.CountFlowsByCreator(client_id_1, min_timestamp), {
+            "foo": 1,
+            "bar": 2
+        })
+    self.assertEqual(
+        self.db.CountFlowsByCreator(
+            client_id_1, min_timestamp, include_child_flows=False), {
+                "foo": 1,
+                "bar": 1
+            })
+    self.assertEqual(
+        self.db.CountFlowsByCreator(client_id_2, self.db.Now()), {})
+
+  def testReadFlowDigests(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    args_1 = rdf_file_finder.FileFinderArgs(paths=["/foo"])
+    args_2 = rdf_file_finder.FileFinderArgs(paths=["/bar"])
+
+    self.db.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            client_id=client_id,
+            flow_id="0000000A",
+            flow_class_name="FileFinder",
+            args=args_1))
+    min_timestamp = self.db.Now()
+    self.db.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            client_id=client_id,
+            flow_id="0000000B",
+            flow_class_name="FileFinder",
+            args=args_1))
+    self.db.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            client_id=client_id,
+            flow_id="0000000C",
+            flow_class_name="FileFinder",
+            args=args_2))
+    self.db.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            client_id=client_id,
+            flow_id="0000000D",
+            parent_flow_id="0000000C",
+            flow_class_name="FileFinder",
+            args=args_2))
+    self.db.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            client_id=client_id,
+            flow_id="0000000E",
+            flow_class_name="ClientFileFinder",
+            args=args_1))
+
+    digests = self.db.ReadFlowDigests(client_id, "FileFinder", min_timestamp)
+    self.assertCountEqual([(d.flow_id, d.args_digest) for d in digests], [
+        ("0000000B", db_utils.FlowArgsDigest(args_1)),
+        ("0000000C", db_utils.FlowArgsDigest(args_2)),
+        ("0000000D", db_utils.FlowArgsDigest(args_2)),
+    ])
+    for digest in digests:
+      self.assertGreaterEqual(digest.create_time, min_timestamp)
+
+    digests = self.db.ReadFlowDigests(
+        client_id, "FileFinder", min_timestamp, include_child_flows=False)
+    self.assertCountEqual([d.flow_id for d in digests],
+                          ["0000000B", "0000000C"])
+
   def testReadAllFlowObjectsWithAllConditions(self):
     client_id_1 = "C.1111111111111111"
     client_id_2 = "C.2222222222222222"
@@ -1483,6 +1574,110 @@ class DatabaseTestFlowMixin(object):
     flow_obj.next_request_to_process = 1
     self.assertTrue(self.db.ReleaseProcessedFlow(flow_obj))
 
+  def testCommitFlowStep(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+    self.db.WriteFlowRequests([
+        rdf_flow_objects.FlowRequest(
+            client_id=client_id, flow_id=flow_id, request_id=1)
+    ])
+
+    processed_flow = self.db.LeaseFlowForProcessing(
+        client_id, flow_id, rdfvalue.Duration.From(60, rdfvalue.SECONDS))
+    processed_flow.next_request_to_process = 2
+
+    released = self.db.CommitFlowStep(
+        processed_flow,
+        requests=[
+            rdf_flow_objects.FlowRequest(
+                client_id=client_id, flow_id=flow_id, request_id=2)
+        ],
+        responses=[
+            rdf_flow_objects.FlowResponse(
+                client_id=client_id,
+                flow_id=flow_id,
+                request_id=2,
+                response_id=1)
+        ],
+        completed_requests=[
+            rdf_flow_objects.FlowRequest(
+                client_id=client_id, flow_id=flow_id, request_id=1)
+        ],
+        results=[
+            rdf_flow_objects.FlowResult(
+                client_id=client_id,
+                flow_id=flow_id,
+                payload=rdf_client.ClientSummary(client_id=client_id))
+        ])
+    self.assertTrue(released)
+
+    requests_and_responses = self.db.ReadAllFlowRequestsAndResponses(
+        client_id, flow_id)
+    self.assertLen(requests_and_responses, 1)
+    request, responses = requests_and_responses[0]
+    self.assertEqual(request.request_id, 2)
+    self.assertEqual(list(responses), [1])
+
+    self.assertLen(self.db.ReadFlowResults(client_id, flow_id, 0, 100), 1)
+
+    read_flow = self.db.ReadFlowObject(client_id, flow_id)
+    self.assertEqual(read_flow.next_request_to_process, 2)
+    self.assertFalse(read_flow.processing_on)
+
+  def testCommitFlowStepWritesMessagesIfFlowCanNotBeReleased(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+
+    processed_flow = self.db.LeaseFlowForProcessing(
+        client_id, flow_id, rdfvalue.Duration.From(60, rdfvalue.SECONDS))
+    processed_flow.next_request_to_process = 2
+
+    released = self.db.CommitFlowStep(
+        processed_flow,
+        requests=[
+            rdf_flow_objects.FlowRequest(
+                client_id=client_id,
+                flow_id=flow_id,
+                request_id=2,
+                needs_processing=True)
+        ])
+    self.assertFalse(released)
+
+    requests_and_responses = self.db.ReadAllFlowRequestsAndResponses(
+        client_id, flow_id)
+    self.assertEqual([r.request_id for r, _ in requests_and_responses], [2])
+
+    read_flow = self.db.ReadFlowObject(client_id, flow_id)
+    self.assertTrue(read_flow.processing_on)
+
+  def testCommitFlowStepWritesNothingOnError(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+
+    processed_flow = self.db.LeaseFlowForProcessing(
+        client_id, flow_id, rdfvalue.Duration.From(60, rdfvalue.SECONDS))
+
+    with self.assertRaises(db.AtLeastOneUnknownFlowError):
+      self.db.CommitFlowStep(
+          processed_flow,
+          requests=[
+              rdf_flow_objects.FlowRequest(
+                  client_id=client_id, flow_id=flow_id, request_id=1),
+              rdf_flow_objects.FlowRequest(
+                  client_id=client_id, flow_id="1234ABCD", request_id=1),
+          ],
+          results=[
+              rdf_flow_objects.FlowResult(
+                  client_id=client_id,
+                  flow_id=flow_id,
+                  payload=rdf_client.ClientSummary(client_id=client_id))
+          ])
+
+    self.assertEmpty(self.db.ReadAllFlowRequestsAndResponses(
+        client_id, flow_id))
+    self.assertEmpty(self.db.ReadFlowResults(client_id, flow_id, 0, 100))
+    self.assertTrue(self.db.ReadFlowObject(client_id, flow_id).processing_on)
+
   def testReadChildFlows(self):
     client_id = u"C.1234567890123456"
     self.db.WriteClientMetadata(client_id)
@@ -1581,6 +1776,61 @@ class DatabaseTestFlowMixin(object):
     all_requests = self.db.ReadAllFlowRequestsAndResponses(client_id1, flow_id2)
     self.assertEqual(all_requests, [])
 
+  def testDeleteOldFlowRequestsSkipsRunningFlows(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    running_flow_id = db_test_utils.InitializeFlow(
+        self.db, client_id, flow_state=rdf_flow_objects.Flow.FlowState.RUNNING)
+    crashed_flow_id = db_test_utils.InitializeFlow(
+        self.db, client_id, flow_state=rdf_flow_objects.Flow.FlowState.CRASHED)
+
+    for flow_id in [running_flow_id, crashed_flow_id]:
+      for request_id in range(1, 4):
+        self.db.WriteFlowRequests([
+            rdf_flow_objects.FlowRequest(
+                client_id=client_id, flow_id=flow_id, request_id=request_id)
+        ])
+        self.db.WriteFlowResponses([
+            rdf_flow_objects.FlowResponse(
+                client_id=client_id,
+                flow_id=flow_id,
+                request_id=request_id,
+                response_id=1)
+        ])
+
+    cutoff_time = rdfvalue.RDFDatetime.Now()
+    deleted = list(self.db.DeleteOldFlowRequests(cutoff_time))
+
+    # 3 requests and 3 responses of the crashed flow.
+    self.assertEqual(sum(d.count for d in deleted), 6)
+    self.assertGreater(sum(d.size for d in deleted), 0)
+    self.assertEmpty(
+        self.db.ReadAllFlowRequestsAndResponses(client_id, crashed_flow_id))
+    self.assertLen(
+        self.db.ReadAllFlowRequestsAndResponses(client_id, running_flow_id), 3)
+
+  def testDeleteOldFlowRequestsRespectsCutoffTimeAndBatchSize(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(
+        self.db, client_id, flow_state=rdf_flow_objects.Flow.FlowState.ERROR)
+
+    before_write = rdfvalue.RDFDatetime.Now()
+    for request_id in range(1, 6):
+      self.db.WriteFlowRequests([
+          rdf_flow_objects.FlowRequest(
+              client_id=client_id, flow_id=flow_id, request_id=request_id)
+      ])
+
+    self.assertEmpty(list(self.db.DeleteOldFlowRequests(before_write)))
+    self.assertLen(self.db.ReadAllFlowRequestsAndResponses(client_id, flow_id),
+                   5)
+
+    deleted = list(
+        self.db.DeleteOldFlowRequests(
+            rdfvalue.RDFDatetime.Now(), batch_size=2))
+    self.assertEqual([d.count for d in deleted], [2, 2, 1])
+    self.assertEmpty(
+        self.db.ReadAllFlowRequestsAndResponses(client_id, flow_id))
+
   def testReadFlowRequestsReadyForProcessing(self):
     client_id = u"C.1234567890000000"
     flow_id = u"12344321"
@@ -2295,6 +2545,44 @@ class DatabaseTestFlowMixin(object):
                             rdf_objects.SerializedValueOfUnrecognizedType)
       self.assertEqual(r.payload.type_name, type_name)
 
+
+  def testDeleteOldFlowResultsDeletesOnlyResultsOlderThanCutoff(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+
+    self.db.WriteFlowResults(self._SampleResults(client_id, flow_id)[:4])
+    cutoff_time = rdfvalue.RDFDatetime.Now()
+    self.db.WriteFlowResults(self._SampleResults(client_id, flow_id)[4:])
+
+    deleted = list(self.db.DeleteOldFlowResults(cutoff_time, batch_size=3))
+    self.assertEqual([d.count for d in deleted], [3, 1])
+    self.assertTrue(all(d.size > 0 for d in deleted))
+
+    results = self.db.ReadFlowResults(client_id, flow_id, 0, 100)
+    self.assertCountEqual([r.tag for r in results],
+                          ["tag_%d" % i for i in range(4, 10)])
+
+  def testDeleteOldFlowResultsSeparatesFlowAndHuntResults(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+    hunt_id = db_test_utils.InitializeHunt(self.db)
+    hunt_flow_id = db_test_utils.InitializeFlow(
+        self.db, client_id, flow_id=hunt_id, parent_hunt_id=hunt_id)
+
+    self.db.WriteFlowResults(self._SampleResults(client_id, flow_id))
+    self.db.WriteFlowResults(
+        self._SampleResults(client_id, hunt_flow_id, hunt_id=hunt_id))
+    cutoff_time = rdfvalue.RDFDatetime.Now()
+
+    deleted = list(self.db.DeleteOldFlowResults(cutoff_time))
+    self.assertEqual(sum(d.count for d in deleted), 10)
+    self.assertEqual(self.db.CountFlowResults(client_id, flow_id), 0)
+    self.assertEqual(self.db.CountFlowResults(client_id, hunt_flow_id), 10)
+
+    deleted = list(self.db.DeleteOldFlowResults(cutoff_time, hunt_results=True))
+    self.assertEqual(sum(d.count for d in deleted), 10)
+    self.assertEqual(self.db.CountFlowResults(client_id, hunt_flow_id), 0)
+
   def testCountFlowResultsReturnsCorrectResultsCount(self):
     client_id = db_test_utils.InitializeClient(self.db)
     flow_id = db_test_utils.InitializeFlow(self.db, client_id)
@@ -2816,6 +3104,23 @@ class DatabaseTestFlowMixin(object):
     num_entries = self.db.CountFlowLogEntries(client_id, flow_id)
     self.assertEqual(num_entries, len(messages))
 
+  def testDeleteOldFlowLogEntriesDeletesOnlyEntriesOlderThanCutoff(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+
+    self._WriteFlowLogEntries(client_id, flow_id)
+    cutoff_time = rdfvalue.RDFDatetime.Now()
+    self.db.WriteFlowLogEntry(
+        rdf_flow_objects.FlowLogEntry(
+            client_id=client_id, flow_id=flow_id, message="new"))
+
+    deleted = list(self.db.DeleteOldFlowLogEntries(cutoff_time, batch_size=4))
+    self.assertEqual([d.count for d in deleted], [4, 4, 2])
+    self.assertTrue(all(d.size > 0 for d in deleted))
+
+    entries = self.db.ReadFlowLogEntries(client_id, flow_id, 0, 100)
+    self.assertEqual([e.message for e in entries], ["new"])
+
   def testFlowLogsAndErrorsForUnknownFlowsRaise(self):
     client_id = db_test_utils.InitializeClient(self.db)
     flow_id = flow.RandomFlowId()
@@ -8,6 +8,7 @@ from typing import List
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import client as rdf_client
 from grr_response_core.lib.rdfvalues import client_stats as rdf_client_stats
+from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
 from grr_response_core.lib.rdfvalues import stats as rdf_stats
 from grr_response_server import flow
 from grr_response_server.databases import db
@@ -844,6 +845,58 @@ class DatabaseTestHuntMixin(object):
     self.assertEqual(states[0].plugin_state, {"foo": "bar"})
     self.assertEqual(states[1].plugin_state, {"foo": "bar"})
 
+  def testUpdatingHuntOutputStateShardForUnknownHuntRaises(self):
+    with self.assertRaises(db.UnknownHuntError):
+      self.db.UpdateHuntOutputPluginStateShard(rdf_hunt_objects.RandomHuntId(),
+                                               0, 0, lambda x: x)
+
+  def testUpdatingHuntOutputStateShardForUnknownStateRaises(self):
+    self.db.WriteGRRUser("user")
+    hunt_obj = rdf_hunt_objects.Hunt(description="foo", creator="user")
+    self.db.WriteHuntObject(hunt_obj)
+
+    with self.assertRaises(db.UnknownHuntOutputPluginStateError):
+      self.db.UpdateHuntOutputPluginStateShard(hunt_obj.hunt_id, 0, 0,
+                                               lambda x: x)
+
+  def testReadingHuntOutputStateShardsForUnknownHuntRaises(self):
+    with self.assertRaises(db.UnknownHuntError):
+      self.db.ReadHuntOutputPluginStateShards(rdf_hunt_objects.RandomHuntId())
+
+  def testUpdatingHuntOutputStateShardsWorksCorrectly(self):
+    self.db.WriteGRRUser("user")
+    hunt_obj = rdf_hunt_objects.Hunt(description="foo", creator="user")
+    self.db.WriteHuntObject(hunt_obj)
+
+    states = [
+        rdf_flow_runner.OutputPluginState(
+            plugin_descriptor=rdf_output_plugin.OutputPluginDescriptor(
+                plugin_name="DummyHuntOutputPlugin%d" % i),
+            plugin_state={"count": 0}) for i in range(2)
+    ]
+    self.db.WriteHuntOutputPluginsStates(hunt_obj.hunt_id, states)
+    self.assertEqual(
+        self.db.ReadHuntOutputPluginStateShards(hunt_obj.hunt_id), {})
+
+    def Update(s):
+      if s is None:
+        s = rdf_protodict.AttributedDict({"count": 0})
+      s["count"] += 1
+      return s
+
+    updated = self.db.UpdateHuntOutputPluginStateShard(hunt_obj.hunt_id, 1, 3,
+                                                       Update)
+    self.assertEqual(updated, {"count": 1})
+    self.db.UpdateHuntOutputPluginStateShard(hunt_obj.hunt_id, 1, 3, Update)
+    self.db.UpdateHuntOutputPluginStateShard(hunt_obj.hunt_id, 1, 0, Update)
+
+    shards = self.db.ReadHuntOutputPluginStateShards(hunt_obj.hunt_id)
+    self.assertEqual(shards, {1: [{"count": 1}, {"count": 2}]})
+
+    # Shards are kept apart from the states they belong to.
+    read_states = self.db.ReadHuntOutputPluginsStates(hunt_obj.hunt_id)
+    self.assertEqual(read_states, states)
+
   def testReadHuntLogEntriesReturnsEntryFromSingleHuntFlow(self):
     self.db.WriteGRRUser("user")
     hunt_obj = rdf_hunt_objects.Hunt(description="foo", creator="user")
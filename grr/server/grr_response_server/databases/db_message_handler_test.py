@@ -84,4 +84,38 @@ class DatabaseTestHandlerMixin(object):
     self.assertEqual(requests, got)
 
 
+  def testMessageHandlerRequestLeasedUntilIsRespected(self):
+    now = rdfvalue.RDFDatetime.Now()
+    delayed_until = now + rdfvalue.Duration.From(1, rdfvalue.HOURS)
+    requests = [
+        rdf_objects.MessageHandlerRequest(
+            client_id="C.1000000000000000",
+            handler_name="Testhandler",
+            request_id=1,
+            request=rdfvalue.RDFInteger(1)),
+        rdf_objects.MessageHandlerRequest(
+            client_id="C.1000000000000000",
+            handler_name="Testhandler",
+            request_id=2,
+            request=rdfvalue.RDFInteger(2),
+            leased_until=delayed_until),
+    ]
+    self.db.WriteMessageHandlerRequests(requests)
+
+    read = {r.request_id: r for r in self.db.ReadMessageHandlerRequests()}
+    self.assertIsNone(read[1].leased_until)
+    self.assertEqual(read[2].leased_until, delayed_until)
+
+    leased = queue.Queue()
+    lease_time = rdfvalue.Duration.From(5, rdfvalue.MINUTES)
+    self.db.RegisterMessageHandler(leased.put, lease_time, limit=5)
+
+    got = leased.get(True, timeout=6)
+    self.assertEqual([r.request_id for r in got], [1])
+    self.db.UnregisterMessageHandler()
+    self.assertTrue(leased.empty())
+
+    self.db.DeleteMessageHandlerRequests(requests)
+
+
 # This file is a test library and thus does not require a __main__ block.
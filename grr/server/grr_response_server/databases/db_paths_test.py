@@ -1416,6 +1416,124 @@ class DatabaseTestPathsMixin(object):
     self.assertEqual(results[0].components, (volume, "foobar.txt"))
     self.assertEqual(results[0].stat_entry.st_size, 42)
 
+  def testMultiListChildPathInfosEmpty(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    results = self.db.MultiListChildPathInfos(client_id, [])
+    self.assertEqual(results, {})
+
+  def testMultiListChildPathInfosDirectoryTree(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    path_info = rdf_objects.PathInfo.OS(components=("foo", "bar", "baz"))
+    path_info.stat_entry.st_size = 42
+    self.db.WritePathInfos(client_id, [
+        path_info,
+        rdf_objects.PathInfo.OS(components=("foo", "quux")),
+        rdf_objects.PathInfo.TSK(components=("foo", "norf")),
+    ])
+
+    os_type = rdf_objects.PathInfo.PathType.OS
+    tsk_type = rdf_objects.PathInfo.PathType.TSK
+    results = self.db.MultiListChildPathInfos(client_id, [
+        (os_type, ()),
+        (os_type, ("foo",)),
+        (os_type, ("foo", "bar")),
+        (tsk_type, ("foo",)),
+        (tsk_type, ("foo", "norf")),
+    ])
+
+    self.assertLen(results, 5)
+
+    self.assertLen(results[(os_type, ())], 1)
+    self.assertEqual(results[(os_type, ())][0].components, ("foo",))
+    self.assertTrue(results[(os_type, ())][0].directory)
+
+    self.assertLen(results[(os_type, ("foo",))], 2)
+    self.assertEqual(results[(os_type, ("foo",))][0].components,
+                     ("foo", "bar"))
+    self.assertEqual(results[(os_type, ("foo",))][1].components,
+                     ("foo", "quux"))
+
+    self.assertLen(results[(os_type, ("foo", "bar"))], 1)
+    baz = results[(os_type, ("foo", "bar"))][0]
+    self.assertEqual(baz.components, ("foo", "bar", "baz"))
+    self.assertEqual(baz.stat_entry.st_size, 42)
+
+    self.assertLen(results[(tsk_type, ("foo",))], 1)
+    self.assertEqual(results[(tsk_type, ("foo",))][0].components,
+                     ("foo", "norf"))
+
+    self.assertIsNone(results[(tsk_type, ("foo", "norf"))])
+
+  def testMultiListChildPathInfosNonexistentDirectory(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    os_type = rdf_objects.PathInfo.PathType.OS
+    results = self.db.MultiListChildPathInfos(client_id, [
+        (os_type, ()),
+        (os_type, ("foo",)),
+    ])
+
+    self.assertEqual(results[(os_type, ())], [])
+    self.assertIsNone(results[(os_type, ("foo",))])
+
+  def testMultiListChildPathInfosReturnsLatestDetails(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    path_info = rdf_objects.PathInfo.OS(components=("foo", "bar"))
+    path_info.stat_entry.st_size = 42
+    self.db.WritePathInfos(client_id, [path_info])
+
+    os_type = rdf_objects.PathInfo.PathType.OS
+    results = self.db.MultiListChildPathInfos(client_id, [(os_type, ("foo",))])
+    self.assertEqual(results[(os_type, ("foo",))][0].stat_entry.st_size, 42)
+
+    path_info.stat_entry.st_size = 1337
+    path_info.hash_entry.sha256 = b"quux"
+    self.db.WritePathInfos(client_id, [path_info])
+
+    results = self.db.MultiListChildPathInfos(client_id, [(os_type, ("foo",))])
+    bar = results[(os_type, ("foo",))][0]
+    self.assertEqual(bar.stat_entry.st_size, 1337)
+    self.assertEqual(bar.hash_entry.sha256, b"quux")
+
+  def testMultiListChildPathInfosTimestamp(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    path_info = rdf_objects.PathInfo.OS(components=("foo", "bar"))
+    path_info.stat_entry.st_size = 42
+    self.db.WritePathInfos(client_id, [path_info])
+    timestamp = self.db.Now()
+
+    path_info.stat_entry.st_size = 1337
+    self.db.WritePathInfos(client_id, [path_info])
+
+    os_type = rdf_objects.PathInfo.PathType.OS
+    results = self.db.MultiListChildPathInfos(
+        client_id, [(os_type, ("foo",))], timestamp=timestamp)
+    self.assertEqual(results[(os_type, ("foo",))][0].stat_entry.st_size, 42)
+
+  def testReadPathInfoAfterListingReturnsWrittenValues(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    path_info = rdf_objects.PathInfo.OS(components=("foo", "bar"))
+    path_info.stat_entry.st_size = 42
+    self.db.WritePathInfos(client_id, [path_info])
+
+    self.db.ListChildPathInfos(
+        client_id, rdf_objects.PathInfo.PathType.OS, components=("foo",))
+    result = self.db.ReadPathInfo(
+        client_id, rdf_objects.PathInfo.PathType.OS, components=("foo", "bar"))
+    self.assertEqual(result.stat_entry.st_size, 42)
+
+    path_info.stat_entry.st_size = 1337
+    self.db.WritePathInfos(client_id, [path_info])
+
+    result = self.db.ReadPathInfo(
+        client_id, rdf_objects.PathInfo.PathType.OS, components=("foo", "bar"))
+    self.assertEqual(result.stat_entry.st_size, 1337)
+
   def testReadPathInfosHistoriesEmpty(self):
     client_id = db_test_utils.InitializeClient(self.db)
     result = self.db.ReadPathInfosHistories(client_id,
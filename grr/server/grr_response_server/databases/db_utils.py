@@ -1,21 +1,32 @@
 #!/usr/bin/env python
 """Utility functions/decorators for DB implementations."""
 import functools
+import hashlib
 import logging
+import threading
 import time
+import zlib
 
+from typing import Callable
+from typing import Dict
 from typing import Generic
+from typing import Hashable
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Optional
 from typing import Sequence
 from typing import Text
 from typing import Tuple
 from typing import TypeVar
 
 from google.protobuf import any_pb2
+from google.protobuf import message
 from google.protobuf import wrappers_pb2
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
+from grr_response_core.lib.util import cache
 from grr_response_core.lib.util import precondition
 from grr_response_core.stats import metrics
 from grr_response_server.databases import db
@@ -31,6 +42,10 @@ DB_REQUEST_LATENCY = metrics.Event(
     bins=[0.05 * 1.2**x for x in range(30)])  # 50ms to ~10 secs
 DB_REQUEST_ERRORS = metrics.Counter(
     "db_request_errors", fields=[("call", str), ("type", str)])
+DB_KNOWN_IDS_CACHE_LOOKUPS = metrics.Counter(
+    "db_known_ids_cache_lookups", fields=[("cache", str), ("result", str)])
+DB_KNOWN_IDS_CACHE_SAVED_QUERIES = metrics.Counter(
+    "db_known_ids_cache_saved_queries", fields=[("cache", str)])
 
 
 class Error(Exception):
@@ -225,6 +240,46 @@ def ParseAndUnpackAny(payload_type: str,
   return rdf_class.FromSerializedBytes(payload_value_bytes)
 
 
+def _ClearDefaultFields(proto: message.Message) -> None:
+  """Recursively clears fields of the message that are set to defaults."""
+  for field, value in proto.ListFields():
+    if field.message_type is not None:
+      if field.label == field.LABEL_REPEATED:
+        if not field.message_type.GetOptions().map_entry:
+          for item in value:
+            _ClearDefaultFields(item)
+      else:
+        _ClearDefaultFields(value)
+        if not value.ListFields():
+          proto.ClearField(field.name)
+    elif field.label != field.LABEL_REPEATED and value == field.default_value:
+      proto.ClearField(field.name)
+
+
+def FlowArgsDigest(args: Optional[rdfvalue.RDFValue]) -> bytes:
+  """Computes a digest of flow arguments used to detect duplicate flows.
+
+  Fields explicitly set to their default values are ignored, so arguments that
+  only differ in whether a default was spelled out have the same digest.
+
+  Args:
+    args: Arguments of a flow or None if the flow has no arguments.
+
+  Returns:
+    A SHA-256 digest of the serialized arguments. Missing and empty arguments
+    have the same digest.
+  """
+  if args is None:
+    serialized_args = b""
+  elif isinstance(args, rdf_structs.RDFProtoStruct):
+    proto = args.AsPrimitiveProto()
+    _ClearDefaultFields(proto)
+    serialized_args = proto.SerializeToString(deterministic=True)
+  else:
+    serialized_args = args.SerializeToBytes()
+  return hashlib.sha256(serialized_args).digest()
+
+
 class BatchPlanner(Generic[_T]):
   """Helper class to batch operations based on affected rows limit.
 
@@ -336,3 +391,256 @@ class BatchPlanner(Generic[_T]):
 
 
 _BYTES_VALUE_TYPE_URL = f"type.googleapis.com/{wrappers_pb2.BytesValue.DESCRIPTOR.full_name}"
+
+
+class PathInfoCache(object):
+  """A bounded cache of latest path infos, partitioned by client.
+
+  The cache is meant to be used by database implementations to answer
+  repeated reads of the latest path info of a path (e.g. while browsing the
+  VFS) without querying the database. Entries are keyed by
+  (client_id, path_type, components) and are invalidated per client whenever
+  path infos of that client are written.
+
+  Writes done by other processes can't be observed, so entries are only
+  considered valid for max_age seconds after their client's partition has
+  been created. The cache is therefore only suitable for deployments where a
+  single process writes path infos or where stale reads are acceptable.
+  """
+
+  # Number of generation counters. Clients are assigned to counters by their
+  # hash, so that invalidating a client only affects a small fraction of other
+  # clients while the memory used by the counters stays bounded.
+  _NUM_GENERATIONS = 1024
+
+  def __init__(self,
+               max_clients: int = 1000,
+               max_paths_per_client: int = 10000,
+               max_age: float = 10):
+    """Constructor.
+
+    Args:
+      max_clients: Maximum number of clients for which path infos are cached.
+      max_paths_per_client: Maximum number of path infos cached per client.
+      max_age: Number of seconds after which cached entries expire.
+    """
+    self._clients = cache.LRUCache(
+        "path_info_clients",
+        max_size=max_clients,
+        max_age=max_age,
+        refresh_on_access=False)
+    self._max_paths_per_client = max_paths_per_client
+    self._generations = [0] * self._NUM_GENERATIONS
+
+  def Generation(self, client_id: Text) -> int:
+    """Returns a number that changes every time a client is invalidated.
+
+    Callers that read path infos from the database should remember the
+    generation before the read and pass it to `PutMany`, so that results of
+    reads racing with writes are not cached.
+
+    Args:
+      client_id: An identifier string for a client.
+
+    Returns:
+      The current generation of the client.
+    """
+    return self._generations[self._GenerationIndex(client_id)]
+
+  def _GenerationIndex(self, client_id: Text) -> int:
+    return zlib.crc32(client_id.encode("utf-8")) % self._NUM_GENERATIONS
+
+  def Get(
+      self,
+      client_id: Text,
+      path_type: "rdf_objects.PathInfo.PathType",
+      components: Sequence[Text],
+  ) -> rdf_objects.PathInfo:
+    """Returns a copy of a cached path info.
+
+    Args:
+      client_id: An identifier string for a client.
+      path_type: A type of the path.
+      components: A sequence of path components.
+
+    Returns:
+      A copy of the cached `rdf_objects.PathInfo`.
+
+    Raises:
+      KeyError: If the path info is not cached.
+    """
+    path_infos = self._clients.Get(client_id)
+    return path_infos.Get((int(path_type), tuple(components))).Copy()
+
+  def PutMany(self, client_id: Text,
+              path_infos: Iterable[rdf_objects.PathInfo],
+              generation: int) -> None:
+    """Caches latest path infos of a client read at a given generation."""
+    with self._clients.lock:
+      if generation != self.Generation(client_id):
+        return
+
+      try:
+        cached = self._clients.Get(client_id)
+      except KeyError:
+        cached = cache.LRUCache(
+            "path_infos", max_size=self._max_paths_per_client)
+        self._clients.Put(client_id, cached)
+
+      for path_info in path_infos:
+        key = (int(path_info.path_type), tuple(path_info.components))
+        cached.Put(key, path_info.Copy())
+
+  def InvalidateClient(self, client_id: Text) -> None:
+    """Drops all cached path infos of a given client."""
+    with self._clients.lock:
+      self._generations[self._GenerationIndex(client_id)] += 1
+      self._clients.Pop(client_id)
+
+
+# Default maximum age (in seconds) of a single KnownIdsCache generation.
+KNOWN_IDS_CACHE_MAX_AGE = 3600
+
+_H = TypeVar("_H", bound=Hashable)
+
+
+class KnownIdsCache(Generic[_H]):
+  """A bounded, memory-resident set of identifiers known to exist.
+
+  Blobs and hash blob references are immutable. Blobs are never deleted. Hash
+  blob references are deleted by data retention only once no path info refers
+  to them and they haven't been written for a configured time, which is
+  required to be well above twice `max_age` (see KNOWN_IDS_CACHE_MAX_AGE).
+  So once an identifier has been seen in the database, its existence can be
+  confirmed without another query for as long as it stays cached. Unlike a
+  Bloom filter, the cache never reports an identifier that wasn't seen as
+  existing, so it can't cause data to be skipped. Unknown identifiers are
+  always checked with the database.
+
+  Identifiers are kept in two generations: when the current one gets full or
+  old, it replaces the previous one, which is dropped. Recently seen
+  identifiers thus stay cached while memory usage stays bounded, and
+  identifiers deleted by other processes are forgotten after at most twice
+  `max_age`.
+  """
+
+  def __init__(self,
+               name: Text,
+               max_size: int = 100000,
+               max_age: Optional[float] = KNOWN_IDS_CACHE_MAX_AGE):
+    """Constructor.
+
+    Args:
+      name: A name of the cache used as a metric field value.
+      max_size: Maximum number of identifiers in a single generation.
+      max_age: Maximum age of a single generation in seconds. If None,
+        generations are only replaced when they get full.
+    """
+    self._name = name
+    self._max_size = max_size
+    self._max_age = max_age
+    self._current = set()
+    self._previous = set()
+    self._current_start_time = time.time()
+    self._lock = threading.Lock()
+
+  def _ExpireGenerations(self) -> None:
+    if self._max_age is None:
+      return
+
+    now = time.time()
+    age = now - self._current_start_time
+    if age >= 2 * self._max_age:
+      self._previous = set()
+      self._current = set()
+      self._current_start_time = now
+    elif age >= self._max_age:
+      self._previous = self._current
+      self._current = set()
+      self._current_start_time = now
+
+  def __contains__(self, id_: _H) -> bool:
+    with self._lock:
+      self._ExpireGenerations()
+      return id_ in self._current or id_ in self._previous
+
+  def Add(self, ids: Iterable[_H]) -> None:
+    """Marks given identifiers as existing."""
+    with self._lock:
+      self._ExpireGenerations()
+      for id_ in ids:
+        if id_ in self._current:
+          continue
+
+        if len(self._current) >= self._max_size:
+          self._previous = self._current
+          self._current = set()
+          self._current_start_time = time.time()
+
+        self._current.add(id_)
+
+  def Discard(self, ids: Iterable[_H]) -> None:
+    """Forgets given identifiers, e.g. after they got deleted."""
+    with self._lock:
+      for id_ in ids:
+        self._current.discard(id_)
+        self._previous.discard(id_)
+
+  def CheckExist(
+      self, ids: Iterable[_H],
+      check_fn: Callable[[List[_H]], Dict[_H, bool]]) -> Dict[_H, bool]:
+    """Checks if identifiers exist, querying only for unknown ones.
+
+    Args:
+      ids: Identifiers to check.
+      check_fn: A function checking existence of a list of identifiers in the
+        database. It's called at most once, with identifiers that are not known
+        to exist.
+
+    Returns:
+      A dictionary mapping identifiers to booleans indicating whether they
+      exist.
+    """
+    results = {}
+    unknown_ids = []
+    for id_ in ids:
+      if id_ in self:
+        results[id_] = True
+      else:
+        unknown_ids.append(id_)
+
+    DB_KNOWN_IDS_CACHE_LOOKUPS.Increment(
+        len(results), fields=[self._name, "hit"])
+    DB_KNOWN_IDS_CACHE_LOOKUPS.Increment(
+        len(unknown_ids), fields=[self._name, "miss"])
+
+    if not unknown_ids:
+      if results:
+        DB_KNOWN_IDS_CACHE_SAVED_QUERIES.Increment(fields=[self._name])
+      return results
+
+    unknown_results = check_fn(unknown_ids)
+    self.Add(id_ for id_, exists in unknown_results.items() if exists)
+
+    results.update(unknown_results)
+    return results
+
+
+def DeleteInBatches(
+    delete_batch_fn: Callable[[int], db.DeletedRows],
+    batch_size: int,
+) -> Iterator[db.DeletedRows]:
+  """Calls a batch deletion function until there is nothing left to delete.
+
+  Args:
+    delete_batch_fn: A function deleting up to the given number of rows.
+    batch_size: A number of rows to delete with a single call.
+
+  Yields:
+    `DeletedRows` for every non-empty batch.
+  """
+  while True:
+    deleted = delete_batch_fn(batch_size)
+    if not deleted.count:
+      break
+    yield deleted
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 import logging
+import time
 from unittest import mock
 
 from absl import app
@@ -7,6 +8,8 @@ from absl.testing import absltest
 
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import client as rdf_client
+from grr_response_core.lib.rdfvalues import file_finder as rdf_file_finder
+from grr_response_core.lib.rdfvalues import paths as rdf_paths
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
 from grr_response_server.databases import db
 from grr_response_server.databases import db_utils
@@ -228,6 +231,233 @@ class ParseAndUnpackAnyTest(absltest.TestCase):
     self.assertEqual(result.value, user.SerializeToBytes())
 
 
+class FlowArgsDigestTest(absltest.TestCase):
+
+  def testMissingAndEmptyArgsHaveSameDigest(self):
+    self.assertEqual(
+        db_utils.FlowArgsDigest(None),
+        db_utils.FlowArgsDigest(rdf_file_finder.FileFinderArgs()))
+
+  def testExplicitDefaultsHaveSameDigest(self):
+    args = rdf_file_finder.FileFinderArgs(paths=["/foo"])
+
+    explicit_args = rdf_file_finder.FileFinderArgs(paths=["/foo"])
+    explicit_args.pathtype = rdf_paths.PathSpec.PathType.OS
+    explicit_args.follow_links = False
+    explicit_args.action.action_type = (
+        rdf_file_finder.FileFinderAction.Action.STAT)
+
+    self.assertEqual(
+        db_utils.FlowArgsDigest(args), db_utils.FlowArgsDigest(explicit_args))
+
+  def testDifferentValuesHaveDifferentDigests(self):
+    args = rdf_file_finder.FileFinderArgs(paths=["/foo"])
+
+    tsk_args = rdf_file_finder.FileFinderArgs(paths=["/foo"])
+    tsk_args.pathtype = rdf_paths.PathSpec.PathType.TSK
+
+    hash_args = rdf_file_finder.FileFinderArgs(paths=["/foo"])
+    hash_args.action.action_type = rdf_file_finder.FileFinderAction.Action.HASH
+
+    digests = {
+        db_utils.FlowArgsDigest(args),
+        db_utils.FlowArgsDigest(tsk_args),
+        db_utils.FlowArgsDigest(hash_args),
+    }
+    self.assertLen(digests, 3)
+
+
+class PathInfoCacheTest(absltest.TestCase):
+
+  def testGetRaisesIfNotCached(self):
+    cache = db_utils.PathInfoCache()
+
+    with self.assertRaises(KeyError):
+      cache.Get("C.0000000000000001", rdf_objects.PathInfo.PathType.OS,
+                ("foo",))
+
+  def testGetReturnsCopiesOfPutPathInfos(self):
+    cache = db_utils.PathInfoCache()
+
+    path_info = rdf_objects.PathInfo.OS(components=("foo", "bar"))
+    path_info.stat_entry.st_size = 42
+    cache.PutMany("C.0000000000000001", [path_info],
+                  cache.Generation("C.0000000000000001"))
+    path_info.stat_entry.st_size = 1337
+
+    result = cache.Get("C.0000000000000001", rdf_objects.PathInfo.PathType.OS,
+                       ("foo", "bar"))
+    self.assertEqual(result.stat_entry.st_size, 42)
+    result.stat_entry.st_size = 0
+
+    result = cache.Get("C.0000000000000001", rdf_objects.PathInfo.PathType.OS,
+                       ("foo", "bar"))
+    self.assertEqual(result.stat_entry.st_size, 42)
+
+  def testKeysIncludePathType(self):
+    cache = db_utils.PathInfoCache()
+
+    cache.PutMany("C.0000000000000001",
+                  [rdf_objects.PathInfo.OS(components=("foo",))],
+                  cache.Generation("C.0000000000000001"))
+
+    with self.assertRaises(KeyError):
+      cache.Get("C.0000000000000001", rdf_objects.PathInfo.PathType.TSK,
+                ("foo",))
+
+  def testInvalidateClientDropsOnlyThatClient(self):
+    cache = db_utils.PathInfoCache()
+
+    path_info = rdf_objects.PathInfo.OS(components=("foo",))
+    cache.PutMany("C.0000000000000001", [path_info],
+                  cache.Generation("C.0000000000000001"))
+    cache.PutMany("C.0000000000000002", [path_info],
+                  cache.Generation("C.0000000000000002"))
+
+    cache.InvalidateClient("C.0000000000000001")
+
+    with self.assertRaises(KeyError):
+      cache.Get("C.0000000000000001", rdf_objects.PathInfo.PathType.OS,
+                ("foo",))
+    cache.Get("C.0000000000000002", rdf_objects.PathInfo.PathType.OS,
+              ("foo",))
+
+  def testPutManyIgnoresReadsRacingWithInvalidation(self):
+    cache = db_utils.PathInfoCache()
+
+    generation = cache.Generation("C.0000000000000001")
+    cache.InvalidateClient("C.0000000000000001")
+    cache.PutMany("C.0000000000000001",
+                  [rdf_objects.PathInfo.OS(components=("foo",))], generation)
+
+    with self.assertRaises(KeyError):
+      cache.Get("C.0000000000000001", rdf_objects.PathInfo.PathType.OS,
+                ("foo",))
+
+  def testInvalidateClientDoesNotAffectGenerationOfOtherClients(self):
+    cache = db_utils.PathInfoCache()
+
+    generation = cache.Generation("C.0000000000000002")
+    cache.InvalidateClient("C.0000000000000001")
+    cache.PutMany("C.0000000000000002",
+                  [rdf_objects.PathInfo.OS(components=("foo",))], generation)
+
+    cache.Get("C.0000000000000002", rdf_objects.PathInfo.PathType.OS,
+              ("foo",))
+
+  def testRespectsMaxPathsPerClient(self):
+    cache = db_utils.PathInfoCache(max_paths_per_client=2)
+
+    cache.PutMany("C.0000000000000001", [
+        rdf_objects.PathInfo.OS(components=("foo",)),
+        rdf_objects.PathInfo.OS(components=("bar",)),
+        rdf_objects.PathInfo.OS(components=("baz",)),
+    ], cache.Generation("C.0000000000000001"))
+
+    with self.assertRaises(KeyError):
+      cache.Get("C.0000000000000001", rdf_objects.PathInfo.PathType.OS,
+                ("foo",))
+    cache.Get("C.0000000000000001", rdf_objects.PathInfo.PathType.OS,
+              ("baz",))
+
+  def testEntriesExpire(self):
+    cache = db_utils.PathInfoCache(max_age=10)
+
+    with mock.patch("time.time", return_value=100):
+      cache.PutMany("C.0000000000000001",
+                    [rdf_objects.PathInfo.OS(components=("foo",))],
+                    cache.Generation("C.0000000000000001"))
+
+    with mock.patch("time.time", return_value=105):
+      cache.Get("C.0000000000000001", rdf_objects.PathInfo.PathType.OS,
+                ("foo",))
+
+    with mock.patch("time.time", return_value=111):
+      with self.assertRaises(KeyError):
+        cache.Get("C.0000000000000001", rdf_objects.PathInfo.PathType.OS,
+                  ("foo",))
+
+
+class KnownIdsCacheTest(stats_test_lib.StatsTestMixin, absltest.TestCase):
+
+  def testQueriesOnlyUnknownIds(self):
+    cache = db_utils.KnownIdsCache("foo")
+    cache.Add([b"a"])
+
+    check_fn = mock.Mock(return_value={b"b": True, b"c": False})
+    results = cache.CheckExist([b"a", b"b", b"c"], check_fn)
+
+    check_fn.assert_called_once_with([b"b", b"c"])
+    self.assertEqual(results, {b"a": True, b"b": True, b"c": False})
+
+  def testRemembersExistingIds(self):
+    cache = db_utils.KnownIdsCache("foo")
+
+    check_fn = mock.Mock(return_value={b"a": True, b"b": False})
+    cache.CheckExist([b"a", b"b"], check_fn)
+
+    self.assertIn(b"a", cache)
+    self.assertNotIn(b"b", cache)
+
+  def testDoesNotQueryIfAllIdsAreKnown(self):
+    cache = db_utils.KnownIdsCache("foo")
+    cache.Add([b"a", b"b"])
+
+    check_fn = mock.Mock()
+    with self.assertStatsCounterDelta(
+        1, db_utils.DB_KNOWN_IDS_CACHE_SAVED_QUERIES, fields=["foo"]):
+      results = cache.CheckExist([b"a", b"b"], check_fn)
+
+    check_fn.assert_not_called()
+    self.assertEqual(results, {b"a": True, b"b": True})
+
+  def testCountsHitsAndMisses(self):
+    cache = db_utils.KnownIdsCache("foo")
+    cache.Add([b"a"])
+
+    check_fn = mock.Mock(return_value={b"b": False, b"c": False})
+    with self.assertStatsCounterDelta(
+        1, db_utils.DB_KNOWN_IDS_CACHE_LOOKUPS, fields=["foo", "hit"]):
+      with self.assertStatsCounterDelta(
+          2, db_utils.DB_KNOWN_IDS_CACHE_LOOKUPS, fields=["foo", "miss"]):
+        cache.CheckExist([b"a", b"b", b"c"], check_fn)
+
+  def testKeepsAtMostTwoGenerations(self):
+    cache = db_utils.KnownIdsCache("foo", max_size=2)
+    cache.Add([b"a", b"b", b"c", b"d", b"e"])
+
+    self.assertNotIn(b"a", cache)
+    self.assertNotIn(b"b", cache)
+    self.assertIn(b"c", cache)
+    self.assertIn(b"d", cache)
+    self.assertIn(b"e", cache)
+
+  def testDiscardsIds(self):
+    cache = db_utils.KnownIdsCache("foo", max_size=2)
+    cache.Add([b"a", b"b", b"c"])
+    cache.Discard([b"a", b"c", b"d"])
+
+    self.assertNotIn(b"a", cache)
+    self.assertIn(b"b", cache)
+    self.assertNotIn(b"c", cache)
+
+  def testExpiresOldGenerations(self):
+    with mock.patch.object(time, "time", return_value=1000):
+      cache = db_utils.KnownIdsCache("foo", max_age=60)
+      cache.Add([b"a"])
+
+    with mock.patch.object(time, "time", return_value=1061):
+      self.assertIn(b"a", cache)
+      cache.Add([b"b"])
+
+    with mock.patch.object(time, "time", return_value=1122):
+      self.assertNotIn(b"a", cache)
+      self.assertIn(b"b", cache)
+
+    with mock.patch.object(time, "time", return_value=1300):
+      self.assertNotIn(b"b", cache)
+
+
 _one_second_timestamp = rdfvalue.RDFDatetime.FromSecondsSinceEpoch(1)
 
 if __name__ == "__main__":
@@ -59,6 +59,7 @@ class InMemoryDB(mem_artifacts.InMemoryDBArtifactsMixin,
     self.blob_keys: dict[rdf_objects.BlobID, str] = {}
     self.clients = {}
     self.client_stats = collections.defaultdict(dict)
+    self.client_stats_rollups = collections.defaultdict(dict)
     self.crash_history = {}
     self.cronjob_leases = {}
     self.cronjobs = {}
@@ -85,6 +86,8 @@ class InMemoryDB(mem_artifacts.InMemoryDBArtifactsMixin,
     self.foreman_rules = []
     self.blobs = {}
     self.blob_refs_by_hashes = {}
+    # Maps hash ids to times at which their blob references were last written.
+    self.blob_refs_timestamps = {}
     self.users = {}
     self.handler_thread = None
     self.handler_stop = True
@@ -110,6 +113,7 @@ class InMemoryDB(mem_artifacts.InMemoryDBArtifactsMixin,
     self.api_audit_entries = []
     self.hunts = {}
     self.hunt_output_plugins_states = {}
+    self.hunt_output_plugin_state_shards = {}
     self.signed_binary_references = {}
     self.client_graph_series = {}
     # Maps (client_id, creator, scheduled_flow_id) to ScheduledFlow.
@@ -1,7 +1,15 @@
 #!/usr/bin/env python
 """DB mixin for blobs-related methods."""
+import sys
+from typing import Iterator
+from typing import Optional
+
+from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_server import blob_store
+from grr_response_server.databases import db
+from grr_response_server.databases import db_utils
+from grr_response_server.rdfvalues import objects as rdf_objects
 
 
 class _BlobRecord(object):
@@ -46,8 +54,10 @@ class InMemoryDBBlobsMixin(blob_store.BlobStore):
 
   @utils.Synchronized
   def WriteHashBlobReferences(self, references_by_hash):
+    now = rdfvalue.RDFDatetime.Now()
     for k, vs in references_by_hash.items():
       self.blob_refs_by_hashes[k] = [v.Copy() for v in vs]
+      self.blob_refs_timestamps[k] = now
 
   @utils.Synchronized
   def ReadHashBlobReferences(self, hashes):
@@ -59,3 +69,46 @@ class InMemoryDBBlobsMixin(blob_store.BlobStore):
         result[hash_id] = None
 
     return result
+
+  def DeleteUnreferencedHashBlobReferences(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[db.DeletedRows]:
+    """Deletes blob references of hashes that no path info refers to."""
+
+    def DeleteBatch(limit):
+      return self._DeleteUnreferencedHashBlobReferencesBatch(cutoff_time, limit)
+
+    return db_utils.DeleteInBatches(DeleteBatch, batch_size or sys.maxsize)
+
+  @utils.Synchronized
+  def _DeleteUnreferencedHashBlobReferencesBatch(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      limit: int,
+  ) -> db.DeletedRows:
+    """Deletes up to `limit` old unreferenced hash blob references."""
+    referenced_hash_ids = set()
+    for path_record in self.path_records.values():
+      for _, hash_entry in path_record.GetHashEntries():
+        if hash_entry.HasField("sha256"):
+          referenced_hash_ids.add(
+              rdf_objects.SHA256HashID.FromSerializedBytes(
+                  hash_entry.sha256.AsBytes()))
+
+    count = 0
+    size = 0
+    for hash_id, timestamp in list(self.blob_refs_timestamps.items()):
+      if count >= limit:
+        break
+      if timestamp >= cutoff_time or hash_id in referenced_hash_ids:
+        continue
+
+      blob_refs = self.blob_refs_by_hashes.pop(hash_id)
+      del self.blob_refs_timestamps[hash_id]
+      count += 1
+      size += len(
+          rdf_objects.BlobReferences(items=blob_refs).SerializeToBytes())
+
+    return db.DeletedRows(count=count, size=size)
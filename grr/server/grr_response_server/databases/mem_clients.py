@@ -431,8 +431,22 @@ class InMemoryDBClientMixin(object):
       stats.timestamp = rdfvalue.RDFDatetime.Now()
 
     copy = rdf_client_stats.ClientStats(stats)
+    if copy.timestamp not in self.client_stats[client_id]:
+      self._UpdateClientStatsRollups(client_id, copy)
     self.client_stats[client_id][copy.timestamp] = copy
 
+  def _UpdateClientStatsRollups(self, client_id: Text,
+                                stats: rdf_client_stats.ClientStats) -> None:
+    rollups = self.client_stats_rollups[client_id]
+    for resolution in db.CLIENT_STATS_ROLLUP_RESOLUTIONS:
+      for rollup in rdf_client_stats.ClientStatsRollup.FromClientStats(
+          stats, resolution):
+        key = (resolution.ToInt(rdfvalue.SECONDS), rollup.timestamp)
+        if key in rollups:
+          rollups[key].Merge(rollup)
+        else:
+          rollups[key] = rollup
+
   @utils.Synchronized
   def ReadClientStats(
       self, client_id: Text, min_timestamp: rdfvalue.RDFDatetime,
@@ -445,6 +459,25 @@ class InMemoryDBClientMixin(object):
         results.append(rdf_client_stats.ClientStats(stats))
     return results
 
+  @utils.Synchronized
+  def ReadClientStatsRollups(
+      self,
+      client_id: Text,
+      resolution: rdfvalue.Duration,
+      min_timestamp: rdfvalue.RDFDatetime,
+      max_timestamp: rdfvalue.RDFDatetime,
+  ) -> List[rdf_client_stats.ClientStatsRollup]:
+    """Reads rollups of ClientStats for a given client and time range."""
+    seconds = resolution.ToInt(rdfvalue.SECONDS)
+    results = []
+    for (rollup_seconds, timestamp), rollup in sorted(
+        self.client_stats_rollups[client_id].items()):
+      if rollup_seconds != seconds:
+        continue
+      if min_timestamp <= timestamp <= max_timestamp:
+        results.append(rdf_client_stats.ClientStatsRollup(rollup))
+    return results
+
   @utils.Synchronized
   def DeleteOldClientStats(
       self,
@@ -471,6 +504,13 @@ class InMemoryDBClientMixin(object):
     if deleted_count > 0:
       yield deleted_count
 
+    coarsest_seconds = db.CLIENT_STATS_ROLLUP_RESOLUTIONS[-1].ToInt(
+        rdfvalue.SECONDS)
+    for rollups in self.client_stats_rollups.values():
+      for seconds, timestamp in list(rollups.keys()):
+        if seconds < coarsest_seconds and timestamp < cutoff_time:
+          del rollups[(seconds, timestamp)]
+
   @utils.Synchronized
   def CountClientVersionStringsByLabel(self, day_buckets):
     """Computes client-activity stats for all GRR versions in the DB."""
@@ -538,6 +578,7 @@ class InMemoryDBClientMixin(object):
     self.crash_history.pop(client_id, None)
 
     self.client_stats.pop(client_id, None)
+    self.client_stats_rollups.pop(client_id, None)
 
     for key in [k for k in self.flows if k[0] == client_id]:
       self.flows.pop(key)
@@ -9,6 +9,7 @@ import time
 
 from typing import Dict
 from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import Sequence
@@ -18,6 +19,7 @@ from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_server.databases import db
+from grr_response_server.databases import db_utils
 from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
 from grr_response_server.rdfvalues import hunt_objects as rdf_hunt_objects
 from grr_response_server.rdfvalues import objects as rdf_objects
@@ -43,6 +45,9 @@ class InMemoryDBFlowMixin(object):
       cloned_request = r.Copy()
       cloned_request.timestamp = now
       flow_dict[cloned_request.request_id] = cloned_request
+      if r.leased_until:
+        leases = self.message_handler_leases.setdefault(r.handler_name, {})
+        leases[r.request_id] = r.leased_until
 
   @utils.Synchronized
   def ReadMessageHandlerRequests(self):
@@ -173,6 +178,45 @@ class InMemoryDBFlowMixin(object):
         res.append(flow.Copy())
     return res
 
+  @utils.Synchronized
+  def CountFlowsByCreator(
+      self,
+      client_id: str,
+      min_create_time: rdfvalue.RDFDatetime,
+      include_child_flows: bool = True,
+  ) -> Dict[str, int]:
+    """Counts flows of a client created since a given time by each creator."""
+    result = collections.Counter()
+    for flow_obj in self.flows.values():
+      if (flow_obj.client_id == client_id and
+          flow_obj.create_time >= min_create_time and
+          (include_child_flows or not flow_obj.parent_flow_id)):
+        result[flow_obj.creator] += 1
+    return dict(result)
+
+  @utils.Synchronized
+  def ReadFlowDigests(
+      self,
+      client_id: str,
+      flow_class_name: str,
+      min_create_time: rdfvalue.RDFDatetime,
+      include_child_flows: bool = True,
+  ) -> List[db.FlowDigest]:
+    """Reads digests of flows of a given class created since a given time."""
+    result = []
+    for flow_obj in self.flows.values():
+      if (flow_obj.client_id == client_id and
+          flow_obj.flow_class_name == flow_class_name and
+          flow_obj.create_time >= min_create_time and
+          (include_child_flows or not flow_obj.parent_flow_id)):
+        args = flow_obj.args if flow_obj.HasField("args") else None
+        result.append(
+            db.FlowDigest(
+                flow_id=flow_obj.flow_id,
+                create_time=flow_obj.create_time,
+                args_digest=db_utils.FlowArgsDigest(args)))
+    return result
+
   @utils.Synchronized
   def LeaseFlowForProcessing(self, client_id, flow_id, processing_time):
     """Marks a flow as being processed on this worker and returns it."""
@@ -427,6 +471,53 @@ class InMemoryDBFlowMixin(object):
     except KeyError:
       pass
 
+  def DeleteOldFlowRequests(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[db.DeletedRows]:
+    """Deletes flow requests left behind by flows that are not running."""
+
+    def DeleteBatch(limit):
+      return self._DeleteOldFlowRequestsBatch(cutoff_time, limit)
+
+    return db_utils.DeleteInBatches(DeleteBatch, batch_size or sys.maxsize)
+
+  @utils.Synchronized
+  def _DeleteOldFlowRequestsBatch(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      limit: int,
+  ) -> db.DeletedRows:
+    """Deletes up to `limit` old requests of flows that are not running."""
+    count = 0
+    size = 0
+    for flow_key, request_dict in list(self.flow_requests.items()):
+      flow_obj = self.flows.get(flow_key)
+      if (flow_obj is not None and
+          flow_obj.flow_state == rdf_flow_objects.Flow.FlowState.RUNNING):
+        continue
+
+      response_dict = self.flow_responses.get(flow_key, {})
+      for request_id, request in list(request_dict.items()):
+        if count >= limit:
+          return db.DeletedRows(count=count, size=size)
+        if request.timestamp >= cutoff_time:
+          continue
+
+        del request_dict[request_id]
+        count += 1
+        size += len(request.SerializeToBytes())
+        for response in response_dict.pop(request_id, {}).values():
+          count += 1
+          size += len(response.SerializeToBytes())
+
+      if not request_dict:
+        del self.flow_requests[flow_key]
+        self.flow_responses.pop(flow_key, None)
+
+    return db.DeletedRows(count=count, size=size)
+
   @utils.Synchronized
   def ReadFlowRequestsReadyForProcessing(self,
                                          client_id,
@@ -517,6 +608,39 @@ class InMemoryDBFlowMixin(object):
         processing_deadline=None)
     return True
 
+  @utils.Synchronized
+  def CommitFlowStep(self,
+                     flow_obj,
+                     requests=(),
+                     responses=(),
+                     completed_requests=(),
+                     results=()):
+    """Writes everything a flow processing step produced and releases it."""
+    # Everything that can fail is checked upfront, so that a failing call does
+    # not leave partial changes behind, like a rolled back transaction.
+    flow_keys = set((r.client_id, r.flow_id) for r in requests)
+    unknown_flow_keys = flow_keys - set(self.flows)
+    if unknown_flow_keys:
+      raise db.AtLeastOneUnknownFlowError(unknown_flow_keys)
+
+    for request in completed_requests:
+      key = (request.client_id, request.flow_id)
+      if key not in self.flows:
+        raise db.UnknownFlowError(request.client_id, request.flow_id)
+      if request.request_id not in self.flow_requests.get(key, {}):
+        raise db.UnknownFlowRequestError(request.client_id, request.flow_id,
+                                         request.request_id)
+
+    if requests:
+      self.WriteFlowRequests(requests)
+    if responses:
+      self.WriteFlowResponses(responses)
+    if completed_requests:
+      self.DeleteFlowRequests(completed_requests)
+    if results:
+      self.WriteFlowResults(results)
+    return self.ReleaseProcessedFlow(flow_obj)
+
   def _InlineProcessingOK(self, requests):
     for r in requests:
       if r.delivery_time is not None:
@@ -798,6 +922,47 @@ class InMemoryDBFlowMixin(object):
 
     return result
 
+  def DeleteOldFlowResults(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      hunt_results: bool = False,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[db.DeletedRows]:
+    """Deletes flow results written before the specified cutoff time."""
+
+    def Matches(result):
+      return (result.timestamp < cutoff_time and
+              bool(result.hunt_id) == hunt_results)
+
+    def DeleteBatch(limit):
+      return self._DeleteFromFlowLists(self.flow_results, Matches, limit)
+
+    return db_utils.DeleteInBatches(DeleteBatch, batch_size or sys.maxsize)
+
+  @utils.Synchronized
+  def _DeleteFromFlowLists(self, container, predicate, limit):
+    """Deletes up to `limit` items matching the predicate from flow lists."""
+    count = 0
+    size = 0
+    for flow_key, items in list(container.items()):
+      kept = []
+      for item in items:
+        if count < limit and predicate(item):
+          count += 1
+          size += len(item.SerializeToBytes())
+        else:
+          kept.append(item)
+
+      if kept:
+        container[flow_key] = kept
+      else:
+        del container[flow_key]
+
+      if count >= limit:
+        break
+
+    return db.DeletedRows(count=count, size=size)
+
   @utils.Synchronized
   def WriteFlowLogEntry(self, entry: rdf_flow_objects.FlowLogEntry) -> None:
     """Writes a single flow log entry to the database."""
@@ -833,6 +998,20 @@ class InMemoryDBFlowMixin(object):
     """Returns number of flow log entries of a given flow."""
     return len(self.ReadFlowLogEntries(client_id, flow_id, 0, sys.maxsize))
 
+  def DeleteOldFlowLogEntries(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[db.DeletedRows]:
+    """Deletes flow log entries written before the specified cutoff time."""
+
+    def DeleteBatch(limit):
+      return self._DeleteFromFlowLists(self.flow_log_entries,
+                                       lambda e: e.timestamp < cutoff_time,
+                                       limit)
+
+    return db_utils.DeleteInBatches(DeleteBatch, batch_size or sys.maxsize)
+
   @utils.Synchronized
   def WriteFlowOutputPluginLogEntry(
       self,
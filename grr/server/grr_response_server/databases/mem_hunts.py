@@ -6,6 +6,7 @@ import sys
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import client_stats as rdf_client_stats
+from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
 from grr_response_core.lib.rdfvalues import stats as rdf_stats
 from grr_response_server.databases import db
 from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
@@ -101,6 +102,40 @@ class InMemoryDBHuntMixin(object):
 
     return state.plugin_state
 
+  @utils.Synchronized
+  def ReadHuntOutputPluginStateShards(self, hunt_id):
+    """Reads all shards of the output plugin states of a given hunt."""
+    if hunt_id not in self.hunts:
+      raise db.UnknownHuntError(hunt_id)
+
+    result = {}
+    shards = self.hunt_output_plugin_state_shards.get(hunt_id, {})
+    for (state_index, _), serialized_shard in sorted(shards.items()):
+      result.setdefault(state_index, []).append(
+          rdf_protodict.AttributedDict.FromSerializedBytes(serialized_shard))
+    return result
+
+  @utils.Synchronized
+  def UpdateHuntOutputPluginStateShard(self, hunt_id, state_index, shard,
+                                       update_fn):
+    """Updates a shard of the hunt output plugin state of a given plugin."""
+    if hunt_id not in self.hunts:
+      raise db.UnknownHuntError(hunt_id)
+
+    if state_index >= len(self.hunt_output_plugins_states.get(hunt_id, [])):
+      raise db.UnknownHuntOutputPluginStateError(hunt_id, state_index)
+
+    shards = self.hunt_output_plugin_state_shards.setdefault(hunt_id, {})
+    serialized_shard = shards.get((state_index, shard))
+    if serialized_shard is None:
+      plugin_state = update_fn(None)
+    else:
+      plugin_state = update_fn(
+          rdf_protodict.AttributedDict.FromSerializedBytes(serialized_shard))
+
+    shards[(state_index, shard)] = plugin_state.SerializeToBytes()
+    return plugin_state
+
   @utils.Synchronized
   def DeleteHuntObject(self, hunt_id):
     """Deletes a hunt object with a given id."""
@@ -109,6 +144,8 @@ class InMemoryDBHuntMixin(object):
     except KeyError:
       raise db.UnknownHuntError(hunt_id)
 
+    self.hunt_output_plugin_state_shards.pop(hunt_id, None)
+
     for approvals in self.approvals_by_username.values():
       # We use `list` around dictionary items iterator to avoid errors about
       # dictionary modification during iteration.
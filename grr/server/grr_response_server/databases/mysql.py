@@ -22,6 +22,7 @@ from grr_response_core import config
 from grr_response_core.lib import rdfvalue
 from grr_response_server import threadpool
 from grr_response_server.databases import db as db_module
+from grr_response_server.databases import db_utils
 from grr_response_server.databases import mysql_artifacts
 from grr_response_server.databases import mysql_blob_keys
 from grr_response_server.databases import mysql_blobs
@@ -504,6 +505,19 @@ class MysqlDB(mysql_artifacts.MySQLDBArtifactsMixin,
     self._max_pool_size = config.CONFIG["Mysql.conn_pool_max"]
     self.pool = mysql_pool.Pool(self._Connect, max_size=self._max_pool_size)
 
+    # Blobs are never deleted and hash blob references are only deleted long
+    # after they were last written or checked, so these caches need no
+    # invalidation.
+    self.known_blob_ids = db_utils.KnownIdsCache("blobs")
+    self.known_hash_ids = db_utils.KnownIdsCache("hash_blob_references")
+
+    path_info_cache_max_age = config.CONFIG["Mysql.path_info_cache_max_age"]
+    if path_info_cache_max_age:
+      self.path_info_cache = db_utils.PathInfoCache(
+          max_age=path_info_cache_max_age)
+    else:
+      self.path_info_cache = None
+
     self.handler_thread = None
     self.handler_stop = True
 
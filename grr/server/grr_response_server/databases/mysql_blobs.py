@@ -1,9 +1,16 @@
 #!/usr/bin/env python
 """The MySQL database methods for blobs handling."""
 
+from typing import Iterator
+from typing import Optional
 
+from MySQLdb import cursors
+
+from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.util import precondition
 from grr_response_server import blob_store
+from grr_response_server.databases import db
+from grr_response_server.databases import db_utils
 from grr_response_server.databases import mysql_utils
 from grr_response_server.rdfvalues import objects as rdf_objects
 
@@ -92,6 +99,8 @@ class MySQLDBBlobsMixin(blob_store.BlobStore):
     for values in _PartitionChunks(chunks):
       self._WriteBlobsBatch(values)
 
+    self.known_blob_ids.Add(blob_id_data_map)
+
   @mysql_utils.WithTransaction(readonly=True)
   def ReadBlobs(self, blob_ids, cursor=None):
     """Reads given blobs."""
@@ -112,11 +121,23 @@ class MySQLDBBlobsMixin(blob_store.BlobStore):
         results[blob_id] = blob
       else:
         results[blob_id] += blob
+
+    self.known_blob_ids.Add(
+        blob_id for blob_id, blob in results.items() if blob is not None)
     return results
 
-  @mysql_utils.WithTransaction(readonly=True)
-  def CheckBlobsExist(self, blob_ids, cursor=None):
+  @property
+  def has_fast_existence_checks(self):
+    # Most checks are answered by the known blob IDs cache without a query.
+    return True
+
+  def CheckBlobsExist(self, blob_ids):
     """Checks if given blobs exist."""
+    return self.known_blob_ids.CheckExist(blob_ids, self._CheckBlobsExist)
+
+  @mysql_utils.WithTransaction(readonly=True)
+  def _CheckBlobsExist(self, blob_ids, cursor=None):
+    """Checks if given blobs exist in the database."""
     if not blob_ids:
       return {}
 
@@ -131,17 +152,33 @@ class MySQLDBBlobsMixin(blob_store.BlobStore):
       exists[rdf_objects.BlobID.FromSerializedBytes(blob_id)] = True
     return exists
 
-  @mysql_utils.WithTransaction()
-  def WriteHashBlobReferences(self, references_by_hash, cursor):
+  def WriteHashBlobReferences(self, references_by_hash):
     """Writes blob references for a given set of hashes."""
-    values = []
+    self._WriteHashBlobReferences(references_by_hash)
+    self.known_hash_ids.Add(
+        hash_id for hash_id, blob_refs in references_by_hash.items()
+        if blob_refs)
+
+  @mysql_utils.WithTransaction()
+  def _WriteHashBlobReferences(self, references_by_hash, cursor):
+    """Writes blob references for a given set of hashes to the database."""
+    if not references_by_hash:
+      return
+
+    args = []
     for hash_id, blob_refs in references_by_hash.items():
       refs = rdf_objects.BlobReferences(items=blob_refs).SerializeToBytes()
-      values.append({
-          "hash_id": hash_id.AsBytes(),
-          "blob_references": refs,
-      })
-    _Insert(cursor, "hash_blob_references", values)
+      args.extend([hash_id.AsBytes(), refs])
+
+    # Re-writing references of a known hash marks them as recently used, so
+    # that data retention does not delete them.
+    query = """
+      INSERT INTO hash_blob_references (hash_id, blob_references)
+      VALUES {}
+      ON DUPLICATE KEY UPDATE timestamp = NOW(6)
+    """.format(
+        mysql_utils.Placeholders(num=2, values=len(references_by_hash)))
+    cursor.execute(query, args)
 
   @mysql_utils.WithTransaction(readonly=True)
   def ReadHashBlobReferences(self, hashes, cursor):
@@ -157,4 +194,84 @@ class MySQLDBBlobsMixin(blob_store.BlobStore):
       sha_hash_id = rdf_objects.SHA256HashID.FromSerializedBytes(hash_id)
       refs = rdf_objects.BlobReferences.FromSerializedBytes(blob_references)
       results[sha_hash_id] = list(refs.items)
+
+    self.known_hash_ids.Add(
+        hash_id for hash_id, blob_refs in results.items() if blob_refs)
+    return results
+
+  def CheckHashBlobReferencesExist(self, hashes):
+    """Checks if blob references of given hashes exist."""
+    return self.known_hash_ids.CheckExist(hashes,
+                                          self._CheckHashBlobReferencesExist)
+
+  @mysql_utils.WithTransaction(readonly=True)
+  def _CheckHashBlobReferencesExist(self, hashes, cursor):
+    """Checks if blob references of given hashes exist in the database."""
+    if not hashes:
+      return {}
+
+    # Blob references of empty files are empty, so they are treated as missing
+    # (consistently with `bool` of what ReadHashBlobReferences returns).
+    query = ("SELECT hash_id FROM hash_blob_references WHERE hash_id IN {} "
+             "AND LENGTH(blob_references) > 0").format(
+                 mysql_utils.Placeholders(len(hashes)))
+    cursor.execute(query, [hash_id.AsBytes() for hash_id in hashes])
+    results = {hash_id: False for hash_id in hashes}
+    for hash_id, in cursor.fetchall():
+      results[rdf_objects.SHA256HashID.FromSerializedBytes(hash_id)] = True
     return results
+
+  def DeleteUnreferencedHashBlobReferences(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[db.DeletedRows]:
+    """Deletes blob references of hashes that no path info refers to."""
+
+    def DeleteBatch(limit):
+      return self._DeleteUnreferencedHashBlobReferencesBatch(cutoff_time, limit)
+
+    return db_utils.DeleteInBatches(
+        DeleteBatch, batch_size or self._DELETE_ROWS_BATCH_SIZE)
+
+  @mysql_utils.WithTransaction()
+  def _DeleteUnreferencedHashBlobReferencesBatch(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      limit: int,
+      cursor: Optional[cursors.Cursor] = None,
+  ) -> db.DeletedRows:
+    """Deletes up to `limit` old unreferenced hash blob references."""
+    query = """
+      SELECT r.hash_id, LENGTH(r.blob_references)
+        FROM hash_blob_references AS r
+       WHERE r.timestamp < FROM_UNIXTIME(%s)
+         AND NOT EXISTS (
+             SELECT 1
+               FROM client_path_hash_entries AS h
+                    FORCE INDEX (client_path_hash_entries_by_sha256)
+              WHERE h.sha256 = r.hash_id)
+       LIMIT %s
+         FOR UPDATE
+    """
+    cutoff_timestamp = mysql_utils.RDFDatetimeToTimestamp(cutoff_time)
+    cursor.execute(query, [cutoff_timestamp, limit])
+    rows = cursor.fetchall()
+    if not rows:
+      return db.DeletedRows(count=0, size=0)
+
+    # The timestamp is checked again in case the references were written
+    # concurrently.
+    hash_ids = [hash_id for hash_id, _ in rows]
+    cursor.execute(
+        "DELETE FROM hash_blob_references WHERE hash_id IN "
+        f"{mysql_utils.Placeholders(len(hash_ids))} "
+        "AND timestamp < FROM_UNIXTIME(%s)", hash_ids + [cutoff_timestamp])
+
+    # Other processes forget about the deleted references once their cache
+    # generations expire.
+    self.known_hash_ids.Discard(
+        rdf_objects.SHA256HashID.FromSerializedBytes(hash_id)
+        for hash_id in hash_ids)
+    return db.DeletedRows(
+        count=len(rows), size=sum(size or 0 for _, size in rows))
@@ -907,6 +907,63 @@ class MySQLDBClientMixin(object):
       else:
         raise
 
+    # A row count of 1 means that a new row was inserted (rather than an
+    # existing one updated), so the samples are not in the rollups yet.
+    if cursor.rowcount == 1:
+      self._UpdateClientStatsRollups(client_id, stats, cursor)
+
+  def _UpdateClientStatsRollups(self, client_id: Text,
+                                stats: rdf_client_stats.ClientStats,
+                                cursor: MySQLdb.cursors.Cursor) -> None:
+    """Adds samples of given stats to the client's stats rollups."""
+    client_id_int = db_utils.ClientIDToInt(client_id)
+
+    rollups = {}
+    for resolution in db.CLIENT_STATS_ROLLUP_RESOLUTIONS:
+      for rollup in rdf_client_stats.ClientStatsRollup.FromClientStats(
+          stats, resolution):
+        key = (resolution.ToInt(rdfvalue.SECONDS),
+               mysql_utils.RDFDatetimeToTimestamp(rollup.timestamp))
+        rollups[key] = rollup
+
+    if not rollups:
+      return
+
+    conditions = []
+    args = [client_id_int]
+    for seconds, timestamp in rollups:
+      conditions.append("(resolution = %s AND timestamp = FROM_UNIXTIME(%s))")
+      args.extend([seconds, timestamp])
+
+    cursor.execute(
+        f"""
+        SELECT resolution, UNIX_TIMESTAMP(timestamp), payload
+        FROM client_stats_rollups
+        WHERE client_id = %s AND ({" OR ".join(conditions)})
+        FOR UPDATE
+        """, args)
+    for seconds, timestamp, payload in cursor.fetchall():
+      existing = rdf_client_stats.ClientStatsRollup.FromSerializedBytes(payload)
+      key = (seconds, mysql_utils.RDFDatetimeToTimestamp(existing.timestamp))
+      existing.Merge(rollups[key])
+      rollups[key] = existing
+
+    values = []
+    args = []
+    for (seconds, timestamp), rollup in rollups.items():
+      values.append("(%s, %s, FROM_UNIXTIME(%s), %s)")
+      args.extend(
+          [client_id_int, seconds, timestamp,
+           rollup.SerializeToBytes()])
+
+    cursor.execute(
+        f"""
+        INSERT INTO client_stats_rollups
+          (client_id, resolution, timestamp, payload)
+        VALUES {", ".join(values)}
+        ON DUPLICATE KEY UPDATE payload = VALUES(payload)
+        """, args)
+
   @mysql_utils.WithTransaction(readonly=True)
   def ReadClientStats(self,
                       client_id: Text,
@@ -931,6 +988,34 @@ class MySQLDBClientMixin(object):
         for stats_bytes, in cursor.fetchall()
     ]
 
+  @mysql_utils.WithTransaction(readonly=True)
+  def ReadClientStatsRollups(
+      self,
+      client_id: Text,
+      resolution: rdfvalue.Duration,
+      min_timestamp: rdfvalue.RDFDatetime,
+      max_timestamp: rdfvalue.RDFDatetime,
+      cursor=None) -> List[rdf_client_stats.ClientStatsRollup]:
+    """Reads rollups of ClientStats for a given client and time range."""
+
+    cursor.execute(
+        """
+        SELECT payload FROM client_stats_rollups
+        WHERE client_id = %s
+          AND resolution = %s
+          AND timestamp BETWEEN FROM_UNIXTIME(%s) AND FROM_UNIXTIME(%s)
+        ORDER BY timestamp ASC
+        """, [
+            db_utils.ClientIDToInt(client_id),
+            resolution.ToInt(rdfvalue.SECONDS),
+            mysql_utils.RDFDatetimeToTimestamp(min_timestamp),
+            mysql_utils.RDFDatetimeToTimestamp(max_timestamp)
+        ])
+    return [
+        rdf_client_stats.ClientStatsRollup.FromSerializedBytes(rollup_bytes)
+        for rollup_bytes, in cursor.fetchall()
+    ]
+
   # DeleteOldClientStats does not use a single transaction, since it runs for
   # a long time. Instead, it uses multiple transactions internally.
   def DeleteOldClientStats(
@@ -952,6 +1037,9 @@ class MySQLDBClientMixin(object):
       else:
         break
 
+    while self._DeleteClientStatsRollupsBatch(cutoff_time, batch_size):
+      pass
+
   @mysql_utils.WithTransaction()
   def _DeleteClientStatsBatch(
       self,
@@ -965,6 +1053,26 @@ class MySQLDBClientMixin(object):
         [mysql_utils.RDFDatetimeToTimestamp(cutoff_time), batch_size])
     return cursor.rowcount
 
+  @mysql_utils.WithTransaction()
+  def _DeleteClientStatsRollupsBatch(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: int,
+      cursor: Optional[MySQLdb.cursors.Cursor] = None,
+  ) -> int:
+    """Deletes up to `batch_size` non-coarsest rollups older than cutoff."""
+    coarsest_resolution = db.CLIENT_STATS_ROLLUP_RESOLUTIONS[-1]
+    cursor.execute(
+        """
+        DELETE FROM client_stats_rollups
+        WHERE resolution < %s AND timestamp < FROM_UNIXTIME(%s)
+        LIMIT %s
+        """, [
+            coarsest_resolution.ToInt(rdfvalue.SECONDS),
+            mysql_utils.RDFDatetimeToTimestamp(cutoff_time), batch_size
+        ])
+    return cursor.rowcount
+
   @mysql_utils.WithTransaction(readonly=True)
   def CountClientVersionStringsByLabel(self, day_buckets, cursor):
     """Computes client-activity stats for all GRR versions in the DB."""
@@ -1062,9 +1170,17 @@ class MySQLDBClientMixin(object):
 
     return fleet_stats_builder.Build()
 
-  @mysql_utils.WithTransaction()
-  def DeleteClient(self, client_id, cursor=None):
+  def DeleteClient(self, client_id):
     """Deletes a client with all associated metadata."""
+    try:
+      self._DeleteClient(client_id)
+    finally:
+      if self.path_info_cache is not None:
+        self.path_info_cache.InvalidateClient(client_id)
+
+  @mysql_utils.WithTransaction()
+  def _DeleteClient(self, client_id, cursor=None):
+    """Deletes a client with all associated metadata from the database."""
     cursor.execute("SELECT COUNT(*) FROM clients WHERE client_id = %s",
                    [db_utils.ClientIDToInt(client_id)])
 
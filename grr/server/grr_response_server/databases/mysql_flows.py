@@ -6,6 +6,7 @@ import threading
 import time
 from typing import Dict
 from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import Sequence
@@ -38,13 +39,18 @@ class MySQLDBFlowMixin(object):
   def WriteMessageHandlerRequests(self, requests, cursor=None):
     """Writes a list of message handler requests to the database."""
     query = ("INSERT IGNORE INTO message_handler_requests "
-             "(handlername, request_id, request) VALUES ")
+             "(handlername, request_id, request, leased_until) VALUES ")
 
     value_templates = []
     args = []
     for r in requests:
-      args.extend([r.handler_name, r.request_id, r.SerializeToBytes()])
-      value_templates.append("(%s, %s, %s)")
+      leased_until = None
+      if r.leased_until:
+        leased_until = mysql_utils.RDFDatetimeToTimestamp(r.leased_until)
+      args.extend(
+          [r.handler_name, r.request_id,
+           r.SerializeToBytes(), leased_until])
+      value_templates.append("(%s, %s, %s, FROM_UNIXTIME(%s))")
 
     query += ",".join(value_templates)
     cursor.execute(query, args)
@@ -159,12 +165,14 @@ class MySQLDBFlowMixin(object):
                        parent_hunt_id, name, creator, flow, flow_state,
                        next_request_to_process, timestamp,
                        network_bytes_sent, user_cpu_time_used_micros,
-                       system_cpu_time_used_micros, num_replies_sent, last_update)
+                       system_cpu_time_used_micros, num_replies_sent,
+                       last_update, args_digest)
     VALUES (%(client_id)s, %(flow_id)s, %(long_flow_id)s, %(parent_flow_id)s,
             %(parent_hunt_id)s, %(name)s, %(creator)s, %(flow)s, %(flow_state)s,
             %(next_request_to_process)s, NOW(6),
             %(network_bytes_sent)s, %(user_cpu_time_used_micros)s,
-            %(system_cpu_time_used_micros)s, %(num_replies_sent)s, NOW(6))"""
+            %(system_cpu_time_used_micros)s, %(num_replies_sent)s, NOW(6),
+            %(args_digest)s)"""
 
     if allow_update:
       query += """
@@ -192,6 +200,8 @@ class MySQLDBFlowMixin(object):
         "num_replies_sent": flow_obj.num_replies_sent,
         "user_cpu_time_used_micros": user_cpu_time_used_micros,
         "system_cpu_time_used_micros": system_cpu_time_used_micros,
+        "args_digest": db_utils.FlowArgsDigest(
+            flow_obj.args if flow_obj.HasField("args") else None),
     }
 
     if flow_obj.parent_flow_id:
@@ -357,6 +367,72 @@ class MySQLDBFlowMixin(object):
     cursor.execute(query, args)
     return [self._FlowObjectFromRow(row) for row in cursor.fetchall()]
 
+  @mysql_utils.WithTransaction(readonly=True)
+  def CountFlowsByCreator(
+      self,
+      client_id: str,
+      min_create_time: rdfvalue.RDFDatetime,
+      include_child_flows: bool = True,
+      cursor=None,
+  ) -> Dict[str, int]:
+    """Counts flows of a client created since a given time by each creator."""
+    query = """
+    SELECT creator, COUNT(*)
+      FROM flows
+     WHERE client_id = %s AND timestamp >= FROM_UNIXTIME(%s)
+    """
+    args = [
+        db_utils.ClientIDToInt(client_id),
+        mysql_utils.RDFDatetimeToTimestamp(min_create_time),
+    ]
+    if not include_child_flows:
+      query += " AND parent_flow_id IS NULL"
+    query += " GROUP BY creator"
+
+    cursor.execute(query, args)
+    return {creator: count for creator, count in cursor.fetchall()}
+
+  @mysql_utils.WithTransaction(readonly=True)
+  def ReadFlowDigests(
+      self,
+      client_id: str,
+      flow_class_name: str,
+      min_create_time: rdfvalue.RDFDatetime,
+      include_child_flows: bool = True,
+      cursor=None,
+  ) -> List[db.FlowDigest]:
+    """Reads digests of flows of a given class created since a given time."""
+    # Flows written before digests were introduced have no digest, so it has
+    # to be computed from the whole flow object.
+    query = """
+    SELECT flow_id, UNIX_TIMESTAMP(timestamp), args_digest,
+           IF(args_digest IS NULL, flow, NULL)
+      FROM flows
+     WHERE client_id = %s AND name = %s AND timestamp >= FROM_UNIXTIME(%s)
+    """
+    args = [
+        db_utils.ClientIDToInt(client_id),
+        flow_class_name,
+        mysql_utils.RDFDatetimeToTimestamp(min_create_time),
+    ]
+    if not include_child_flows:
+      query += " AND parent_flow_id IS NULL"
+
+    cursor.execute(query, args)
+
+    result = []
+    for flow_id, timestamp, args_digest, flow in cursor.fetchall():
+      if args_digest is None:
+        flow_obj = rdf_flow_objects.Flow.FromSerializedBytes(flow)
+        args_digest = db_utils.FlowArgsDigest(
+            flow_obj.args if flow_obj.HasField("args") else None)
+      result.append(
+          db.FlowDigest(
+              flow_id=db_utils.IntToFlowID(flow_id),
+              create_time=mysql_utils.TimestampToRDFDatetime(timestamp),
+              args_digest=args_digest))
+    return result
+
   @mysql_utils.WithTransaction()
   def LeaseFlowForProcessing(self,
                              client_id,
@@ -916,6 +992,78 @@ class MySQLDBFlowMixin(object):
     req_query = "DELETE FROM flow_requests WHERE client_id=%s AND flow_id=%s"
     cursor.execute(req_query, args)
 
+  def DeleteOldFlowRequests(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[db.DeletedRows]:
+    """Deletes flow requests left behind by flows that are not running."""
+
+    def DeleteBatch(limit):
+      return self._DeleteOldFlowRequestsBatch(cutoff_time, limit)
+
+    return db_utils.DeleteInBatches(
+        DeleteBatch, batch_size or self._DELETE_ROWS_BATCH_SIZE)
+
+  @mysql_utils.WithTransaction()
+  def _DeleteOldFlowRequestsBatch(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      limit: int,
+      cursor: Optional[cursors.Cursor] = None,
+  ) -> db.DeletedRows:
+    """Deletes up to `limit` old requests of flows that are not running."""
+    query = """
+      SELECT r.client_id, r.flow_id, r.request_id, LENGTH(r.request)
+        FROM flow_requests AS r FORCE INDEX (flow_requests_by_timestamp)
+        JOIN flows AS f
+          ON f.client_id = r.client_id AND f.flow_id = r.flow_id
+       WHERE r.timestamp < FROM_UNIXTIME(%s)
+         AND f.flow_state != %s
+       LIMIT %s
+    """
+    cursor.execute(query, [
+        mysql_utils.RDFDatetimeToTimestamp(cutoff_time),
+        int(rdf_flow_objects.Flow.FlowState.RUNNING),
+        limit,
+    ])
+    rows = cursor.fetchall()
+    if not rows:
+      return db.DeletedRows(count=0, size=0)
+
+    args = []
+    size = 0
+    for client_id_int, flow_id_int, request_id, request_size in rows:
+      args.extend([client_id_int, flow_id_int, request_id])
+      size += request_size or 0
+
+    key_match_list = ", ".join(("(%s, %s, %s)",) * len(rows))
+    responses_query = f"""
+      SELECT COUNT(*),
+             SUM(LENGTH(response) + LENGTH(status) + LENGTH(iterator))
+        FROM flow_responses
+       WHERE (client_id, flow_id, request_id) IN ({key_match_list})
+    """
+    cursor.execute(responses_query, args)
+    responses_count, responses_size = cursor.fetchone()
+
+    cursor.execute(
+        f"""
+      DELETE
+        FROM flow_responses
+       WHERE (client_id, flow_id, request_id) IN ({key_match_list})
+    """, args)
+    cursor.execute(
+        f"""
+      DELETE
+        FROM flow_requests
+       WHERE (client_id, flow_id, request_id) IN ({key_match_list})
+    """, args)
+
+    return db.DeletedRows(
+        count=len(rows) + responses_count,
+        size=size + int(responses_size or 0))
+
   @mysql_utils.WithTransaction(readonly=True)
   def ReadFlowRequestsReadyForProcessing(self,
                                          client_id,
@@ -1054,6 +1202,34 @@ class MySQLDBFlowMixin(object):
     rows_updated = cursor.execute(update_query, args)
     return rows_updated == 1
 
+  @mysql_utils.WithTransaction()
+  def CommitFlowStep(self,
+                     flow_obj,
+                     requests=(),
+                     responses=(),
+                     completed_requests=(),
+                     results=(),
+                     cursor=None):
+    """Writes everything a flow processing step produced and releases it."""
+    if requests:
+      self.WriteFlowRequests(requests, cursor=cursor)
+
+    # Unlike `WriteFlowResponses`, responses are written and counted in the
+    # same transaction. This is safe, since flows only respond to their own
+    # requests or requests of their parent flows, which no other writer sends
+    # responses to.
+    for batch in collection.Batch(responses, self._WRITE_ROWS_BATCH_SIZE):
+      self._WriteFlowResponsesAndExpectedUpdates(batch, cursor=cursor)
+      self._UpdateRequestsAndScheduleFPRs(batch, cursor=cursor)
+
+    if completed_requests:
+      self.DeleteFlowRequests(completed_requests, cursor=cursor)
+
+    if results:
+      self._WriteFlowResultsOrErrors("flow_results", results, cursor=cursor)
+
+    return self.ReleaseProcessedFlow(flow_obj, cursor=cursor)
+
   @mysql_utils.WithTransaction()
   def WriteFlowProcessingRequests(self, requests, cursor=None):
     """Writes a list of flow processing requests to the database."""
@@ -1436,6 +1612,65 @@ class MySQLDBFlowMixin(object):
     return self._CountFlowResultsOrErrorsByType("flow_errors", client_id,
                                                 flow_id)
 
+  def DeleteOldFlowResults(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      hunt_results: bool = False,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[db.DeletedRows]:
+    """Deletes flow results written before the specified cutoff time."""
+    # Results of flows that do not belong to a hunt are stored with hunt_id 0
+    # (see _WriteFlowResultsOrErrors).
+    if hunt_results:
+      condition = "hunt_id != 0"
+    else:
+      condition = "hunt_id = 0"
+
+    def DeleteBatch(limit):
+      return self._DeleteOldRowsBatch(
+          table="flow_results",
+          index="flow_results_by_timestamp",
+          id_column="result_id",
+          payload_column="payload",
+          condition=condition,
+          cutoff_time=cutoff_time,
+          limit=limit)
+
+    return db_utils.DeleteInBatches(
+        DeleteBatch, batch_size or self._DELETE_ROWS_BATCH_SIZE)
+
+  @mysql_utils.WithTransaction()
+  def _DeleteOldRowsBatch(
+      self,
+      table: str,
+      index: str,
+      id_column: str,
+      payload_column: str,
+      condition: str,
+      cutoff_time: rdfvalue.RDFDatetime,
+      limit: int,
+      cursor: Optional[cursors.Cursor] = None,
+  ) -> db.DeletedRows:
+    """Deletes up to `limit` rows written before the cutoff time."""
+    query = f"""
+      SELECT {id_column}, LENGTH({payload_column})
+        FROM {table} FORCE INDEX ({index})
+       WHERE timestamp < FROM_UNIXTIME(%s) AND {condition}
+       LIMIT %s
+    """
+    cursor.execute(query,
+                   [mysql_utils.RDFDatetimeToTimestamp(cutoff_time), limit])
+    rows = cursor.fetchall()
+    if not rows:
+      return db.DeletedRows(count=0, size=0)
+
+    ids = [row_id for row_id, _ in rows]
+    cursor.execute(
+        f"DELETE FROM {table} WHERE {id_column} IN "
+        f"{mysql_utils.Placeholders(len(ids))}", ids)
+    return db.DeletedRows(
+        count=len(rows), size=sum(size or 0 for _, size in rows))
+
   @mysql_utils.WithTransaction()
   def WriteFlowLogEntry(
       self,
@@ -1512,6 +1747,26 @@ class MySQLDBFlowMixin(object):
     cursor.execute(query, args)
     return cursor.fetchone()[0]
 
+  def DeleteOldFlowLogEntries(
+      self,
+      cutoff_time: rdfvalue.RDFDatetime,
+      batch_size: Optional[int] = None,
+  ) -> Iterator[db.DeletedRows]:
+    """Deletes flow log entries written before the specified cutoff time."""
+
+    def DeleteBatch(limit):
+      return self._DeleteOldRowsBatch(
+          table="flow_log_entries",
+          index="flow_log_entries_by_timestamp",
+          id_column="log_id",
+          payload_column="message",
+          condition="TRUE",
+          cutoff_time=cutoff_time,
+          limit=limit)
+
+    return db_utils.DeleteInBatches(
+        DeleteBatch, batch_size or self._DELETE_ROWS_BATCH_SIZE)
+
   @mysql_utils.WithTransaction()
   def WriteFlowOutputPluginLogEntry(
       self,
@@ -2,15 +2,59 @@
 from absl import app
 from absl.testing import absltest
 
+from grr_response_core.lib import rdfvalue
+from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_server.databases import db_flows_test
+from grr_response_server.databases import db_test_utils
 from grr_response_server.databases import mysql_test
+from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
 from grr.test_lib import test_lib
 
 
 class MysqlFlowTest(db_flows_test.DatabaseTestFlowMixin,
                     mysql_test.MysqlTestBase, absltest.TestCase):
 
-  pass
+  def _WriteFlowAndHuntResults(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+    hunt_id = db_test_utils.InitializeHunt(self.db)
+    hunt_flow_id = db_test_utils.InitializeFlow(
+        self.db, client_id, flow_id=hunt_id, parent_hunt_id=hunt_id)
+
+    for i in range(3):
+      self.db.WriteFlowResults([
+          rdf_flow_objects.FlowResult(
+              client_id=client_id,
+              flow_id=flow_id,
+              payload=rdf_flows.EmptyFlowArgs()),
+          rdf_flow_objects.FlowResult(
+              client_id=client_id,
+              flow_id=hunt_flow_id,
+              hunt_id=hunt_id,
+              tag="tag_%d" % i,
+              payload=rdf_flows.EmptyFlowArgs()),
+      ])
+    return client_id, flow_id, hunt_flow_id
+
+  def testDeleteOldFlowResultsKeepsHuntResults(self):
+    client_id, flow_id, hunt_flow_id = self._WriteFlowAndHuntResults()
+
+    deleted = list(self.db.DeleteOldFlowResults(rdfvalue.RDFDatetime.Now()))
+
+    self.assertEqual(sum(d.count for d in deleted), 3)
+    self.assertEqual(self.db.CountFlowResults(client_id, flow_id), 0)
+    self.assertEqual(self.db.CountFlowResults(client_id, hunt_flow_id), 3)
+
+  def testDeleteOldHuntResultsKeepsFlowResults(self):
+    client_id, flow_id, hunt_flow_id = self._WriteFlowAndHuntResults()
+
+    deleted = list(
+        self.db.DeleteOldFlowResults(
+            rdfvalue.RDFDatetime.Now(), hunt_results=True))
+
+    self.assertEqual(sum(d.count for d in deleted), 3)
+    self.assertEqual(self.db.CountFlowResults(client_id, flow_id), 3)
+    self.assertEqual(self.db.CountFlowResults(client_id, hunt_flow_id), 0)
 
 
 if __name__ == "__main__":
@@ -507,6 +507,75 @@ class MySQLDBHuntMixin(object):
     cursor.execute(query, args)
     return state
 
+  @mysql_utils.WithTransaction(readonly=True)
+  def ReadHuntOutputPluginStateShards(self, hunt_id, cursor=None):
+    """Reads all shards of the output plugin states of a given hunt."""
+    hunt_id_int = db_utils.HuntIDToInt(hunt_id)
+
+    query = "SELECT hunt_id FROM hunts WHERE hunt_id = %s"
+    rows_returned = cursor.execute(query, [hunt_id_int])
+    if rows_returned == 0:
+      raise db.UnknownHuntError(hunt_id)
+
+    query = ("SELECT plugin_id, plugin_state "
+             "FROM hunt_output_plugins_state_shards "
+             "WHERE hunt_id = %s AND plugin_state IS NOT NULL "
+             "ORDER BY plugin_id, shard")
+    cursor.execute(query, [hunt_id_int])
+
+    result = {}
+    for plugin_id, plugin_state in cursor.fetchall():
+      result.setdefault(plugin_id, []).append(
+          rdf_protodict.AttributedDict.FromSerializedBytes(plugin_state))
+    return result
+
+  @mysql_utils.WithTransaction()
+  def UpdateHuntOutputPluginStateShard(self,
+                                       hunt_id,
+                                       state_index,
+                                       shard,
+                                       update_fn,
+                                       cursor=None):
+    """Updates a shard of the hunt output plugin state of a given plugin."""
+    hunt_id_int = db_utils.HuntIDToInt(hunt_id)
+
+    query = "SELECT hunt_id FROM hunts WHERE hunt_id = %s"
+    rows_returned = cursor.execute(query, [hunt_id_int])
+    if rows_returned == 0:
+      raise db.UnknownHuntError(hunt_id)
+
+    # An empty shard row is created first, so that concurrent writers of a new
+    # shard serialize on its row lock instead of failing on a duplicate key.
+    # Rows of unknown plugin states are ignored because of the foreign key.
+    query = ("INSERT IGNORE INTO hunt_output_plugins_state_shards "
+             "(hunt_id, plugin_id, shard, plugin_state) "
+             "VALUES (%s, %s, %s, NULL)")
+    cursor.execute(query, [hunt_id_int, state_index, shard])
+
+    query = ("SELECT plugin_state FROM hunt_output_plugins_state_shards "
+             "WHERE hunt_id = %s AND plugin_id = %s AND shard = %s "
+             "FOR UPDATE")
+    rows_returned = cursor.execute(query, [hunt_id_int, state_index, shard])
+    if rows_returned == 0:
+      raise db.UnknownHuntOutputPluginStateError(hunt_id, state_index)
+
+    (plugin_state,) = cursor.fetchone()
+    if plugin_state is None:
+      modified_plugin_state = update_fn(None)
+    else:
+      modified_plugin_state = update_fn(
+          rdf_protodict.AttributedDict.FromSerializedBytes(plugin_state))
+
+    query = ("UPDATE hunt_output_plugins_state_shards "
+             "SET plugin_state = %s "
+             "WHERE hunt_id = %s AND plugin_id = %s AND shard = %s")
+    args = [
+        modified_plugin_state.SerializeToBytes(), hunt_id_int, state_index,
+        shard
+    ]
+    cursor.execute(query, args)
+    return modified_plugin_state
+
   @mysql_utils.WithTransaction(readonly=True)
   def ReadHuntLogEntries(self,
                          hunt_id,
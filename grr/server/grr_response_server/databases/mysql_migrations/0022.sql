@@ -0,0 +1,18 @@
+-- Data retention: hash blob references not backing any path info are only
+-- garbage-collected some time after they were written, so the time of the
+-- write has to be known.
+ALTER TABLE hash_blob_references
+ADD COLUMN timestamp TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6);
+
+CREATE INDEX client_path_hash_entries_by_sha256
+  ON client_path_hash_entries(sha256);
+
+-- Indexes used to find rows to delete in bounded batches.
+CREATE INDEX flow_results_by_timestamp
+  ON flow_results(timestamp);
+
+CREATE INDEX flow_log_entries_by_timestamp
+  ON flow_log_entries(timestamp);
+
+CREATE INDEX flow_requests_by_timestamp
+  ON flow_requests(timestamp);
@@ -0,0 +1,8 @@
+-- Flow throttling compares arguments of recently created flows. Storing their
+-- digest avoids reading and deserializing whole flow objects to do so. Flows
+-- written before this migration have a NULL digest.
+ALTER TABLE flows
+ADD COLUMN args_digest BINARY(32) DEFAULT NULL;
+
+CREATE INDEX flows_by_client_id_timestamp
+  ON flows(client_id, timestamp);
@@ -0,0 +1,14 @@
+-- Shards of hunt output plugin states. Workers add their updates of a
+-- plugin's state to one of several shard rows instead of all of them updating
+-- the single `hunt_output_plugins_states` row. Shards are merged on read.
+CREATE TABLE hunt_output_plugins_state_shards(
+    hunt_id BIGINT UNSIGNED NOT NULL,
+    plugin_id BIGINT UNSIGNED NOT NULL,
+    shard INT UNSIGNED NOT NULL,
+    plugin_state MEDIUMBLOB,
+    PRIMARY KEY (hunt_id, plugin_id, shard),
+    CONSTRAINT fk_hunt_output_plugins_state_shards_states
+        FOREIGN KEY (hunt_id, plugin_id)
+        REFERENCES hunt_output_plugins_states(hunt_id, plugin_id)
+        ON DELETE CASCADE
+);
@@ -0,0 +1,16 @@
+-- Downsampled aggregates of client stats, updated on every WriteClientStats.
+-- Dashboards over long time ranges read these instead of raw client_stats.
+CREATE TABLE client_stats_rollups(
+    client_id BIGINT UNSIGNED NOT NULL,
+    -- Length of the aggregated period in seconds.
+    resolution INT UNSIGNED NOT NULL,
+    timestamp TIMESTAMP(6) NOT NULL,
+    payload MEDIUMBLOB NOT NULL,
+    PRIMARY KEY (client_id, resolution, timestamp),
+    -- Used by DeleteOldClientStats.
+    KEY resolution_timestamp(resolution, timestamp),
+    CONSTRAINT fk_client_stats_rollups_client_id
+        FOREIGN KEY (client_id)
+        REFERENCES clients(client_id)
+        ON DELETE CASCADE
+);
@@ -21,24 +21,29 @@ from grr_response_server.rdfvalues import objects as rdf_objects
 class MySQLDBPathMixin(object):
   """MySQLDB mixin for path related functions."""
 
-  @mysql_utils.WithTransaction(readonly=True)
-  def ReadPathInfo(self,
-                   client_id,
-                   path_type,
-                   components,
-                   timestamp=None,
-                   cursor=None):
+  def ReadPathInfo(self, client_id, path_type, components, timestamp=None):
     """Retrieves a path info record for a given path."""
-    if timestamp is None:
-      path_infos = self.ReadPathInfos(client_id, path_type, [components])
+    if timestamp is not None:
+      return self._ReadPathInfoAtTimestamp(client_id, path_type, components,
+                                           timestamp)
+
+    path_infos = self.ReadPathInfos(client_id, path_type, [components])
 
-      path_info = path_infos[components]
-      if path_info is None:
-        raise db.UnknownPathError(
-            client_id=client_id, path_type=path_type, components=components)
+    path_info = path_infos[components]
+    if path_info is None:
+      raise db.UnknownPathError(
+          client_id=client_id, path_type=path_type, components=components)
 
-      return path_info
+    return path_info
 
+  @mysql_utils.WithTransaction(readonly=True)
+  def _ReadPathInfoAtTimestamp(self,
+                               client_id,
+                               path_type,
+                               components,
+                               timestamp,
+                               cursor=None):
+    """Retrieves a path info record for a given path at a given timestamp."""
     # If/when support for MySQL 5.x is dropped, this query can be cleaned up
     # with a common table expression (CTE).
     # The joining below is just a way to run multiple (independent) queries in a
@@ -135,9 +140,33 @@ class MySQLDBPathMixin(object):
         stat_entry=stat_entry,
         hash_entry=hash_entry)
 
-  @mysql_utils.WithTransaction(readonly=True)
-  def ReadPathInfos(self, client_id, path_type, components_list, cursor=None):
+  def ReadPathInfos(self, client_id, path_type, components_list):
     """Retrieves path info records for given paths."""
+    if self.path_info_cache is None:
+      return self._ReadPathInfos(client_id, path_type, components_list)
+
+    path_infos = {}
+    uncached_components_list = []
+    for components in components_list:
+      try:
+        path_infos[components] = self.path_info_cache.Get(
+            client_id, path_type, components)
+      except KeyError:
+        uncached_components_list.append(components)
+
+    if uncached_components_list:
+      generation = self.path_info_cache.Generation(client_id)
+      read_path_infos = self._ReadPathInfos(client_id, path_type,
+                                            uncached_components_list)
+      self.path_info_cache.PutMany(
+          client_id, filter(None, read_path_infos.values()), generation)
+      path_infos.update(read_path_infos)
+
+    return path_infos
+
+  @mysql_utils.WithTransaction(readonly=True)
+  def _ReadPathInfos(self, client_id, path_type, components_list, cursor=None):
+    """Retrieves path info records for given paths from the database."""
 
     if not components_list:
       return {}
@@ -213,11 +242,25 @@ class MySQLDBPathMixin(object):
 
     return path_infos
 
-  @mysql_utils.WithTransaction()
   def WritePathInfos(
       self,
       client_id: str,
       path_infos: Sequence[rdf_objects.PathInfo],
+  ) -> None:
+    """Writes a collection of path_info records for a client."""
+    try:
+      self._WritePathInfos(client_id, path_infos)
+    finally:
+      # Invalidation happens only after the transaction is committed, so that
+      # concurrent reads can't cache path infos from before the write.
+      if self.path_info_cache is not None:
+        self.path_info_cache.InvalidateClient(client_id)
+
+  @mysql_utils.WithTransaction()
+  def _WritePathInfos(
+      self,
+      client_id: str,
+      path_infos: Sequence[rdf_objects.PathInfo],
       cursor: Optional[MySQLdb.cursors.Cursor] = None,
   ) -> None:
     """Writes a collection of path_info records for a client."""
@@ -335,6 +378,11 @@ class MySQLDBPathMixin(object):
     """Lists path info records that correspond to descendants of given path."""
     path_infos = []
 
+    if self.path_info_cache is not None:
+      cache_generation = self.path_info_cache.Generation(client_id)
+    else:
+      cache_generation = None
+
     query = ""
 
     path = mysql_utils.ComponentsToPath(components)
@@ -461,6 +509,11 @@ class MySQLDBPathMixin(object):
 
     path_infos.sort(key=lambda _: tuple(_.components))
 
+    # Without a timestamp, all listed path infos are the latest ones, exactly
+    # as returned by ReadPathInfos, so they can be reused by subsequent reads.
+    if not only_explicit and self.path_info_cache is not None:
+      self.path_info_cache.PutMany(client_id, path_infos, cache_generation)
+
     # The first entry should be always the base directory itself unless it is a
     # root directory that was never collected.
     if not path_infos and components:
@@ -495,6 +548,123 @@ class MySQLDBPathMixin(object):
     # again to conform to the interface.
     return list(reversed(explicit_path_infos))
 
+  def MultiListChildPathInfos(self, client_id, paths, timestamp=None):
+    """Lists path info records that correspond to children of given paths."""
+    if timestamp is not None:
+      return super().MultiListChildPathInfos(
+          client_id, paths, timestamp=timestamp)
+
+    paths = {(path_type, tuple(components)) for path_type, components in paths}
+    if not paths:
+      return {}
+
+    return self._MultiListLatestChildPathInfos(client_id, paths)
+
+  @mysql_utils.WithTransaction(readonly=True)
+  def _MultiListLatestChildPathInfos(self, client_id, paths, cursor=None):
+    """Lists latest path infos of children of given paths with one query."""
+    if self.path_info_cache is not None:
+      cache_generation = self.path_info_cache.Generation(client_id)
+    else:
+      cache_generation = None
+
+    query = """
+    SELECT p.path_type, p.path, p.directory, UNIX_TIMESTAMP(p.timestamp),
+           ls.stat_entry, UNIX_TIMESTAMP(ls.timestamp),
+           lh.hash_entry, UNIX_TIMESTAMP(lh.timestamp)
+      FROM client_paths AS p
+ LEFT JOIN client_path_stat_entries AS ls
+        ON ls.id = (SELECT id
+                      FROM client_path_stat_entries
+                     WHERE (client_id, path_type, path_id) =
+                           (p.client_id, p.path_type, p.path_id)
+                  ORDER BY timestamp DESC
+                     LIMIT 1)
+ LEFT JOIN client_path_hash_entries AS lh
+        ON lh.id = (SELECT id
+                      FROM client_path_hash_entries
+                     WHERE (client_id, path_type, path_id) =
+                           (p.client_id, p.path_type, p.path_id)
+                  ORDER BY timestamp DESC
+                     LIMIT 1)
+     WHERE p.client_id = %s
+       AND ({})
+    """
+    # Every listed directory matches both the directory itself (to verify that
+    # it exists and is a directory) and its direct children.
+    condition = """
+    (p.path_type = %s AND
+     (p.path = %s OR (p.depth = %s AND p.path LIKE CONCAT(%s, '/%%'))))
+    """
+    query = query.format(" OR ".join([condition] * len(paths)))
+
+    values = [db_utils.ClientIDToInt(client_id)]
+    for path_type, components in paths:
+      path = mysql_utils.ComponentsToPath(components)
+      escaped_path = db_utils.EscapeWildcards(db_utils.EscapeBackslashes(path))
+      values.extend([int(path_type), path, len(components) + 1, escaped_path])
+
+    cursor.execute(query, values)
+
+    directories = {}
+    children = {path: [] for path in paths}
+    all_path_infos = []
+    for row in cursor.fetchall():
+      # pyformat: disable
+      (path_type, path, directory, timestamp,
+       stat_entry_bytes, last_stat_entry_timestamp,
+       hash_entry_bytes, last_hash_entry_timestamp) = row
+      # pyformat: enable
+      components = tuple(mysql_utils.PathToComponents(path))
+
+      if stat_entry_bytes is not None:
+        stat_entry = rdf_client_fs.StatEntry.FromSerializedBytes(
+            stat_entry_bytes)
+      else:
+        stat_entry = None
+
+      if hash_entry_bytes is not None:
+        hash_entry = rdf_crypto.Hash.FromSerializedBytes(hash_entry_bytes)
+      else:
+        hash_entry = None
+
+      datetime = mysql_utils.TimestampToRDFDatetime
+      path_info = rdf_objects.PathInfo(
+          path_type=path_type,
+          components=components,
+          timestamp=datetime(timestamp),
+          last_stat_entry_timestamp=datetime(last_stat_entry_timestamp),
+          last_hash_entry_timestamp=datetime(last_hash_entry_timestamp),
+          directory=directory,
+          stat_entry=stat_entry,
+          hash_entry=hash_entry)
+      all_path_infos.append(path_info)
+
+      # A single row can be both a listed directory and a child of another
+      # listed directory (e.g. when listing all levels of a directory tree).
+      if (path_type, components) in paths:
+        directories[(path_type, components)] = bool(directory)
+
+      if components and (path_type, components[:-1]) in paths:
+        children[(path_type, components[:-1])].append(path_info)
+
+    if self.path_info_cache is not None:
+      self.path_info_cache.PutMany(client_id, all_path_infos, cache_generation)
+
+    results = {}
+    for (path_type, components), path_infos in children.items():
+      # The root directory is always considered to exist, even if it was never
+      # collected explicitly.
+      is_directory = directories.get((path_type, components), not components)
+      if not is_directory:
+        results[(path_type, components)] = None
+        continue
+
+      path_infos.sort(key=lambda _: tuple(_.components))
+      results[(path_type, components)] = path_infos
+
+    return results
+
   @mysql_utils.WithTransaction(readonly=True)
   def ReadPathInfosHistories(
       self,
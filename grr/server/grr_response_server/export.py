@@ -8,6 +8,14 @@ ExportConverters convert various complex RDFValues to simple RDFValues
 easily be written to a relational database or just to a set of files.
 """
 
+import collections
+from concurrent import futures
+import multiprocessing
+import threading
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from grr_response_core import config
+from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.util import collection
 from grr_response_server import export_converters_registry
 from grr_response_server.export_converters import base
@@ -142,3 +150,89 @@ def ConvertValues(default_metadata, values, options=None):
   """
   batch_data = [(default_metadata, obj) for obj in values]
   return ConvertValuesWithMetadata(batch_data, options=options)
+
+
+MetadataValuePairs = List[Tuple[base.ExportedMetadata, rdfvalue.RDFValue]]
+
+_converter_pool: Optional[futures.ProcessPoolExecutor] = None
+_converter_pool_size = 0
+_converter_pool_lock = threading.Lock()
+
+
+def _GetConverterPool() -> Optional[futures.ProcessPoolExecutor]:
+  """Returns the pool of converter worker processes, None if disabled."""
+  global _converter_pool, _converter_pool_size
+
+  num_processes = config.CONFIG["Export.converter_processes"]
+  with _converter_pool_lock:
+    if num_processes != _converter_pool_size:
+      if _converter_pool is not None:
+        _converter_pool.shutdown()
+        _converter_pool = None
+      if num_processes > 0:
+        # Worker processes are spawned rather than forked: forking a process
+        # running other threads (and holding database connections) is unsafe.
+        _converter_pool = futures.ProcessPoolExecutor(
+            max_workers=num_processes,
+            mp_context=multiprocessing.get_context("spawn"))
+      _converter_pool_size = num_processes
+
+    return _converter_pool
+
+
+def ShutdownConverterPool() -> None:
+  """Stops the converter worker processes, if any are running."""
+  global _converter_pool, _converter_pool_size
+
+  with _converter_pool_lock:
+    if _converter_pool is not None:
+      _converter_pool.shutdown()
+      _converter_pool = None
+    _converter_pool_size = 0
+
+
+def _BatchConvert(
+    converter_cls: type,
+    options: base.ExportOptions,
+    metadata_value_pairs: MetadataValuePairs,
+) -> List[rdfvalue.RDFValue]:
+  return list(converter_cls(options).BatchConvert(metadata_value_pairs))
+
+
+def BatchConvertInParallel(
+    converter: base.ExportConverter,
+    batches: Iterable[MetadataValuePairs],
+) -> Iterator[rdfvalue.RDFValue]:
+  """Converts batches of values, in worker processes if possible.
+
+  Batches are converted in the "Export.converter_processes" worker processes
+  if the converter is parallelizable, and in the calling process otherwise.
+  Results are yielded in the order of the batches either way.
+
+  Args:
+    converter: ExportConverter to convert the values with.
+    batches: An iterable of lists of (metadata, value) tuples, where all
+      values are of the converter's input type.
+
+  Yields:
+    Values generated by the converter.
+  """
+  pool = _GetConverterPool()
+  if pool is None or not converter.parallelizable:
+    for batch in batches:
+      yield from converter.BatchConvert(batch)
+    return
+
+  # At most two batches per worker are queued, so that a slow consumer of the
+  # results doesn't make all of the input accumulate in memory.
+  max_pending = 2 * _converter_pool_size
+  pending = collections.deque()
+  for batch in batches:
+    pending.append(
+        pool.submit(_BatchConvert, converter.__class__, converter.options,
+                    list(batch)))
+    if len(pending) >= max_pending:
+      yield from pending.popleft().result()
+
+  while pending:
+    yield from pending.popleft().result()
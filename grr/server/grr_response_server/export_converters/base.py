@@ -49,6 +49,12 @@ class ExportConverter():
   # Type of values that this converter accepts.
   input_rdf_type = None
 
+  # Whether results of BatchConvert() depend on its arguments and the options
+  # only. Batches of such converters can be converted in worker processes (see
+  # export.BatchConvertInParallel). Converters reading the data store or
+  # creating RDF classes on the fly must leave it unset.
+  parallelizable = False
+
   def __init__(self, options=None):
     """Constructor.
 
@@ -22,6 +22,7 @@ class BufferReferenceToExportedMatchConverter(base.ExportConverter):
   """Export converter for BufferReference instances."""
 
   input_rdf_type = rdf_client.BufferReference
+  parallelizable = True
 
   def Convert(
       self, metadata: base.ExportedMetadata,
@@ -18,6 +18,7 @@ class CronTabFileConverter(base.ExportConverter):
   """Converter for rdf_client.SoftwarePackages structs."""
 
   input_rdf_type = rdf_cronjobs.CronTabFile
+  parallelizable = True
 
   def Convert(
       self, metadata: base.ExportedMetadata,
@@ -18,6 +18,7 @@ class ExecuteResponseConverter(base.ExportConverter):
   """Export converter for ExecuteResponse."""
 
   input_rdf_type = rdf_client_action.ExecuteResponse
+  parallelizable = True
 
   def Convert(
       self, metadata: base.ExportedMetadata,
@@ -251,6 +251,7 @@ class StatEntryToExportedRegistryKeyConverter(base.ExportConverter):
   """Converts StatEntry to ExportedRegistryKey."""
 
   input_rdf_type = rdf_client_fs.StatEntry
+  parallelizable = True
 
   def Convert(self, metadata: base.ExportedMetadata, stat_entry):
     """Converts StatEntry to ExportedRegistryKey.
@@ -437,6 +438,8 @@ class ArtifactFilesDownloaderResultConverter(base.ExportConverter):
 
   def BatchConvert(self, metadata_value_pairs):
     metadata_value_pairs = list(metadata_value_pairs)
+    registry_key_converter = StatEntryToExportedRegistryKeyConverter()
+    file_converter = StatEntryToExportedFileConverter()
 
     results = []
     for metadata, value in metadata_value_pairs:
@@ -447,16 +450,12 @@ class ArtifactFilesDownloaderResultConverter(base.ExportConverter):
 
       if self.IsRegistryStatEntry(original_result):
         exported_registry_key = self.GetExportedResult(
-            original_result,
-            StatEntryToExportedRegistryKeyConverter(),
-            metadata=metadata)
+            original_result, registry_key_converter, metadata=metadata)
         result = ExportedArtifactFilesDownloaderResult(
             metadata=metadata, original_registry_key=exported_registry_key)
       elif self.IsFileStatEntry(original_result):
         exported_file = self.GetExportedResult(
-            original_result,
-            StatEntryToExportedFileConverter(),
-            metadata=metadata)
+            original_result, file_converter, metadata=metadata)
         result = ExportedArtifactFilesDownloaderResult(
             metadata=metadata, original_file=exported_file)
       else:
@@ -28,6 +28,7 @@ class LaunchdPlistConverter(base.ExportConverter):
   """Export converter for LaunchdPlist."""
 
   input_rdf_type = rdf_plist.LaunchdPlist
+  parallelizable = True
 
   def Convert(self, metadata: base.ExportedMetadata,
               l: rdf_plist.LaunchdPlist) -> Iterator[ExportedLaunchdPlist]:
@@ -23,6 +23,7 @@ class ExportedProcessMemoryError(rdf_structs.RDFProtoStruct):
 class YaraProcessScanMatchConverter(base.ExportConverter):
   """Converter for YaraProcessScanMatch."""
   input_rdf_type = rdf_memory.YaraProcessScanMatch
+  parallelizable = True
 
   def Convert(
       self, metadata: base.ExportedMetadata,
@@ -50,6 +51,7 @@ class YaraProcessScanMatchConverter(base.ExportConverter):
 class ProcessMemoryErrorConverter(base.ExportConverter):
   """Converter for ProcessMemoryError."""
   input_rdf_type = rdf_memory.ProcessMemoryError
+  parallelizable = True
 
   def Convert(
       self,
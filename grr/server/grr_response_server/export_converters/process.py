@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 """Classes for exporting Process."""
 
-from typing import Iterator, List
+from typing import Iterable, Iterator, List, Tuple
 
 from grr_response_core.lib.rdfvalues import client as rdf_client
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
@@ -28,6 +28,7 @@ class ProcessToExportedProcessConverter(base.ExportConverter):
   """Converts Process to ExportedProcess."""
 
   input_rdf_type = rdf_client.Process
+  parallelizable = True
 
   def Convert(self, metadata: base.ExportedMetadata,
               process: rdf_client.Process) -> List[ExportedProcess]:
@@ -74,6 +75,7 @@ class ProcessToExportedNetworkConnectionConverter(base.ExportConverter):
   """Converts Process to ExportedNetworkConnection."""
 
   input_rdf_type = rdf_client.Process
+  parallelizable = True
 
   def Convert(
       self, metadata: base.ExportedMetadata, process: rdf_client.Process
@@ -95,11 +97,27 @@ class ProcessToExportedNetworkConnectionConverter(base.ExportConverter):
         (metadata, conn) for conn in process.connections
     ])
 
+  def BatchConvert(
+      self,
+      metadata_value_pairs: Iterable[Tuple[base.ExportedMetadata,
+                                           rdf_client.Process]],
+  ) -> Iterator[network.ExportedNetworkConnection]:
+    """Converts connections of all processes with a single converter."""
+    conn_converter = (
+        network.NetworkConnectionToExportedNetworkConnectionConverter(
+            options=self.options))
+    return conn_converter.BatchConvert([
+        (metadata, conn)
+        for metadata, process in metadata_value_pairs
+        for conn in process.connections
+    ])
+
 
 class ProcessToExportedOpenFileConverter(base.ExportConverter):
   """Converts Process to ExportedOpenFile."""
 
   input_rdf_type = rdf_client.Process
+  parallelizable = True
 
   def Convert(self, metadata: base.ExportedMetadata,
               process: rdf_client.Process) -> Iterator[ExportedOpenFile]:
@@ -105,6 +105,25 @@ class ProcessToExportedNetworkConnectionConverterTest(
     self.assertEqual(results[1].pid, 1)
     self.assertEqual(results[1].ctime, 0)
 
+  def testBatchConversion(self):
+    procs = []
+    for i in range(3):
+      procs.append(
+          rdf_client.Process(
+              pid=i,
+              connections=[
+                  rdf_client_network.NetworkConnection(pid=i, ctime=j)
+                  for j in range(i)
+              ]))
+
+    converter = process.ProcessToExportedNetworkConnectionConverter()
+    results = list(converter.BatchConvert([(self.metadata, p) for p in procs]))
+
+    self.assertEqual([(r.pid, r.ctime) for r in results],
+                     [(1, 0), (2, 0), (2, 1)])
+    for result in results:
+      self.assertEqual(result.metadata, self.metadata)
+
 
 def main(argv):
   test_lib.main(argv)
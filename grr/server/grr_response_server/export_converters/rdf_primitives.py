@@ -27,6 +27,7 @@ class RDFBytesToExportedBytesConverter(base.ExportConverter):
   """Converts RDFBytes to ExportedBytes."""
 
   input_rdf_type = rdfvalue.RDFBytes
+  parallelizable = True
 
   def Convert(self, metadata: base.ExportedMetadata,
               data: rdfvalue.RDFBytes) -> List[ExportedBytes]:
@@ -49,6 +50,7 @@ class RDFStringToExportedStringConverter(base.ExportConverter):
   """Converts RDFString to ExportedString."""
 
   input_rdf_type = rdfvalue.RDFString
+  parallelizable = True
 
   def Convert(self, metadata: base.ExportedMetadata,
               data: rdfvalue.RDFString) -> List[ExportedString]:
@@ -20,6 +20,7 @@ class SoftwarePackageConverter(base.ExportConverter):
   """Converter for rdf_client.SoftwarePackage structs."""
 
   input_rdf_type = rdf_client.SoftwarePackage
+  parallelizable = True
 
   _INSTALL_STATE_MAP = {
       rdf_client.SoftwarePackage.InstallState.INSTALLED:
@@ -52,6 +53,7 @@ class SoftwarePackagesConverter(base.ExportConverter):
   """Converter for rdf_client.SoftwarePackages structs."""
 
   input_rdf_type = rdf_client.SoftwarePackages
+  parallelizable = True
 
   def Convert(
       self, metadata: base.ExportedMetadata,
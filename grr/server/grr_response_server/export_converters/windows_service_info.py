@@ -18,6 +18,7 @@ class WindowsServiceInformationConverter(base.ExportConverter):
   """Export converter for WindowsServiceInformation."""
 
   input_rdf_type = rdf_client.WindowsServiceInformation
+  parallelizable = True
 
   def Convert(
       self, metadata: base.ExportedMetadata,
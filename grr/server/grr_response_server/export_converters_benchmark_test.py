@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""Benchmarks batch conversion of every registered export converter."""
+
+import functools
+
+from absl import app
+
+from grr_response_core.lib import rdfvalue
+from grr_response_core.lib.rdfvalues import client as rdf_client
+from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
+from grr_response_core.lib.rdfvalues import client_network as rdf_client_network
+from grr_response_core.lib.rdfvalues import file_finder as rdf_file_finder
+from grr_response_core.lib.rdfvalues import flows as rdf_flows
+from grr_response_core.lib.rdfvalues import paths as rdf_paths
+from grr_response_server import export
+from grr_response_server import export_converters_registry
+from grr_response_server.export_converters import base
+from grr_response_server.flows.general import collectors
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import export_test_lib
+from grr.test_lib import test_lib
+
+
+class ExportConvertersBenchmark(benchmark_test_lib.AverageMicroBenchmarks):
+  """Times BatchConvert() of all registered converters on synthetic values."""
+
+  NUM_VALUES = 10000
+  NUM_PROCESSES = 4
+  BATCH_SIZE = 1000
+
+  def setUp(self):
+    super().setUp()
+    self.client_id = self.SetupClient(0)
+
+  def _SampleValue(self, converter_cls, i):
+    """Returns a value to be converted by a converter of the given class."""
+    pathspec = rdf_paths.PathSpec.OS(path="/usr/lib/file_%d" % i)
+    stat_entry = rdf_client_fs.StatEntry(
+        pathspec=pathspec, st_mode=33184, st_size=i, st_mtime=1600000000 + i)
+
+    value_type = converter_cls.input_rdf_type
+    if value_type is rdf_client_fs.StatEntry:
+      return stat_entry
+    elif value_type is rdf_file_finder.FileFinderResult:
+      return rdf_file_finder.FileFinderResult(stat_entry=stat_entry)
+    elif value_type is collectors.ArtifactFilesDownloaderResult:
+      return collectors.ArtifactFilesDownloaderResult(
+          original_result=stat_entry)
+    elif value_type is rdf_flows.GrrMessage:
+      return rdf_flows.GrrMessage(
+          source=self.client_id, payload=stat_entry)
+    elif value_type is rdf_client.BufferReference:
+      return rdf_client.BufferReference(data=b"%d" % i, pathspec=pathspec)
+    elif value_type is rdf_client.Process:
+      return rdf_client.Process(
+          pid=i,
+          exe="/usr/bin/foo",
+          connections=[rdf_client_network.NetworkConnection(pid=i)])
+    else:
+      return value_type()
+
+  def _MetadataValuePairs(self, converter_cls):
+    metadata = base.ExportedMetadata(
+        client_urn="aff4:/C.1000000000000000",
+        hostname="host.example.com",
+        os="Linux",
+        source_urn="aff4:/hunts/H:123456",
+        timestamp=rdfvalue.RDFDatetime.FromSecondsSinceEpoch(1600000000))
+    return [(metadata, self._SampleValue(converter_cls, i))
+            for i in range(self.NUM_VALUES)]
+
+  def _Convert(self, converter, pairs):
+    return len(list(converter.BatchConvert(pairs)))
+
+  def _ConvertInParallel(self, converter, batches):
+    return len(list(export.BatchConvertInParallel(converter, batches)))
+
+  @export_test_lib.WithAllExportConverters
+  def testBatchConvertOfRegisteredConverters(self):
+    """Converting 10k values with every registered converter."""
+    self.addCleanup(export.ShutdownConverterPool)
+
+    converter_classes = sorted(
+        export_converters_registry._EXPORT_CONVERTER_REGISTRY,  # pylint: disable=protected-access
+        key=lambda cls: cls.__name__)
+
+    failures = {}
+    for converter_cls in converter_classes:
+      if converter_cls.input_rdf_type is None:
+        continue
+
+      try:
+        pairs = self._MetadataValuePairs(converter_cls)
+        converter = converter_cls()
+        self.TimeIt(
+            functools.partial(self._Convert, converter, pairs),
+            converter_cls.__name__,
+            repetitions=1)
+
+        if converter_cls.parallelizable:
+          batches = [
+              pairs[i:i + self.BATCH_SIZE]
+              for i in range(0, len(pairs), self.BATCH_SIZE)
+          ]
+          with test_lib.ConfigOverrider(
+              {"Export.converter_processes": self.NUM_PROCESSES}):
+            # Worker processes are started before the timing starts.
+            self._ConvertInParallel(converter, batches[:self.NUM_PROCESSES])
+            self.TimeIt(
+                functools.partial(self._ConvertInParallel, converter, batches),
+                "%s (%d processes)" %
+                (converter_cls.__name__, self.NUM_PROCESSES),
+                repetitions=1)
+      except Exception as e:  # pylint: disable=broad-except
+        failures[converter_cls.__name__] = e
+
+    self.assertEmpty(failures)
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
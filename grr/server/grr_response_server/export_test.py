@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 """Tests for export converters."""
 
+import itertools
+from unittest import mock
+
 from absl import app
 
 from grr_response_core.lib import rdfvalue
@@ -8,6 +11,7 @@ from grr_response_core.lib.rdfvalues import cloud as rdf_cloud
 from grr_response_server import data_store
 from grr_response_server import export
 from grr_response_server.export_converters import base
+from grr_response_server.export_converters import rdf_primitives
 from grr.test_lib import export_test_lib
 from grr.test_lib import fixture_test_lib
 from grr.test_lib import test_lib
@@ -108,6 +112,51 @@ class ConvertValuesTest(export_test_lib.ExportTestBase):
                      result[1] == DummyRDFValue("someA")))
 
 
+class BatchConvertInParallelTest(export_test_lib.ExportTestBase):
+  """Tests the BatchConvertInParallel function."""
+
+  def setUp(self):
+    super().setUp()
+    self.addCleanup(export.ShutdownConverterPool)
+
+  def _Batches(self, num_batches, batch_size):
+    for i in range(num_batches):
+      yield [(self.metadata, rdfvalue.RDFString("%d-%d" % (i, j)))
+             for j in range(batch_size)]
+
+  def testConvertsSequentiallyWhenNoProcessesAreConfigured(self):
+    converter = rdf_primitives.RDFStringToExportedStringConverter()
+    with test_lib.ConfigOverrider({"Export.converter_processes": 0}):
+      results = list(
+          export.BatchConvertInParallel(converter, self._Batches(3, 2)))
+
+    self.assertEqual([r.data for r in results],
+                     ["0-0", "0-1", "1-0", "1-1", "2-0", "2-1"])
+
+  def testConvertsInWorkerProcessesPreservingOrder(self):
+    converter = rdf_primitives.RDFStringToExportedStringConverter()
+    expected = list(
+        converter.BatchConvert(
+            itertools.chain.from_iterable(self._Batches(10, 5))))
+
+    with test_lib.ConfigOverrider({"Export.converter_processes": 2}):
+      results = list(
+          export.BatchConvertInParallel(converter, self._Batches(10, 5)))
+
+    self.assertEqual(results, expected)
+
+  def testConvertsNonParallelizableConvertersInProcess(self):
+    batches = [[(self.metadata, DummyRDFValue("foo"))],
+               [(self.metadata, DummyRDFValue("bar"))]]
+    with test_lib.ConfigOverrider({"Export.converter_processes": 2}):
+      with mock.patch.object(export, "_GetConverterPool") as get_pool:
+        results = list(
+            export.BatchConvertInParallel(DummyRDFValueConverter(), batches))
+
+    self.assertEqual(results, ["foo", "bar"])
+    get_pool.return_value.submit.assert_not_called()
+
+
 class GetMetadataTest(test_lib.GRRBaseTest):
 
   def setUp(self):
@@ -3,9 +3,11 @@
 
 import abc
 import collections
+from concurrent import futures
 import hashlib
 import io
 import os
+import time
 from typing import Dict
 from typing import Iterable
 from typing import NamedTuple
@@ -16,6 +18,7 @@ from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_core.lib.util import collection
 from grr_response_core.lib.util import precondition
+from grr_response_core.stats import metrics
 from grr_response_server import data_store
 from grr_response_server.databases import db
 from grr_response_server.rdfvalues import objects as rdf_objects
@@ -336,10 +339,7 @@ def CheckHashes(hash_ids):
     A dict where SHA256HashID objects are keys. Corresponding values
     may be False (if hash id is not present) or True if it is not present.
   """
-  return {
-      k: bool(v)
-      for k, v in data_store.REL_DB.ReadHashBlobReferences(hash_ids).items()
-  }
+  return data_store.REL_DB.CheckHashBlobReferencesExist(hash_ids)
 
 
 def GetLastCollectionPathInfos(client_paths, max_timestamp=None):
@@ -432,6 +432,17 @@ def OpenFile(
 
 STREAM_CHUNKS_READ_AHEAD = 500
 
+# Maximum amount of blob data that StreamFilesChunks keeps in memory (read
+# ahead and not yet consumed) when prefetching is enabled.
+STREAM_CHUNKS_PREFETCH_BYTES = 64 * 1024 * 1024
+
+STREAM_CHUNKS_READ_BYTES = metrics.Counter(
+    "file_store_stream_chunks_read_bytes", units="BYTES")
+STREAM_CHUNKS_READ_LATENCY = metrics.Event(
+    "file_store_stream_chunks_read_latency")
+STREAM_CHUNKS_PREFETCH_WAIT_LATENCY = metrics.Event(
+    "file_store_stream_chunks_prefetch_wait_latency")
+
 
 class StreamedFileChunk(object):
   """An object representing a single streamed file chunk."""
@@ -457,7 +468,105 @@ class StreamedFileChunk(object):
     self.total_chunks = total_chunks
 
 
-def StreamFilesChunks(client_paths, max_timestamp=None, max_size=None):
+class _ChunkRef(NamedTuple):
+  """A reference to a single blob to be streamed by StreamFilesChunks."""
+  client_path: db.ClientPath
+  blob_id: rdf_objects.BlobID
+  chunk_index: int
+  total_chunks: int
+  offset: int
+  total_size: int
+  size: int
+
+
+def _BatchChunkRefs(chunk_refs, max_batch_bytes=None):
+  """Splits chunk references into batches to be read with a single call."""
+  batch = []
+  batch_bytes = 0
+  for ref in chunk_refs:
+    if batch and (len(batch) >= STREAM_CHUNKS_READ_AHEAD or
+                  (max_batch_bytes is not None and
+                   batch_bytes + ref.size > max_batch_bytes)):
+      yield batch
+      batch = []
+      batch_bytes = 0
+
+    batch.append(ref)
+    batch_bytes += ref.size
+
+  if batch:
+    yield batch
+
+
+def _ReadChunkRefsBatch(batch):
+  """Reads blobs referenced by a batch of chunk references."""
+  start_time = time.time()
+  blobs = data_store.BLOBS.ReadBlobs([ref.blob_id for ref in batch])
+  STREAM_CHUNKS_READ_LATENCY.RecordEvent(time.time() - start_time)
+  STREAM_CHUNKS_READ_BYTES.Increment(sum(ref.size for ref in batch))
+  return blobs
+
+
+def _PrefetchChunkRefsBatches(batches, num_threads, max_prefetch_bytes):
+  """Reads batches of blobs ahead of time using a bounded thread pool.
+
+  Args:
+    batches: An iterable of lists of _ChunkRef objects.
+    num_threads: Maximum number of batches read concurrently.
+    max_prefetch_bytes: Maximum number of bytes kept in memory: this includes
+      batches being read, batches already read and the batch being consumed.
+      A single batch is always read, even if it's bigger than the limit.
+
+  Yields:
+    Tuples (batch, blobs) where blobs is a dictionary returned by
+    ReadBlobs. Tuples are yielded in the order of the input batches.
+  """
+  batches = iter(batches)
+  next_batch = next(batches, None)
+
+  # Batches that are being read or were read but not yet consumed.
+  pending = collections.deque()
+  # Size of pending batches and of the batch being consumed by the caller.
+  held_bytes = 0
+
+  executor = futures.ThreadPoolExecutor(
+      max_workers=num_threads, thread_name_prefix="StreamFilesChunks")
+  try:
+    while next_batch is not None or pending:
+      # Batches are submitted in order, so that the budget check only delays
+      # reading of the upcoming batches and never reorders them. One batch
+      # more than there are threads is kept, so that all threads keep reading
+      # while the caller consumes the first pending batch.
+      while next_batch is not None and len(pending) <= num_threads:
+        next_batch_bytes = sum(ref.size for ref in next_batch)
+        if held_bytes and held_bytes + next_batch_bytes > max_prefetch_bytes:
+          break
+
+        future = executor.submit(_ReadChunkRefsBatch, next_batch)
+        pending.append((next_batch, next_batch_bytes, future))
+        held_bytes += next_batch_bytes
+        next_batch = next(batches, None)
+
+      batch, batch_bytes, future = pending.popleft()
+
+      start_time = time.time()
+      blobs = future.result()
+      STREAM_CHUNKS_PREFETCH_WAIT_LATENCY.RecordEvent(time.time() - start_time)
+
+      yield batch, blobs
+      # The batch is accounted for until the caller is done with it.
+      held_bytes -= batch_bytes
+  finally:
+    for _, _, future in pending:
+      future.cancel()
+    executor.shutdown(wait=False)
+
+
+def StreamFilesChunks(client_paths,
+                      max_timestamp=None,
+                      max_size=None,
+                      num_prefetch_threads=0,
+                      max_prefetch_bytes=STREAM_CHUNKS_PREFETCH_BYTES):
   """Streams contents of given files.
 
   Args:
@@ -468,6 +577,11 @@ def StreamFilesChunks(client_paths, max_timestamp=None, max_size=None):
       each file.
     max_size: If specified, only the chunks covering max_size bytes will be
       returned.
+    num_prefetch_threads: If non-zero, blobs will be read ahead of time by up
+      to num_prefetch_threads background threads while the caller processes
+      already streamed chunks.
+    max_prefetch_bytes: Maximum amount of blob data held in memory when
+      prefetching is enabled.
 
   Yields:
     StreamedFileChunk objects for every file read. Chunks will be returned
@@ -491,7 +605,7 @@ def StreamFilesChunks(client_paths, max_timestamp=None, max_size=None):
   blob_refs_by_hash_id = data_store.REL_DB.ReadHashBlobReferences(
       hash_ids_by_cp.values())
 
-  all_chunks = []
+  chunk_refs = []
   for cp in client_paths:
     try:
       hash_id = hash_ids_by_cp[cp]
@@ -510,18 +624,37 @@ def StreamFilesChunks(client_paths, max_timestamp=None, max_size=None):
 
     cur_size = 0
     for i, ref in enumerate(blob_refs):
-      all_chunks.append((cp, ref.blob_id, i, num_blobs, ref.offset, total_size))
+      chunk_refs.append(
+          _ChunkRef(
+              client_path=cp,
+              blob_id=ref.blob_id,
+              chunk_index=i,
+              total_chunks=num_blobs,
+              offset=ref.offset,
+              total_size=total_size,
+              size=ref.size))
 
       cur_size += ref.size
       if max_size is not None and cur_size >= max_size:
         break
 
-  for batch in collection.Batch(all_chunks, STREAM_CHUNKS_READ_AHEAD):
-    blobs = data_store.BLOBS.ReadBlobs(
-        [blob_id for cp, blob_id, i, num_blobs, offset, total_size in batch])
-    for cp, blob_id, i, num_blobs, offset, total_size in batch:
-      blob_data = blobs[blob_id]
+  if num_prefetch_threads:
+    # Batches are additionally limited by size, so that several of them can be
+    # read concurrently without exceeding the memory budget.
+    batches = _BatchChunkRefs(
+        chunk_refs,
+        max_batch_bytes=max(1, max_prefetch_bytes // num_prefetch_threads))
+    batches_with_blobs = _PrefetchChunkRefsBatches(
+        batches, num_prefetch_threads, max_prefetch_bytes)
+  else:
+    batches_with_blobs = ((batch, _ReadChunkRefsBatch(batch))
+                          for batch in _BatchChunkRefs(chunk_refs))
+
+  for batch, blobs in batches_with_blobs:
+    for ref in batch:
+      blob_data = blobs[ref.blob_id]
       if blob_data is None:
-        raise BlobNotFoundError(blob_id)
+        raise BlobNotFoundError(ref.blob_id)
 
-      yield StreamedFileChunk(cp, blob_data, i, num_blobs, offset, total_size)
+      yield StreamedFileChunk(ref.client_path, blob_data, ref.chunk_index,
+                              ref.total_chunks, ref.offset, ref.total_size)
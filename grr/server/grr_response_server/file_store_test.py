@@ -625,6 +625,64 @@ class StreamFilesChunksTest(test_lib.GRRBaseTest):
     self.assertEqual(chunks[0].data, blob_data[0])
     self.assertEqual(chunks[1].data, blob_data[1])
 
+  def testPrefetchingStreamsChunksInClientPathsOrder(self):
+    client_paths = []
+    for i in range(6):
+      client_path = db.ClientPath.OS(self.client_id, ("foo", str(i)))
+      self._WriteFile(client_path, (i % 3, i % 3 + 2))
+      client_paths.append(client_path)
+
+    expected = [(c.client_path, c.chunk_index, c.data)
+                for c in file_store.StreamFilesChunks(client_paths)]
+    self.assertLen(expected, 12)
+
+    # The budget makes every batch consist of a single blob.
+    chunks = file_store.StreamFilesChunks(
+        client_paths,
+        num_prefetch_threads=3,
+        max_prefetch_bytes=self.blob_size * 3)
+    self.assertEqual([(c.client_path, c.chunk_index, c.data) for c in chunks],
+                     expected)
+
+  def testPrefetchingRespectsMaxPrefetchBytes(self):
+    client_paths = []
+    for i in range(6):
+      client_path = db.ClientPath.OS(self.client_id, ("foo", str(i)))
+      self._WriteFile(client_path, (i, i + 1))
+      client_paths.append(client_path)
+
+    with mock.patch.object(
+        file_store,
+        "_ReadChunkRefsBatch",
+        wraps=file_store._ReadChunkRefsBatch) as read_batch_mock:
+      chunks = file_store.StreamFilesChunks(
+          client_paths,
+          num_prefetch_threads=4,
+          max_prefetch_bytes=self.blob_size * 2)
+
+      next(chunks)
+      self.assertLessEqual(read_batch_mock.call_count, 2)
+
+      self.assertLen(list(chunks), 5)
+      self.assertEqual(read_batch_mock.call_count, 6)
+
+  def testPrefetchingRaisesIfChunkIsMissing(self):
+    _, missing_blob_refs = vfs_test_lib.GenerateBlobRefs(self.blob_size, "0")
+
+    hash_id = rdf_objects.SHA256HashID.FromSerializedBytes(
+        missing_blob_refs[0].blob_id.AsBytes())
+    data_store.REL_DB.WriteHashBlobReferences({hash_id: missing_blob_refs})
+
+    client_path = db.ClientPath.OS(self.client_id, ("foo", "bar"))
+    path_info = rdf_objects.PathInfo.OS(components=client_path.components)
+    path_info.hash_entry.sha256 = hash_id.AsBytes()
+    data_store.REL_DB.WritePathInfos(client_path.client_id, [path_info])
+
+    chunks = file_store.StreamFilesChunks([client_path],
+                                          num_prefetch_threads=2)
+    with self.assertRaises(file_store.BlobNotFoundError):
+      list(chunks)
+
 
 def main(argv):
   # Run the full test suite
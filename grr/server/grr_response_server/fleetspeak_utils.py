@@ -2,8 +2,10 @@
 """FS GRR server side integration utility functions."""
 
 import binascii
+from concurrent import futures
 import datetime
-from typing import Text, List
+import threading
+from typing import List, Optional, Sequence, Text
 
 from google.protobuf import timestamp_pb2
 
@@ -22,6 +24,10 @@ from grr_response_proto import rrg_pb2
 
 FLEETSPEAK_CALL_LATENCY = metrics.Event(
     "fleetspeak_call_latency", fields=[("call", str)])
+FLEETSPEAK_SEND_BATCH_SIZE = metrics.Event(
+    "fleetspeak_send_batch_size",
+    bins=[1, 2, 5, 10, 20, 50, 100, 200, 500, 1000],
+    fields=[("service", str)])
 
 WRITE_SINGLE_TRY_TIMEOUT = datetime.timedelta(seconds=30)
 WRITE_TOTAL_TIMEOUT = datetime.timedelta(seconds=300)
@@ -29,8 +35,58 @@ WRITE_TOTAL_TIMEOUT = datetime.timedelta(seconds=300)
 READ_SINGLE_TRY_TIMEOUT = datetime.timedelta(seconds=60)
 READ_TOTAL_TIMEOUT = datetime.timedelta(seconds=120)
 
+# Limits on the number and total size of GrrMessages to pack into a single
+# MessageList.
+_MAX_MESSAGE_LIST_COUNT = 100
+_MAX_MESSAGE_LIST_BYTES = 1 << 20  # 1 MiB
+
+_send_executor: Optional[futures.ThreadPoolExecutor] = None
+_send_executor_lock = threading.Lock()
+
 
 @FLEETSPEAK_CALL_LATENCY.Timed(fields=["InsertMessage"])
+def _InsertMessage(fs_msg: fs_common_pb2.Message) -> None:
+  fleetspeak_connector.CONN.outgoing.InsertMessage(
+      fs_msg,
+      single_try_timeout=WRITE_SINGLE_TRY_TIMEOUT,
+      timeout=WRITE_TOTAL_TIMEOUT)
+
+
+def _GetSendExecutor() -> futures.ThreadPoolExecutor:
+  """Returns the executor shared by all batched sends of the process."""
+  global _send_executor
+
+  with _send_executor_lock:
+    if _send_executor is None:
+      _send_executor = futures.ThreadPoolExecutor(
+          max_workers=config.CONFIG["Server.fleetspeak_send_max_in_flight"],
+          thread_name_prefix="FleetspeakSend")
+    return _send_executor
+
+
+def _InsertMessages(fs_msgs: Sequence[fs_common_pb2.Message]) -> None:
+  """Inserts messages, at most `fleetspeak_send_max_in_flight` at a time.
+
+  Args:
+    fs_msgs: Fleetspeak messages to insert.
+
+  Raises:
+    grpc.RpcError: If inserting any of the messages failed. All insertions
+      are finished when the error is raised.
+  """
+  if (len(fs_msgs) == 1 or
+      config.CONFIG["Server.fleetspeak_send_max_in_flight"] <= 1):
+    for fs_msg in fs_msgs:
+      _InsertMessage(fs_msg)
+    return
+
+  executor = _GetSendExecutor()
+  pending = [executor.submit(_InsertMessage, fs_msg) for fs_msg in fs_msgs]
+  futures.wait(pending)
+  for future in pending:
+    future.result()
+
+
 def SendGrrMessageThroughFleetspeak(grr_id: str,
                                     grr_msg: rdf_flows.GrrMessage) -> None:
   """Sends the given GrrMessage through FS with retrying.
@@ -47,24 +103,77 @@ def SendGrrMessageThroughFleetspeak(grr_id: str,
     grr_id: ID of grr client to send message to.
     grr_msg: GRR message to send.
   """
+  fs_msg = _MakeGrrFleetspeakMessage(grr_id, "GrrMessage", [grr_msg])
+  fs_msg.data.Pack(grr_msg.AsPrimitiveProto())
+  _InsertMessage(fs_msg)
+
+
+@FLEETSPEAK_CALL_LATENCY.Timed(fields=["InsertMessages"])
+def SendGrrMessagesThroughFleetspeak(
+    grr_id: str, grr_msgs: Sequence[rdf_flows.GrrMessage]) -> None:
+  """Sends the given GrrMessages to a single client through FS.
+
+  If `Server.fleetspeak_send_message_lists` is set, the messages are packed
+  into as few MessageLists as possible. Otherwise, every message is sent on
+  its own.
+
+  Args:
+    grr_id: ID of grr client to send messages to.
+    grr_msgs: GRR messages to send.
+  """
+  FLEETSPEAK_SEND_BATCH_SIZE.RecordEvent(len(grr_msgs), fields=["GRR"])
+
+  if not config.CONFIG["Server.fleetspeak_send_message_lists"]:
+    fs_msgs = []
+    for grr_msg in grr_msgs:
+      fs_msg = _MakeGrrFleetspeakMessage(grr_id, "GrrMessage", [grr_msg])
+      fs_msg.data.Pack(grr_msg.AsPrimitiveProto())
+      fs_msgs.append(fs_msg)
+    _InsertMessages(fs_msgs)
+    return
+
+  chunks = []
+  chunk = []
+  chunk_size = 0
+  for grr_msg in grr_msgs:
+    msg_size = grr_msg.AsPrimitiveProto().ByteSize()
+    if chunk and (len(chunk) >= _MAX_MESSAGE_LIST_COUNT or
+                  chunk_size + msg_size > _MAX_MESSAGE_LIST_BYTES):
+      chunks.append(chunk)
+      chunk = []
+      chunk_size = 0
+    chunk.append(grr_msg)
+    chunk_size += msg_size
+  if chunk:
+    chunks.append(chunk)
+
+  fs_msgs = []
+  for chunk in chunks:
+    fs_msg = _MakeGrrFleetspeakMessage(grr_id, "MessageList", chunk)
+    fs_msg.data.Pack(rdf_flows.MessageList(job=chunk).AsPrimitiveProto())
+    fs_msgs.append(fs_msg)
+  _InsertMessages(fs_msgs)
+
+
+def _MakeGrrFleetspeakMessage(
+    grr_id: str, message_type: str,
+    grr_msgs: Sequence[rdf_flows.GrrMessage]) -> fs_common_pb2.Message:
+  """Creates a message to the GRR service annotated with the flow ids."""
   fs_msg = fs_common_pb2.Message(
-      message_type="GrrMessage",
+      message_type=message_type,
       destination=fs_common_pb2.Address(
           client_id=GRRIDToFleetspeakID(grr_id), service_name="GRR"))
-  fs_msg.data.Pack(grr_msg.AsPrimitiveProto())
-  if grr_msg.session_id is not None:
-    annotation = fs_msg.annotations.entries.add()
-    annotation.key, annotation.value = "flow_id", grr_msg.session_id.Basename()
-  if grr_msg.request_id is not None:
-    annotation = fs_msg.annotations.entries.add()
-    annotation.key, annotation.value = "request_id", str(grr_msg.request_id)
-  fleetspeak_connector.CONN.outgoing.InsertMessage(
-      fs_msg,
-      single_try_timeout=WRITE_SINGLE_TRY_TIMEOUT,
-      timeout=WRITE_TOTAL_TIMEOUT)
+  for grr_msg in grr_msgs:
+    if grr_msg.session_id is not None:
+      annotation = fs_msg.annotations.entries.add()
+      annotation.key = "flow_id"
+      annotation.value = grr_msg.session_id.Basename()
+    if grr_msg.request_id is not None:
+      annotation = fs_msg.annotations.entries.add()
+      annotation.key, annotation.value = "request_id", str(grr_msg.request_id)
+  return fs_msg
 
 
-@FLEETSPEAK_CALL_LATENCY.Timed(fields=["InsertMessage"])
 def SendRrgRequest(
     client_id: str,
     request: rrg_pb2.Request,
@@ -75,6 +184,34 @@ def SendRrgRequest(
     client_id: A unique endpoint identifier as recognized by GRR.
     request: A request to send to the endpoint.
   """
+  _InsertMessage(_MakeRrgFleetspeakMessage(client_id, request))
+
+
+@FLEETSPEAK_CALL_LATENCY.Timed(fields=["InsertMessages"])
+def SendRrgRequests(
+    client_id: str,
+    requests: Sequence[rrg_pb2.Request],
+) -> None:
+  """Sends RRG action requests to the specified endpoint.
+
+  RRG agents accept a single request per message, so the requests are
+  inserted concurrently instead.
+
+  Args:
+    client_id: A unique endpoint identifier as recognized by GRR.
+    requests: Requests to send to the endpoint.
+  """
+  FLEETSPEAK_SEND_BATCH_SIZE.RecordEvent(len(requests), fields=["RRG"])
+  _InsertMessages([
+      _MakeRrgFleetspeakMessage(client_id, request) for request in requests
+  ])
+
+
+def _MakeRrgFleetspeakMessage(
+    client_id: str,
+    request: rrg_pb2.Request,
+) -> fs_common_pb2.Message:
+  """Creates a message with the RRG action request to the endpoint."""
   message = fs_common_pb2.Message()
   message.message_type = "rrg.Request"
   message.destination.service_name = "RRG"
@@ -92,11 +229,7 @@ def SendRrgRequest(
       value=str(request.request_id),
   )
 
-  fleetspeak_connector.CONN.outgoing.InsertMessage(
-      message,
-      single_try_timeout=WRITE_SINGLE_TRY_TIMEOUT,
-      timeout=WRITE_TOTAL_TIMEOUT,
-  )
+  return message
 
 
 @FLEETSPEAK_CALL_LATENCY.Timed(fields=["InsertMessage"])
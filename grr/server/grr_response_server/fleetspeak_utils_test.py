@@ -105,6 +105,84 @@ class FleetspeakUtilsTest(test_lib.GRRBaseTest):
     self.assertEqual(fs_message.annotations, expected_annotations)
     self.assertEqual(grr_message.AsPrimitiveProto(), unpacked_message)
 
+  def _MakeGrrMessages(self, count):
+    return [
+        rdf_flows.GrrMessage(
+            session_id="C.0123456789abcdef/01234567",
+            name="TestClientAction",
+            request_id=i) for i in range(1, count + 1)
+    ]
+
+  @mock.patch.object(fleetspeak_connector, "CONN")
+  def testSendGrrMessagesSendsMessagesSeparatelyByDefault(self, mock_conn):
+    grr_messages = self._MakeGrrMessages(3)
+    fleetspeak_utils.SendGrrMessagesThroughFleetspeak("C.0123456789abcdef",
+                                                      grr_messages)
+
+    self.assertEqual(mock_conn.outgoing.InsertMessage.call_count, 3)
+    for call, grr_message in zip(
+        mock_conn.outgoing.InsertMessage.call_args_list, grr_messages):
+      fs_message = call[0][0]
+      self.assertEqual(fs_message.message_type, "GrrMessage")
+      unpacked_message = rdf_flows.GrrMessage.protobuf()
+      fs_message.data.Unpack(unpacked_message)
+      self.assertEqual(grr_message.AsPrimitiveProto(), unpacked_message)
+
+  @mock.patch.object(fleetspeak_connector, "CONN")
+  @mock.patch.object(fleetspeak_utils, "_MAX_MESSAGE_LIST_COUNT", 2)
+  def testSendGrrMessagesPacksMessageLists(self, mock_conn):
+    grr_messages = self._MakeGrrMessages(3)
+    with test_lib.ConfigOverrider(
+        {"Server.fleetspeak_send_message_lists": True}):
+      fleetspeak_utils.SendGrrMessagesThroughFleetspeak("C.0123456789abcdef",
+                                                        grr_messages)
+
+    self.assertEqual(mock_conn.outgoing.InsertMessage.call_count, 2)
+    sent = []
+    for call in mock_conn.outgoing.InsertMessage.call_args_list:
+      fs_message = call[0][0]
+      self.assertEqual(fs_message.message_type, "MessageList")
+      self.assertEqual(fs_message.destination.service_name, "GRR")
+      message_list = rdf_flows.MessageList.FromSerializedBytes(
+          fs_message.data.value)
+      sent.extend(message_list.job)
+      self.assertEqual(
+          [e.value for e in fs_message.annotations.entries if
+           e.key == "request_id"],
+          [str(m.request_id) for m in message_list.job])
+    self.assertEqual(sent, grr_messages)
+
+  @mock.patch.object(fleetspeak_connector, "CONN")
+  def testSendGrrMessagesConcurrently(self, mock_conn):
+    grr_messages = self._MakeGrrMessages(10)
+    with test_lib.ConfigOverrider(
+        {"Server.fleetspeak_send_max_in_flight": 4}):
+      with mock.patch.object(fleetspeak_utils, "_send_executor", None):
+        fleetspeak_utils.SendGrrMessagesThroughFleetspeak(
+            "C.0123456789abcdef", grr_messages)
+
+    self.assertEqual(mock_conn.outgoing.InsertMessage.call_count, 10)
+    sent = []
+    for call in mock_conn.outgoing.InsertMessage.call_args_list:
+      unpacked_message = rdf_flows.GrrMessage.protobuf()
+      call[0][0].data.Unpack(unpacked_message)
+      sent.append(unpacked_message.request_id)
+    self.assertCountEqual(sent, range(1, 11))
+
+  @mock.patch.object(fleetspeak_connector, "CONN")
+  def testSendGrrMessagesRaisesInsertErrors(self, mock_conn):
+    mock_conn.outgoing.InsertMessage.side_effect = [
+        None, RuntimeError("Oh no!"), None
+    ]
+    with test_lib.ConfigOverrider(
+        {"Server.fleetspeak_send_max_in_flight": 2}):
+      with mock.patch.object(fleetspeak_utils, "_send_executor", None):
+        with self.assertRaises(RuntimeError):
+          fleetspeak_utils.SendGrrMessagesThroughFleetspeak(
+              "C.0123456789abcdef", self._MakeGrrMessages(3))
+
+    self.assertEqual(mock_conn.outgoing.InsertMessage.call_count, 3)
+
   @mock.patch.object(fleetspeak_connector, "CONN")
   def testKillFleetspeak(self, mock_conn):
     fleetspeak_utils.KillFleetspeak("C.1000000000000000", True)
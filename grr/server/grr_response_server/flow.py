@@ -22,7 +22,7 @@ import enum
 import logging
 import traceback
 
-from typing import Optional, Sequence
+from typing import Optional, Sequence, Set
 
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import registry
@@ -70,6 +70,109 @@ class AttributedDict(dict):
     self.__dict__ = self
 
 
+# Values of these types can't be modified in place, so reading them does not
+# make a key changed.
+_IMMUTABLE_STATE_VALUE_TYPES = (type(None), bool, int, float, str, bytes)
+
+
+class FlowState(dict):
+  """A dict of flow state that supports attribute access and tracks changes.
+
+  A key is considered changed once it is assigned or deleted, or once its value
+  is read if the value is mutable: flows commonly modify values in place (e.g.
+  `self.state.pending_files[path] = ...`), which can't be detected otherwise.
+  This allows persisting only the changed portion of the state.
+  """
+
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    object.__setattr__(self, "_changed_keys", set())
+
+  @property
+  def changed_keys(self) -> Set[str]:
+    """Keys that were changed since the last `ClearChanges` call."""
+    return self._changed_keys
+
+  def ClearChanges(self) -> None:
+    self._changed_keys.clear()
+
+  def __reduce__(self):
+    return (self.__class__, (dict.copy(self),))
+
+  def __getattr__(self, key):
+    try:
+      return self[key]
+    except KeyError:
+      raise AttributeError(key) from None
+
+  def __setattr__(self, key, value):
+    self[key] = value
+
+  def __delattr__(self, key):
+    try:
+      del self[key]
+    except KeyError:
+      raise AttributeError(key) from None
+
+  def __getitem__(self, key):
+    value = super().__getitem__(key)
+    if not isinstance(value, _IMMUTABLE_STATE_VALUE_TYPES):
+      self._changed_keys.add(key)
+    return value
+
+  def __setitem__(self, key, value):
+    self._changed_keys.add(key)
+    super().__setitem__(key, value)
+
+  def __delitem__(self, key):
+    self._changed_keys.add(key)
+    super().__delitem__(key)
+
+  def __iter__(self):
+    # Overriding `__iter__` stops `dict(state)` and `{**state}` from copying
+    # values directly, bypassing `__getitem__`.
+    return super().__iter__()
+
+  def get(self, key, default=None):
+    if key in self:
+      return self[key]
+    return default
+
+  def setdefault(self, key, default=None):
+    self._changed_keys.add(key)
+    return super().setdefault(key, default)
+
+  def pop(self, key, *args):
+    self._changed_keys.add(key)
+    return super().pop(key, *args)
+
+  def popitem(self):
+    key, value = super().popitem()
+    self._changed_keys.add(key)
+    return key, value
+
+  def update(self, *args, **kwargs):
+    other = dict(*args, **kwargs)
+    self._changed_keys.update(other)
+    super().update(other)
+
+  def clear(self):
+    self._changed_keys.update(self)
+    super().clear()
+
+  def copy(self):
+    self._changed_keys.update(self)
+    return dict(self)
+
+  def values(self):
+    self._changed_keys.update(self)
+    return super().values()
+
+  def items(self):
+    self._changed_keys.update(self)
+    return super().items()
+
+
 def FilterArgsFromSemanticProtobuf(protobuf, kwargs):
   """Assign kwargs to the protobuf, and remove them from the kwargs dict."""
   for descriptor in protobuf.type_infos:
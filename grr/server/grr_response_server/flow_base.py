@@ -9,12 +9,15 @@ from typing import Any, Callable, Iterator, Mapping, NamedTuple, Optional, Seque
 
 from google.protobuf import any_pb2
 from google.protobuf import message as pb_message
+from grr_response_core import config
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import client as rdf_client
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
 from grr_response_core.lib.registry import FlowRegistry
+from grr_response_core.lib.util import collection
+from grr_response_core.lib.util import random
 from grr_response_core.stats import metrics
 from grr_response_server import access_control
 from grr_response_server import action_registry
@@ -24,6 +27,7 @@ from grr_response_server import fleetspeak_utils
 from grr_response_server import flow
 from grr_response_server import flow_responses
 from grr_response_server import hunt
+from grr_response_server import message_handlers
 from grr_response_server import notification as notification_lib
 from grr_response_server import output_plugin as output_plugin_lib
 from grr_response_server import server_stubs
@@ -770,7 +774,10 @@ class FlowBase(metaclass=FlowRegistry):
 
       if self.replies_to_process:
         if self.rdf_flow.parent_hunt_id and not self.rdf_flow.parent_flow_id:
-          self._ProcessRepliesWithHuntOutputPlugins(self.replies_to_process)
+          if config.CONFIG["OutputPlugins.async_delivery"]:
+            self._QueueRepliesForHuntOutputPlugins(self.replies_to_process)
+          else:
+            self._ProcessRepliesWithHuntOutputPlugins(self.replies_to_process)
         else:
           self._ProcessRepliesWithFlowOutputPlugins(self.replies_to_process)
 
@@ -902,11 +909,19 @@ class FlowBase(metaclass=FlowRegistry):
     self.rdf_flow.response_count += 1
     return self.rdf_flow.response_count
 
+  def _SendQueuedClientMessages(self) -> None:
+    if self.client_action_requests:
+      fleetspeak_utils.SendGrrMessagesThroughFleetspeak(
+          self.rdf_flow.client_id, self.client_action_requests)
+      self.client_action_requests = []
+
+    if self.rrg_requests:
+      fleetspeak_utils.SendRrgRequests(self.rdf_flow.client_id,
+                                       self.rrg_requests)
+      self.rrg_requests = []
+
   def FlushQueuedMessages(self) -> None:
     """Flushes queued messages."""
-    # TODO(amoser): This could be done in a single db call, might be worth
-    # optimizing.
-
     if self.flow_requests:
       data_store.REL_DB.WriteFlowRequests(self.flow_requests)
       self.flow_requests = []
@@ -915,17 +930,7 @@ class FlowBase(metaclass=FlowRegistry):
       data_store.REL_DB.WriteFlowResponses(self.flow_responses)
       self.flow_responses = []
 
-    if self.client_action_requests:
-      client_id = self.rdf_flow.client_id
-      for request in self.client_action_requests:
-        fleetspeak_utils.SendGrrMessageThroughFleetspeak(client_id, request)
-
-      self.client_action_requests = []
-
-    for request in self.rrg_requests:
-      fleetspeak_utils.SendRrgRequest(self.rdf_flow.client_id, request)
-
-    self.rrg_requests = []
+    self._SendQueuedClientMessages()
 
     if self.completed_requests:
       data_store.REL_DB.DeleteFlowRequests(self.completed_requests)
@@ -941,35 +946,60 @@ class FlowBase(metaclass=FlowRegistry):
         data_store.REL_DB.WriteFlowResults(self.replies_to_write)
       self.replies_to_write = []
 
+  def FlushQueuedMessagesAndRelease(self) -> bool:
+    """Flushes queued messages and releases the flow in a single DB call.
+
+    If there are messages for the client, their requests are written and the
+    messages are sent in advance, so that the flow stays leased if sending
+    fails.
+
+    Returns:
+      False if the flow could not be released, because more of its requests
+      are ready for processing. Queued messages are flushed in any case.
+    """
+    if self.client_action_requests or self.rrg_requests:
+      # Client messages can only be sent once their requests are written, but
+      # they have to be sent before the flow is released. Otherwise, if sending
+      # failed, the released flow would wait for responses forever.
+      if self.flow_requests:
+        data_store.REL_DB.WriteFlowRequests(self.flow_requests)
+        self.flow_requests = []
+      self._SendQueuedClientMessages()
+
+    released = data_store.REL_DB.CommitFlowStep(
+        self.rdf_flow,
+        requests=self.flow_requests,
+        responses=self.flow_responses,
+        completed_requests=self.completed_requests,
+        results=self.replies_to_write)
+    self.flow_requests = []
+    self.flow_responses = []
+    self.completed_requests = []
+
+    if self.replies_to_write:
+      if self.rdf_flow.parent_hunt_id:
+        hunt.StopHuntIfCPUOrNetworkLimitsExceeded(self.rdf_flow.parent_hunt_id)
+      self.replies_to_write = []
+
+    return released
+
   def _ProcessRepliesWithHuntOutputPlugins(
       self, replies: Sequence[rdf_flow_objects.FlowResponse]) -> None:
     """Applies output plugins to hunt results."""
-    hunt_obj = data_store.REL_DB.ReadHuntObject(self.rdf_flow.parent_hunt_id)
-    self.rdf_flow.output_plugins = hunt_obj.output_plugins
-    hunt_output_plugins_states = data_store.REL_DB.ReadHuntOutputPluginsStates(
-        self.rdf_flow.parent_hunt_id)
+    hunt_id = self.rdf_flow.parent_hunt_id
+    hunt_output_plugins = hunt.GetHuntOutputPlugins(hunt_id)
+    self.rdf_flow.output_plugins = hunt_output_plugins
+    hunt_output_plugins_states = hunt.ReadHuntOutputPluginsStates(hunt_id)
     self.rdf_flow.output_plugins_states = hunt_output_plugins_states
 
     created_plugins = self._ProcessRepliesWithFlowOutputPlugins(replies)
 
     for index, (plugin, state) in enumerate(
         zip(created_plugins, hunt_output_plugins_states)):
-      if plugin is None:
-        continue
+      if plugin is not None:
+        hunt.UpdateHuntOutputPluginState(hunt_id, index, plugin, state)
 
-      # Only do the REL_DB call if the plugin state has actually changed.
-      s = state.plugin_state.Copy()
-      plugin.UpdateState(s)
-      if s != state.plugin_state:
-
-        def UpdateFn(plugin_state):
-          plugin.UpdateState(plugin_state)  # pylint: disable=cell-var-from-loop
-          return plugin_state
-
-        data_store.REL_DB.UpdateHuntOutputPluginState(hunt_obj.hunt_id, index,
-                                                      UpdateFn)
-
-    for plugin_def, created_plugin in zip(hunt_obj.output_plugins,
+    for plugin_def, created_plugin in zip(hunt_output_plugins,
                                           created_plugins):
       if created_plugin is not None:
         HUNT_RESULTS_RAN_THROUGH_PLUGIN.Increment(
@@ -977,6 +1007,25 @@ class FlowBase(metaclass=FlowRegistry):
       else:
         HUNT_OUTPUT_PLUGIN_ERRORS.Increment(fields=[plugin_def.plugin_name])
 
+  def _QueueRepliesForHuntOutputPlugins(
+      self, replies: Sequence[rdf_flow_objects.FlowResult]) -> None:
+    """Queues hunt results for OutputPluginDeliveryHandler."""
+    if not hunt.GetHuntOutputPlugins(self.rdf_flow.parent_hunt_id):
+      return
+
+    delivery_request = rdf_flow_objects.OutputPluginDeliveryRequest(
+        client_id=self.rdf_flow.client_id,
+        flow_id=self.rdf_flow.flow_id,
+        hunt_id=self.rdf_flow.parent_hunt_id,
+        results=replies)
+    data_store.REL_DB.WriteMessageHandlerRequests([
+        rdf_objects.MessageHandlerRequest(
+            client_id=self.rdf_flow.client_id,
+            handler_name=OutputPluginDeliveryHandler.handler_name,
+            request_id=random.UInt32(),
+            request=delivery_request)
+    ])
+
   def _ProcessRepliesWithFlowOutputPlugins(
       self, replies: Sequence[rdf_flow_objects.FlowResponse]
   ) -> Sequence[Optional[output_plugin_lib.OutputPlugin]]:
@@ -1095,9 +1144,18 @@ class FlowBase(metaclass=FlowRegistry):
   @property
   def state(self) -> Any:
     if self._state is None:
-      self._state = flow.AttributedDict(self.rdf_flow.persistent_data.ToDict())
+      self._state = flow.FlowState(self.rdf_flow.persistent_data.ToDict())
     return self._state
 
+  def RestoreState(self, state: flow.FlowState) -> None:
+    """Uses an already deserialized state instead of the persisted one.
+
+    Args:
+      state: A state kept from an earlier processing round of this flow. It
+        has to be the state persisted as the current `persistent_data_version`.
+    """
+    self._state = state
+
   def PersistState(self) -> None:
     """Persists flow state."""
     if hasattr(self.state, "_result_metadata"):
@@ -1123,7 +1181,14 @@ class FlowBase(metaclass=FlowRegistry):
 
     self.state._result_metadata = result_metadata  # pylint: disable=protected-access
     self._num_replies_per_type_tag = collections.Counter()
-    self.rdf_flow.persistent_data = self.state
+
+    # Only values of changed keys have to be converted, entries of the other
+    # keys are reused from the persistent data the state was read from.
+    persistent_data = self.rdf_flow.persistent_data
+    self.rdf_flow.persistent_data = persistent_data.UpdateFromDict(
+        self.state, self.state.changed_keys)
+    self.rdf_flow.persistent_data_version += 1
+    self.state.ClearChanges()
 
   @property
   def args(self) -> Any:
@@ -1224,6 +1289,143 @@ def UseProto2AnyResponses(
   return Wrapper
 
 
+class OutputPluginDeliveryHandler(message_handlers.MessageHandler):
+  """Delivers queued hunt results to the output plugins of the hunts.
+
+  Results are queued by hunt flows if `OutputPlugins.async_delivery` is set.
+  The worker's message handler thread leases them in batches, so each output
+  plugin processes the results of many flows and clients with a single series
+  of ProcessResponses() calls followed by one Flush(), and its state is updated
+  once per batch. Results a plugin fails to process are queued again for this
+  plugin only, with a delay doubling on every attempt.
+  """
+
+  handler_name = "OutputPluginDeliveryHandler"
+
+  def ProcessMessages(
+      self,
+      msgs: Sequence[rdf_objects.MessageHandlerRequest],
+  ) -> None:
+    delivery_requests = [msg.request.payload for msg in msgs]
+
+    retries = []
+    by_hunt_id = collection.Group(delivery_requests, lambda r: r.hunt_id)
+    for hunt_id, hunt_delivery_requests in by_hunt_id.items():
+      retries.extend(self._DeliverHuntResults(hunt_id, hunt_delivery_requests))
+
+    if retries:
+      data_store.REL_DB.WriteMessageHandlerRequests(retries)
+
+  def _DeliverHuntResults(
+      self,
+      hunt_id: str,
+      delivery_requests: Sequence[rdf_flow_objects.OutputPluginDeliveryRequest],
+  ) -> Sequence[rdf_objects.MessageHandlerRequest]:
+    """Runs the hunt's output plugins, returns requests for failed plugins."""
+    try:
+      hunt_output_plugins = hunt.GetHuntOutputPlugins(hunt_id)
+      hunt_output_plugins_states = hunt.ReadHuntOutputPluginsStates(hunt_id)
+    except db.UnknownHuntError:
+      logging.warning("Dropping queued results of unknown hunt %s.", hunt_id)
+      return []
+
+    source_urn = rdfvalue.RDFURN("hunts").Add(hunt_id)
+
+    retries = []
+    for index, (plugin_def, state) in enumerate(
+        zip(hunt_output_plugins, hunt_output_plugins_states)):
+      output_plugin_id = "%d" % index
+      plugin_requests = [
+          r for r in delivery_requests
+          if not r.output_plugin_ids or output_plugin_id in r.output_plugin_ids
+      ]
+      if not plugin_requests:
+        continue
+
+      plugin_descriptor = state.plugin_descriptor
+      num_replies = sum(len(r.results) for r in plugin_requests)
+      try:
+        plugin = plugin_descriptor.GetPluginClass()(
+            source_urn=source_urn, args=plugin_descriptor.args)
+        for r in plugin_requests:
+          messages = [result.AsLegacyGrrMessage() for result in r.results]
+          plugin.ProcessResponses(state.plugin_state, messages)
+        plugin.Flush(state.plugin_state)
+      except Exception as e:  # pylint: disable=broad-except
+        logging.exception("Plugin %s failed to process %d replies.",
+                          plugin_descriptor, num_replies)
+        HUNT_OUTPUT_PLUGIN_ERRORS.Increment(fields=[plugin_def.plugin_name])
+
+        for r in plugin_requests:
+          _WriteOutputPluginLogEntry(
+              r, output_plugin_id,
+              rdf_flow_objects.FlowOutputPluginLogEntry.LogEntryType.ERROR,
+              "Error while processing %d replies: %s" % (len(r.results), e))
+          retry = self._RetryRequest(r, output_plugin_id)
+          if retry is not None:
+            retries.append(retry)
+        continue
+
+      HUNT_RESULTS_RAN_THROUGH_PLUGIN.Increment(
+          num_replies, fields=[plugin_def.plugin_name])
+      for r in plugin_requests:
+        _WriteOutputPluginLogEntry(
+            r, output_plugin_id,
+            rdf_flow_objects.FlowOutputPluginLogEntry.LogEntryType.LOG,
+            "Processed %d replies." % len(r.results))
+
+      hunt.UpdateHuntOutputPluginState(hunt_id, index, plugin, state)
+
+    return retries
+
+  def _RetryRequest(
+      self,
+      delivery_request: rdf_flow_objects.OutputPluginDeliveryRequest,
+      output_plugin_id: str,
+  ) -> Optional[rdf_objects.MessageHandlerRequest]:
+    """Creates a delayed request to retry delivery to a single plugin."""
+    attempts = delivery_request.attempts + 1
+    if attempts >= config.CONFIG["OutputPlugins.delivery_max_attempts"]:
+      logging.error(
+          "Dropping %d results of flow %s on %s for output plugin %s of "
+          "hunt %s after %d attempts.", len(delivery_request.results),
+          delivery_request.flow_id, delivery_request.client_id,
+          output_plugin_id, delivery_request.hunt_id, attempts)
+      return None
+
+    retry_interval = config.CONFIG["OutputPlugins.delivery_retry_interval"]
+    delay = retry_interval * 2**delivery_request.attempts
+    return rdf_objects.MessageHandlerRequest(
+        client_id=delivery_request.client_id,
+        handler_name=self.handler_name,
+        request_id=random.UInt32(),
+        leased_until=rdfvalue.RDFDatetime.Now() + delay,
+        request=rdf_flow_objects.OutputPluginDeliveryRequest(
+            client_id=delivery_request.client_id,
+            flow_id=delivery_request.flow_id,
+            hunt_id=delivery_request.hunt_id,
+            results=delivery_request.results,
+            output_plugin_ids=[output_plugin_id],
+            attempts=attempts))
+
+
+def _WriteOutputPluginLogEntry(
+    delivery_request: rdf_flow_objects.OutputPluginDeliveryRequest,
+    output_plugin_id: str,
+    log_entry_type: rdf_structs.EnumNamedValue,
+    message: str,
+) -> None:
+  """Writes an output plugin log entry for the flow of a delivery request."""
+  data_store.REL_DB.WriteFlowOutputPluginLogEntry(
+      rdf_flow_objects.FlowOutputPluginLogEntry(
+          client_id=delivery_request.client_id,
+          flow_id=delivery_request.flow_id,
+          hunt_id=delivery_request.hunt_id,
+          output_plugin_id=output_plugin_id,
+          log_entry_type=log_entry_type,
+          message=message))
+
+
 def _TerminateFlow(
     rdf_flow: rdf_flow_objects.Flow,
     reason: Optional[str] = None,
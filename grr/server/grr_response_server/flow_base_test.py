@@ -6,11 +6,13 @@ from absl.testing import absltest
 from google.protobuf import any_pb2
 from google.protobuf import empty_pb2
 from google.protobuf import wrappers_pb2
+from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import client as rdf_client
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
 from grr_response_core.stats import default_stats_collector
 from grr_response_core.stats import metrics
 from grr_response_core.stats import stats_collector_instance
+from grr_response_server import fleetspeak_utils
 from grr_response_server import flow_base
 from grr_response_server import flow_responses
 from grr_response_server.databases import db as abstract_db
@@ -328,6 +330,25 @@ class FlowBaseTest(absltest.TestCase, stats_test_lib.StatsCollectorTestMixin):
     # coverage and ensure that the call does not fail.
     flow.CallRRG(rrg_pb2.GET_SYSTEM_METADATA, empty_pb2.Empty())
 
+  @db_test_lib.WithDatabase
+  def testFlushQueuedMessagesAndReleaseKeepsFlowLeasedIfSendingFails(
+      self, db: abstract_db.Database):
+    client_id = db_test_utils.InitializeRRGClient(db)
+    flow_id = db_test_utils.InitializeFlow(db, client_id)
+
+    rdf_flow = db.LeaseFlowForProcessing(
+        client_id, flow_id, rdfvalue.Duration.From(1, rdfvalue.HOURS))
+    flow = FlowBaseTest.Flow(rdf_flow)
+    flow.CallRRG(rrg_pb2.GET_SYSTEM_METADATA, empty_pb2.Empty())
+
+    with mock.patch.object(
+        fleetspeak_utils, "SendRrgRequests", side_effect=RuntimeError()):
+      with self.assertRaises(RuntimeError):
+        flow.FlushQueuedMessagesAndRelease()
+
+    self.assertIsNotNone(db.ReadFlowObject(client_id, flow_id).processing_on)
+    self.assertLen(db.ReadAllFlowRequestsAndResponses(client_id, flow_id), 1)
+
   @db_test_lib.WithDatabase
   def testErrorIncrementsMetricsWithExceptionName(
       self, db: abstract_db.Database
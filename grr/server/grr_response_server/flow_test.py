@@ -980,6 +980,48 @@ class IncrementalResponseHandlingTest(BasicFlowTest):
     ])
 
 
+class FlowStateTest(absltest.TestCase):
+
+  def testSupportsAttributeAccess(self):
+    state = flow.FlowState(foo=1)
+    state.bar = 2
+    del state.foo
+
+    self.assertEqual(state, {"bar": 2})
+    self.assertEqual(state.bar, 2)
+    self.assertFalse(hasattr(state, "foo"))
+
+  def testTracksAssignedAndDeletedKeys(self):
+    state = flow.FlowState(foo=1, bar=2, baz=3)
+    state.foo = 4
+    state["quux"] = 5
+    del state.bar
+
+    self.assertEqual(state.changed_keys, {"foo", "bar", "quux"})
+
+  def testTracksKeysWithMutableValuesThatWereRead(self):
+    state = flow.FlowState(foo=1, bar=[2], baz={}, quux=[])
+    self.assertEqual(state.foo, 1)
+    state.bar.append(3)
+    state.get("baz")["key"] = "value"
+
+    self.assertEqual(state.changed_keys, {"bar", "baz"})
+
+  def testTracksValuesReadByCopying(self):
+    state = flow.FlowState(foo=[1], bar=2)
+    dict(state)["foo"].append(3)
+
+    self.assertEqual(state.changed_keys, {"foo"})
+
+  def testClearChanges(self):
+    state = flow.FlowState(foo=[1])
+    state.foo.append(2)
+    state.ClearChanges()
+
+    self.assertEmpty(state.changed_keys)
+    self.assertEqual(state, {"foo": [1, 2]})
+
+
 class WorkerTest(BasicFlowTest):
 
   def testRaisesIfFlowProcessingRequestDoesNotTriggerAnyProcessing(self):
@@ -2,17 +2,20 @@
 """These flows are system-specific GRR cron flows."""
 
 import collections
-
+import logging
+import time
 
 from grr_response_core import config
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import stats as rdf_stats
+from grr_response_core.stats import metrics
 from grr_response_server import client_report_utils
 from grr_response_server import cronjobs
 from grr_response_server import data_store
 from grr_response_server import hunt
 from grr_response_server.databases import db
+from grr_response_server.databases import db_utils
 from grr_response_server.flows.general import discovery as flows_discovery
 
 # Maximum number of old stats entries to delete in a single db call.
@@ -28,6 +31,18 @@ _GENERAL_FLEET_STATS_DAY_BUCKETS = frozenset([1, 2, 3, 7, 14, 30, 60])
 
 _FLEET_BREAKDOWN_DAY_BUCKETS = frozenset([1, 7, 14, 30])
 
+# Server processes cache hashes known to have blob references for up to twice
+# the maximum age of a cache generation and skip collecting their contents. The
+# references must outlive that (and the time it takes to write a path info
+# pointing at them afterwards) by a wide margin.
+MIN_HASH_BLOB_REFERENCES_TTL = rdfvalue.Duration.From(
+    10 * db_utils.KNOWN_IDS_CACHE_MAX_AGE, rdfvalue.SECONDS)
+
+DATA_RETENTION_DELETED_ROWS = metrics.Counter(
+    "data_retention_deleted_rows", fields=[("type", str)])
+DATA_RETENTION_DELETED_BYTES = metrics.Counter(
+    "data_retention_deleted_bytes", fields=[("type", str)])
+
 
 def _WriteFleetBreakdownStatsToDB(fleet_stats, report_type):
   """Saves a snapshot of client activity stats to the DB.
@@ -269,3 +284,97 @@ class PurgeClientStatsCronJob(cronjobs.SystemCronJobBase):
       total_deleted_count += deleted_count
       self.Log("Deleted %d ClientStats that expired before %s",
                total_deleted_count, end)
+
+
+class DataRetentionCronJob(cronjobs.SystemCronJobBase):
+  """Deletes data that is older than its configured retention period.
+
+  Every kind of data has its own `DataRetention.*_ttl` option. Data of kinds
+  without one is retained forever. Rows are deleted in batches of
+  `DataRetention.purge_batch_size`, and after every batch the job pauses for
+  the time the batch took multiplied by `DataRetention.purge_sleep_coefficient`
+  so that database replicas can keep up with the deletes.
+  """
+
+  frequency = rdfvalue.Duration.From(1, rdfvalue.DAYS)
+  lifetime = rdfvalue.Duration.From(20, rdfvalue.HOURS)
+
+  def Run(self):
+    batch_size = config.CONFIG["DataRetention.purge_batch_size"]
+
+    def DeleteFlowResults(cutoff_time):
+      return data_store.REL_DB.DeleteOldFlowResults(
+          cutoff_time, hunt_results=False, batch_size=batch_size)
+
+    def DeleteHuntResults(cutoff_time):
+      return data_store.REL_DB.DeleteOldFlowResults(
+          cutoff_time, hunt_results=True, batch_size=batch_size)
+
+    def DeleteFlowLogEntries(cutoff_time):
+      return data_store.REL_DB.DeleteOldFlowLogEntries(
+          cutoff_time, batch_size=batch_size)
+
+    def DeleteFlowRequests(cutoff_time):
+      return data_store.REL_DB.DeleteOldFlowRequests(
+          cutoff_time, batch_size=batch_size)
+
+    def DeleteHashBlobReferences(cutoff_time):
+      return data_store.REL_DB.DeleteUnreferencedHashBlobReferences(
+          cutoff_time, batch_size=batch_size)
+
+    policies = [
+        ("flow_results", "DataRetention.flow_results_ttl", DeleteFlowResults),
+        ("hunt_results", "DataRetention.hunt_results_ttl", DeleteHuntResults),
+        ("flow_log_entries", "DataRetention.flow_log_entries_ttl",
+         DeleteFlowLogEntries),
+        ("flow_requests", "DataRetention.flow_requests_ttl",
+         DeleteFlowRequests),
+        ("hash_blob_references", "DataRetention.hash_blob_references_ttl",
+         DeleteHashBlobReferences),
+    ]
+
+    total_count = 0
+    total_size = 0
+    for data_type, ttl_option, delete_fn in policies:
+      ttl = config.CONFIG[ttl_option]
+      if not ttl:
+        continue
+
+      if (data_type == "hash_blob_references" and
+          ttl < MIN_HASH_BLOB_REFERENCES_TTL):
+        logging.warning("Not deleting hash_blob_references: %s must be at "
+                        "least %s (got %s).", ttl_option,
+                        MIN_HASH_BLOB_REFERENCES_TTL, ttl)
+        self.Log("Skipped hash_blob_references: %s is shorter than %s",
+                 ttl_option, MIN_HASH_BLOB_REFERENCES_TTL)
+        continue
+
+      cutoff_time = rdfvalue.RDFDatetime.Now() - ttl
+      count, size = self._Purge(data_type, delete_fn(cutoff_time))
+      self.Log("Deleted %d %s rows (%d bytes) written before %s", count,
+               data_type, size, cutoff_time)
+      total_count += count
+      total_size += size
+
+    self.Log("Deleted %d rows (%d bytes) in total", total_count, total_size)
+
+  def _Purge(self, data_type, deleted_batches):
+    """Consumes an iterator of deleted batches, throttling the deletion."""
+    sleep_coefficient = config.CONFIG["DataRetention.purge_sleep_coefficient"]
+
+    count = 0
+    size = 0
+    batch_start_time = time.time()
+    # Every iteration deletes a single batch.
+    for deleted in deleted_batches:
+      count += deleted.count
+      size += deleted.size
+      DATA_RETENTION_DELETED_ROWS.Increment(deleted.count, fields=[data_type])
+      DATA_RETENTION_DELETED_BYTES.Increment(deleted.size, fields=[data_type])
+      self.HeartBeat()
+
+      if sleep_coefficient > 0:
+        time.sleep((time.time() - batch_start_time) * sleep_coefficient)
+      batch_start_time = time.time()
+
+    return count, size
@@ -10,12 +10,17 @@ from grr_response_core.lib.rdfvalues import stats as rdf_stats
 from grr_response_server import client_report_utils
 from grr_response_server import data_store
 from grr_response_server.databases import db
+from grr_response_server.databases import db_test_utils
 from grr_response_server.flows.cron import system
 from grr_response_server.rdfvalues import cronjobs as rdf_cronjobs
+from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
+from grr_response_server.rdfvalues import objects as rdf_objects
+from grr.test_lib import stats_test_lib
 from grr.test_lib import test_lib
 
 
-class SystemCronJobTest(test_lib.GRRBaseTest):
+class SystemCronJobTest(stats_test_lib.StatsTestMixin,
+                        test_lib.GRRBaseTest):
   """Test system cron jobs."""
 
   def setUp(self):
@@ -220,6 +225,75 @@ class SystemCronJobTest(test_lib.GRRBaseTest):
 
     self._CheckLastAccessStats()
 
+  def testDataRetentionDeletesOnlyExpiredData(self):
+    client_id = db_test_utils.InitializeClient(data_store.REL_DB)
+    flow_id = db_test_utils.InitializeFlow(data_store.REL_DB, client_id)
+    day = rdfvalue.Duration.From(1, rdfvalue.DAYS).ToInt(rdfvalue.SECONDS)
+
+    for t, message in [(1 * day, "old"), (3 * day, "new")]:
+      with test_lib.FakeTime(t):
+        data_store.REL_DB.WriteFlowLogEntry(
+            rdf_flow_objects.FlowLogEntry(
+                client_id=client_id, flow_id=flow_id, message=message))
+        data_store.REL_DB.WriteFlowResults([
+            rdf_flow_objects.FlowResult(
+                client_id=client_id,
+                flow_id=flow_id,
+                tag=message,
+                payload=rdf_client_stats.ClientStats())
+        ])
+
+    with test_lib.ConfigOverrider({
+        "DataRetention.flow_log_entries_ttl": rdfvalue.Duration.From(
+            2, rdfvalue.DAYS),
+        "DataRetention.purge_batch_size": 1,
+        "DataRetention.purge_sleep_coefficient": 0.0,
+    }):
+      with self.assertStatsCounterDelta(
+          1, system.DATA_RETENTION_DELETED_ROWS, fields=["flow_log_entries"]):
+        with test_lib.FakeTime(4 * day):
+          run = rdf_cronjobs.CronJobRun()
+          job = rdf_cronjobs.CronJob()
+          system.DataRetentionCronJob(run, job).Run()
+
+    entries = data_store.REL_DB.ReadFlowLogEntries(client_id, flow_id, 0, 10)
+    self.assertEqual([e.message for e in entries], ["new"])
+    # Flow results have no TTL configured, so they are retained.
+    results = data_store.REL_DB.ReadFlowResults(client_id, flow_id, 0, 10)
+    self.assertCountEqual([r.tag for r in results], ["old", "new"])
+
+  def testDataRetentionSkipsOnlyShortHashBlobReferencesTtl(self):
+    client_id = db_test_utils.InitializeClient(data_store.REL_DB)
+    flow_id = db_test_utils.InitializeFlow(data_store.REL_DB, client_id)
+    day = rdfvalue.Duration.From(1, rdfvalue.DAYS).ToInt(rdfvalue.SECONDS)
+    hash_id = rdf_objects.SHA256HashID(b"0a1b2c3d" * 4)
+    blob_ref = rdf_objects.BlobReference(
+        offset=0, size=42, blob_id=rdf_objects.BlobID(b"01234567" * 4))
+
+    with test_lib.FakeTime(1 * day):
+      data_store.REL_DB.WriteFlowLogEntry(
+          rdf_flow_objects.FlowLogEntry(
+              client_id=client_id, flow_id=flow_id, message="old"))
+      data_store.REL_DB.WriteHashBlobReferences({hash_id: [blob_ref]})
+
+    with test_lib.ConfigOverrider({
+        "DataRetention.flow_log_entries_ttl": rdfvalue.Duration.From(
+            2, rdfvalue.DAYS),
+        "DataRetention.hash_blob_references_ttl": rdfvalue.Duration.From(
+            1, rdfvalue.HOURS),
+        "DataRetention.purge_sleep_coefficient": 0.0,
+    }):
+      with test_lib.FakeTime(4 * day):
+        run = rdf_cronjobs.CronJobRun()
+        job = rdf_cronjobs.CronJob()
+        system.DataRetentionCronJob(run, job).Run()
+
+    self.assertEmpty(
+        data_store.REL_DB.ReadFlowLogEntries(client_id, flow_id, 0, 10))
+    self.assertEqual(
+        data_store.REL_DB.ReadHashBlobReferences([hash_id]),
+        {hash_id: [blob_ref]})
+
   def _RunPurgeClientStats(self):
     run = rdf_cronjobs.CronJobRun()
     job = rdf_cronjobs.CronJob()
@@ -184,6 +184,8 @@ class Interrogate(flow_base.FlowBase):
       args = artifact.KnowledgeBaseInitializationArgs()
       args.require_complete = False  # Not all dependencies are known yet.
       args.lightweight = self.args.lightweight
+      args.batched = config.CONFIG["Artifacts.knowledge_base_batched"]
+      args.max_age = config.CONFIG["Artifacts.knowledge_base_max_age"]
 
       self.CallFlow(
           flow_name=artifact.KnowledgeBaseInitializationFlow.__name__,
@@ -269,6 +271,8 @@ class Interrogate(flow_base.FlowBase):
           artifact.KnowledgeBaseInitializationFlow.__name__,
           require_complete=False,
           lightweight=self.args.lightweight,
+          batched=config.CONFIG["Artifacts.knowledge_base_batched"],
+          max_age=config.CONFIG["Artifacts.knowledge_base_max_age"],
           next_state=self.ProcessKnowledgeBase.__name__)
     else:
       self.Log("Unknown system type, skipping KnowledgeBaseInitializationFlow")
@@ -19,6 +19,7 @@ from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_core.lib.rdfvalues import paths as rdf_paths
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
 from grr_response_server import action_registry
+from grr_response_server import artifact
 from grr_response_server import artifact_registry
 from grr_response_server import client_index
 from grr_response_server import data_store
@@ -300,6 +301,34 @@ class TestClientInterrogate(acl_test_lib.AclTestMixin,
     self._CheckClientLibraries(client)
     self._CheckMemory(client)
 
+  def testInterrogatePassesKnowledgeBaseOptions(self):
+    client_id = self._SetupMinimalClient()
+    with vfs_test_lib.FakeTestDataVFSOverrider():
+      with test_lib.ConfigOverrider({
+          "Artifacts.knowledge_base": [],
+          "Artifacts.knowledge_base_batched": True,
+          "Artifacts.knowledge_base_max_age": rdfvalue.Duration("1d"),
+      }):
+        client_mock = action_mocks.InterrogatedClient()
+        client_mock.InitializeClient()
+
+        with test_lib.SuppressLogs():
+          flow_id = flow_test_lib.TestFlowHelper(
+              discovery.Interrogate.__name__,
+              client_mock,
+              creator=self.test_username,
+              client_id=client_id)
+
+    flow_objs = data_store.REL_DB.ReadAllFlowObjects(
+        client_id=client_id, parent_flow_id=flow_id)
+    kb_flow_objs = [
+        flow_obj for flow_obj in flow_objs if flow_obj.flow_class_name ==
+        artifact.KnowledgeBaseInitializationFlow.__name__
+    ]
+    self.assertLen(kb_flow_objs, 1)
+    self.assertTrue(kb_flow_objs[0].args.batched)
+    self.assertEqual(kb_flow_objs[0].args.max_age, rdfvalue.Duration("1d"))
+
   @parser_test_lib.WithAllParsers
   def testInterrogateWindows(self):
     """Test the Interrogate flow."""
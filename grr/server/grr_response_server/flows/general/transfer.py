@@ -1196,4 +1196,18 @@ class BlobHandler(message_handlers.MessageHandler):
 
       blobs.append(data)
 
-    data_store.BLOBS.WriteBlobsWithUnknownHashes(blobs)
+    if not data_store.BLOBS.has_fast_existence_checks:
+      data_store.BLOBS.WriteBlobsWithUnknownHashes(blobs)
+      return
+
+    # Clients often send blobs that are already present (e.g. contents of
+    # common system files), there is no need to write them again.
+    blobs_by_id = {
+        rdf_objects.BlobID.FromBlobData(data): data for data in blobs
+    }
+    existing_blobs = data_store.BLOBS.CheckBlobsExist(list(blobs_by_id))
+    data_store.BLOBS.WriteBlobs({
+        blob_id: data
+        for blob_id, data in blobs_by_id.items()
+        if not existing_blobs[blob_id]
+    })
@@ -17,6 +17,7 @@ from absl.testing import absltest
 from grr_response_core.lib import constants
 from grr_response_core.lib.rdfvalues import client as rdf_client
 from grr_response_core.lib.rdfvalues import paths as rdf_paths
+from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
 from grr_response_core.lib.util import temp
 from grr_response_server import blob_store
@@ -1387,6 +1388,58 @@ class GetFileThroughRRGTest(absltest.TestCase):
     # errors are raised.
 
 
+class BlobHandlerTest(test_lib.GRRBaseTest):
+
+  def _Request(self, data):
+    return rdf_objects.MessageHandlerRequest(
+        client_id="C.1000000000000000",
+        handler_name=transfer.BlobHandler.handler_name,
+        request_id=1,
+        request=rdf_protodict.DataBlob(
+            data=data,
+            compression=rdf_protodict.DataBlob.CompressionType.UNCOMPRESSED))
+
+  def testWritesBlobs(self):
+    handler = transfer.BlobHandler()
+    handler.ProcessMessages([self._Request(b"foo"), self._Request(b"bar")])
+
+    for data in [b"foo", b"bar"]:
+      blob_id = rdf_objects.BlobID.FromBlobData(data)
+      self.assertEqual(data_store.BLOBS.ReadBlob(blob_id), data)
+
+  def testDoesNotRewriteExistingBlobsIfExistenceChecksAreFast(self):
+    data_store.BLOBS.WriteBlobWithUnknownHash(b"foo")
+
+    with mock.patch.object(
+        blob_store.BlobStoreValidationWrapper,
+        "has_fast_existence_checks",
+        new_callable=mock.PropertyMock,
+        return_value=True):
+      with mock.patch.object(
+          data_store.BLOBS, "WriteBlobs",
+          wraps=data_store.BLOBS.WriteBlobs) as write_blobs_mock:
+        handler = transfer.BlobHandler()
+        handler.ProcessMessages([self._Request(b"foo"), self._Request(b"bar")])
+
+    write_blobs_mock.assert_called_once_with(
+        {rdf_objects.BlobID.FromBlobData(b"bar"): b"bar"})
+
+  def testDoesNotCheckExistingBlobsIfExistenceChecksAreSlow(self):
+    with mock.patch.object(
+        blob_store.BlobStoreValidationWrapper,
+        "has_fast_existence_checks",
+        new_callable=mock.PropertyMock,
+        return_value=False):
+      with mock.patch.object(
+          data_store.BLOBS, "CheckBlobsExist") as check_blobs_exist_mock:
+        handler = transfer.BlobHandler()
+        handler.ProcessMessages([self._Request(b"foo")])
+
+    check_blobs_exist_mock.assert_not_called()
+    blob_id = rdf_objects.BlobID.FromBlobData(b"foo")
+    self.assertEqual(data_store.BLOBS.ReadBlob(blob_id), b"foo")
+
+
 def main(argv):
   # Run the full test suite
   test_lib.main(argv)
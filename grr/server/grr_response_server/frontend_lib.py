@@ -1,8 +1,9 @@
 #!/usr/bin/env python
 """The GRR frontend server."""
 import logging
+import threading
 import time
-from typing import Optional, Sequence
+from typing import Iterable, List, Optional, Sequence
 
 from grr_response_core.lib import queues
 from grr_response_core.lib import rdfvalue
@@ -33,9 +34,160 @@ RRG_PARCEL_ACCEPT_ERRORS = metrics.Counter(
     fields=[("sink", str)],
 )
 
+FRONTEND_INGESTION_BATCH_SIZE = metrics.Event(
+    "frontend_ingestion_batch_size",
+    bins=[1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000])
+FRONTEND_INGESTION_BATCH_LATENCY = metrics.Event(
+    "frontend_ingestion_batch_latency",
+    bins=[0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5])
+
 FRONTEND_USERNAME = "GRRFrontEnd"
 
 
+class _IngestionEntry(object):
+  """Flow responses and message handler requests from a single caller."""
+
+  def __init__(
+      self,
+      flow_responses: List[rdf_flow_objects.FlowMessage],
+      message_handler_requests: List[rdf_objects.MessageHandlerRequest],
+  ) -> None:
+    self.flow_responses = flow_responses
+    self.message_handler_requests = message_handler_requests
+    self.error = None  # type: Optional[Exception]
+
+  @property
+  def size(self) -> int:
+    return len(self.flow_responses) + len(self.message_handler_requests)
+
+
+class _IngestionBatch(object):
+  """Entries that are written to the database together."""
+
+  def __init__(self) -> None:
+    self.entries = []  # type: List[_IngestionEntry]
+    self.size = 0
+    self.start_time = time.time()
+    # Set when the batch is full and shouldn't wait for more entries.
+    self.full = threading.Event()
+    # Set when the batch is written (or failed to be written).
+    self.done = threading.Event()
+
+
+class IngestionBatcher(object):
+  """Writes flow responses and message handler requests in batches.
+
+  Entries written concurrently, e.g. by frontend threads handling messages from
+  different clients, are grouped into batches. Each batch is written with a
+  single `WriteFlowResponses` and a single `WriteMessageHandlerRequests` call.
+
+  The caller that opens a batch waits for up to `max_latency` for more entries
+  and then writes the batch once the previous one is written. Entries arriving
+  in the meantime are added to the batch until it holds `max_batch_size`
+  responses and requests. `Write` returns only after the caller's entry has
+  been written, so messages are acknowledged only once they are stored.
+  """
+
+  def __init__(self, max_batch_size: int,
+               max_latency: rdfvalue.Duration) -> None:
+    self._max_batch_size = max_batch_size
+    self._max_latency = max_latency.ToFractional(rdfvalue.SECONDS)
+    self._lock = threading.Lock()
+    self._write_lock = threading.Lock()
+    self._batch = None  # type: Optional[_IngestionBatch]
+
+  def Write(
+      self,
+      flow_responses: Iterable[rdf_flow_objects.FlowMessage] = (),
+      message_handler_requests: Iterable[
+          rdf_objects.MessageHandlerRequest] = (),
+  ) -> None:
+    """Writes flow responses and message handler requests to the database.
+
+    Args:
+      flow_responses: Flow responses to write.
+      message_handler_requests: Message handler requests to write.
+
+    Raises:
+      Exception: The error raised by the database when writing the entry.
+    """
+    entry = _IngestionEntry(
+        list(flow_responses), list(message_handler_requests))
+    if not entry.size:
+      return
+
+    with self._lock:
+      batch = self._batch
+      opened_batch = batch is None
+      if opened_batch:
+        batch = self._batch = _IngestionBatch()
+
+      batch.entries.append(entry)
+      batch.size += entry.size
+      if batch.size >= self._max_batch_size:
+        self._batch = None
+        batch.full.set()
+
+    if opened_batch:
+      self._WriteBatch(batch)
+    else:
+      batch.done.wait()
+
+    if entry.error is not None:
+      raise entry.error
+
+  def _WriteBatch(self, batch: _IngestionBatch) -> None:
+    """Waits for the batch to fill up and writes it."""
+    if self._max_latency:
+      batch.full.wait(self._max_latency)
+
+    with self._write_lock:
+      with self._lock:
+        if self._batch is batch:
+          self._batch = None
+
+      try:
+        self._WriteEntries(batch.entries)
+      finally:
+        FRONTEND_INGESTION_BATCH_SIZE.RecordEvent(batch.size)
+        FRONTEND_INGESTION_BATCH_LATENCY.RecordEvent(time.time() -
+                                                     batch.start_time)
+        batch.done.set()
+
+  def _WriteEntries(self, entries: List[_IngestionEntry]) -> None:
+    """Writes entries, isolating the entries that fail to be written."""
+    try:
+      self._WriteEntriesUnchecked(entries)
+      return
+    except Exception as e:  # pylint: disable=broad-except
+      if len(entries) == 1:
+        entries[0].error = e
+        return
+      logging.exception(
+          "Failed to write a batch of %d ingested entries, retrying them one "
+          "by one.", len(entries))
+
+    # Only the callers whose entries can't be written get an error, so that
+    # messages from other clients are still acknowledged.
+    for entry in entries:
+      try:
+        self._WriteEntriesUnchecked([entry])
+      except Exception as e:  # pylint: disable=broad-except
+        entry.error = e
+
+  def _WriteEntriesUnchecked(self, entries: List[_IngestionEntry]) -> None:
+    flow_responses = []
+    message_handler_requests = []
+    for entry in entries:
+      flow_responses.extend(entry.flow_responses)
+      message_handler_requests.extend(entry.message_handler_requests)
+
+    if flow_responses:
+      data_store.REL_DB.WriteFlowResponses(flow_responses)
+    if message_handler_requests:
+      data_store.REL_DB.WriteMessageHandlerRequests(message_handler_requests)
+
+
 class FrontEndServer(object):
   """This is the front end server.
 
@@ -53,10 +205,14 @@ class FrontEndServer(object):
   def __init__(self,
                max_queue_size=50,
                message_expiry_time=120,
-               max_retransmission_time=10):
+               max_retransmission_time=10,
+               ingestion_batch_size=1000,
+               ingestion_batch_latency=rdfvalue.Duration(0)):
     self.message_expiry_time = message_expiry_time
     self.max_retransmission_time = max_retransmission_time
     self.max_queue_size = max_queue_size
+    self._ingestion_batcher = IngestionBatcher(ingestion_batch_size,
+                                               ingestion_batch_latency)
 
     # There is only a single session id that we accept unauthenticated
     # messages for, the one to enroll new clients.
@@ -164,36 +320,35 @@ class FrontEndServer(object):
       logging.info("Dropped %d unauthenticated messages for %s", dropped_count,
                    client_id)
 
-    if unprocessed_msgs:
-      flow_responses = []
-      for message in unprocessed_msgs:
-        try:
-          flow_responses.append(
-              rdf_flow_objects.FlowResponseForLegacyResponse(message))
-        except ValueError as e:
-          logging.warning("Failed to parse legacy FlowResponse:\n%s\n%s", e,
-                          message)
-
-      data_store.REL_DB.WriteFlowResponses(flow_responses)
-
-      for msg in unprocessed_msgs:
-        if msg.type == rdf_flows.GrrMessage.Type.STATUS:
-          stat = rdf_flows.GrrStatus(msg.payload)
-          if stat.status == rdf_flows.GrrStatus.ReturnedStatus.CLIENT_KILLED:
-            # A client crashed while performing an action, fire an event.
-            crash_details = rdf_client.ClientCrash(
-                client_id=client_id,
-                session_id=msg.session_id,
-                backtrace=stat.backtrace,
-                crash_message=stat.error_message,
-                nanny_status=stat.nanny_status,
-                timestamp=rdfvalue.RDFDatetime.Now())
-            events.Events.PublishEvent(
-                "ClientCrash", crash_details, username=FRONTEND_USERNAME)
-
-    if worker_message_handler_requests:
-      data_store.REL_DB.WriteMessageHandlerRequests(
-          worker_message_handler_requests)
+    flow_responses = []
+    for message in unprocessed_msgs:
+      try:
+        flow_responses.append(
+            rdf_flow_objects.FlowResponseForLegacyResponse(message))
+      except ValueError as e:
+        logging.warning("Failed to parse legacy FlowResponse:\n%s\n%s", e,
+                        message)
+
+    # Flow responses and worker message handler requests from many clients are
+    # written in batches.
+    self._ingestion_batcher.Write(
+        flow_responses=flow_responses,
+        message_handler_requests=worker_message_handler_requests)
+
+    for msg in unprocessed_msgs:
+      if msg.type == rdf_flows.GrrMessage.Type.STATUS:
+        stat = rdf_flows.GrrStatus(msg.payload)
+        if stat.status == rdf_flows.GrrStatus.ReturnedStatus.CLIENT_KILLED:
+          # A client crashed while performing an action, fire an event.
+          crash_details = rdf_client.ClientCrash(
+              client_id=client_id,
+              session_id=msg.session_id,
+              backtrace=stat.backtrace,
+              crash_message=stat.error_message,
+              nanny_status=stat.nanny_status,
+              timestamp=rdfvalue.RDFDatetime.Now())
+          events.Events.PublishEvent(
+              "ClientCrash", crash_details, username=FRONTEND_USERNAME)
 
     if frontend_message_handler_requests:
       worker_lib.ProcessMessageHandlerRequests(
@@ -254,7 +409,7 @@ class FrontEndServer(object):
     flow_response.flow_id = f"{response.flow_id:016X}"
     flow_response.request_id = response.request_id
     flow_response.response_id = response.response_id
-    data_store.REL_DB.WriteFlowResponses([flow_response])
+    self._ingestion_batcher.Write(flow_responses=[flow_response])
 
   def ReceiveRRGParcel(
       self,
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 """Tests for frontend server, client communicator, and the GRRHTTPClient."""
 
+import threading
 from unittest import mock
 import zlib
 
@@ -23,6 +24,7 @@ from grr_response_server.rdfvalues import objects as rdf_objects
 from grr_response_server.sinks import test_lib as sinks_test_lib
 from grr.test_lib import db_test_lib
 from grr.test_lib import flow_test_lib
+from grr.test_lib import stats_test_lib
 from grr.test_lib import test_lib
 from grr_response_proto import rrg_pb2
 
@@ -348,6 +350,115 @@ class FrontEndServerTest(absltest.TestCase):
       self.server.ReceiveRRGParcel("C.1234567890ABCDEF", parcel)
 
 
+class IngestionBatcherTest(stats_test_lib.StatsTestMixin, absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.db = mock.MagicMock()
+    patcher = mock.patch.object(data_store, "REL_DB", self.db)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def _Response(self, client_id):
+    return rdf_flow_objects.FlowResponse(
+        client_id=client_id, flow_id="12345678", request_id=1, response_id=1)
+
+  def _WriteConcurrently(self, batcher, client_ids):
+    errors = {}
+
+    def Write(client_id):
+      try:
+        batcher.Write(flow_responses=[self._Response(client_id)])
+      except Exception as e:  # pylint: disable=broad-except
+        errors[client_id] = e
+
+    threads = [
+        threading.Thread(target=Write, args=(client_id,))
+        for client_id in client_ids
+    ]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    return errors
+
+  def _WrittenClientIds(self, call):
+    return sorted(response.client_id for response in call[0][0])
+
+  def testWritesEntriesFromConcurrentCallersInOneBatch(self):
+    batcher = frontend_lib.IngestionBatcher(
+        max_batch_size=3,
+        max_latency=rdfvalue.Duration.From(1, rdfvalue.MINUTES))
+    client_ids = ["C.1000000000000001", "C.1000000000000002",
+                  "C.1000000000000003"]
+
+    errors = self._WriteConcurrently(batcher, client_ids)
+
+    self.assertEmpty(errors)
+    self.db.WriteFlowResponses.assert_called_once()
+    self.assertEqual(
+        self._WrittenClientIds(self.db.WriteFlowResponses.call_args),
+        client_ids)
+    self.db.WriteMessageHandlerRequests.assert_not_called()
+
+  def testWritesImmediatelyWithoutLatency(self):
+    batcher = frontend_lib.IngestionBatcher(
+        max_batch_size=1000, max_latency=rdfvalue.Duration(0))
+    request = rdf_objects.MessageHandlerRequest(
+        client_id="C.1000000000000001", handler_name="Foo", request_id=1)
+
+    batcher.Write(
+        flow_responses=[self._Response("C.1000000000000001")],
+        message_handler_requests=[request])
+
+    self.db.WriteFlowResponses.assert_called_once()
+    self.db.WriteMessageHandlerRequests.assert_called_once_with([request])
+
+  def testDoesNotWriteEmptyEntries(self):
+    batcher = frontend_lib.IngestionBatcher(
+        max_batch_size=1000, max_latency=rdfvalue.Duration(0))
+
+    batcher.Write()
+
+    self.db.WriteFlowResponses.assert_not_called()
+    self.db.WriteMessageHandlerRequests.assert_not_called()
+
+  def testFailsOnlyCallersWhoseEntriesCanNotBeWritten(self):
+    bad_client_id = "C.1000000000000002"
+
+    def WriteFlowResponses(responses):
+      if any(response.client_id == bad_client_id for response in responses):
+        raise abstract_db.UnknownClientError(bad_client_id)
+
+    self.db.WriteFlowResponses.side_effect = WriteFlowResponses
+    batcher = frontend_lib.IngestionBatcher(
+        max_batch_size=3,
+        max_latency=rdfvalue.Duration.From(1, rdfvalue.MINUTES))
+    client_ids = ["C.1000000000000001", bad_client_id, "C.1000000000000003"]
+
+    errors = self._WriteConcurrently(batcher, client_ids)
+
+    self.assertEqual(list(errors), [bad_client_id])
+    self.assertIsInstance(errors[bad_client_id], abstract_db.UnknownClientError)
+    # The failed batch is retried entry by entry.
+    self.assertLen(self.db.WriteFlowResponses.call_args_list, 4)
+    self.assertEqual(
+        sorted(
+            self._WrittenClientIds(call)
+            for call in self.db.WriteFlowResponses.call_args_list[1:]),
+        [[client_id] for client_id in client_ids])
+
+  def testRecordsBatchMetrics(self):
+    batcher = frontend_lib.IngestionBatcher(
+        max_batch_size=1000, max_latency=rdfvalue.Duration(0))
+
+    with self.assertStatsCounterDelta(
+        1, frontend_lib.FRONTEND_INGESTION_BATCH_SIZE):
+      with self.assertStatsCounterDelta(
+          1, frontend_lib.FRONTEND_INGESTION_BATCH_LATENCY):
+        batcher.Write(flow_responses=[self._Response("C.1000000000000001")])
+
+
 def main(args):
   test_lib.main(args)
 
@@ -79,3 +79,41 @@ class ApiCallHandler:
   def Handle(self, args, context=None):
     """Handles request and returns an RDFValue of result_type."""
     raise NotImplementedError()
+
+  def HandleStream(self, args, context=None):
+    """Handles request and yields items of the result one by one.
+
+    This is only implemented by handlers returning lists of items (i.e. having
+    a result_type with an `items` field). It makes it possible to stream the
+    items to the user in bounded memory, instead of building the whole result
+    object upfront.
+
+    Args:
+      args: Handler arguments (an RDFValue of args_type).
+      context: API call context.
+
+    Yields:
+      RDFValues of the type of result_type's `items` field.
+    """
+    raise NotImplementedError()
+
+  def CountItems(self, args, context=None):
+    """Counts all items of the result, ignoring the offset and count args.
+
+    This is used as the `total_count` of results which items are streamed
+    with HandleStream().
+
+    Args:
+      args: Handler arguments (an RDFValue of args_type).
+      context: API call context.
+
+    Returns:
+      The number of items or None if it is not known.
+    """
+    del args, context  # Unused.
+    return None
+
+  @property
+  def supports_items_streaming(self):
+    """Whether HandleStream() is implemented by this handler."""
+    return type(self).HandleStream is not ApiCallHandler.HandleStream
@@ -93,3 +93,43 @@ def FilterList(l, offset, count=0, filter_value=None):
         break
 
   return items
+
+
+def GenerateItemsInPages(read_fn, offset=0, count=0, page_size=1000):
+  """Reads items in pages of bounded size and yields them one by one.
+
+  Args:
+    read_fn: A function accepting offset and count arguments and returning a
+      list of at most `count` items starting at `offset`.
+    offset: An offset of the first item to yield.
+    count: A maximum number of items to yield. 0 means no limit.
+    page_size: A maximum number of items to read with a single read_fn call.
+
+  Yields:
+    Items returned by read_fn.
+
+  Raises:
+    ValueError: if offset or count are negative or page_size is not positive.
+  """
+  if offset < 0:
+    raise ValueError("Offset needs to be greater than or equal to zero")
+
+  if count < 0:
+    raise ValueError("Count needs to be greater than or equal to zero")
+
+  if page_size <= 0:
+    raise ValueError("Page size needs to be greater than zero")
+
+  yielded = 0
+  while not count or yielded < count:
+    to_read = page_size
+    if count:
+      to_read = min(to_read, count - yielded)
+
+    page = read_fn(offset + yielded, to_read)
+    for item in page:
+      yield item
+
+    yielded += len(page)
+    if len(page) < to_read:
+      break
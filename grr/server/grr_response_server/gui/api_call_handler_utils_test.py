@@ -45,6 +45,53 @@ class FilterListTest(test_lib.GRRBaseTest):
     self.assertEqual(data[0].path, "/var/os/tmp-8")
 
 
+class GenerateItemsInPagesTest(test_lib.GRRBaseTest):
+  """Test for GenerateItemsInPages."""
+
+  def setUp(self):
+    super().setUp()
+
+    self.items = list(range(10))
+    self.reads = []
+
+  def _Read(self, offset, count):
+    self.reads.append((offset, count))
+    return self.items[offset:offset + count]
+
+  def testYieldsAllItemsInPages(self):
+    items = api_call_handler_utils.GenerateItemsInPages(self._Read, page_size=4)
+
+    self.assertEqual(list(items), self.items)
+    self.assertEqual(self.reads, [(0, 4), (4, 4), (8, 4)])
+
+  def testDoesNotReadEagerly(self):
+    items = api_call_handler_utils.GenerateItemsInPages(self._Read, page_size=4)
+
+    self.assertEqual(next(items), 0)
+    self.assertEqual(self.reads, [(0, 4)])
+
+  def testReadsEmptyPageWhenItemsCountIsPageSizeMultiple(self):
+    items = api_call_handler_utils.GenerateItemsInPages(self._Read, page_size=5)
+
+    self.assertEqual(list(items), self.items)
+    self.assertEqual(self.reads, [(0, 5), (5, 5), (10, 5)])
+
+  def testRespectsOffsetAndCount(self):
+    items = api_call_handler_utils.GenerateItemsInPages(
+        self._Read, offset=3, count=5, page_size=4)
+
+    self.assertEqual(list(items), [3, 4, 5, 6, 7])
+    self.assertEqual(self.reads, [(3, 4), (7, 1)])
+
+  def testRaisesOnNegativeOffset(self):
+    with self.assertRaises(ValueError):
+      list(api_call_handler_utils.GenerateItemsInPages(self._Read, offset=-1))
+
+  def testRaisesOnNegativeCount(self):
+    with self.assertRaises(ValueError):
+      list(api_call_handler_utils.GenerateItemsInPages(self._Read, count=-1))
+
+
 def main(argv):
   test_lib.main(argv)
 
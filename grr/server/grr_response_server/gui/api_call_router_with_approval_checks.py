@@ -4,8 +4,8 @@
 from typing import Optional, Text
 
 from grr_response_core.lib import registry
-from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
+from grr_response_core.lib.util import cache
 from grr_response_core.lib.util import precondition
 from grr_response_core.stats import metrics
 from grr_response_proto import api_call_router_pb2
@@ -62,8 +62,11 @@ class AccessChecker(object):
     for g in params.restricted_flow_groups:
       self._restricted_flow_group_manager.AuthorizeGroup(g, self._AUTH_SUBJECT)
 
-    self.acl_cache = utils.AgeBasedCache(
-        max_size=10000, max_age=self.APPROVAL_CACHE_TIME)
+    self.acl_cache = cache.LRUCache(
+        "approvals",
+        max_size=10000,
+        max_age=self.APPROVAL_CACHE_TIME,
+        refresh_on_access=False)
 
   def _CheckAccess(self, username, subject_id, approval_type):
     """Checks access to a given subject by a given user."""
@@ -156,6 +156,23 @@ class ApiClientLibFlowTest(api_integration_test_lib.ApiIntegrationTest):
     self.assertLen(results, 1)
     self.assertEqual(process.AsPrimitiveProto(), results[0].payload)
 
+  def testListResultsStreamsAllResults(self):
+    client_id = self.SetupClient(0)
+    flow_id = flow_test_lib.StartFlow(
+        processes.ListProcesses,
+        client_id=client_id,
+        creator=self.test_username)
+
+    # More results than fit in a single page of the API client.
+    payloads = [rdf_client.Process(pid=i) for i in range(120)]
+    flow_test_lib.AddResultsToFlow(client_id, flow_id, payloads)
+
+    result_flow = self.api.Client(client_id=client_id).Flow(flow_id)
+    results = result_flow.ListResults()
+
+    self.assertEqual(results.total_count, 120)
+    self.assertEqual([r.payload.pid for r in results], list(range(120)))
+
   def testListParsedFlowResults(self):
     client_id = self.SetupClient(0)
     flow_id = "4815162342ABCDEF"
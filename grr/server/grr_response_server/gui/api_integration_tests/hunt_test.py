@@ -113,6 +113,22 @@ class ApiClientLibHuntTest(
       self.assertEqual(r.timestamp, 42000000)
       self.assertEqual(r.payload.stat_entry.pathspec.path, "/tmp/evil.txt")
 
+  def testListResultsWithSelectedFields(self):
+    self.client_ids = self.SetupClients(5)
+    hunt_id = self.StartHunt()
+    self.RunHunt(failrate=-1)
+
+    h = self.api.Hunt(hunt_id).Get()
+    results = list(
+        h.ListResults(
+            with_type="FileFinderResult", fields=["stat_entry.pathspec.path"]))
+
+    self.assertLen(results, 5)
+    for r in results:
+      self.assertEqual(r.payload.stat_entry.pathspec.path, "/tmp/evil.txt")
+      self.assertFalse(r.payload.stat_entry.HasField("st_size"))
+      self.assertFalse(r.payload.HasField("hash_entry"))
+
   def testListLogsWithoutClientIds(self):
     hunt_id = self.StartHunt()
 
@@ -132,7 +148,10 @@ class ApiClientLibHuntTest(
             hunt_id=hunt_id,
             message="Sample message: bar."))
 
-    logs = list(self.api.Hunt(hunt_id).ListLogs())
+    logs = self.api.Hunt(hunt_id).ListLogs()
+    self.assertEqual(logs.total_count, 2)
+
+    logs = list(logs)
     self.assertLen(logs, 2)
 
     self.assertEqual(logs[0].data.log_message, "Sample message: foo.")
@@ -212,7 +231,10 @@ class ApiClientLibHuntTest(
     clients = list(h.ListClients(h.CLIENT_STATUS_STARTED))
     self.assertLen(clients, 5)
 
-    clients = list(h.ListClients(h.CLIENT_STATUS_OUTSTANDING))
+    clients = h.ListClients(h.CLIENT_STATUS_OUTSTANDING)
+    self.assertEqual(clients.total_count, 4)
+
+    clients = list(clients)
     self.assertLen(clients, 4)
 
     clients = list(h.ListClients(h.CLIENT_STATUS_COMPLETED))
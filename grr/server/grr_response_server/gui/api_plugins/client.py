@@ -760,7 +760,8 @@ class ApiGetClientLoadStatsHandler(api_call_handler_base.ApiCallHandler):
     stat_values = data_store.REL_DB.ReadClientStats(
         client_id=str(args.client_id),
         min_timestamp=start_time,
-        max_timestamp=end_time)
+        max_timestamp=end_time,
+        max_samples=self.MAX_SAMPLES)
     points = []
     for stat_value in reversed(stat_values):
       if args.metric == args.Metric.CPU_PERCENT:
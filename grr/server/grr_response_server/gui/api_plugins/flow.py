@@ -457,25 +457,46 @@ class ApiListFlowResultsHandler(api_call_handler_base.ApiCallHandler):
         with_tag=args.with_tag or None,
         with_type=args.with_type or None)
 
+    total_count = self.CountItems(args, context=context)
+
+    wrapped_items = [ApiFlowResult().InitFromFlowResult(r) for r in results]
+
+    return ApiListFlowResultsResult(
+        items=wrapped_items, total_count=total_count)
+
+  def CountItems(self, args, context=None):
     if args.filter:
       # TODO: with_substring is implemented in a hacky way,
       #   searching for a string in the serialized protobuf bytes. We decided
       #   to omit the same hacky implementation in CountFlowResults. Until
       #   CountFlowResults implements the same, or we generally improve this
       #   string search, total_count will be unset if `filter` is specified.
-      total_count = None
-    else:
-      total_count = data_store.REL_DB.CountFlowResults(
-          str(args.client_id),
-          str(args.flow_id),
-          # TODO: Add with_substring to CountFlowResults().
+      return None
+
+    return data_store.REL_DB.CountFlowResults(
+        str(args.client_id),
+        str(args.flow_id),
+        # TODO: Add with_substring to CountFlowResults().
+        with_tag=args.with_tag or None,
+        with_type=args.with_type or None)
+
+  def HandleStream(self, args, context=None):
+    client_id = str(args.client_id)
+    flow_id = str(args.flow_id)
+
+    def ReadPage(offset, count):
+      return data_store.REL_DB.ReadFlowResults(
+          client_id,
+          flow_id,
+          offset,
+          count,
+          with_substring=args.filter or None,
           with_tag=args.with_tag or None,
           with_type=args.with_type or None)
 
-    wrapped_items = [ApiFlowResult().InitFromFlowResult(r) for r in results]
-
-    return ApiListFlowResultsResult(
-        items=wrapped_items, total_count=total_count)
+    for r in api_call_handler_utils.GenerateItemsInPages(
+        ReadPage, offset=args.offset, count=args.count):
+      yield ApiFlowResult().InitFromFlowResult(r)
 
 
 class ApiListParsedFlowResultsArgs(rdf_structs.RDFProtoStruct):
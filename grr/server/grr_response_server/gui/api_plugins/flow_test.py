@@ -427,6 +427,31 @@ class ApiListFlowResultsHandlerTest(test_lib.GRRBaseTest):
     self.assertEqual(result.items[0].tag, "tag:foo")
     self.assertEqual(result.items[1].tag, "tag:bar")
 
+  def testStreamsResults(self):
+    items = list(
+        self.handler.HandleStream(
+            flow_plugin.ApiListFlowResultsArgs(
+                client_id=self.client_id, flow_id=self.flow_id)))
+    self.assertLen(items, 2)
+    self.assertEqual(items[0].tag, "tag:foo")
+    self.assertEqual(items[1].tag, "tag:bar")
+
+  def testStreamsResultsFilteredByTag(self):
+    items = list(
+        self.handler.HandleStream(
+            flow_plugin.ApiListFlowResultsArgs(
+                client_id=self.client_id, flow_id=self.flow_id,
+                with_tag="tag:bar")))
+    self.assertLen(items, 1)
+    self.assertEqual(items[0].tag, "tag:bar")
+
+  def testCountsItemsFilteredByTag(self):
+    self.assertEqual(
+        self.handler.CountItems(
+            flow_plugin.ApiListFlowResultsArgs(
+                client_id=self.client_id, flow_id=self.flow_id,
+                with_tag="tag:bar")), 1)
+
   def testCorrectlyFiltersByTag(self):
     foo_result = self.handler.Handle(
         flow_plugin.ApiListFlowResultsArgs(
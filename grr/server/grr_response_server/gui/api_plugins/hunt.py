@@ -9,6 +9,8 @@ from typing import Iterator
 from typing import Optional
 from typing import Tuple
 
+from google.protobuf import field_mask_pb2
+
 from grr_response_core import config
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import registry
@@ -645,22 +647,80 @@ class ApiListHuntResultsHandler(api_call_handler_base.ApiCallHandler):
   args_type = ApiListHuntResultsArgs
   result_type = ApiListHuntResultsResult
 
+  def _GetFieldMask(self, args):
+    """Returns a mask of payload fields to keep, None to keep all fields."""
+    if not args.fields:
+      return None
+
+    if not args.with_type:
+      raise ValueError("Payload fields can only be selected for results of "
+                       "a single type, with_type has to be set.")
+
+    payload_cls = rdfvalue.RDFValue.classes.get(args.with_type)
+    if (payload_cls is None or
+        not issubclass(payload_cls, rdf_structs.RDFProtoStruct)):
+      raise ValueError("Can't select fields of payloads of type %s." %
+                       args.with_type)
+
+    paths = [path.strip() for path in args.fields.split(",")]
+    field_mask = field_mask_pb2.FieldMask(paths=paths)
+    if not field_mask.IsValidForDescriptor(payload_cls.protobuf.DESCRIPTOR):
+      raise ValueError("Invalid fields of %s: %s." %
+                       (args.with_type, args.fields))
+
+    return field_mask
+
+  def _ToApiHuntResult(self, flow_result, field_mask):
+    result = ApiHuntResult().InitFromFlowResult(flow_result)
+    if field_mask is not None:
+      payload = flow_result.payload
+      projected = payload.protobuf()
+      field_mask.MergeMessage(payload.AsPrimitiveProto(), projected)
+      result.payload = payload.__class__.FromSerializedBytes(
+          projected.SerializeToString())
+    return result
+
   def Handle(self, args, context=None):
+    field_mask = self._GetFieldMask(args)
+
     results = data_store.REL_DB.ReadHuntResults(
         str(args.hunt_id),
         args.offset,
         args.count or db.MAX_COUNT,
         with_substring=args.filter or None,
         with_type=args.with_type or None,
+        with_tag=args.with_tag or None,
     )
 
-    total_count = data_store.REL_DB.CountHuntResults(
-        str(args.hunt_id), with_type=args.with_type or None)
+    total_count = self.CountItems(args, context=context)
 
     return ApiListHuntResultsResult(
-        items=[ApiHuntResult().InitFromFlowResult(r) for r in results],
+        items=[self._ToApiHuntResult(r, field_mask) for r in results],
         total_count=total_count)
 
+  def CountItems(self, args, context=None):
+    return data_store.REL_DB.CountHuntResults(
+        str(args.hunt_id),
+        with_type=args.with_type or None,
+        with_tag=args.with_tag or None)
+
+  def HandleStream(self, args, context=None):
+    hunt_id = str(args.hunt_id)
+    field_mask = self._GetFieldMask(args)
+
+    def ReadPage(offset, count):
+      return data_store.REL_DB.ReadHuntResults(
+          hunt_id,
+          offset,
+          count,
+          with_substring=args.filter or None,
+          with_type=args.with_type or None,
+          with_tag=args.with_tag or None)
+
+    for r in api_call_handler_utils.GenerateItemsInPages(
+        ReadPage, offset=args.offset, count=args.count):
+      yield self._ToApiHuntResult(r, field_mask)
+
 
 class ApiListHuntCrashesArgs(rdf_structs.RDFProtoStruct):
   protobuf = hunt_pb2.ApiListHuntCrashesArgs
@@ -752,8 +812,7 @@ class ApiListHuntOutputPluginsHandler(api_call_handler_base.ApiCallHandler):
     used_names = collections.Counter()
     result = []
     try:
-      plugin_states = data_store.REL_DB.ReadHuntOutputPluginsStates(
-          str(args.hunt_id))
+      plugin_states = hunt.ReadHuntOutputPluginsStates(str(args.hunt_id))
     except db.UnknownHuntError:
       raise HuntNotFoundError("Hunt with id %s could not be found" %
                               str(args.hunt_id))
@@ -898,12 +957,26 @@ class ApiListHuntLogsHandler(api_call_handler_base.ApiCallHandler):
         args.count or db.MAX_COUNT,
         with_substring=args.filter or None)
 
-    total_count = data_store.REL_DB.CountHuntLogEntries(str(args.hunt_id))
+    total_count = self.CountItems(args, context=context)
 
     return ApiListHuntLogsResult(
         items=[ApiHuntLog().InitFromFlowLogEntry(r) for r in results],
         total_count=total_count)
 
+  def CountItems(self, args, context=None):
+    return data_store.REL_DB.CountHuntLogEntries(str(args.hunt_id))
+
+  def HandleStream(self, args, context=None):
+    hunt_id = str(args.hunt_id)
+
+    def ReadPage(offset, count):
+      return data_store.REL_DB.ReadHuntLogEntries(
+          hunt_id, offset, count, with_substring=args.filter or None)
+
+    for r in api_call_handler_utils.GenerateItemsInPages(
+        ReadPage, offset=args.offset, count=args.count):
+      yield ApiHuntLog().InitFromFlowLogEntry(r)
+
 
 class ApiListHuntErrorsArgs(rdf_structs.RDFProtoStruct):
   protobuf = hunt_pb2.ApiListHuntErrorsArgs
@@ -1321,17 +1394,19 @@ class ApiListHuntClientsHandler(api_call_handler_base.ApiCallHandler):
   args_type = ApiListHuntClientsArgs
   result_type = ApiListHuntClientsResult
 
-  def Handle(self, args, context=None):
-    hunt_id = str(args.hunt_id)
-
-    filter_condition = db.HuntFlowsCondition.UNSET
+  def _GetFilterCondition(self, args):
     if args.client_status == args.ClientStatus.OUTSTANDING:
-      filter_condition = db.HuntFlowsCondition.FLOWS_IN_PROGRESS_ONLY
+      return db.HuntFlowsCondition.FLOWS_IN_PROGRESS_ONLY
     elif args.client_status == args.ClientStatus.COMPLETED:
-      filter_condition = db.HuntFlowsCondition.COMPLETED_FLOWS_ONLY
+      return db.HuntFlowsCondition.COMPLETED_FLOWS_ONLY
+    else:
+      return db.HuntFlowsCondition.UNSET
 
-    total_count = data_store.REL_DB.CountHuntFlows(
-        hunt_id, filter_condition=filter_condition)
+  def Handle(self, args, context=None):
+    hunt_id = str(args.hunt_id)
+    filter_condition = self._GetFilterCondition(args)
+
+    total_count = self.CountItems(args, context=context)
     hunt_flows = data_store.REL_DB.ReadHuntFlows(
         hunt_id,
         args.offset,
@@ -1344,6 +1419,22 @@ class ApiListHuntClientsHandler(api_call_handler_base.ApiCallHandler):
 
     return ApiListHuntClientsResult(items=results, total_count=total_count)
 
+  def CountItems(self, args, context=None):
+    return data_store.REL_DB.CountHuntFlows(
+        str(args.hunt_id), filter_condition=self._GetFilterCondition(args))
+
+  def HandleStream(self, args, context=None):
+    hunt_id = str(args.hunt_id)
+    filter_condition = self._GetFilterCondition(args)
+
+    def ReadPage(offset, count):
+      return data_store.REL_DB.ReadHuntFlows(
+          hunt_id, offset, count, filter_condition=filter_condition)
+
+    for hf in api_call_handler_utils.GenerateItemsInPages(
+        ReadPage, offset=args.offset, count=args.count):
+      yield ApiHuntClient(client_id=hf.client_id, flow_id=hf.flow_id)
+
 
 class ApiGetHuntContextArgs(rdf_structs.RDFProtoStruct):
   protobuf = hunt_pb2.ApiGetHuntContextArgs
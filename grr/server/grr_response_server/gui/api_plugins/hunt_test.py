@@ -12,8 +12,10 @@ import yaml
 
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
+from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
 from grr_response_core.lib.rdfvalues import file_finder as rdf_file_finder
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
+from grr_response_core.lib.rdfvalues import paths as rdf_paths
 from grr_response_core.lib.rdfvalues import test_base as rdf_test_base
 from grr_response_server import data_store
 from grr_response_server import hunt
@@ -24,6 +26,7 @@ from grr_response_server.gui import api_call_context
 from grr_response_server.gui import api_test_lib
 from grr_response_server.gui.api_plugins import hunt as hunt_plugin
 from grr_response_server.output_plugins import test_plugins
+from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
 from grr_response_server.rdfvalues import flow_runner as rdf_flow_runner
 from grr_response_server.rdfvalues import hunt_objects as rdf_hunt_objects
 from grr_response_server.rdfvalues import output_plugin as rdf_output_plugin
@@ -575,6 +578,87 @@ class ApiListHuntResultsHandlerTest(api_test_lib.ApiCallHandlerTest,
                           [rdf_file_finder.FileFinderResult.__name__] * 3)
     self.assertEqual(result.total_count, 5)
 
+  def testReturnsResultsWithTag(self):
+    hunt_id = self._RunHuntWithResults(
+        client_count=2, results=[rdf_file_finder.FileFinderResult()])
+    data_store.REL_DB.WriteFlowResults([
+        rdf_flow_objects.FlowResult(
+            client_id=self.client_ids[0],
+            flow_id=hunt_id,
+            hunt_id=hunt_id,
+            tag="foo",
+            payload=rdf_file_finder.FileFinderResult())
+    ])
+
+    result = self.handler.Handle(
+        hunt_plugin.ApiListHuntResultsArgs(hunt_id=hunt_id, with_tag="foo"),
+        context=self.context)
+
+    self.assertLen(result.items, 1)
+    self.assertEqual(result.items[0].client_id, self.client_ids[0])
+    self.assertEqual(result.total_count, 1)
+
+  def _RunHuntWithFileFinderResults(self):
+    return self._RunHuntWithResults(
+        client_count=3,
+        results=[
+            rdf_file_finder.FileFinderResult(
+                stat_entry=rdf_client_fs.StatEntry(
+                    pathspec=rdf_paths.PathSpec.OS(path="/foo/bar"),
+                    st_size=42)),
+            rdf_file_finder.CollectFilesByKnownPathResult(),
+        ],
+    )
+
+  def testReturnsSelectedPayloadFields(self):
+    hunt_id = self._RunHuntWithFileFinderResults()
+    result = self.handler.Handle(
+        hunt_plugin.ApiListHuntResultsArgs(
+            hunt_id=hunt_id,
+            with_type=rdf_file_finder.FileFinderResult.__name__,
+            fields="stat_entry.st_size"),
+        context=self.context)
+
+    self.assertLen(result.items, 3)
+    for item in result.items:
+      self.assertEqual(
+          item.payload,
+          rdf_file_finder.FileFinderResult(
+              stat_entry=rdf_client_fs.StatEntry(st_size=42)))
+
+  def testStreamsSelectedPayloadFields(self):
+    hunt_id = self._RunHuntWithFileFinderResults()
+    items = list(
+        self.handler.HandleStream(
+            hunt_plugin.ApiListHuntResultsArgs(
+                hunt_id=hunt_id,
+                with_type=rdf_file_finder.FileFinderResult.__name__,
+                fields="stat_entry.pathspec.path"),
+            context=self.context))
+
+    self.assertCountEqual([i.client_id for i in items], self.client_ids)
+    for item in items:
+      self.assertEqual(item.payload.stat_entry.pathspec.path, "/foo/bar")
+      self.assertFalse(item.payload.stat_entry.HasField("st_size"))
+
+  def testRaisesWhenFieldsAreSelectedWithoutType(self):
+    hunt_id = self._RunHuntWithFileFinderResults()
+    with self.assertRaises(ValueError):
+      self.handler.Handle(
+          hunt_plugin.ApiListHuntResultsArgs(
+              hunt_id=hunt_id, fields="stat_entry.st_size"),
+          context=self.context)
+
+  def testRaisesOnUnknownFields(self):
+    hunt_id = self._RunHuntWithFileFinderResults()
+    with self.assertRaises(ValueError):
+      self.handler.Handle(
+          hunt_plugin.ApiListHuntResultsArgs(
+              hunt_id=hunt_id,
+              with_type=rdf_file_finder.FileFinderResult.__name__,
+              fields="stat_entry.st_size,stat_entry.foo"),
+          context=self.context)
+
 
 class ApiCountHuntResultsHandlerTest(api_test_lib.ApiCallHandlerTest,
                                      hunt_test_lib.StandardHuntTestMixin):
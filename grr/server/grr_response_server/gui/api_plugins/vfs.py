@@ -8,6 +8,7 @@ import re
 from typing import Collection
 from typing import Dict
 from typing import Iterator
+from typing import List
 from typing import Optional
 from typing import Set
 from typing import Tuple
@@ -548,13 +549,21 @@ class ApiBrowseFilesystemHandler(api_call_handler_base.ApiCallHandler):
     }
 
     if args.include_directory_tree:
-      all_components = self._GetDirectoryTree(last_components)
+      all_components = list(self._GetDirectoryTree(last_components))
     else:
       all_components = [last_components]
 
+    # All the directories are listed with a single database call.
+    child_path_infos = data_store.REL_DB.MultiListChildPathInfos(
+        client_id=client_id,
+        paths=[(path_type, components)
+               for components in all_components
+               for path_type in path_types_to_query],
+        timestamp=args.timestamp)
+
     for cur_components in all_components:
       path_types_to_query, children = self._ListDirectory(
-          client_id, path_types_to_query, cur_components, args.timestamp)
+          path_types_to_query, cur_components, child_path_infos)
 
       if children is None:
         # When the current directory was not found, stop querying because
@@ -587,25 +596,22 @@ class ApiBrowseFilesystemHandler(api_call_handler_base.ApiCallHandler):
         path_infos[pi.basename] = pi
 
   def _ListDirectory(
-      self, client_id: str,
-      path_types: Collection["rdf_objects.PathInfo.PathType"],
-      components: Collection[str], timestamp: rdfvalue.RDFDatetime
+      self, path_types: Collection["rdf_objects.PathInfo.PathType"],
+      components: Collection[str],
+      child_path_infos: Dict[Tuple["rdf_objects.PathInfo.PathType",
+                                   Tuple[str, ...]],
+                             Optional[List[rdf_objects.PathInfo]]]
   ) -> Tuple[Set["rdf_objects.PathInfo.PathType"],
              Optional[Collection[ApiFile]]]:
     path_infos = {}
     existing_path_types = set(path_types)
 
     for path_type in path_types:
-      try:
-        cur_path_infos = data_store.REL_DB.ListChildPathInfos(
-            client_id=client_id,
-            path_type=path_type,
-            components=components,
-            timestamp=timestamp)
-      except (db.UnknownPathError, db.NotDirectoryPathError):
+      cur_path_infos = child_path_infos[(path_type, tuple(components))]
+      if cur_path_infos is None:
         # Whenever a directory cannot be found with a given PathType, we remove
         # this PathType from the list of existing PathTypes to not wastefully
-        # try to load children of a folder whose parent is known to not exist.
+        # look at children of a folder whose parent is known to not exist.
         existing_path_types.remove(path_type)
         continue
 
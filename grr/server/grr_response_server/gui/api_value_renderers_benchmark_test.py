@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Benchmarks for rendering API results into JSON-compatible data."""
+
+from absl import app
+
+from grr_response_core.lib import rdfvalue
+from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
+from grr_response_core.lib.rdfvalues import paths as rdf_paths
+from grr_response_server.gui import http_api
+from grr_response_server.gui.api_plugins import flow as api_flow
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import test_lib
+
+
+class ApiValueRenderersBenchmark(benchmark_test_lib.AverageMicroBenchmarks):
+  """Benchmarks for rendering big ApiListFlowResultsResult payloads."""
+
+  REPEATS = 5
+  units = "ms"
+
+  NUM_RESULTS = 10000
+
+  def setUp(self):
+    super().setUp()
+
+    items = []
+    for i in range(self.NUM_RESULTS):
+      stat_entry = rdf_client_fs.StatEntry(
+          pathspec=rdf_paths.PathSpec.OS(path=f"/foo/bar/{i}"),
+          st_size=i,
+          st_mode=0o100644,
+          st_mtime=rdfvalue.RDFDatetimeSeconds(1000000 + i))
+      items.append(
+          api_flow.ApiFlowResult(
+              payload_type=stat_entry.__class__.__name__,
+              payload=stat_entry,
+              timestamp=rdfvalue.RDFDatetime(1000000 + i)))
+
+    self.result = api_flow.ApiListFlowResultsResult(
+        items=items, total_count=len(items))
+    # Make sure that serialized payloads are cached and are not affecting the
+    # measurements.
+    self.result.SerializeToBytes()
+
+    self.handler = http_api.HttpRequestHandler(router_matcher=object())
+
+  def _TimeFormatMode(self, name, format_mode):
+
+    def Format():
+      self.handler._FormatResultAsJson(self.result, format_mode=format_mode)  # pylint: disable=protected-access
+
+    self.TimeIt(Format, name=f"{name} ({self.NUM_RESULTS} results)")
+
+  def testGrrJsonMode(self):
+    self._TimeFormatMode("GRR JSON", http_api.JsonMode.GRR_JSON_MODE)
+
+  def testGrrTypeStrippedJsonMode(self):
+    self._TimeFormatMode("GRR type stripped JSON",
+                         http_api.JsonMode.GRR_TYPE_STRIPPED_JSON_MODE)
+
+  def testGrrRootTypesStrippedJsonMode(self):
+    self._TimeFormatMode("GRR root types stripped JSON",
+                         http_api.JsonMode.GRR_ROOT_TYPES_STRIPPED_JSON_MODE)
+
+  def testProto3JsonMode(self):
+    self._TimeFormatMode("Proto3 JSON", http_api.JsonMode.PROTO3_JSON_MODE)
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
@@ -6,6 +6,7 @@ import base64
 from absl import app
 from absl.testing import absltest
 
+from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import client as rdf_client
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
@@ -62,6 +63,44 @@ class ApiAnyValueRendererTest(absltest.TestCase):
         })
 
 
+class ApiValueRendererTest(absltest.TestCase):
+
+  def testGetRendererForValueOrClassReturnsSameRendererForSameClass(self):
+    renderer = api_value_renderers.ApiValueRenderer.GetRendererForValueOrClass(
+        rdf_client.User(username="foo"))
+    other_renderer = (
+        api_value_renderers.ApiValueRenderer.GetRendererForValueOrClass(
+            rdf_client.User))
+
+    self.assertIsInstance(renderer,
+                          api_value_renderers.ApiRDFProtoStructRenderer)
+    self.assertIs(renderer, other_renderer)
+
+  def testGetRendererForValueOrClassRespectsListsLimit(self):
+    renderer = api_value_renderers.ApiValueRenderer.GetRendererForValueOrClass(
+        [], limit_lists=1)
+    other_renderer = (
+        api_value_renderers.ApiValueRenderer.GetRendererForValueOrClass(
+            [], limit_lists=2))
+
+    self.assertEqual(renderer.limit_lists, 1)
+    self.assertEqual(other_renderer.limit_lists, 2)
+
+  def testGetRendererForValueOrClassDistinguishesClassesWithSameName(self):
+    rdf_string_renderer = (
+        api_value_renderers.ApiValueRenderer.GetRendererForValueOrClass(
+            rdfvalue.RDFString))
+    self.assertIsInstance(rdf_string_renderer,
+                          api_value_renderers.ApiRDFStringRenderer)
+
+    # A plain string subclass that happens to share the name with RDFString.
+    str_cls = type("RDFString", (str,), {})
+    str_renderer = (
+        api_value_renderers.ApiValueRenderer.GetRendererForValueOrClass(
+            str_cls))
+    self.assertIsInstance(str_renderer, api_value_renderers.ApiStringRenderer)
+
+
 class ApiRDFProtoStructRendererTest(test_lib.GRRBaseTest):
   """Test for ApiRDFProtoStructRenderer."""
 
@@ -131,6 +170,17 @@ class ApiRDFProtoStructRendererTest(test_lib.GRRBaseTest):
         })
 
 
+  def testRendersFieldsInDeclarationOrder(self):
+    sample = ApiRDFProtoStructRendererSample()
+    sample.values = ["foo"]
+    sample.index = 42
+
+    renderer = api_value_renderers.ApiRDFProtoStructRenderer()
+    data = renderer.RenderValue(sample)
+
+    self.assertEqual(list(data["value"]), ["index", "values"])
+
+
 class ApiGrrMessageRendererTest(test_lib.GRRBaseTest):
   """Test for ApiGrrMessageRenderer."""
 
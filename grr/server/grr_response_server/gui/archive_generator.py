@@ -11,6 +11,7 @@ import yaml
 
 from grr_response_core.lib import utils
 from grr_response_core.lib.util import collection
+from grr_response_core.stats import metrics
 from grr_response_server import data_store
 from grr_response_server import file_store
 from grr_response_server import flow_base
@@ -20,6 +21,11 @@ from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
 from grr_response_server.rdfvalues import objects as rdf_objects
 
 
+ARCHIVED_FILES = metrics.Counter("archive_generator_archived_files")
+ARCHIVED_BYTES = metrics.Counter(
+    "archive_generator_archived_bytes", units="BYTES")
+
+
 def _ClientPathToString(client_path, prefix=""):
   """Returns a path-like String of client_path with optional prefix."""
   return os.path.join(prefix, client_path.client_id, client_path.vfs_path)
@@ -46,6 +52,10 @@ class CollectionArchiveGenerator(object):
       "# blobs in the data store to archive.\n").encode("utf-8")
 
   BATCH_SIZE = 1000
+  # Number of threads reading upcoming files' blobs while the current file is
+  # being compressed and the memory budget for the read-ahead data.
+  PREFETCH_THREADS = 4
+  PREFETCH_BYTES = file_store.STREAM_CHUNKS_PREFETCH_BYTES
 
   def __init__(self,
                archive_format=ZIP,
@@ -162,7 +172,9 @@ class CollectionArchiveGenerator(object):
     client_ids = set()
     for item_batch in collection.Batch(items, self.BATCH_SIZE):
 
-      client_paths = set()
+      # Client paths are kept in collection order, so that the archive
+      # contents don't depend on set iteration order.
+      client_paths = {}
       for item in item_batch:
         try:
           client_path = flow_export.CollectionItemToClientPath(
@@ -176,14 +188,17 @@ class CollectionArchiveGenerator(object):
           continue
 
         client_ids.add(client_path.client_id)
-        client_paths.add(client_path)
+        client_paths[client_path] = None
 
-      for chunk in file_store.StreamFilesChunks(client_paths):
+      for chunk in file_store.StreamFilesChunks(
+          list(client_paths),
+          num_prefetch_threads=self.PREFETCH_THREADS,
+          max_prefetch_bytes=self.PREFETCH_BYTES):
         self.processed_files.add(chunk.client_path)
         for output in self._WriteFileChunk(chunk=chunk):
           yield output
 
-      self.processed_files |= client_paths - (
+      self.processed_files |= client_paths.keys() - (
           self.ignored_files | self.archived_files)
 
     if client_ids:
@@ -214,16 +229,20 @@ class CollectionArchiveGenerator(object):
       yield self.archive_generator.WriteFileHeader(target_path, st=st)
 
     yield self.archive_generator.WriteFileChunk(chunk.data)
+    ARCHIVED_BYTES.Increment(len(chunk.data))
 
     if chunk.chunk_index == chunk.total_chunks - 1:
       yield self.archive_generator.WriteFileFooter()
       self.archived_files.add(chunk.client_path)
+      ARCHIVED_FILES.Increment()
 
 
 class FlowArchiveGenerator:
   """Archive generator for new-style flows that provide custom file mappings."""
 
   BATCH_SIZE = 1000
+  PREFETCH_THREADS = CollectionArchiveGenerator.PREFETCH_THREADS
+  PREFETCH_BYTES = CollectionArchiveGenerator.PREFETCH_BYTES
 
   def __init__(self, flow: rdf_flow_objects.Flow,
                archive_format: ArchiveFormat):
@@ -284,9 +303,11 @@ class FlowArchiveGenerator:
       yield self.archive_generator.WriteFileHeader(target_path, st=st)
 
     yield self.archive_generator.WriteFileChunk(chunk.data)
+    ARCHIVED_BYTES.Increment(len(chunk.data))
 
     if chunk.chunk_index == chunk.total_chunks - 1:
       self.num_archived_files += 1
+      ARCHIVED_FILES.Increment()
       yield self.archive_generator.WriteFileFooter()
 
   def Generate(
@@ -313,7 +334,9 @@ class FlowArchiveGenerator:
 
       processed_in_batch = set()
       for chunk in file_store.StreamFilesChunks(
-          [m.client_path for m in mappings_batch]):
+          [m.client_path for m in mappings_batch],
+          num_prefetch_threads=self.PREFETCH_THREADS,
+          max_prefetch_bytes=self.PREFETCH_BYTES):
         processed_in_batch.add(chunk.client_path.path_id)
         processed_files[chunk.client_path.vfs_path] = archive_paths_by_id[
             chunk.client_path.path_id]
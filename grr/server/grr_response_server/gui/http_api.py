@@ -21,6 +21,7 @@ from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import serialization
 from grr_response_core.lib import utils
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
+from grr_response_core.lib.util import cache
 from grr_response_core.lib.util import precondition
 from grr_response_core.stats import metrics
 from grr_response_server import access_control
@@ -42,6 +43,15 @@ API_METHOD_LATENCY = metrics.Event("api_method_latency", fields=_FIELDS)
 API_ACCESS_PROBE_LATENCY = metrics.Event(
     "api_access_probe_latency", fields=_FIELDS)
 
+# Query parameter used to request list results to be streamed item by item
+# (see HttpRequestHandler._BuildItemsStreamingResponse).
+STREAM_ITEMS_PARAM = "stream_items"
+# Header set on responses that stream list results item by item.
+STREAM_ITEMS_HEADER = "X-GRR-Stream-Items"
+
+# Items are accumulated into chunks of roughly this size before being sent.
+_STREAM_ITEMS_CHUNK_SIZE = 64 * 1024
+
 
 class Error(Exception):
   pass
@@ -75,7 +85,7 @@ class RouterMatcher(object):
   """Matches requests to routers (and caches them)."""
 
   def __init__(self):
-    self._routing_maps_cache = utils.FastStore()
+    self._routing_maps_cache = cache.LRUCache("api_routing_maps")
 
   def _BuildHttpRoutingMap(self, router_cls):
     """Builds a werkzeug routing map out of a given router class."""
@@ -277,9 +287,10 @@ class HttpRequestHandler(object):
       return dict(status="OK")
 
     if format_mode == JsonMode.PROTO3_JSON_MODE:
-      json_data = json_format.MessageToJson(
+      # Converting straight to a dict avoids a costly JSON string round trip:
+      # the result gets serialized into JSON in _BuildResponse anyway.
+      return json_format.MessageToDict(
           result.AsPrimitiveProto(), float_precision=8)
-      return json.loads(json_data)
     elif format_mode == JsonMode.GRR_ROOT_TYPES_STRIPPED_JSON_MODE:
       result_dict = {}
       for field, value in result.ListSetFields():
@@ -299,6 +310,20 @@ class HttpRequestHandler(object):
     else:
       raise ValueError("Invalid format_mode: %s" % format_mode)
 
+  def _FormatItemAsJson(self, item, format_mode=None):
+    """Renders a single list item for streaming responses."""
+    if format_mode == JsonMode.PROTO3_JSON_MODE:
+      return json_format.MessageToDict(
+          item.AsPrimitiveProto(), float_precision=8)
+    elif format_mode == JsonMode.GRR_TYPE_STRIPPED_JSON_MODE:
+      rendered_data = api_value_renderers.RenderValue(item)
+      return api_value_renderers.StripTypeInfo(rendered_data)
+    elif format_mode in (JsonMode.GRR_JSON_MODE,
+                         JsonMode.GRR_ROOT_TYPES_STRIPPED_JSON_MODE):
+      return api_value_renderers.RenderValue(item)
+    else:
+      raise ValueError("Invalid format_mode: %s" % format_mode)
+
   @staticmethod
   def CallApiHandler(handler, args, context=None):
     """Handles API call to a given handler with given args and context."""
@@ -329,17 +354,8 @@ class HttpRequestHandler(object):
                      no_audit_log=False):
     """Builds HttpResponse object from rendered data and HTTP status."""
 
-    # To avoid IE content sniffing problems, escape the tags. Otherwise somebody
-    # may send a link with malicious payload that will be opened in IE (which
-    # does content sniffing and doesn't respect Content-Disposition header) and
-    # IE will treat the document as html and execute arbitrary JS that was
-    # passed with the payload.
-    str_data = json.dumps(
-        rendered_data, cls=JSONEncoderWithRDFPrimitivesSupport
-    )
     # XSSI protection and tags escaping
-    rendered_str = ")]}'\n" + str_data.replace("<", r"\u003c").replace(
-        ">", r"\u003e")
+    rendered_str = ")]}'\n" + _DumpJson(rendered_data)
 
     response = http_response.HttpResponse(
         rendered_str,
@@ -400,6 +416,102 @@ class HttpRequestHandler(object):
 
     return response
 
+  def _BuildItemsStreamingResponse(self,
+                                   items,
+                                   format_mode,
+                                   total_count=None,
+                                   method_name=None,
+                                   no_audit_log=False,
+                                   context=None):
+    """Builds HttpResponse object streaming list items in bounded memory.
+
+    The body of the response is a JSON object with an "items" field and, if
+    it is known, a "total_count" field. The total count is sent before the
+    items and every item is rendered on a separate line, so that clients can
+    parse items one by one while the response is being received:
+
+      )]}'
+      {"total_count": 2, "items": [
+      {...}
+      ,{...}
+      ]}
+
+    Args:
+      items: An iterable of RDFValues to stream.
+      format_mode: JSON format mode used to render every item.
+      total_count: The total number of items of the result (ignoring the
+        offset and count arguments) or None if it is not known.
+      method_name: Name of the API method that produced the items.
+      no_audit_log: If True, the response is not going to be audit-logged.
+      context: API call context.
+
+    Returns:
+      HttpResponse object.
+    """
+    items = iter(items)
+
+    # Similarly to _BuildStreamingResponse, we get the first item upfront, so
+    # that errors happening during the first read are reported with a proper
+    # HTTP status code.
+    try:
+      first_item = next(items)
+      items = itertools.chain([first_item], items)
+    except StopIteration:
+      pass
+
+    if total_count is None:
+      header = "{\"items\": [\n"
+    else:
+      header = "{\"total_count\": %d, \"items\": [\n" % total_count
+
+    def Generate():
+      chunk = [")]}'\n" + header]
+      chunk_size = 0
+
+      try:
+        for index, item in enumerate(items):
+          rendered_item = self._FormatItemAsJson(item, format_mode=format_mode)
+          line = _DumpJson(rendered_item)
+          if index:
+            line = "," + line
+
+          chunk.append(line + "\n")
+          chunk_size += len(line)
+          if chunk_size >= _STREAM_ITEMS_CHUNK_SIZE:
+            yield "".join(chunk).encode("utf-8")
+            chunk = []
+            chunk_size = 0
+      except Exception as e:  # pylint: disable=broad-except
+        # The status has been sent already, so the only thing we can do is to
+        # end the response prematurely: clients detect truncated streams by
+        # the missing closing bracket.
+        logging.exception("Error while streaming items of %s: %s",
+                          method_name, e)
+        if chunk:
+          yield "".join(chunk).encode("utf-8")
+        return
+
+      chunk.append("]}\n")
+      yield "".join(chunk).encode("utf-8")
+
+    response = http_response.HttpResponse(
+        response=Generate(),
+        content_type="application/json; charset=utf-8",
+        context=context)
+    response.headers[
+        "Content-Disposition"] = "attachment; filename=response.json"
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers[STREAM_ITEMS_HEADER] = "1"
+
+    if method_name:
+      response.headers["X-API-Method"] = method_name
+    if no_audit_log:
+      response.headers["X-No-Log"] = "True"
+    if context:
+      response.headers["X-API-User"] = context.username
+
+    return response
+
   def HandleRequest(self, request):
     """Handles given HTTP request."""
     impersonated_username = config.CONFIG["AdminUI.debug_impersonate_user"]
@@ -504,6 +616,18 @@ class HttpRequestHandler(object):
         binary_stream = handler.Handle(args, context=context)
         return self._BuildStreamingResponse(
             binary_stream, method_name=method_metadata.name, context=context)
+      elif (request.args.get(STREAM_ITEMS_PARAM) and
+            handler.supports_items_streaming):
+        format_mode = GetRequestFormatMode(request, method_metadata)
+        total_count = handler.CountItems(args, context=context)
+        items = handler.HandleStream(args, context=context)
+        return self._BuildItemsStreamingResponse(
+            items,
+            format_mode,
+            total_count=total_count,
+            method_name=method_metadata.name,
+            no_audit_log=method_metadata.no_audit_log_required,
+            context=context)
       else:
         format_mode = GetRequestFormatMode(request, method_metadata)
         result = self.CallApiHandler(handler, args, context=context)
@@ -629,6 +753,17 @@ def _GetRequestOrigin(request):
     return "unknown"
 
 
+def _DumpJson(rendered_data) -> str:
+  """Dumps rendered data into a JSON string with HTML tags escaped."""
+  # To avoid IE content sniffing problems, escape the tags. Otherwise somebody
+  # may send a link with malicious payload that will be opened in IE (which
+  # does content sniffing and doesn't respect Content-Disposition header) and
+  # IE will treat the document as html and execute arbitrary JS that was
+  # passed with the payload.
+  str_data = json.dumps(rendered_data, cls=JSONEncoderWithRDFPrimitivesSupport)
+  return str_data.replace("<", r"\u003c").replace(">", r"\u003e")
+
+
 _V = TypeVar("_V", bound=rdfvalue.RDFValue)
 
 
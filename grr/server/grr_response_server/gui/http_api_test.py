@@ -18,6 +18,7 @@ from grr_response_server.gui import api_call_router
 from grr_response_server.gui import api_call_router_registry
 from grr_response_server.gui import api_test_lib
 from grr_response_server.gui import http_api
+from grr_response_server.gui.api_plugins import hunt as api_hunt
 from grr.test_lib import stats_test_lib
 from grr.test_lib import test_lib
 
@@ -47,6 +48,34 @@ class SampleStreamingHandler(api_call_handler_base.ApiCallHandler):
         "test.ext", content_generator=self._Generate(), content_length=1337)
 
 
+class SampleListHandler(api_call_handler_base.ApiCallHandler):
+
+  args_type = api_hunt.ApiListHuntClientsArgs
+  result_type = api_hunt.ApiListHuntClientsResult
+
+  def _GenerateItems(self, args):
+    for i in range(args.count or 3):
+      yield api_hunt.ApiHuntClient(
+          client_id="C.%016X" % i, flow_id="%08X" % i)
+
+  def Handle(self, args, context=None):
+    items = list(self._GenerateItems(args))
+    return api_hunt.ApiListHuntClientsResult(
+        items=items, total_count=len(items))
+
+  def CountItems(self, args, context=None):
+    return len(list(self._GenerateItems(args)))
+
+  def HandleStream(self, args, context=None):
+    return self._GenerateItems(args)
+
+
+class SampleRaisingListHandler(SampleListHandler):
+
+  def HandleStream(self, args, context=None):
+    raise RuntimeError("Some error")
+
+
 class SampleDeleteHandlerArgs(rdf_structs.RDFProtoStruct):
   protobuf = tests_pb2.SampleDeleteHandlerArgs
 
@@ -101,6 +130,18 @@ class TestHttpApiRouter(api_call_router.ApiCallRouter):
   def SampleStreamingGet(self, args, context=None):
     return SampleStreamingHandler()
 
+  @api_call_router.Http("GET", "/test_sample_list")
+  @api_call_router.ArgsType(api_hunt.ApiListHuntClientsArgs)
+  @api_call_router.ResultType(api_hunt.ApiListHuntClientsResult)
+  def SampleList(self, args, context=None):
+    return SampleListHandler()
+
+  @api_call_router.Http("GET", "/test_sample_list/raising")
+  @api_call_router.ArgsType(api_hunt.ApiListHuntClientsArgs)
+  @api_call_router.ResultType(api_hunt.ApiListHuntClientsResult)
+  def SampleRaisingList(self, args, context=None):
+    return SampleRaisingListHandler()
+
   @api_call_router.Http("DELETE", "/test_resource/<resource_id>")
   @api_call_router.ArgsType(SampleDeleteHandlerArgs)
   @api_call_router.ResultType(SampleDeleteHandlerResult)
@@ -319,6 +360,154 @@ class HttpRequestHandlerTest(test_lib.GRRBaseTest,
 
     self.assertEqual(response.headers["Content-Length"], "1337")
 
+  def testListIsNotStreamedByDefault(self):
+    response = self._RenderResponse(
+        self._CreateRequest(
+            "GET",
+            "/test_sample_list",
+            query_parameters={"strip_type_info": "1"}))
+
+    self.assertNotIn(http_api.STREAM_ITEMS_HEADER, response.headers)
+    self.assertEqual(
+        self._GetResponseContent(response), {
+            "items": [
+                {
+                    "client_id": "C.0000000000000000",
+                    "flow_id": "00000000"
+                },
+                {
+                    "client_id": "C.0000000000000001",
+                    "flow_id": "00000001"
+                },
+                {
+                    "client_id": "C.0000000000000002",
+                    "flow_id": "00000002"
+                },
+            ],
+            "total_count": 3,
+        })
+
+  def testListItemsAreStreamedWhenRequested(self):
+    response = self._RenderResponse(
+        self._CreateRequest(
+            "GET",
+            "/test_sample_list",
+            query_parameters={
+                http_api.STREAM_ITEMS_PARAM: "1",
+                "strip_type_info": "1",
+            }))
+
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(response.headers[http_api.STREAM_ITEMS_HEADER], "1")
+    self.assertEqual(
+        self._GetResponseContent(response), {
+            "items": [
+                {
+                    "client_id": "C.0000000000000000",
+                    "flow_id": "00000000"
+                },
+                {
+                    "client_id": "C.0000000000000001",
+                    "flow_id": "00000001"
+                },
+                {
+                    "client_id": "C.0000000000000002",
+                    "flow_id": "00000002"
+                },
+            ],
+            "total_count": 3,
+        })
+
+  def testStreamedListItemsAreRenderedOnSeparateLines(self):
+    response = self._RenderResponse(
+        self._CreateRequest(
+            "GET",
+            "/test_sample_list",
+            query_parameters={
+                http_api.STREAM_ITEMS_PARAM: "1",
+                "strip_type_info": "1",
+            }))
+
+    lines = response.get_data(as_text=True).splitlines()
+    self.assertEqual(lines[0], ")]}'")
+    self.assertEqual(lines[1], "{\"total_count\": 3, \"items\": [")
+    self.assertEqual(
+        json.loads(lines[2]), {
+            "client_id": "C.0000000000000000",
+            "flow_id": "00000000"
+        })
+    self.assertEqual(
+        json.loads(lines[3].lstrip(",")), {
+            "client_id": "C.0000000000000001",
+            "flow_id": "00000001"
+        })
+    self.assertEqual(lines[-1], "]}")
+
+  def testEmptyListIsStreamedCorrectly(self):
+    with mock.patch.object(
+        SampleListHandler, "_GenerateItems", return_value=iter([])):
+      response = self._RenderResponse(
+          self._CreateRequest(
+              "GET",
+              "/test_sample_list",
+              query_parameters={
+                http_api.STREAM_ITEMS_PARAM: "1",
+                "strip_type_info": "1",
+            }))
+
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(
+        self._GetResponseContent(response), {
+            "items": [],
+            "total_count": 0
+        })
+
+  def testTotalCountIsOmittedFromStreamedListIfUnknown(self):
+    with mock.patch.object(SampleListHandler, "CountItems", return_value=None):
+      response = self._RenderResponse(
+          self._CreateRequest(
+              "GET",
+              "/test_sample_list",
+              query_parameters={
+                  http_api.STREAM_ITEMS_PARAM: "1",
+                  "strip_type_info": "1",
+              }))
+
+    self.assertEqual(response.status_code, 200)
+    self.assertNotIn("total_count", self._GetResponseContent(response))
+
+  def testStreamingErrorBeforeFirstItemIsReportedAsServerError(self):
+    response = self._RenderResponse(
+        self._CreateRequest(
+            "GET",
+            "/test_sample_list/raising",
+            query_parameters={
+                http_api.STREAM_ITEMS_PARAM: "1",
+                "strip_type_info": "1",
+            }))
+
+    self.assertEqual(response.status_code, 500)
+    self.assertEqual(self._GetResponseContent(response)["message"],
+                     "Some error")
+
+  def testStreamingIsIgnoredForHandlersNotSupportingIt(self):
+    response = self._RenderResponse(
+        self._CreateRequest(
+            "GET",
+            "/test_sample/some/path",
+            query_parameters={
+                http_api.STREAM_ITEMS_PARAM: "1",
+                "strip_type_info": "1",
+            }))
+
+    self.assertNotIn(http_api.STREAM_ITEMS_HEADER, response.headers)
+    self.assertEqual(
+        self._GetResponseContent(response), {
+            "method": "GET",
+            "path": "some/path",
+            "foo": ""
+        })
+
   def testQueryParamsArePassedIntoHandlerArgs(self):
     response = self._RenderResponse(
         self._CreateRequest(
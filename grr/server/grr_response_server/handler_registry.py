@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 """A registry of all new style well known flows."""
 
+from grr_response_server import flow_base
 from grr_response_server import foreman
 from grr_response_server.flows.general import administrative
 from grr_response_server.flows.general import transfer
@@ -10,6 +11,7 @@ message_handlers = [
     administrative.ClientStartupHandler,
     administrative.ClientStatsHandler,
     administrative.NannyMessageHandler,
+    flow_base.OutputPluginDeliveryHandler,
     foreman.ForemanMessageHandler,
     transfer.BlobHandler,
 ]
@@ -1,18 +1,25 @@
 #!/usr/bin/env python
 """REL_DB implementation of hunts."""
 
+from typing import Sequence
+
+from grr_response_core import config
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import registry
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
 from grr_response_core.lib.util import cache
 from grr_response_core.lib.util import precondition
+from grr_response_core.lib.util import random
 from grr_response_server import access_control
 from grr_response_server import data_store
 from grr_response_server import flow
 from grr_response_server import foreman_rules
 from grr_response_server import notification
+from grr_response_server import output_plugin
+from grr_response_server.rdfvalues import flow_runner as rdf_flow_runner
 from grr_response_server.rdfvalues import hunt_objects as rdf_hunt_objects
 from grr_response_server.rdfvalues import objects as rdf_objects
+from grr_response_server.rdfvalues import output_plugin as rdf_output_plugin
 
 MIN_CLIENTS_FOR_AVERAGE_THRESHOLDS = 1000
 
@@ -84,6 +91,79 @@ def HuntURNFromID(hunt_id):
   return rdfvalue.RDFURN("aff4:/hunts/H:%s" % hunt_id)
 
 
+# Output plugins of a hunt can't be changed after the hunt is created, so
+# workers processing results of many flows of a hunt read them only once.
+_OUTPUT_PLUGINS_CACHE = cache.LRUCache(
+    "hunt_output_plugins", max_size=1000, max_age=60)
+
+
+def GetHuntOutputPlugins(
+    hunt_id: str) -> Sequence[rdf_output_plugin.OutputPluginDescriptor]:
+  """Returns the (cached) output plugin descriptors of a given hunt."""
+  return _OUTPUT_PLUGINS_CACHE.GetOrLoad(
+      hunt_id,
+      lambda: list(data_store.REL_DB.ReadHuntObject(hunt_id).output_plugins))
+
+
+def ReadHuntOutputPluginsStates(
+    hunt_id: str) -> Sequence[rdf_flow_runner.OutputPluginState]:
+  """Reads output plugin states of a given hunt with their shards merged."""
+  states = data_store.REL_DB.ReadHuntOutputPluginsStates(hunt_id)
+  if not any(s.plugin_descriptor.GetPluginClass().shardable_state
+             for s in states):
+    return states
+
+  shards = data_store.REL_DB.ReadHuntOutputPluginStateShards(hunt_id)
+  for index, state_shards in shards.items():
+    state = states[index]
+    state.plugin_descriptor.GetPluginClass().MergeStateShards(
+        state.plugin_state, state_shards)
+  return states
+
+
+def UpdateHuntOutputPluginState(
+    hunt_id: str,
+    state_index: int,
+    plugin: output_plugin.OutputPlugin,
+    state: rdf_flow_runner.OutputPluginState,
+) -> None:
+  """Stores state changes of a plugin that processed a batch of results.
+
+  Args:
+    hunt_id: Id of the hunt.
+    state_index: Index of the plugin's state in the hunt's states list.
+    plugin: The plugin that processed the results.
+    state: The state the plugin processed the results with, as returned by
+      ReadHuntOutputPluginsStates.
+  """
+  # Only do the REL_DB call if the plugin state has actually changed.
+  s = state.plugin_state.Copy()
+  plugin.UpdateState(s)
+  if s == state.plugin_state:
+    return
+
+  num_shards = config.CONFIG["OutputPlugins.state_shards"]
+  if not plugin.shardable_state or num_shards <= 1:
+
+    def UpdateFn(plugin_state):
+      plugin.UpdateState(plugin_state)
+      return plugin_state
+
+    data_store.REL_DB.UpdateHuntOutputPluginState(hunt_id, state_index,
+                                                  UpdateFn)
+    return
+
+  def UpdateShardFn(shard):
+    if shard is None:
+      shard = plugin.CreateStateShard(state.plugin_state)
+    plugin.UpdateState(shard)
+    return shard
+
+  data_store.REL_DB.UpdateHuntOutputPluginStateShard(
+      hunt_id, state_index,
+      random.UInt32() % num_shards, UpdateShardFn)
+
+
 def StopHuntIfCrashLimitExceeded(hunt_id):
   """Stops the hunt if number of crashes exceeds the limit."""
   hunt_obj = data_store.REL_DB.ReadHuntObject(hunt_id)
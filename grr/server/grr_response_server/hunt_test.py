@@ -19,6 +19,7 @@ from grr_response_server import flow_base
 from grr_response_server import foreman
 from grr_response_server import foreman_rules
 from grr_response_server import hunt
+from grr_response_server import worker_lib
 from grr_response_server.flows.general import file_finder
 from grr_response_server.flows.general import processes
 from grr_response_server.flows.general import transfer
@@ -471,6 +472,35 @@ class HuntTest(stats_test_lib.StatsTestMixin,
     self.assertListEqual(hunt_test_lib.StatefulDummyHuntOutputPlugin.data,
                          [0, 1, 2, 3, 4])
 
+  def testOutputPluginsMaintainGlobalStateInShards(self):
+    hunt_test_lib.StatefulDummyHuntOutputPlugin.data = []
+    plugin_descriptor = rdf_output_plugin.OutputPluginDescriptor(
+        plugin_name="StatefulDummyHuntOutputPlugin")
+
+    with mock.patch.object(hunt_test_lib.StatefulDummyHuntOutputPlugin,
+                           "shardable_state", True):
+      with test_lib.ConfigOverrider({"OutputPlugins.state_shards": 3}):
+        hunt_id, _ = self._CreateAndRunHunt(
+            num_clients=5,
+            client_mock=hunt_test_lib.SampleHuntMock(failrate=-1),
+            client_rule_set=foreman_rules.ForemanClientRuleSet(),
+            client_rate=0,
+            args=self.ClientFileFinderHuntArgs(),
+            output_plugins=[plugin_descriptor],
+        )
+
+      # Every update is written to a shard, but reads see them all.
+      self.assertListEqual(hunt_test_lib.StatefulDummyHuntOutputPlugin.data,
+                           [0, 1, 2, 3, 4])
+
+      states = data_store.REL_DB.ReadHuntOutputPluginsStates(hunt_id)
+      self.assertEqual(states[0].plugin_state.index, 0)
+      shards = data_store.REL_DB.ReadHuntOutputPluginStateShards(hunt_id)
+      self.assertEqual(sum(s.index for s in shards[0]), 5)
+
+      states = hunt.ReadHuntOutputPluginsStates(hunt_id)
+      self.assertEqual(states[0].plugin_state.index, 5)
+
   def testOutputPluginFlushErrorIsLoggedProperly(self):
     plugin_descriptor = rdf_output_plugin.OutputPluginDescriptor(
         plugin_name="FailingInFlushDummyHuntOutputPlugin")
@@ -582,6 +612,92 @@ class HuntTest(stats_test_lib.StatsTestMixin,
             output_plugins=[plugin_descriptor],
         )
 
+  def _ReadOutputPluginLogEntries(self, hunt_id, output_plugin_id,
+                                  log_entry_type):
+    return data_store.REL_DB.ReadHuntOutputPluginLogEntries(
+        hunt_id,
+        output_plugin_id=output_plugin_id,
+        offset=0,
+        count=sys.maxsize,
+        with_type=log_entry_type)
+
+  def testAsyncOutputPluginDeliveryProcessesQueuedResultsInOneBatch(self):
+    plugin_descriptor = rdf_output_plugin.OutputPluginDescriptor(
+        plugin_name="DummyHuntOutputPlugin")
+
+    with test_lib.ConfigOverrider({"OutputPlugins.async_delivery": True}):
+      hunt_id, _ = self._CreateAndRunHunt(
+          num_clients=5,
+          client_mock=hunt_test_lib.SampleHuntMock(failrate=-1),
+          client_rule_set=foreman_rules.ForemanClientRuleSet(),
+          client_rate=0,
+          args=self.ClientFileFinderHuntArgs(),
+          output_plugins=[plugin_descriptor],
+      )
+
+    log_type = rdf_flow_objects.FlowOutputPluginLogEntry.LogEntryType.LOG
+    self.assertEmpty(self._ReadOutputPluginLogEntries(hunt_id, "0", log_type))
+
+    requests = data_store.REL_DB.ReadMessageHandlerRequests()
+    self.assertLen(requests, 5)
+    for r in requests:
+      self.assertEqual(r.handler_name,
+                       flow_base.OutputPluginDeliveryHandler.handler_name)
+
+    with self.assertStatsCounterDelta(
+        5,
+        flow_base.HUNT_RESULTS_RAN_THROUGH_PLUGIN,
+        fields=["DummyHuntOutputPlugin"]):
+      worker_lib.ProcessMessageHandlerRequests(requests)
+
+    self.assertEmpty(data_store.REL_DB.ReadMessageHandlerRequests())
+    logs = self._ReadOutputPluginLogEntries(hunt_id, "0", log_type)
+    self.assertLen(logs, 5)
+    for log in logs:
+      self.assertEqual(log.message, "Processed 1 replies.")
+
+  def testAsyncOutputPluginDeliveryRetriesOnlyFailedPlugins(self):
+    failing_plugin_descriptor = rdf_output_plugin.OutputPluginDescriptor(
+        plugin_name="FailingDummyHuntOutputPlugin")
+    plugin_descriptor = rdf_output_plugin.OutputPluginDescriptor(
+        plugin_name="DummyHuntOutputPlugin")
+
+    with test_lib.ConfigOverrider({"OutputPlugins.async_delivery": True}):
+      hunt_id, _ = self._CreateAndRunHunt(
+          num_clients=5,
+          client_mock=hunt_test_lib.SampleHuntMock(failrate=-1),
+          client_rule_set=foreman_rules.ForemanClientRuleSet(),
+          client_rate=0,
+          args=self.ClientFileFinderHuntArgs(),
+          output_plugins=[failing_plugin_descriptor, plugin_descriptor],
+      )
+
+    worker_lib.ProcessMessageHandlerRequests(
+        data_store.REL_DB.ReadMessageHandlerRequests())
+
+    log_types = rdf_flow_objects.FlowOutputPluginLogEntry.LogEntryType
+    self.assertLen(
+        self._ReadOutputPluginLogEntries(hunt_id, "0", log_types.ERROR), 5)
+    self.assertLen(
+        self._ReadOutputPluginLogEntries(hunt_id, "1", log_types.LOG), 5)
+
+    retries = data_store.REL_DB.ReadMessageHandlerRequests()
+    self.assertLen(retries, 5)
+    for r in retries:
+      self.assertGreater(r.leased_until, rdfvalue.RDFDatetime.Now())
+      self.assertEqual(r.request.payload.output_plugin_ids, ["0"])
+      self.assertEqual(r.request.payload.attempts, 1)
+      self.assertLen(r.request.payload.results, 1)
+
+    with test_lib.ConfigOverrider({"OutputPlugins.delivery_max_attempts": 2}):
+      worker_lib.ProcessMessageHandlerRequests(retries)
+
+    self.assertEmpty(data_store.REL_DB.ReadMessageHandlerRequests())
+    self.assertLen(
+        self._ReadOutputPluginLogEntries(hunt_id, "0", log_types.ERROR), 10)
+    self.assertLen(
+        self._ReadOutputPluginLogEntries(hunt_id, "1", log_types.LOG), 5)
+
   def _CheckHuntStoppedNotification(self, str_match):
     pending = self.GetUserNotifications(self.test_username)
     self.assertLen(pending, 1)
@@ -222,12 +222,14 @@ class InstantOutputPluginWithExportConversion(InstantOutputPlugin):
     Raises:
       ValueError: if any of the GrrMessage objects doesn't have "source" set.
     """
-    for batch in collection.Batch(grr_messages, self.BATCH_SIZE):
-      metadata_items = self._GetMetadataForClients([gm.source for gm in batch])
-      batch_with_metadata = zip(metadata_items, [gm.payload for gm in batch])
-
-      for result in converter.BatchConvert(batch_with_metadata):
-        yield result
+    batches = (self._GetBatchWithMetadata(batch)
+               for batch in collection.Batch(grr_messages, self.BATCH_SIZE))
+    for result in export.BatchConvertInParallel(converter, batches):
+      yield result
+
+  def _GetBatchWithMetadata(self, batch):
+    metadata_items = self._GetMetadataForClients([gm.source for gm in batch])
+    return list(zip(metadata_items, [gm.payload for gm in batch]))
 
   def ProcessValues(self, value_type, values_generator_fn):
     converter_classes = export_converters_registry.GetConvertersByClass(
@@ -8,6 +8,7 @@ import socket
 from grr_response_core import config
 from grr_response_core.lib import utils
 from grr_response_core.lib.registry import MetaclassRegistry
+from grr_response_core.lib.util import cache
 from grr_response_core.lib.util import precondition
 
 
@@ -29,7 +30,7 @@ class IPResolver(IPResolverBase):
 
   def __init__(self):
     super().__init__()
-    self.cache = utils.FastStore(max_size=100)
+    self.cache = cache.LRUCache("ip_info", max_size=100)
 
   def RetrieveIPInfo(self, ip):
     precondition.AssertOptionalType(
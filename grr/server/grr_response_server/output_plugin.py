@@ -4,6 +4,8 @@
 import abc
 import threading
 
+import requests
+
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
@@ -28,6 +30,27 @@ class PluginDoesNotProduceOutputStreams(Error):
   """Raised when output streams API is used on plugins not supporting them."""
 
 
+_http_sessions = threading.local()
+
+
+def HttpSession() -> requests.Session:
+  """Returns an HTTP session of the calling thread.
+
+  Sessions pool connections, so plugins sending results to HTTP endpoints
+  reuse established (TLS) connections across batches instead of opening a new
+  connection for every request. `requests.Session` is not thread-safe, hence
+  one session per thread.
+
+  Returns:
+    A `requests.Session` shared by all output plugins running in this thread.
+  """
+  session = getattr(_http_sessions, "session", None)
+  if session is None:
+    session = requests.Session()
+    _http_sessions.session = session
+  return session
+
+
 class OutputPlugin(metaclass=OutputPluginRegistry):
   """The base class for output plugins.
 
@@ -44,6 +67,9 @@ class OutputPlugin(metaclass=OutputPluginRegistry):
   name = ""
   description = ""
   args_type = None
+  # Whether UpdateState() only adds to numeric values of the state. Updates of
+  # such states can be spread over several shards that are summed on read.
+  shardable_state = False
 
   @classmethod
   def CreatePluginAndDefaultState(cls, source_urn=None, args=None):
@@ -130,6 +156,45 @@ class OutputPlugin(metaclass=OutputPluginRegistry):
       state: rdf_protodict.AttributedDict with plugin's state to be updated.
     """
 
+  @classmethod
+  def CreateStateShard(cls, state):
+    """Creates an empty shard of a given shardable state.
+
+    Args:
+      state: rdf_protodict.AttributedDict with plugin's state.
+
+    Returns:
+      A copy of the state with all numeric values set to zero.
+    """
+    shard = state.Copy()
+    for key, value in state.Items():
+      if _IsNumeric(value):
+        shard[key] = type(value)()
+    return shard
+
+  @classmethod
+  def MergeStateShards(cls, state, shards):
+    """Adds numeric values of state shards to a given state.
+
+    Args:
+      state: rdf_protodict.AttributedDict with plugin's state. It's modified
+        in-place.
+      shards: An iterable of shards of the state, as created by
+        CreateStateShard() and updated by UpdateState().
+
+    Returns:
+      The merged state.
+    """
+    for shard in shards:
+      for key, value in shard.Items():
+        if _IsNumeric(value) and _IsNumeric(state.GetItem(key)):
+          state[key] += value
+    return state
+
+
+def _IsNumeric(value):
+  return isinstance(value, (int, float)) and not isinstance(value, bool)
+
 
 class UnknownOutputPlugin(OutputPlugin):
   """Stub plugin used when original plugin class can't be found."""
@@ -6,6 +6,7 @@ from absl import app
 
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import registry
+from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
 from grr_response_server import output_plugin
 from grr_response_server.flows.general import transfer
 from grr_response_server.rdfvalues import flow_runner as rdf_flow_runner
@@ -49,6 +50,30 @@ class OutputPluginTest(test_lib.GRRBaseTest):
 
       self.assertEqual(deserialized.args, descriptor.args.SerializeToBytes())
 
+  def testStateShardsAreMergedIntoState(self):
+    state = rdf_protodict.AttributedDict({
+        "source_urn": "aff4:/hunts/H:123456",
+        "count": 3,
+        "errors": 0.5,
+        "enabled": True,
+    })
+
+    shard = output_plugin.OutputPlugin.CreateStateShard(state)
+    self.assertEqual(shard["source_urn"], "aff4:/hunts/H:123456")
+    self.assertEqual(shard["count"], 0)
+    self.assertEqual(shard["errors"], 0.0)
+    self.assertIs(shard["enabled"], True)
+
+    shard["count"] += 2
+    other_shard = shard.Copy()
+    other_shard["errors"] += 1.0
+
+    merged = output_plugin.OutputPlugin.MergeStateShards(
+        state, [shard, other_shard])
+    self.assertEqual(merged["count"], 7)
+    self.assertEqual(merged["errors"], 1.5)
+    self.assertIs(merged["enabled"], True)
+
 
 def main(argv):
   test_lib.main(argv)
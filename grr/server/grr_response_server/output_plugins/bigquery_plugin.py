@@ -70,6 +70,7 @@ class BigQueryOutputPlugin(output_plugin.OutputPlugin):
   name = "bigquery"
   description = "Send output to bigquery."
   args_type = BigQueryOutputPluginArgs
+  shardable_state = True
   GZIP_COMPRESSION_LEVEL = 9
   RDF_BIGQUERY_TYPE_MAP = {
       "bool": "BOOLEAN",
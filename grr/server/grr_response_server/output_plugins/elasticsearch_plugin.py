@@ -7,31 +7,24 @@ core/grr_response_core/config/output_plugins.py
 The specification for the indexing of documents is
 https://www.elastic.co/guide/en/elasticsearch/reference/7.1/docs-index_.html
 """
-import json
-from typing import Any
-from typing import Dict
 from typing import List
 from typing import Text
+from typing import Tuple
 from urllib import parse as urlparse
 
-import requests
-
-from google.protobuf import json_format
 from grr_response_core import config
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
 from grr_response_proto import output_plugin_pb2
-from grr_response_server import data_store
-from grr_response_server import export
 from grr_response_server import output_plugin
-from grr_response_server.export_converters import base
-from grr_response_server.gui.api_plugins import flow as api_flow
+from grr_response_server.output_plugins import metadata_cache
 
 BULK_OPERATIONS_PATH = "_bulk"
 
-# TODO(user): Use the JSON type.
-JsonDict = Dict[Text, Any]
+# Encoded metadata is inserted into documents as is.
+_EVENT_TEMPLATE = (
+    '{"client":%s,"flow":%s,"resultType":%s,"result":%s%s}')
 
 
 class ElasticsearchConfigurationError(Exception):
@@ -45,10 +38,6 @@ class ElasticsearchOutputPluginArgs(rdf_structs.RDFProtoStruct):
   rdf_deps = []
 
 
-def _ToDict(rdfval: rdf_structs.RDFProtoStruct) -> JsonDict:
-  return json_format.MessageToDict(rdfval.AsPrimitiveProto(), float_precision=8)
-
-
 class ElasticsearchOutputPlugin(output_plugin.OutputPlugin):
   """OutputPlugin that sends Flow results to Elasticsearch."""
 
@@ -74,17 +63,53 @@ class ElasticsearchOutputPlugin(output_plugin.OutputPlugin):
 
     self._url = urlparse.urljoin(url, BULK_OPERATIONS_PATH)
 
+    # Each index operation is two lines, the first defining the index settings,
+    # the second is the actual document to be indexed.
+    self._index_command = metadata_cache.ENCODER.encode(
+        {"index": {"_index": self._index}})
+    self._tags = ""
+    if self.args.tags:
+      self._tags = ",\"tags\":" + metadata_cache.ENCODER.encode(
+          list(self.args.tags))
+
+    # Responses of all ProcessResponses() calls, grouped by client and flow id.
+    # They are sent together on Flush().
+    self._responses: List[Tuple[Text, Text, List[rdf_flows.GrrMessage]]] = []
+
   def ProcessResponses(self, state: rdf_protodict.AttributedDict,
                        responses: List[rdf_flows.GrrMessage]) -> None:
     """See base class."""
     client_id = self._GetClientId(responses)
     flow_id = self._GetFlowId(responses)
 
-    client = self._GetClientMetadata(client_id)
-    flow = self._GetFlowMetadata(client_id, flow_id)
+    with self.lock:
+      self._responses.append((client_id, flow_id, list(responses)))
+
+  def Flush(self, state: rdf_protodict.AttributedDict) -> None:
+    """Sends all responses collected since the last flush in one request."""
+    with self.lock:
+      responses = self._responses
+      self._responses = []
+
+    if not responses:
+      return
+
+    clients = metadata_cache.ReadClientMetadata(
+        {client_id for client_id, _, _ in responses})
 
-    events = [self._MakeEvent(response, client, flow) for response in responses]
-    self._SendEvents(events)
+    lines = []
+    for client_id, flow_id, messages in responses:
+      client = clients.get(client_id)
+      if client is None:
+        client = metadata_cache.UnknownClientMetadata(client_id)
+      flow = metadata_cache.ReadFlowMetadata(client_id, flow_id)
+      for message in messages:
+        lines.append(self._index_command)
+        lines.append(self._MakeEvent(message, client, flow))
+    # The bulk API requires the body to end with a newline.
+    lines.append("")
+
+    self._SendEvents("\n".join(lines))
 
   def _GetClientId(self, responses: List[rdf_flows.GrrMessage]) -> Text:
     client_ids = {msg.source.Basename() for msg in responses}
@@ -102,34 +127,15 @@ class ElasticsearchOutputPlugin(output_plugin.OutputPlugin):
            "violates OutputPlugin constraints.").format(flow_ids))
     return flow_ids.pop()
 
-  def _GetClientMetadata(self, client_id: Text) -> base.ExportedMetadata:
-    info = data_store.REL_DB.ReadClientFullInfo(client_id)
-    metadata = export.GetMetadata(client_id, info)
-    metadata.timestamp = None  # timestamp is sent outside of metadata.
-    return metadata
-
-  def _GetFlowMetadata(self, client_id: Text,
-                       flow_id: Text) -> api_flow.ApiFlow:
-    flow_obj = data_store.REL_DB.ReadFlowObject(client_id, flow_id)
-    return api_flow.ApiFlow().InitFromFlowObject(flow_obj)
-
   def _MakeEvent(self, message: rdf_flows.GrrMessage,
-                 client: base.ExportedMetadata,
-                 flow: api_flow.ApiFlow) -> JsonDict:
-
-    event = {
-        "client": _ToDict(client),
-        "flow": _ToDict(flow),
-        "resultType": message.args_rdf_name,
-        "result": _ToDict(message.payload),
-    }
-
-    if self.args.tags:
-      event["tags"] = list(self.args.tags)
-
-    return event
-
-  def _SendEvents(self, events: List[JsonDict]) -> None:
+                 client: metadata_cache.ClientMetadata, flow: Text) -> Text:
+    """Encodes a single document, reusing the encoded metadata."""
+    encoder = metadata_cache.ENCODER
+    return _EVENT_TEMPLATE % (
+        client.json, flow, encoder.encode(message.args_rdf_name),
+        encoder.encode(metadata_cache.ToDict(message.payload)), self._tags)
+
+  def _SendEvents(self, data: Text) -> None:
     """Uses the Elasticsearch bulk API to index all events in a single request.
     """
     # https://www.elastic.co/guide/en/elasticsearch/reference/7.1/docs-bulk.html
@@ -142,20 +148,6 @@ class ElasticsearchOutputPlugin(output_plugin.OutputPlugin):
     else:
       headers = {"Content-Type": "application/json"}
 
-    index_command = json.dumps({"index": {"_index": self._index}}, indent=None)
-
-    # Each index operation is two lines, the first defining the index settings,
-    # the second is the actual document to be indexed
-    data = (
-        "\n".join(
-            [
-                "{}\n{}".format(index_command, json.dumps(event, indent=None))
-                for event in events
-            ]
-        )
-        + "\n"
-    )
-
-    response = requests.post(
+    response = output_plugin.HttpSession().post(
         url=self._url, verify=self._verify_https, data=data, headers=headers)
     response.raise_for_status()
@@ -54,7 +54,7 @@ class ElasticsearchOutputPluginTest(flow_test_lib.FlowTestsBaseclass):
         source_urn=source_id, args=plugin_args)
 
     if patcher is None:
-      patcher = mock.patch.object(requests, 'post')
+      patcher = mock.patch.object(requests.Session, 'post')
 
     with patcher as patched:
       plugin.ProcessResponses(plugin_state, messages)
@@ -201,7 +201,7 @@ class ElasticsearchOutputPluginTest(flow_test_lib.FlowTestsBaseclass):
         self._CallPlugin(
             plugin_args=elasticsearch_plugin.ElasticsearchOutputPluginArgs(),
             responses=[rdf_client.Process(pid=42)],
-            patcher=mock.patch.object(requests, 'post', post))
+            patcher=mock.patch.object(requests.Session, 'post', post))
 
   def testPostDataTerminatingNewline(self):
     with test_lib.ConfigOverrider({
@@ -214,5 +214,41 @@ class ElasticsearchOutputPluginTest(flow_test_lib.FlowTestsBaseclass):
     self.assertEndsWith(mock_post.call_args[KWARGS]['data'], '\n')
 
 
+  def testSendsResponsesOfMultipleFlowsInOneRequest(self):
+    other_flow_id = '87654321'
+    data_store.REL_DB.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            flow_id=other_flow_id,
+            client_id=self.client_id,
+            flow_class_name='ClientFileFinder',
+            create_time=rdfvalue.RDFDatetime.Now(),
+        ))
+
+    with test_lib.ConfigOverrider({
+        'Elasticsearch.url': 'http://a',
+        'Elasticsearch.token': 'b',
+    }):
+      plugin_cls = elasticsearch_plugin.ElasticsearchOutputPlugin
+      plugin, plugin_state = plugin_cls.CreatePluginAndDefaultState(
+          source_urn='aff4:/hunts/H:123456',
+          args=elasticsearch_plugin.ElasticsearchOutputPluginArgs())
+
+      with mock.patch.object(requests.Session, 'post') as mock_post:
+        for flow_id in [self.flow_id, other_flow_id]:
+          plugin.ProcessResponses(plugin_state, [
+              rdf_flows.GrrMessage(
+                  source=self.client_id,
+                  session_id='{}/{}'.format(self.client_id, flow_id),
+                  payload=rdf_client.Process(pid=42))
+          ])
+        plugin.Flush(plugin_state)
+
+    mock_post.assert_called_once()
+    events = self._ParseEvents(mock_post)
+    self.assertEqual(
+        [pair[1]['flow']['flowId'] for pair in events],
+        [self.flow_id, other_flow_id])
+
+
 if __name__ == '__main__':
   app.run(test_lib.main)
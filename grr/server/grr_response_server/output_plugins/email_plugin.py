@@ -27,6 +27,7 @@ class EmailOutputPlugin(output_plugin.OutputPlugin):
   name = "email"
   description = "Send an email for each result."
   args_type = EmailOutputPluginArgs
+  shardable_state = True
   produces_output_streams = False
 
   subject_template = jinja2.Template(
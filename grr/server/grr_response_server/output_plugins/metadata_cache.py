@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""Client and flow metadata rendered to JSON for output plugins.
+
+Output plugins that send results as JSON documents (Splunk, Elasticsearch)
+attach the metadata of the client and the flow to every document. Rendering
+this metadata is more expensive than rendering a typical result, so rendered
+metadata is kept in bounded caches shared by all plugin instances of the
+process. The database is still read on every flush, only rendering is cached.
+Client cache keys contain the timestamp of the client snapshot, so an entry is
+never used once a new snapshot is written. Flow metadata is cached per flow
+without the fields that change while the flow runs, which are rendered anew
+every time.
+"""
+
+import functools
+import json
+from typing import Any, Dict, Iterable, NamedTuple, Text
+
+from google.protobuf import json_format
+from grr_response_core.lib.rdfvalues import structs as rdf_structs
+from grr_response_core.lib.util import cache
+from grr_response_server import data_store
+from grr_response_server import export
+from grr_response_server.export_converters import base
+from grr_response_server.gui.api_plugins import flow as api_flow
+from grr_response_server.rdfvalues import objects as rdf_objects
+
+JsonDict = Dict[Text, Any]
+
+# A compact encoder, reused for all documents. Documents are built from
+# already encoded fragments, which are free of reference cycles.
+ENCODER = json.JSONEncoder(separators=(",", ":"), check_circular=False)
+
+_CLIENT_METADATA_CACHE = cache.LRUCache(
+    "output_plugin_client_metadata", max_size=10000, max_age=3600)
+_FLOW_METADATA_CACHE = cache.LRUCache(
+    "output_plugin_flow_metadata", max_size=10000, max_age=3600)
+
+# `ApiFlow` fields that change while the flow runs. They would make cached flow
+# metadata stale, so they are rendered separately.
+_DYNAMIC_FLOW_FIELDS = ("last_active_at", "state", "error_description")
+
+
+class ClientMetadata(NamedTuple):
+  """Client metadata rendered for output plugins."""
+  # Fully qualified domain name of the client, empty if unknown.
+  hostname: Text
+  # `ExportedMetadata` of the client, encoded as a JSON object.
+  json: Text
+
+
+def ToDict(rdfval: rdf_structs.RDFProtoStruct) -> JsonDict:
+  return json_format.MessageToDict(rdfval.AsPrimitiveProto(), float_precision=8)
+
+
+def ReadClientMetadata(
+    client_ids: Iterable[Text]) -> Dict[Text, ClientMetadata]:
+  """Reads rendered metadata of multiple clients with a single query.
+
+  Args:
+    client_ids: Ids of the clients to read the metadata of.
+
+  Returns:
+    A dict mapping ids of the clients that exist to their rendered metadata.
+  """
+  infos = data_store.REL_DB.MultiReadClientFullInfo(list(client_ids))
+
+  result = {}
+  for client_id, info in infos.items():
+    labels = tuple(sorted((label.owner, label.name) for label in info.labels))
+    key = (client_id, info.last_snapshot.timestamp, labels)
+    result[client_id] = _CLIENT_METADATA_CACHE.GetOrLoad(
+        key, functools.partial(_RenderClientMetadata, client_id, info))
+  return result
+
+
+def UnknownClientMetadata(client_id: Text) -> ClientMetadata:
+  """Returns metadata of a client that has no metadata in the database."""
+  metadata = base.ExportedMetadata(client_urn=client_id)
+  metadata.timestamp = None  # timestamp is sent outside of metadata.
+  return ClientMetadata(hostname="", json=ENCODER.encode(ToDict(metadata)))
+
+
+def _RenderClientMetadata(client_id: Text,
+                          info: rdf_objects.ClientFullInfo) -> ClientMetadata:
+  metadata = export.GetMetadata(client_id, info)
+  metadata.timestamp = None  # timestamp is sent outside of metadata.
+  return ClientMetadata(
+      hostname=metadata.hostname, json=ENCODER.encode(ToDict(metadata)))
+
+
+def ReadFlowMetadata(client_id: Text, flow_id: Text) -> Text:
+  """Reads rendered metadata of a flow.
+
+  Args:
+    client_id: Id of the client the flow runs on.
+    flow_id: Id of the flow.
+
+  Returns:
+    The `ApiFlow` of the flow without its context, encoded as a JSON object.
+  """
+  flow_obj = data_store.REL_DB.ReadFlowObject(client_id, flow_id)
+  api_flow_obj = api_flow.ApiFlow().InitFromFlowObject(flow_obj)
+  dynamic_api_flow_obj = api_flow.ApiFlow()
+  for name in _DYNAMIC_FLOW_FIELDS:
+    if api_flow_obj.HasField(name):
+      dynamic_api_flow_obj.Set(name, api_flow_obj.Get(name))
+  dynamic_metadata = ToDict(dynamic_api_flow_obj)
+
+  metadata = dict(
+      _FLOW_METADATA_CACHE.GetOrLoad(
+          (client_id, flow_id),
+          functools.partial(_RenderStaticFlowMetadata, api_flow_obj)))
+  metadata.update(dynamic_metadata)
+  return ENCODER.encode(metadata)
+
+
+def _RenderStaticFlowMetadata(api_flow_obj: api_flow.ApiFlow) -> JsonDict:
+  for name in _DYNAMIC_FLOW_FIELDS:
+    setattr(api_flow_obj, name, None)
+  return ToDict(api_flow_obj)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Tests for metadata caches of output plugins."""
+
+import json
+from unittest import mock
+
+from absl import app
+
+from grr_response_core.lib import rdfvalue
+from grr_response_server import data_store
+from grr_response_server import export
+from grr_response_server.output_plugins import metadata_cache
+from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
+from grr_response_server.rdfvalues import objects as rdf_objects
+from grr.test_lib import test_lib
+
+
+class MetadataCacheTest(test_lib.GRRBaseTest):
+
+  def setUp(self):
+    super().setUp()
+    self.client_ids = self.SetupClients(2)
+    # Caches are shared by the whole process.
+    # pylint: disable=protected-access
+    metadata_cache._CLIENT_METADATA_CACHE.Flush()
+    metadata_cache._FLOW_METADATA_CACHE.Flush()
+    # pylint: enable=protected-access
+
+  def testReadClientMetadataRendersEachSnapshotOnce(self):
+    get_metadata = mock.MagicMock(wraps=export.GetMetadata)
+    with mock.patch.object(export, "GetMetadata", get_metadata):
+      first = metadata_cache.ReadClientMetadata(self.client_ids)
+      second = metadata_cache.ReadClientMetadata(self.client_ids)
+    self.assertEqual(first, second)
+    self.assertEqual(get_metadata.call_count, 2)
+
+    client = json.loads(first[self.client_ids[0]].json)
+    self.assertEqual(client["clientUrn"], "aff4:/" + self.client_ids[0])
+    self.assertNotIn("timestamp", client)
+
+    snapshot = rdf_objects.ClientSnapshot(client_id=self.client_ids[0])
+    snapshot.knowledge_base.fqdn = "new.example.com"
+    data_store.REL_DB.WriteClientSnapshot(snapshot)
+
+    with mock.patch.object(export, "GetMetadata", get_metadata):
+      third = metadata_cache.ReadClientMetadata(self.client_ids)
+    self.assertEqual(get_metadata.call_count, 3)
+    self.assertEqual(third[self.client_ids[0]].hostname, "new.example.com")
+    self.assertEqual(third[self.client_ids[1]], first[self.client_ids[1]])
+
+  def testReadClientMetadataSkipsUnknownClients(self):
+    result = metadata_cache.ReadClientMetadata(
+        [self.client_ids[0], "C.0000000000000123"])
+    self.assertCountEqual(result.keys(), [self.client_ids[0]])
+
+  def testUnknownClientMetadata(self):
+    client = metadata_cache.UnknownClientMetadata("C.0000000000000123")
+    self.assertEqual(client.hostname, "")
+    self.assertEqual(
+        json.loads(client.json), {"clientUrn": "aff4:/C.0000000000000123"})
+
+  def testReadFlowMetadataRendersStaticFieldsOnce(self):
+    flow_obj = rdf_flow_objects.Flow(
+        flow_id="12345678",
+        client_id=self.client_ids[0],
+        flow_class_name="ClientFileFinder",
+        creator="foo",
+        create_time=rdfvalue.RDFDatetime.Now())
+    data_store.REL_DB.WriteFlowObject(flow_obj)
+
+    # pylint: disable=protected-access
+    render = mock.MagicMock(wraps=metadata_cache._RenderStaticFlowMetadata)
+    with mock.patch.object(metadata_cache, "_RenderStaticFlowMetadata",
+                           render):
+      # pylint: enable=protected-access
+      first = metadata_cache.ReadFlowMetadata(self.client_ids[0], "12345678")
+
+      flow_obj.flow_state = flow_obj.FlowState.ERROR
+      flow_obj.error_message = "oops"
+      data_store.REL_DB.UpdateFlow(
+          self.client_ids[0], "12345678", flow_obj=flow_obj)
+
+      second = metadata_cache.ReadFlowMetadata(self.client_ids[0], "12345678")
+
+    self.assertEqual(render.call_count, 1)
+
+    flow = json.loads(second)
+    self.assertEqual(flow["flowId"], "12345678")
+    self.assertEqual(flow["creator"], "foo")
+    self.assertEqual(flow["state"], "ERROR")
+    self.assertEqual(flow["errorDescription"], "oops")
+    self.assertIn("lastActiveAt", flow)
+    self.assertNotIn("errorDescription", json.loads(first))
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+"""Plugin that exports results as Apache Parquet files.
+
+The plugin requires the optional `pyarrow` dependency, which is installed with
+the `parquet` extra of the grr-response-server package.
+"""
+
+import io
+import itertools
+import os
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Text
+import zipfile
+
+import pyarrow
+from pyarrow import parquet
+import yaml
+
+from grr_response_core.lib import rdfvalue
+from grr_response_core.lib import utils
+from grr_response_core.lib.rdfvalues import structs as rdf_structs
+from grr_response_core.lib.util import collection
+from grr_response_server import instant_output_plugin
+
+
+class Column(NamedTuple):
+  """A Parquet column of a flattened export-proto field."""
+  # Dot-separated name of the field, e.g. "metadata.hostname".
+  name: Text
+  # Names of the fields leading to the value, e.g. ("metadata", "hostname").
+  path: Sequence[Text]
+  arrow_type: pyarrow.DataType
+  convert_fn: Callable[[Any], Any]
+
+
+class Rdf2ArrowAdapter(object):
+  """An adapter for converting RDF values to Arrow column values."""
+
+  class Converter(NamedTuple):
+    arrow_type: pyarrow.DataType
+    convert_fn: Callable[[Any], Any]
+
+  BYTES_CONVERTER = Converter(pyarrow.binary(), bytes)
+  STR_CONVERTER = Converter(pyarrow.string(), str)
+  INT_CONVERTER = Converter(pyarrow.int64(), int)
+  UINT_CONVERTER = Converter(pyarrow.uint64(), int)
+  FLOAT_CONVERTER = Converter(pyarrow.float64(), float)
+  BOOL_CONVERTER = Converter(pyarrow.bool_(), bool)
+
+  DEFAULT_CONVERTER = STR_CONVERTER
+
+  # Converters for fields that have a semantic type annotation in their
+  # protobuf definition.
+  SEMANTIC_CONVERTERS = {
+      rdfvalue.RDFString:
+          STR_CONVERTER,
+      rdfvalue.RDFBytes:
+          BYTES_CONVERTER,
+      rdfvalue.RDFInteger:
+          INT_CONVERTER,
+      bool:
+          BOOL_CONVERTER,
+      rdfvalue.RDFDatetime:
+          Converter(
+              pyarrow.timestamp("us", tz="UTC"),
+              lambda x: x.AsMicrosecondsSinceEpoch()),
+      rdfvalue.RDFDatetimeSeconds:
+          Converter(
+              pyarrow.timestamp("us", tz="UTC"),
+              lambda x: x.AsSecondsSinceEpoch() * 1000000),
+      rdfvalue.DurationSeconds:
+          Converter(pyarrow.duration("us"), lambda x: x.microseconds),
+  }
+
+  # Converters for fields that do not have a semantic type annotation in their
+  # protobuf definition.
+  NON_SEMANTIC_CONVERTERS = {
+      rdf_structs.ProtoBinary: BYTES_CONVERTER,
+      rdf_structs.ProtoString: STR_CONVERTER,
+      rdf_structs.ProtoEnum: STR_CONVERTER,
+      rdf_structs.ProtoUnsignedInteger: UINT_CONVERTER,
+      rdf_structs.ProtoSignedInteger: INT_CONVERTER,
+      rdf_structs.ProtoFixed32: UINT_CONVERTER,
+      rdf_structs.ProtoFixed64: UINT_CONVERTER,
+      rdf_structs.ProtoFloat: FLOAT_CONVERTER,
+      rdf_structs.ProtoDouble: FLOAT_CONVERTER,
+      rdf_structs.ProtoBoolean: BOOL_CONVERTER,
+  }
+
+  @staticmethod
+  def GetConverter(type_info):
+    if type_info.__class__ is rdf_structs.ProtoRDFValue:
+      return Rdf2ArrowAdapter.SEMANTIC_CONVERTERS.get(
+          type_info.type, Rdf2ArrowAdapter.DEFAULT_CONVERTER)
+    else:
+      return Rdf2ArrowAdapter.NON_SEMANTIC_CONVERTERS.get(
+          type_info.__class__, Rdf2ArrowAdapter.DEFAULT_CONVERTER)
+
+
+class _ChunkSink(io.RawIOBase):
+  """A write-only stream handing out written data in chunks.
+
+  The Parquet writer records offsets of row groups in the file footer, so
+  tell() reports the number of bytes written overall, even though only data
+  not yet returned by TakeChunk() is kept in memory.
+  """
+
+  def __init__(self):
+    super().__init__()
+    self._chunks = []
+    self._position = 0
+
+  def writable(self):
+    return True
+
+  def write(self, data):
+    data = bytes(data)
+    self._chunks.append(data)
+    self._position += len(data)
+    return len(data)
+
+  def tell(self):
+    return self._position
+
+  def TakeChunk(self) -> bytes:
+    chunk = b"".join(self._chunks)
+    self._chunks = []
+    return chunk
+
+
+class ParquetInstantOutputPlugin(
+    instant_output_plugin.InstantOutputPluginWithExportConversion):
+  """Instant output plugin that writes results to Parquet files.
+
+  Every exported type is written to a separate file with one column per
+  (flattened) field of the type. Values are written in row groups, so the
+  memory needed for an export doesn't depend on the number of results.
+  """
+
+  plugin_name = "parquet-zip"
+  friendly_name = "Parquet (zipped)"
+  description = "Output ZIP archive with Apache Parquet files."
+  output_file_extension = ".zip"
+
+  ROW_GROUP_SIZE = 10000
+  COMPRESSION = "zstd"
+
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.archive_generator = None  # Created in Start()
+    self.export_counts = {}
+
+  @property
+  def path_prefix(self):
+    prefix, _ = os.path.splitext(self.output_file_name)
+    return prefix
+
+  def Start(self):
+    # Parquet files are compressed already.
+    self.archive_generator = utils.StreamingZipGenerator(
+        compression=zipfile.ZIP_STORED)
+    self.export_counts = {}
+    return []
+
+  def ProcessSingleTypeExportedValues(self, original_value_type,
+                                      exported_values):
+    first_value = next(exported_values, None)
+    if not first_value:
+      return
+
+    if not isinstance(first_value, rdf_structs.RDFProtoStruct):
+      raise ValueError("The Parquet plugin only supports export-protos")
+
+    yield self.archive_generator.WriteFileHeader(
+        "%s/%s/from_%s.parquet" %
+        (self.path_prefix, first_value.__class__.__name__,
+         original_value_type.__name__))
+
+    columns = self._GetColumns(first_value.__class__)
+    schema = pyarrow.schema([(c.name, c.arrow_type) for c in columns])
+    sink = _ChunkSink()
+    writer = parquet.ParquetWriter(
+        sink, schema, compression=self.COMPRESSION)
+
+    counter = 0
+    values = collection.Batch(
+        itertools.chain([first_value], exported_values), self.ROW_GROUP_SIZE)
+    for batch in values:
+      counter += len(batch)
+      writer.write_batch(self._GetRecordBatch(schema, columns, batch))
+      yield self.archive_generator.WriteFileChunk(sink.TakeChunk())
+
+    writer.close()
+    yield self.archive_generator.WriteFileChunk(sink.TakeChunk())
+    yield self.archive_generator.WriteFileFooter()
+
+    counts_for_original_type = self.export_counts.setdefault(
+        original_value_type.__name__, dict())
+    counts_for_original_type[first_value.__class__.__name__] = counter
+
+  def _GetColumns(self, proto_struct_class, prefix=()) -> List[Column]:
+    """Returns columns of all non-embedded fields of an export-proto class."""
+    columns = []
+    for type_info in proto_struct_class.type_infos:
+      path = prefix + (type_info.name,)
+      if type_info.__class__ is rdf_structs.ProtoEmbedded:
+        columns.extend(self._GetColumns(type_info.type, prefix=path))
+      else:
+        converter = Rdf2ArrowAdapter.GetConverter(type_info)
+        columns.append(
+            Column(
+                name=".".join(path),
+                path=path,
+                arrow_type=converter.arrow_type,
+                convert_fn=converter.convert_fn))
+    return columns
+
+  def _GetRecordBatch(self, schema, columns, values):
+    arrays = []
+    for column in columns:
+      column_values = [self._GetColumnValue(column, v) for v in values]
+      arrays.append(pyarrow.array(column_values, type=column.arrow_type))
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+  def _GetColumnValue(self, column: Column, value) -> Optional[Any]:
+    """Returns the converted value of a column, None for unset fields."""
+    for name in column.path:
+      if not value.HasField(name):
+        return None
+      value = value.Get(name)
+    return column.convert_fn(value)
+
+  def Finish(self):
+    manifest = {"export_stats": self.export_counts}
+    manifest_bytes = yaml.safe_dump(manifest).encode("utf-8")
+
+    header = self.path_prefix + "/MANIFEST"
+    yield self.archive_generator.WriteFileHeader(header)
+    yield self.archive_generator.WriteFileChunk(manifest_bytes)
+    yield self.archive_generator.WriteFileFooter()
+    yield self.archive_generator.Close()
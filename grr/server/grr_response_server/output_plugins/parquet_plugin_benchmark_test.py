@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""Benchmarks Parquet export of a large hunt against CSV export."""
+
+import os
+import unittest
+
+from absl import app
+
+from grr_response_core.lib import rdfvalue
+from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
+from grr_response_server.export_converters import base
+from grr_response_server.export_converters import file as file_converters
+from grr_response_server.output_plugins import csv_plugin
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import test_lib
+
+# pylint: disable=g-import-not-at-top
+try:
+  from grr_response_server.output_plugins import parquet_plugin
+except ImportError:
+  raise unittest.SkipTest("`pyarrow` not available")
+# pylint: enable=g-import-not-at-top
+
+
+class ParquetInstantOutputPluginBenchmark(
+    benchmark_test_lib.AverageMicroBenchmarks):
+  """Exports results of a synthetic hunt with CSV and Parquet plugins."""
+
+  # CI sets GRR_BENCHMARK_NUM_ROWS to run this benchmark on fewer rows.
+  NUM_ROWS = int(os.environ.get("GRR_BENCHMARK_NUM_ROWS", 1000000))
+
+  def _ExportedFiles(self):
+    metadata = base.ExportedMetadata(
+        client_urn="aff4:/C.1000000000000000",
+        hostname="host.example.com",
+        os="Linux",
+        source_urn="aff4:/hunts/H:123456",
+        timestamp=rdfvalue.RDFDatetime.FromSecondsSinceEpoch(1600000000))
+    for i in range(self.NUM_ROWS):
+      yield file_converters.ExportedFile(
+          metadata=metadata,
+          urn="aff4:/C.1000000000000000/fs/os/usr/lib/file_%d" % i,
+          basename="file_%d" % i,
+          st_mode=33184,
+          st_ino=1000000 + i,
+          st_size=i % 65536,
+          st_mtime=rdfvalue.RDFDatetimeSeconds.FromSecondsSinceEpoch(
+              1600000000 + i),
+          hash_sha256=b"%032d" % i)
+
+  def _Export(self, plugin_cls):
+    plugin = plugin_cls(source_urn=rdfvalue.RDFURN("aff4:/hunts/H:123456"))
+    size = sum(len(chunk) for chunk in plugin.Start())
+    for chunk in plugin.ProcessSingleTypeExportedValues(
+        rdf_client_fs.StatEntry, self._ExportedFiles()):
+      size += len(chunk)
+    for chunk in plugin.Finish():
+      size += len(chunk)
+    return size
+
+  def testExportLargeHunt(self):
+    """Exporting NUM_ROWS ExportedFile rows."""
+    self.TimeIt(
+        lambda: self._Export(csv_plugin.CSVInstantOutputPlugin),
+        "CSV",
+        repetitions=1)
+    self.TimeIt(
+        lambda: self._Export(parquet_plugin.ParquetInstantOutputPlugin),
+        "Parquet",
+        repetitions=1)
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
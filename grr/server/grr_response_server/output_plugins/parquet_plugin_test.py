@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""Tests for Parquet output plugin."""
+
+import io
+import os
+import unittest
+from unittest import mock
+import zipfile
+
+from absl import app
+import yaml
+
+from grr_response_core.lib import rdfvalue
+from grr_response_core.lib.rdfvalues import client as rdf_client
+from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
+from grr_response_core.lib.rdfvalues import paths as rdf_paths
+from grr_response_server.output_plugins import test_plugins
+from grr.test_lib import export_test_lib
+from grr.test_lib import test_lib
+
+# pylint: disable=g-import-not-at-top
+try:
+  from pyarrow import parquet
+  from grr_response_server.output_plugins import parquet_plugin
+except ImportError:
+  raise unittest.SkipTest("`pyarrow` not available")
+# pylint: enable=g-import-not-at-top
+
+
+class ParquetInstantOutputPluginTest(test_plugins.InstantOutputPluginTestBase):
+  """Tests instant Parquet output plugin."""
+
+  plugin_cls = parquet_plugin.ParquetInstantOutputPlugin
+
+  def ProcessValuesToZip(self, values_by_cls):
+    fd_path = self.ProcessValues(values_by_cls)
+    file_basename, _ = os.path.splitext(os.path.basename(fd_path))
+    return zipfile.ZipFile(fd_path), file_basename
+
+  def ReadParquetFile(self, zip_fd, path):
+    return parquet.ParquetFile(io.BytesIO(zip_fd.read(path)))
+
+  @export_test_lib.WithAllExportConverters
+  def testParquetPluginWithValuesOfSameType(self):
+    responses = []
+    for i in range(10):
+      responses.append(
+          rdf_client_fs.StatEntry(
+              pathspec=rdf_paths.PathSpec(
+                  path="/foo/bar/%d" % i, pathtype="OS"),
+              st_mode=33184,  # octal = 100640 => u=rw,g=r,o= => -rw-r-----
+              st_ino=1063090,
+              st_nlink=1 + i,
+              st_size=0,
+              st_mtime=1336129892))
+
+    zip_fd, prefix = self.ProcessValuesToZip(
+        {rdf_client_fs.StatEntry: responses})
+    self.assertCountEqual(zip_fd.namelist(), [
+        "%s/MANIFEST" % prefix,
+        "%s/ExportedFile/from_StatEntry.parquet" % prefix,
+    ])
+
+    parsed_manifest = yaml.safe_load(zip_fd.read("%s/MANIFEST" % prefix))
+    self.assertEqual(parsed_manifest,
+                     {"export_stats": {
+                         "StatEntry": {
+                             "ExportedFile": 10
+                         }
+                     }})
+
+    parquet_file = self.ReadParquetFile(
+        zip_fd, "%s/ExportedFile/from_StatEntry.parquet" % prefix)
+    rows = parquet_file.read().to_pylist()
+    self.assertLen(rows, 10)
+    for i, row in enumerate(rows):
+      self.assertEqual(row["metadata.client_urn"], "aff4:/%s" % self.client_id)
+      self.assertEqual(row["metadata.hostname"], "Host-0.example.com")
+      self.assertEqual(row["metadata.source_urn"], str(self.results_urn))
+      self.assertEqual(row["metadata.hardware_info.bios_version"],
+                       "Bios-Version-0")
+
+      self.assertEqual(row["urn"],
+                       "aff4:/%s/fs/os/foo/bar/%d" % (self.client_id, i))
+      self.assertEqual(row["st_mode"], "-rw-r-----")
+      self.assertEqual(row["st_ino"], 1063090)
+      self.assertEqual(row["st_nlink"], 1 + i)
+      self.assertEqual(row["st_size"], 0)
+      self.assertEqual(
+          rdfvalue.RDFDatetime.FromDatetime(row["st_mtime"]),
+          rdfvalue.RDFDatetime.FromSecondsSinceEpoch(1336129892))
+      # Fields that are not set are null rather than their default value.
+      self.assertIsNone(row["hash_md5"])
+
+  @export_test_lib.WithAllExportConverters
+  def testParquetPluginWithValuesOfMultipleTypes(self):
+    zip_fd, prefix = self.ProcessValuesToZip({
+        rdf_client_fs.StatEntry: [
+            rdf_client_fs.StatEntry(
+                pathspec=rdf_paths.PathSpec(path="/foo/bar", pathtype="OS"))
+        ],
+        rdf_client.Process: [rdf_client.Process(pid=42)]
+    })
+    self.assertCountEqual(zip_fd.namelist(), [
+        "%s/MANIFEST" % prefix,
+        "%s/ExportedFile/from_StatEntry.parquet" % prefix,
+        "%s/ExportedProcess/from_Process.parquet" % prefix,
+    ])
+
+    parsed_manifest = yaml.safe_load(zip_fd.read("%s/MANIFEST" % prefix))
+    self.assertEqual(
+        parsed_manifest, {
+            "export_stats": {
+                "StatEntry": {
+                    "ExportedFile": 1
+                },
+                "Process": {
+                    "ExportedProcess": 1
+                }
+            }
+        })
+
+    rows = self.ReadParquetFile(
+        zip_fd, "%s/ExportedFile/from_StatEntry.parquet" %
+        prefix).read().to_pylist()
+    self.assertLen(rows, 1)
+    self.assertEqual(rows[0]["urn"], "aff4:/%s/fs/os/foo/bar" % self.client_id)
+
+    rows = self.ReadParquetFile(
+        zip_fd, "%s/ExportedProcess/from_Process.parquet" %
+        prefix).read().to_pylist()
+    self.assertLen(rows, 1)
+    self.assertEqual(rows[0]["metadata.client_urn"],
+                     "aff4:/%s" % self.client_id)
+    self.assertEqual(rows[0]["pid"], 42)
+
+  @export_test_lib.WithAllExportConverters
+  def testParquetPluginWritesBytesValuesCorrectly(self):
+    pathspec = rdf_paths.PathSpec.OS(path="/żółta/gęśla/jaźń")
+    values = {
+        rdf_client.BufferReference: [
+            rdf_client.BufferReference(data=b"\xff\x00\xff", pathspec=pathspec),
+            rdf_client.BufferReference(data=b"\xfa\xfb\xfc", pathspec=pathspec),
+        ],
+    }
+
+    zip_fd, prefix = self.ProcessValuesToZip(values)
+
+    rows = self.ReadParquetFile(
+        zip_fd, "%s/ExportedMatch/from_BufferReference.parquet" %
+        prefix).read().to_pylist()
+    self.assertEqual([row["data"] for row in rows],
+                     [b"\xff\x00\xff", b"\xfa\xfb\xfc"])
+    self.assertEqual(rows[0]["urn"],
+                     "aff4:/%s/fs/os/żółta/gęśla/jaźń" % self.client_id)
+
+  @export_test_lib.WithAllExportConverters
+  def testParquetPluginWritesValuesInRowGroups(self):
+    num_rows = 25
+
+    responses = []
+    for i in range(num_rows):
+      responses.append(
+          rdf_client_fs.StatEntry(
+              pathspec=rdf_paths.PathSpec(
+                  path="/foo/bar/%d" % i, pathtype="OS")))
+
+    with mock.patch.object(parquet_plugin.ParquetInstantOutputPlugin,
+                           "ROW_GROUP_SIZE", 10):
+      zip_fd, prefix = self.ProcessValuesToZip(
+          {rdf_client_fs.StatEntry: responses})
+
+    parquet_file = self.ReadParquetFile(
+        zip_fd, "%s/ExportedFile/from_StatEntry.parquet" % prefix)
+    self.assertEqual(parquet_file.num_row_groups, 3)
+
+    rows = parquet_file.read(columns=["urn"]).to_pylist()
+    self.assertEqual(
+        rows, [{
+            "urn": "aff4:/%s/fs/os/foo/bar/%d" % (self.client_id, i)
+        } for i in range(num_rows)])
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
@@ -7,31 +7,26 @@ core/grr_response_core/config/output_plugins.py
 The spec for HTTP Event Collector is taken from https://docs.splunk.com
 /Documentation/Splunk/8.0.1/Data/FormateventsforHTTPEventCollector
 """
-import json
-from typing import Any
-from typing import Dict
 from typing import List
 from typing import Text
+from typing import Tuple
 from urllib import parse as urlparse
 
-import requests
-
-from google.protobuf import json_format
 from grr_response_core import config
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
 from grr_response_proto import output_plugin_pb2
-from grr_response_server import data_store
-from grr_response_server import export
 from grr_response_server import output_plugin
-from grr_response_server.export_converters import base
-from grr_response_server.gui.api_plugins import flow as api_flow
+from grr_response_server.output_plugins import metadata_cache
 
 HTTP_EVENT_COLLECTOR_PATH = "services/collector/event"
 
-JsonDict = Dict[Text, Any]
+# Encoded metadata is inserted into events as is.
+_EVENT_TEMPLATE = (
+    '{"time":%d,"host":%s,"source":%s,"sourcetype":%s,'
+    '"event":{"client":%s,"flow":%s,"resultType":%s,"result":%s%s}%s}')
 
 
 class SplunkConfigurationError(Exception):
@@ -45,10 +40,6 @@ class SplunkOutputPluginArgs(rdf_structs.RDFProtoStruct):
   rdf_deps = []
 
 
-def _ToDict(rdfval: rdf_structs.RDFProtoStruct) -> JsonDict:
-  return json_format.MessageToDict(rdfval.AsPrimitiveProto(), float_precision=8)
-
-
 class SplunkOutputPlugin(output_plugin.OutputPlugin):
   """OutputPlugin that sends Flow results to Splunk Http Event Collector."""
 
@@ -82,6 +73,20 @@ class SplunkOutputPlugin(output_plugin.OutputPlugin):
           "installation.")
 
     self._url = urlparse.urljoin(url, HTTP_EVENT_COLLECTOR_PATH)
+    encoder = metadata_cache.ENCODER
+    self._encoded_source = encoder.encode(self._source)
+    self._encoded_sourcetype = encoder.encode(self._sourcetype)
+    self._annotations = ""
+    if self.args.annotations:
+      self._annotations = ",\"annotations\":" + encoder.encode(
+          list(self.args.annotations))
+    self._encoded_index = ""
+    if self._index:
+      self._encoded_index = ",\"index\":" + encoder.encode(self._index)
+
+    # Responses of all ProcessResponses() calls, grouped by client and flow id.
+    # They are sent together on Flush().
+    self._responses: List[Tuple[Text, Text, List[rdf_flows.GrrMessage]]] = []
 
   def ProcessResponses(self, state: rdf_protodict.AttributedDict,
                        responses: List[rdf_flows.GrrMessage]) -> None:
@@ -89,11 +94,32 @@ class SplunkOutputPlugin(output_plugin.OutputPlugin):
     client_id = self._GetClientId(responses)
     flow_id = self._GetFlowId(responses)
 
-    client = self._GetClientMetadata(client_id)
-    flow = self._GetFlowMetadata(client_id, flow_id)
+    with self.lock:
+      self._responses.append((client_id, flow_id, list(responses)))
 
-    events = [self._MakeEvent(response, client, flow) for response in responses]
-    self._SendEvents(events)
+  def Flush(self, state: rdf_protodict.AttributedDict) -> None:
+    """Sends all responses collected since the last flush in one request."""
+    with self.lock:
+      responses = self._responses
+      self._responses = []
+
+    if not responses:
+      return
+
+    clients = metadata_cache.ReadClientMetadata(
+        {client_id for client_id, _, _ in responses})
+
+    events = []
+    for client_id, flow_id, messages in responses:
+      client = clients.get(client_id)
+      if client is None:
+        client = metadata_cache.UnknownClientMetadata(client_id)
+      flow = metadata_cache.ReadFlowMetadata(client_id, flow_id)
+      for message in messages:
+        events.append(self._MakeEvent(message, client, flow))
+
+    # Batch multiple events in one request, separated by two newlines.
+    self._SendEvents("\n\n".join(events))
 
   def _GetClientId(self, responses: List[rdf_flows.GrrMessage]) -> Text:
     client_ids = {msg.source.Basename() for msg in responses}
@@ -111,53 +137,25 @@ class SplunkOutputPlugin(output_plugin.OutputPlugin):
            "violates OutputPlugin constraints.").format(flow_ids))
     return flow_ids.pop()
 
-  def _GetClientMetadata(self, client_id: Text) -> base.ExportedMetadata:
-    info = data_store.REL_DB.ReadClientFullInfo(client_id)
-    metadata = export.GetMetadata(client_id, info)
-    metadata.timestamp = None  # timestamp is sent outside of metadata.
-    return metadata
-
-  def _GetFlowMetadata(self, client_id: Text,
-                       flow_id: Text) -> api_flow.ApiFlow:
-    flow_obj = data_store.REL_DB.ReadFlowObject(client_id, flow_id)
-    return api_flow.ApiFlow().InitFromFlowObject(flow_obj)
-
   def _MakeEvent(self, message: rdf_flows.GrrMessage,
-                 client: base.ExportedMetadata,
-                 flow: api_flow.ApiFlow) -> JsonDict:
-
+                 client: metadata_cache.ClientMetadata, flow: Text) -> Text:
+    """Encodes a single event, reusing the encoded metadata."""
     if message.timestamp:
       time = message.timestamp.AsSecondsSinceEpoch()
     else:
       time = rdfvalue.RDFDatetime.Now().AsSecondsSinceEpoch()
 
-    event = {
-        "time": time,
-        "host": client.hostname or message.source.Basename(),
-        "source": self._source,
-        "sourcetype": self._sourcetype,
-        "event": {
-            "client": _ToDict(client),
-            "flow": _ToDict(flow),
-            "resultType": message.args_rdf_name,
-            "result": _ToDict(message.payload),
-        },
-    }
-
-    if self.args.annotations:
-      event["event"]["annotations"] = list(self.args.annotations)
-
-    if self._index:
-      event["index"] = self._index
-
-    return event
+    encoder = metadata_cache.ENCODER
+    return _EVENT_TEMPLATE % (
+        time, encoder.encode(client.hostname or message.source.Basename()),
+        self._encoded_source, self._encoded_sourcetype, client.json, flow,
+        encoder.encode(message.args_rdf_name),
+        encoder.encode(metadata_cache.ToDict(message.payload)),
+        self._annotations, self._encoded_index)
 
-  def _SendEvents(self, events: List[JsonDict]) -> None:
+  def _SendEvents(self, data: Text) -> None:
     headers = {"Authorization": "Splunk {}".format(self._token)}
 
-    # Batch multiple events in one request, separated by two newlines.
-    data = "\n\n".join(json.dumps(event) for event in events)
-
-    response = requests.post(
+    response = output_plugin.HttpSession().post(
         url=self._url, verify=self._verify_https, data=data, headers=headers)
     response.raise_for_status()
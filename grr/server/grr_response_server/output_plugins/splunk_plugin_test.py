@@ -53,7 +53,7 @@ class SplunkOutputPluginTest(flow_test_lib.FlowTestsBaseclass):
         source_urn=source_id, args=plugin_args)
 
     if patcher is None:
-      patcher = mock.patch.object(requests, 'post')
+      patcher = mock.patch.object(requests.Session, 'post')
 
     with patcher as patched:
       plugin.ProcessResponses(plugin_state, messages)
@@ -199,7 +199,43 @@ class SplunkOutputPluginTest(flow_test_lib.FlowTestsBaseclass):
         self._CallPlugin(
             plugin_args=splunk_plugin.SplunkOutputPluginArgs(),
             responses=[rdf_client.Process(pid=42)],
-            patcher=mock.patch.object(requests, 'post', post))
+            patcher=mock.patch.object(requests.Session, 'post', post))
+
+
+  def testSendsResponsesOfMultipleFlowsInOneRequest(self):
+    other_flow_id = '87654321'
+    data_store.REL_DB.WriteFlowObject(
+        rdf_flow_objects.Flow(
+            flow_id=other_flow_id,
+            client_id=self.client_id,
+            flow_class_name='ClientFileFinder',
+            create_time=rdfvalue.RDFDatetime.Now(),
+        ))
+
+    with test_lib.ConfigOverrider({
+        'Splunk.url': 'http://a',
+        'Splunk.token': 'b',
+    }):
+      plugin_cls = splunk_plugin.SplunkOutputPlugin
+      plugin, plugin_state = plugin_cls.CreatePluginAndDefaultState(
+          source_urn='aff4:/hunts/H:123456',
+          args=splunk_plugin.SplunkOutputPluginArgs())
+
+      with mock.patch.object(requests.Session, 'post') as mock_post:
+        for flow_id in [self.flow_id, other_flow_id]:
+          plugin.ProcessResponses(plugin_state, [
+              rdf_flows.GrrMessage(
+                  source=self.client_id,
+                  session_id='{}/{}'.format(self.client_id, flow_id),
+                  payload=rdf_client.Process(pid=42))
+          ])
+        plugin.Flush(plugin_state)
+
+    mock_post.assert_called_once()
+    events = self._ParseEvents(mock_post)
+    self.assertEqual(
+        [event['event']['flow']['flowId'] for event in events],
+        [self.flow_id, other_flow_id])
 
 
 def main(argv):
@@ -1,10 +1,11 @@
 #!/usr/bin/env python
 """Plugin that exports results as SQLite db scripts."""
 import io
+import itertools
+import math
 import os
 import zipfile
 
-import sqlite3
 import yaml
 
 from grr_response_core.lib import rdfvalue
@@ -74,6 +75,24 @@ class Rdf2SqliteAdapter(object):
           type_info.__class__, Rdf2SqliteAdapter.DEFAULT_CONVERTER)
 
 
+def _QuoteSqlValue(value):
+  """Formats a value as an SQL literal, the way SQLite's quote() does."""
+  if value is None:
+    return u"NULL"
+  elif isinstance(value, bytes):
+    return u"X'%s'" % value.hex()
+  elif isinstance(value, str):
+    return u"'%s'" % value.replace(u"'", u"''")
+  elif isinstance(value, float):
+    if math.isnan(value):
+      return u"NULL"
+    elif math.isinf(value):
+      return u"1e999" if value > 0 else u"-1e999"
+    return repr(value)
+  else:
+    return str(value)
+
+
 class SqliteInstantOutputPlugin(
     instant_output_plugin.InstantOutputPluginWithExportConversion):
   """Instant output plugin that converts results into SQLite db commands."""
@@ -83,7 +102,7 @@ class SqliteInstantOutputPlugin(
   description = "Output ZIP archive containing SQLite scripts."
   output_file_extension = ".zip"
 
-  ROW_BATCH = 100
+  ROW_BATCH = 500
 
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
@@ -115,41 +134,37 @@ class SqliteInstantOutputPlugin(
     table_name = "%s.from_%s" % (first_value.__class__.__name__,
                                  original_value_type.__name__)
     schema = self._GetSqliteSchema(first_value.__class__)
+    columns = self._GetSqlColumns(schema)
 
-    # We will buffer the sql statements into an in-memory sql database before
-    # dumping them to the zip archive. We rely on the PySQLite library for
-    # string escaping.
-    db_connection = sqlite3.connect(":memory:")
-    db_cursor = db_connection.cursor()
-
-    yield self.archive_generator.WriteFileChunk(
-        "BEGIN TRANSACTION;\n".encode("utf-8"))
+    buf = io.StringIO()
+    buf.write(u"BEGIN TRANSACTION;\n")
+    buf.write(u"CREATE TABLE \"%s\" (\n  " % table_name)
+    column_types = [(k, v.sqlite_type) for k, v in schema.items()]
+    buf.write(u",\n  ".join([u"\"%s\" %s" % (k, v) for k, v in column_types]))
+    buf.write(u"\n);\n")
+    chunk = buf.getvalue().encode("utf-8")
+    yield self.archive_generator.WriteFileChunk(chunk)
+
+    # Every batch of rows is written as a single multi-row INSERT statement,
+    # which SQLite prepares once when the script is imported.
+    insert_statement = u"INSERT INTO \"%s\" (%s) VALUES\n" % (
+        table_name, u",".join(u"\"%s\"" % k for k in schema))
+
+    counter = 0
+    values = itertools.chain([first_value], exported_values)
+    for batch in collection.Batch(values, self.ROW_BATCH):
+      counter += len(batch)
 
-    with db_connection:
       buf = io.StringIO()
-      buf.write(u"CREATE TABLE \"%s\" (\n  " % table_name)
-      column_types = [(k, v.sqlite_type) for k, v in schema.items()]
-      buf.write(u",\n  ".join([u"\"%s\" %s" % (k, v) for k, v in column_types]))
-      buf.write(u"\n);")
-      db_cursor.execute(buf.getvalue())
-
-      chunk = (buf.getvalue() + "\n").encode("utf-8")
+      buf.write(insert_statement)
+      buf.write(u",\n".join(
+          u"(%s)" % u",".join(_QuoteSqlValue(v)
+                              for v in self._GetSqlRow(columns, value))
+          for value in batch))
+      buf.write(u";\n")
+      chunk = buf.getvalue().encode("utf-8")
       yield self.archive_generator.WriteFileChunk(chunk)
 
-      self._InsertValueIntoDb(table_name, schema, first_value, db_cursor)
-
-    for sql in self._FlushAllRows(db_connection, table_name):
-      yield sql
-    counter = 1
-    for batch in collection.Batch(exported_values, self.ROW_BATCH):
-      counter += len(batch)
-      with db_connection:
-        for value in batch:
-          self._InsertValueIntoDb(table_name, schema, value, db_cursor)
-      for sql in self._FlushAllRows(db_connection, table_name):
-        yield sql
-
-    db_connection.close()
     yield self.archive_generator.WriteFileChunk("COMMIT;\n".encode("utf-8"))
     yield self.archive_generator.WriteFileFooter()
 
@@ -170,40 +185,26 @@ class SqliteInstantOutputPlugin(
         schema[field_name] = Rdf2SqliteAdapter.GetConverter(type_info)
     return schema
 
-  def _InsertValueIntoDb(self, table_name, schema, value, db_cursor):
-    sql_dict = self._ConvertToCanonicalSqlDict(schema, value.ToPrimitiveDict())
-    buf = io.StringIO()
-    buf.write(u"INSERT INTO \"%s\" (\n  " % table_name)
-    buf.write(u",\n  ".join(["\"%s\"" % k for k in sql_dict.keys()]))
-    buf.write(u"\n)")
-    buf.write(u"VALUES (%s);" % u",".join([u"?"] * len(sql_dict)))
-    db_cursor.execute(buf.getvalue(), list(sql_dict.values()))
-
-  def _ConvertToCanonicalSqlDict(self, schema, raw_dict, prefix=""):
-    """Converts a dict of RDF values into a SQL-ready form."""
-    flattened_dict = {}
-    for k, v in raw_dict.items():
-      if isinstance(v, dict):
-        flattened_dict.update(
-            self._ConvertToCanonicalSqlDict(
-                schema, v, prefix="%s%s." % (prefix, k)))
+  def _GetSqlColumns(self, schema):
+    """Returns (field path, conversion function) pairs of schema columns."""
+    return [(tuple(k.split(".")), v.convert_fn) for k, v in schema.items()]
+
+  def _GetSqlRow(self, columns, value):
+    """Converts an RDF value into a list of SQL values, one per column."""
+    row = []
+    for path, convert_fn in columns:
+      field_value = value
+      for name in path:
+        if not field_value.HasField(name):
+          field_value = None
+          break
+        field_value = field_value.Get(name)
+
+      if field_value is None:
+        row.append(None)
       else:
-        field_name = prefix + k
-        flattened_dict[field_name] = schema[field_name].convert_fn(v)
-    return flattened_dict
-
-  def _FlushAllRows(self, db_connection, table_name):
-    """Copies rows from the given db into the output file then deletes them."""
-    for sql in db_connection.iterdump():
-      if (sql.startswith("CREATE TABLE") or
-          sql.startswith("BEGIN TRANSACTION") or sql.startswith("COMMIT")):
-        # These statements only need to be written once.
-        continue
-      # The archive generator expects strings (not Unicode objects returned by
-      # the pysqlite library).
-      yield self.archive_generator.WriteFileChunk((sql + "\n").encode("utf-8"))
-    with db_connection:
-      db_connection.cursor().execute("DELETE FROM \"%s\";" % table_name)
+        row.append(convert_fn(field_value))
+    return row
 
   def Finish(self):
     manifest = {"export_stats": self.export_counts}
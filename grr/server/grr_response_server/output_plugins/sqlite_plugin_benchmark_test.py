@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""Benchmarks SQLite export of a large hunt."""
+
+import os
+import sqlite3
+import zipfile
+
+from absl import app
+
+from grr_response_core.lib import rdfvalue
+from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
+from grr_response_server.export_converters import base
+from grr_response_server.export_converters import file as file_converters
+from grr_response_server.output_plugins import sqlite_plugin
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import test_lib
+
+
+class SqliteInstantOutputPluginBenchmark(
+    benchmark_test_lib.AverageMicroBenchmarks):
+  """Exports results of a synthetic hunt and imports the exported script."""
+
+  # CI sets GRR_BENCHMARK_NUM_ROWS to run this benchmark on fewer rows.
+  NUM_ROWS = int(os.environ.get("GRR_BENCHMARK_NUM_ROWS", 100000))
+
+  def setUp(self):
+    super().setUp()
+    self.plugin = sqlite_plugin.SqliteInstantOutputPlugin(
+        source_urn=rdfvalue.RDFURN("aff4:/hunts/H:123456"))
+
+  def _ExportedFiles(self):
+    metadata = base.ExportedMetadata(
+        client_urn="aff4:/C.1000000000000000",
+        hostname="host.example.com",
+        os="Linux",
+        source_urn="aff4:/hunts/H:123456",
+        timestamp=rdfvalue.RDFDatetime.FromSecondsSinceEpoch(1600000000))
+    for i in range(self.NUM_ROWS):
+      yield file_converters.ExportedFile(
+          metadata=metadata,
+          urn="aff4:/C.1000000000000000/fs/os/usr/lib/file_%d" % i,
+          basename="file_%d" % i,
+          st_mode=33184,
+          st_ino=1000000 + i,
+          st_size=i % 65536,
+          st_mtime=rdfvalue.RDFDatetimeSeconds.FromSecondsSinceEpoch(
+              1600000000 + i),
+          hash_sha256=b"%032d" % i)
+
+  def _Export(self, path):
+    with open(path, "wb") as fd:
+      for chunk in self.plugin.Start():
+        fd.write(chunk)
+      for chunk in self.plugin.ProcessSingleTypeExportedValues(
+          rdf_client_fs.StatEntry, self._ExportedFiles()):
+        fd.write(chunk)
+      for chunk in self.plugin.Finish():
+        fd.write(chunk)
+
+  def _Import(self, path):
+    with zipfile.ZipFile(path) as zip_fd:
+      script_path = "%s/ExportedFile_from_StatEntry.sql" % (
+          self.plugin.path_prefix)
+      script = zip_fd.read(script_path).decode("utf-8")
+
+    db_connection = sqlite3.connect(":memory:")
+    try:
+      db_connection.executescript(script)
+      (count,) = db_connection.execute(
+          "SELECT COUNT(*) FROM \"ExportedFile.from_StatEntry\";").fetchone()
+    finally:
+      db_connection.close()
+    return count
+
+  def testExportLargeHunt(self):
+    """Exporting and importing NUM_ROWS ExportedFile rows."""
+    path = self.temp_dir + "/export.zip"
+    self.TimeIt(lambda: self._Export(path), "Export", repetitions=1)
+    self.TimeIt(lambda: self._Import(path), "Import", repetitions=1)
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
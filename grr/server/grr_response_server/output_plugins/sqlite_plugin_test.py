@@ -115,7 +115,7 @@ class SqliteInstantOutputPluginTest(test_plugins.InstantOutputPluginTestBase):
             "embedded_field.e_double_field": "REAL"
         })
 
-  def testConversionToCanonicalSqlDict(self):
+  def testConversionToSqlRow(self):
     schema = self.plugin._GetSqliteSchema(SqliteTestStruct)
     test_struct = SqliteTestStruct(
         string_field="string_value",
@@ -134,8 +134,9 @@ class SqliteInstantOutputPluginTest(test_plugins.InstantOutputPluginTestBase):
         duration_field=rdfvalue.Duration.From(123, rdfvalue.SECONDS),
         embedded_field=TestEmbeddedStruct(
             e_string_field="e_string_value", e_double_field=0.789))
-    sql_dict = self.plugin._ConvertToCanonicalSqlDict(
-        schema, test_struct.ToPrimitiveDict())
+    row = self.plugin._GetSqlRow(
+        self.plugin._GetSqlColumns(schema), test_struct)
+    sql_dict = dict(zip(schema.keys(), row))
     self.assertEqual(
         sql_dict,
         {
@@ -155,6 +156,25 @@ class SqliteInstantOutputPluginTest(test_plugins.InstantOutputPluginTestBase):
             "embedded_field.e_double_field": 0.789
         })
 
+  def testConversionToSqlRowOfUnsetFields(self):
+    schema = self.plugin._GetSqliteSchema(SqliteTestStruct)
+    test_struct = SqliteTestStruct(int_field=0)
+    row = self.plugin._GetSqlRow(
+        self.plugin._GetSqlColumns(schema), test_struct)
+    sql_dict = dict(zip(schema.keys(), row))
+    self.assertEqual(sql_dict.pop("int_field"), 0)
+    self.assertEqual(set(sql_dict.values()), {None})
+
+  def testQuotingOfSqlValues(self):
+    values = [
+        None, 42, -1.5, float("inf"), "it's", "中国", b"\x00\xff'", "",
+        "line\nbreak"
+    ]
+    literals = [sqlite_plugin._QuoteSqlValue(v) for v in values]
+
+    self.db_cursor.execute("SELECT %s;" % ",".join(literals))
+    self.assertEqual(list(self.db_cursor.fetchone()), values)
+
   @export_test_lib.WithAllExportConverters
   def testExportedFilenamesAndManifestForValuesOfSameType(self):
     zip_fd, prefix = self.ProcessValuesToZip(
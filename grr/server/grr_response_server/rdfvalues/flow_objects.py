@@ -139,6 +139,13 @@ class FlowResult(rdf_structs.RDFProtoStruct):
         payload=self.payload)
 
 
+class OutputPluginDeliveryRequest(rdf_structs.RDFProtoStruct):
+  protobuf = flows_pb2.OutputPluginDeliveryRequest
+  rdf_deps = [
+      FlowResult,
+  ]
+
+
 class FlowError(rdf_structs.RDFProtoStruct):
   protobuf = flows_pb2.FlowError
   rdf_deps = [rdfvalue.RDFDatetime]
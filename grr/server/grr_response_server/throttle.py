@@ -4,6 +4,7 @@
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_server import data_store
+from grr_response_server.databases import db_utils
 
 
 class Error(Exception):
@@ -39,21 +40,6 @@ class FlowThrottler(object):
     self.daily_req_limit = daily_req_limit
     self.dup_interval = dup_interval
 
-  def _LoadFlows(self, client_id, min_create_time):
-    """Yields all flows for the given client_id and time range.
-
-    Args:
-      client_id: Client id string.
-      min_create_time: minimum creation time (inclusive)
-    Yields: flow_objects.Flow objects
-    """
-    flow_list = data_store.REL_DB.ReadAllFlowObjects(
-        client_id=client_id,
-        min_create_time=min_create_time,
-        include_child_flows=False)
-    for flow_obj in flow_list:
-      yield flow_obj
-
   def EnforceLimits(self, client_id, user, flow_name, flow_args=None):
     """Enforce DailyFlowRequestLimit and FlowDuplicateInterval.
 
@@ -79,28 +65,29 @@ class FlowThrottler(object):
     now = rdfvalue.RDFDatetime.Now()
     yesterday = now - rdfvalue.Duration.From(1, rdfvalue.DAYS)
     dup_boundary = now - self.dup_interval
-    min_create_time = min(yesterday, dup_boundary)
-
-    flow_count = 0
-    flow_objs = self._LoadFlows(client_id, min_create_time)
 
     if flow_args is None:
       flow_args = rdf_flows.EmptyFlowArgs()
 
-    for flow_obj in flow_objs:
-      if (flow_obj.create_time > dup_boundary and
-          flow_obj.flow_class_name == flow_name and flow_obj.args == flow_args):
-        raise DuplicateFlowError(
-            "Identical %s already run on %s at %s" %
-            (flow_name, client_id, flow_obj.create_time),
-            flow_id=flow_obj.flow_id)
-
-      # Filter for flows started by user within the 1 day window.
-      if flow_obj.creator == user and flow_obj.create_time > yesterday:
-        flow_count += 1
+    if self.dup_interval:
+      args_digest = db_utils.FlowArgsDigest(flow_args)
+      flow_digests = data_store.REL_DB.ReadFlowDigests(
+          client_id, flow_name, dup_boundary, include_child_flows=False)
+      for flow_digest in flow_digests:
+        if (flow_digest.create_time > dup_boundary and
+            flow_digest.args_digest == args_digest):
+          raise DuplicateFlowError(
+              "Identical %s already run on %s at %s" %
+              (flow_name, client_id, flow_digest.create_time),
+              flow_id=flow_digest.flow_id)
 
     # If limit is set, enforce it.
-    if self.daily_req_limit and flow_count >= self.daily_req_limit:
-      raise DailyFlowRequestLimitExceededError(
-          "%s flows run since %s, limit: %s" %
-          (flow_count, yesterday, self.daily_req_limit))
+    if self.daily_req_limit:
+      # Only flows started by user within the 1 day window count.
+      flow_counts = data_store.REL_DB.CountFlowsByCreator(
+          client_id, yesterday, include_child_flows=False)
+      flow_count = flow_counts.get(user, 0)
+      if flow_count >= self.daily_req_limit:
+        raise DailyFlowRequestLimitExceededError(
+            "%s flows run since %s, limit: %s" %
+            (flow_count, yesterday, self.daily_req_limit))
@@ -3,14 +3,17 @@
 
 import logging
 import time
-from typing import Sequence
+from typing import Optional, Sequence, Tuple
 
+from grr_response_core import config
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import registry
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
+from grr_response_core.lib.util import cache
 from grr_response_core.lib.util import collection
 from grr_response_core.stats import metrics
 from grr_response_server import data_store
+from grr_response_server import flow
 from grr_response_server import flow_base
 from grr_response_server import handler_registry
 # pylint: disable=unused-import
@@ -70,6 +73,15 @@ class GRRWorker(object):
     """Constructor."""
     logging.info("Started GRR worker.")
 
+    # Maps (client_id, flow_id) to a tuple of the persistent data version and
+    # the flow state persisted last by this worker.
+    self._flow_state_cache: Optional[cache.LRUCache[
+        Tuple[str, str], Tuple[int, flow.FlowState]]] = None
+    cache_size = config.CONFIG["Worker.flow_state_cache_size"]
+    if cache_size > 0:
+      self._flow_state_cache = cache.LRUCache(
+          "worker_flow_states", max_size=cache_size)
+
   def Shutdown(self) -> None:
     data_store.REL_DB.UnregisterMessageHandler()
     data_store.REL_DB.UnregisterFlowProcessingHandler()
@@ -98,9 +110,33 @@ class GRRWorker(object):
           "Lease expired for flow %s on %s (%s)." %
           (rdf_flow.flow_id, rdf_flow.client_id, rdf_flow.processing_deadline))
 
-    flow_obj.FlushQueuedMessages()
+    return flow_obj.FlushQueuedMessagesAndRelease()
+
+  def _RestoreCachedFlowState(self, flow_obj: flow_base.FlowBase) -> None:
+    """Restores the state the flow was persisted with by this worker."""
+    if self._flow_state_cache is None:
+      return
+
+    rdf_flow = flow_obj.rdf_flow
+    # The entry is removed, so that a state left partially modified by a
+    # failed processing round is never used.
+    entry = self._flow_state_cache.Pop((rdf_flow.client_id, rdf_flow.flow_id))
+    if entry is None:
+      return
 
-    return data_store.REL_DB.ReleaseProcessedFlow(rdf_flow)
+    # The flow might have been processed by another worker in the meantime.
+    version, state = entry
+    if version == rdf_flow.persistent_data_version:
+      flow_obj.RestoreState(state)
+
+  def _CacheFlowState(self, flow_obj: flow_base.FlowBase) -> None:
+    if self._flow_state_cache is None or not flow_obj.IsRunning():
+      return
+
+    rdf_flow = flow_obj.rdf_flow
+    self._flow_state_cache.Put((rdf_flow.client_id, rdf_flow.flow_id),
+                               (rdf_flow.persistent_data_version,
+                                flow_obj.state))
 
   def ProcessFlow(
       self, flow_processing_request: rdf_flows.FlowProcessingRequest) -> None:
@@ -126,6 +162,7 @@ class GRRWorker(object):
 
     flow_cls = registry.FlowRegistry.FlowClassByName(rdf_flow.flow_class_name)
     flow_obj = flow_cls(rdf_flow)
+    self._RestoreCachedFlowState(flow_obj)
 
     if not flow_obj.IsRunning():
       logging.info(
@@ -147,6 +184,8 @@ class GRRWorker(object):
             "request could be processed (next req: %d)." %
             (client_id, flow_id, flow_obj.rdf_flow.next_request_to_process))
 
+    self._CacheFlowState(flow_obj)
+
     if flow_obj.IsRunning():
       logging.info(
           "Processing Flow %s/%s/%d (%s) done, next request to process: %d.",
@@ -197,6 +197,9 @@ setup_args = dict(
         # Ubuntu Jammy, see
         # https://packages.ubuntu.com/en/jammy/python3-mysqldb
         "mysqldatastore": ["mysqlclient==1.4.6"],
+        # This is an optional component. Install to get the Parquet instant
+        # output plugin: pip install grr-response-server[parquet]
+        "parquet": ["pyarrow==16.1.0"],
         # TODO: We currently release fleetspeak-server-bin packages
         # for Linux only.
         ':sys_platform=="linux"': [
@@ -19,6 +19,10 @@ class TestBlobStore(blob_store.BlobStore):
   def ReadBlobs(self, blob_ids):
     return self.new.ReadBlobs(blob_ids)
 
+  @property
+  def has_fast_existence_checks(self):
+    return self.new.has_fast_existence_checks
+
   def CheckBlobsExist(self, blob_ids):
     return self.new.CheckBlobsExist(blob_ids)
 
@@ -24,15 +24,20 @@ def StoreMessage(fs_msg: common_pb2.Message):
     raise ValueError("No destination set for Fleetspeak message:\n%s" % fs_msg)
 
   grr_id = fleetspeak_utils.FleetspeakIDToGRRID(fs_msg.destination.client_id)
-  raw_grr_msg = jobs_pb2.GrrMessage()
-  fs_msg.data.Unpack(raw_grr_msg)
-  grr_msg = rdf_flows.GrrMessage.FromSerializedBytes(
-      raw_grr_msg.SerializeToString())
+  if fs_msg.message_type == "MessageList":
+    message_list = rdf_flows.MessageList.FromSerializedBytes(
+        fs_msg.data.value)
+    grr_msgs = list(message_list.job)
+  else:
+    raw_grr_msg = jobs_pb2.GrrMessage()
+    fs_msg.data.Unpack(raw_grr_msg)
+    grr_msgs = [
+        rdf_flows.GrrMessage.FromSerializedBytes(
+            raw_grr_msg.SerializeToString())
+    ]
   with _message_lock:
-    try:
-      _messages_by_client_id[grr_id].append(grr_msg)
-    except KeyError:
-      _messages_by_client_id[grr_id] = collections.deque([grr_msg])
+    _messages_by_client_id.setdefault(grr_id,
+                                      collections.deque()).extend(grr_msgs)
 
 
 def PopMessage(client_id: Text) -> Optional[rdf_flows.GrrMessage]: